@@ -0,0 +1,101 @@
+"""
+Tests for the vectorised trend analytics kernel.
+"""
+from datetime import date
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from zargar.core.analytics import (
+    as_array, compare_periods, linear_forecast, load_daily_series, moving_average,
+    percent_changes, summarize_series, to_decimal, trend_direction
+)
+from zargar.core.dashboard_services import TenantDashboardService
+
+
+class AnalyticsKernelTest(SimpleTestCase):
+    """Kernel functions against the loop-based results they replace."""
+
+    def test_to_decimal_quantises_and_maps_nan_to_none(self):
+        self.assertEqual(to_decimal(np.float64(12.345)), Decimal('12.35'))
+        self.assertEqual(to_decimal(0.1 + 0.2), Decimal('0.30'))
+        self.assertIsNone(to_decimal(np.nan))
+
+    def test_moving_average_uses_shorter_window_at_start(self):
+        averages = moving_average(as_array([1, 2, 3, 4, 5]), 3)
+        np.testing.assert_allclose(averages, [1, 1.5, 2, 3, 4])
+
+    def test_percent_changes_skip_zero_base(self):
+        changes = percent_changes(as_array([100, 110, 0, 50]))
+        np.testing.assert_allclose(changes, [0, 10, -100, 0])
+
+    def test_linear_forecast_extends_line(self):
+        forecast = linear_forecast(as_array([10, 12, 14, 16]), 2)
+        self.assertAlmostEqual(forecast['slope'], 2)
+        np.testing.assert_allclose(forecast['forecast'], [18, 20])
+
+    def test_trend_direction_threshold(self):
+        self.assertEqual(trend_direction(1.5), 'increasing')
+        self.assertEqual(trend_direction(-1.5), 'decreasing')
+        self.assertEqual(trend_direction(0.5), 'stable')
+
+    def test_summarize_series_matches_report_statistics(self):
+        closes = [Decimal('3000000'), Decimal('3300000'), Decimal('3150000')]
+        highs = [Decimal('3050000'), Decimal('3350000'), Decimal('3200000')]
+        lows = [Decimal('2950000'), Decimal('3250000'), Decimal('3100000')]
+
+        trend = summarize_series(as_array(closes), highs=as_array(highs), lows=as_array(lows))
+
+        average = sum(closes) / 3
+        self.assertEqual(trend['minimum'], Decimal('2950000.00'))
+        self.assertEqual(trend['maximum'], Decimal('3350000.00'))
+        self.assertEqual(trend['average'], average.quantize(Decimal('0.01')))
+        self.assertEqual(
+            trend['volatility'],
+            ((Decimal('3350000') - Decimal('2950000')) / average * 100).quantize(Decimal('0.01'))
+        )
+        self.assertEqual(trend['changes'], [Decimal('0.00'), Decimal('10.00'), Decimal('-4.55')])
+        self.assertEqual(trend['change_percentage'], Decimal('5.00'))
+        self.assertEqual(trend['direction'], 'increasing')
+        self.assertEqual(len(trend['forecast']), 7)
+
+    def test_summarize_empty_series(self):
+        trend = summarize_series(as_array([]))
+        self.assertIsNone(trend['minimum'])
+        self.assertEqual(trend['forecast'], [])
+
+    def test_compare_periods(self):
+        comparison = compare_periods(as_array([1, 1, 1, 2, 2, 2]), 3)
+        self.assertEqual(comparison['current_total'], 6)
+        self.assertEqual(comparison['previous_total'], 3)
+        self.assertEqual(comparison['change_percentage'], Decimal('100.00'))
+        self.assertEqual(comparison['direction'], 'increasing')
+
+    def test_load_daily_series_fills_missing_days_from_one_query(self):
+        queryset = MagicMock()
+        rows = queryset.filter.return_value.annotate.return_value.values.return_value \
+            .annotate.return_value.values_list
+        rows.return_value = [(date(2024, 1, 1), 2), (date(2024, 1, 3), 5)]
+
+        series = load_daily_series(queryset, 'created_at', date(2024, 1, 1), 4)
+
+        np.testing.assert_allclose(series, [2, 0, 5, 0])
+        queryset.filter.assert_called_once()
+
+
+class DashboardPriceTrendTest(SimpleTestCase):
+
+    def test_analyze_price_trend_adds_kernel_statistics(self):
+        service = TenantDashboardService('test_tenant')
+        analysis = service._analyze_price_trend([
+            {'price_per_gram': Decimal('3000000')},
+            {'price_per_gram': Decimal('3100000')},
+            {'price_per_gram': Decimal('3200000')},
+        ])
+
+        self.assertEqual(analysis['direction'], 'increasing')
+        self.assertEqual(analysis['change_percentage'], Decimal('6.67'))
+        self.assertEqual(analysis['moving_average'], Decimal('3100000.00'))
+        self.assertEqual(analysis['next_day_forecast'], Decimal('3300000.00'))
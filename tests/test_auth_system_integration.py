@@ -331,7 +331,7 @@ class AuthenticationSystemIntegrationTest(TestCase):
         """Test that all required middleware is configured."""
         required_middleware = [
             'zargar.core.middleware.HealthCheckMiddleware',
-            'django_tenants.middleware.main.TenantMainMiddleware',
+            'zargar.tenants.middleware.CachedTenantMainMiddleware',
             'zargar.core.middleware.TenantContextMiddleware',
             'zargar.core.middleware.PersianLocalizationMiddleware',
         ]
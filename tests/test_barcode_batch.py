@@ -0,0 +1,90 @@
+"""
+Tests for batched barcode generation and label sheets.
+"""
+
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase, override_settings
+
+from zargar.jewelry import barcode_batch
+from zargar.jewelry.barcode_batch import BarcodeBatchGenerator, render_label_page, render_label_sheet, render_qr_png
+from zargar.jewelry.barcode_models import BarcodeGeneration
+from zargar.jewelry.models import Category, JewelryItem
+
+
+@override_settings(BARCODE_BATCH_CHUNK_SIZE=2, BARCODE_RENDER_WORKERS=1, BARCODE_UPLOAD_WORKERS=2)
+class BarcodeBatchGeneratorTest(SimpleTestCase):
+    """Test chunked generation with the database and storage mocked out."""
+
+    def setUp(self):
+        category = Category(id=1, name='Rings')
+        self.items = [
+            JewelryItem(id=index, sku=f'RNG-{index:04d}', name=f'Ring {index}', category=category)
+            for index in range(1, 6)
+        ]
+
+        storage = MagicMock()
+        storage.save.side_effect = lambda name, content: name
+        image_field = BarcodeGeneration._meta.get_field('barcode_image')
+
+        patchers = [
+            patch('zargar.jewelry.barcode_batch.transaction.atomic', MagicMock()),
+            patch('zargar.jewelry.barcode_batch.record_changes'),
+            patch.object(BarcodeGeneration.objects, 'filter'),
+            patch.object(BarcodeGeneration.objects, 'bulk_create', side_effect=lambda rows: rows),
+            patch.object(JewelryItem.objects, 'bulk_update'),
+            patch.object(image_field, 'storage', storage),
+        ]
+        mocks = [patcher.start() for patcher in patchers]
+        for patcher in patchers:
+            self.addCleanup(patcher.stop)
+        self.bulk_create = mocks[3]
+        self.bulk_update = mocks[4]
+        self.storage = storage
+
+    def test_items_are_written_per_chunk(self):
+        progress = MagicMock()
+
+        results = BarcodeBatchGenerator(label_sheet=True).generate(iter(self.items), progress=progress)
+
+        self.assertEqual(len(results['generated']), 5)
+        self.assertEqual(self.bulk_create.call_count, 3)
+        self.assertEqual(self.bulk_update.call_count, 3)
+        self.assertEqual(self.storage.save.call_count, 5)
+        self.assertEqual([c.args[0] for c in progress.call_args_list], [2, 4, 5])
+        self.assertTrue(self.items[0].barcode.startswith('ZRG-RNG-0001-RIN-'))
+        self.assertTrue(results['label_sheet'].startswith(b'%PDF'))
+
+    def test_failed_chunk_is_reported_and_uploads_removed(self):
+        self.bulk_update.side_effect = [None, Exception('duplicate barcode'), None]
+
+        results = BarcodeBatchGenerator().generate(self.items)
+
+        self.assertEqual(len(results['generated']), 3)
+        self.assertEqual([error['item_id'] for error in results['errors']], [3, 4])
+        self.assertEqual(self.storage.delete.call_count, 2)
+
+    def test_render_pool_failure_falls_back_to_in_process(self):
+        generator = BarcodeBatchGenerator(render_workers=2)
+        pool = MagicMock()
+        pool.map.side_effect = AssertionError('daemonic processes are not allowed to have children')
+
+        with patch('zargar.jewelry.barcode_batch.ProcessPoolExecutor', return_value=pool):
+            images = generator._render(['payload'] * barcode_batch.MIN_POOL_BATCH)
+
+        self.assertEqual(len(images), barcode_batch.MIN_POOL_BATCH)
+        self.assertTrue(images[0].startswith(b'\x89PNG'))
+        self.assertEqual(generator.render_workers, 1)
+
+
+class LabelSheetTest(SimpleTestCase):
+    """Test label sheet rendering."""
+
+    def test_multi_page_sheet(self):
+        label = {'image': render_qr_png('{"sku": "RNG-0001"}'), 'lines': ['RNG-0001', 'ZRG-RNG-0001-RIN']}
+        pages = [render_label_page([label] * 32), render_label_page([label] * 3)]
+
+        sheet = render_label_sheet(pages)
+
+        self.assertTrue(sheet.startswith(b'%PDF'))
+        self.assertIn(b'/Count 2', sheet)
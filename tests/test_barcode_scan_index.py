@@ -0,0 +1,189 @@
+"""
+Tests for the barcode resolution index and batched scan history.
+"""
+
+from unittest.mock import MagicMock, patch
+
+from django.db import IntegrityError, OperationalError
+from django.test import SimpleTestCase, override_settings
+
+from zargar.jewelry.barcode_index import MISSING, barcode_index
+from zargar.jewelry.barcode_models import BarcodeScanHistory
+from zargar.jewelry.barcode_services import BarcodeScanningService
+from zargar.jewelry.models import JewelryItem
+from zargar.jewelry.scan_sink import ScanHistorySink
+from zargar.jewelry.signals import update_barcode_index
+
+
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'barcode-index-tests',
+    }
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES, BARCODE_SCAN_HISTORY_ASYNC=True)
+@patch('zargar.jewelry.barcode_services.connection', MagicMock(schema_name='shop'))
+@patch('zargar.jewelry.barcode_services.scan_history_sink')
+class BarcodeScanResolutionTest(SimpleTestCase):
+    """Test scanner lookups through the resolution index."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        barcode_index.clear_local()
+        self.item = JewelryItem(id=7, sku='RNG-0007', barcode='ZRG-RNG-0007-RIN-20261018')
+        self.service = BarcodeScanningService()
+
+    def test_indexed_code_skips_database_search(self, sink):
+        barcode_index.add_item('shop', self.item)
+
+        with patch.object(self.service, '_load_item', return_value=(self.item, None)) as load, \
+                patch.object(self.service, '_find_item_by_code') as find:
+            result = self.service.scan_barcode('RNG-0007', 'inventory_check')
+
+        self.assertTrue(result['success'])
+        load.assert_called_once_with(7)
+        find.assert_not_called()
+        self.assertEqual(sink.record.call_args.kwargs['jewelry_item_id'], 7)
+        self.assertEqual(sink.record.call_args.kwargs['scan_action'], 'inventory_check')
+
+    def test_miss_is_resolved_once_and_indexed(self, sink):
+        with patch.object(self.service, '_load_item', return_value=(self.item, None)), \
+                patch.object(self.service, '_find_item_by_code', return_value=self.item) as find:
+            self.service.scan_barcode(self.item.barcode)
+            self.service.scan_barcode(self.item.barcode)
+
+        find.assert_called_once_with(self.item.barcode)
+        self.assertEqual(barcode_index.resolve('shop', 'RNG-0007'), 7)
+
+    def test_stale_entry_falls_back_to_database(self, sink):
+        barcode_index.add_item('shop', self.item)
+        moved = JewelryItem(id=7, sku='RNG-0007', barcode='ZRG-NEW')
+        other = JewelryItem(id=9, sku='RNG-0009', barcode=self.item.barcode)
+
+        with patch.object(self.service, '_load_item', side_effect=[(moved, None), (other, None)]), \
+                patch.object(self.service, '_find_item_by_code', return_value=other):
+            result = self.service.scan_barcode(self.item.barcode)
+
+        self.assertEqual(result['jewelry_item'], other)
+        self.assertEqual(barcode_index.resolve('shop', self.item.barcode), 9)
+
+    def test_unknown_code_is_remembered(self, sink):
+        with patch.object(self.service, '_find_item_by_code', return_value=None) as find:
+            first = self.service.scan_barcode('UNKNOWN')
+            second = self.service.scan_barcode('UNKNOWN')
+
+        self.assertFalse(first['success'] or second['success'])
+        find.assert_called_once()
+        self.assertEqual(barcode_index.resolve('shop', 'UNKNOWN'), MISSING)
+        sink.record.assert_not_called()
+
+    def test_qr_payload_uses_item_id(self, sink):
+        with patch.object(self.service, '_load_item', return_value=(self.item, None)) as load:
+            result = self.service.scan_barcode('{"type": "jewelry_item", "item_id": 7, "sku": "RNG-0007"}')
+
+        self.assertTrue(result['success'])
+        load.assert_called_once_with(7)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+@patch('zargar.jewelry.signals.connection', MagicMock(schema_name='shop'))
+class BarcodeIndexSignalTest(SimpleTestCase):
+    """Test that item saves keep the index current."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        barcode_index.clear_local()
+
+    def test_changed_codes_are_reindexed(self):
+        item = JewelryItem(id=7, sku='RNG-0007', barcode='NEW-CODE')
+        item._original_sku = 'RNG-0007'
+        item._original_barcode = 'OLD-CODE'
+        barcode_index.add_item('shop', JewelryItem(id=7, sku='RNG-0007', barcode='OLD-CODE'))
+
+        update_barcode_index(sender=JewelryItem, instance=item, created=False)
+
+        self.assertIsNone(barcode_index.resolve('shop', 'OLD-CODE'))
+        self.assertEqual(barcode_index.resolve('shop', 'NEW-CODE'), 7)
+
+
+@override_settings(BARCODE_SCAN_HISTORY_ASYNC=True, BARCODE_SCAN_FLUSH_SIZE=2)
+class ScanHistorySinkTest(SimpleTestCase):
+    """Test buffering and flushing of scan history."""
+
+    def setUp(self):
+        self.redis = MagicMock()
+        patcher = patch('zargar.jewelry.scan_sink._get_redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.sink = ScanHistorySink()
+
+    def test_full_buffer_schedules_flush(self):
+        self.redis.pipeline.return_value.execute.side_effect = [[1, True, 1], [2, True, 0]]
+
+        with patch('zargar.jewelry.tasks.flush_barcode_scans') as flush_task:
+            self.sink.record('shop', jewelry_item_id=7, scanned_data='RNG-0007')
+            flush_task.delay.assert_not_called()
+            self.sink.record('shop', jewelry_item_id=7, scanned_data='RNG-0007')
+
+        flush_task.delay.assert_called_once_with('shop')
+
+    def test_flush_writes_batches(self):
+        entries = [
+            b'{"jewelry_item_id": 7, "scanned_data": "A", "scan_timestamp": "2026-10-18T10:00:00+00:00"}',
+            b'{"jewelry_item_id": 8, "scanned_data": "B", "scan_timestamp": "2026-10-18T10:00:01+00:00"}',
+        ]
+        self.redis.pipeline.return_value.execute.side_effect = [[entries, True], [[], True]]
+
+        with patch.object(BarcodeScanHistory.objects, 'bulk_create') as bulk_create:
+            written = self.sink.flush('shop')
+
+        self.assertEqual(written, 2)
+        scans = bulk_create.call_args.args[0]
+        self.assertEqual([scan.jewelry_item_id for scan in scans], [7, 8])
+        self.assertEqual(scans[1].scan_timestamp.second, 1)
+
+    def test_rejected_row_is_dead_lettered(self):
+        entries = [
+            b'{"jewelry_item_id": 7, "scanned_data": "A", "scan_timestamp": "2026-10-18T10:00:00+00:00"}',
+            b'{"jewelry_item_id": 999, "scanned_data": "B", "scan_timestamp": "2026-10-18T10:00:01+00:00"}',
+        ]
+        pipe = self.redis.pipeline.return_value
+        pipe.execute.side_effect = [[entries, True], [1, True], [[], True]]
+
+        def bulk_create(scans, **kwargs):
+            if len(scans) > 1 or scans[0].jewelry_item_id == 999:
+                raise IntegrityError('jewelry item 999 does not exist')
+
+        with patch.object(BarcodeScanHistory.objects, 'bulk_create', side_effect=bulk_create):
+            written = self.sink.flush('shop')
+
+        self.assertEqual(written, 1)
+        pipe.rpush.assert_called_once_with('barcode_scans:dead:shop', entries[1])
+        pipe.lpush.assert_not_called()
+
+    def test_database_outage_requeues_unwritten_rows(self):
+        entries = [
+            b'{"jewelry_item_id": 7, "scanned_data": "A", "scan_timestamp": "2026-10-18T10:00:00+00:00"}',
+            b'{"jewelry_item_id": 8, "scanned_data": "B", "scan_timestamp": "2026-10-18T10:00:01+00:00"}',
+        ]
+        pipe = self.redis.pipeline.return_value
+        pipe.execute.side_effect = [[entries, True], [2, True, 1]]
+
+        with patch.object(BarcodeScanHistory.objects, 'bulk_create', side_effect=OperationalError('down')):
+            with self.assertRaises(OperationalError):
+                self.sink.flush('shop')
+
+        pipe.lpush.assert_called_once_with('barcode_scans:shop', entries[1], entries[0])
+        pipe.rpush.assert_not_called()
+
+    def test_redis_failure_writes_directly(self):
+        self.redis.pipeline.side_effect = ConnectionError('redis down')
+
+        with patch.object(BarcodeScanHistory.objects, 'bulk_create') as bulk_create:
+            self.sink.record('shop', jewelry_item_id=7, scanned_data='RNG-0007')
+
+        self.assertEqual(len(bulk_create.call_args.args[0]), 1)
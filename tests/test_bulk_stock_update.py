@@ -0,0 +1,104 @@
+"""
+Tests for set-based bulk stock updates.
+"""
+
+import io
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase
+
+from zargar.jewelry.models import JewelryItem
+from zargar.jewelry.stock_models import StockMovement
+from zargar.jewelry.stock_services import BulkStockUpdateService, iter_stock_update_rows
+
+
+class BulkStockUpdateServiceTest(SimpleTestCase):
+    """Test applying stock update batches."""
+
+    def setUp(self):
+        self.ring = JewelryItem(id=1, sku='RNG-0001', quantity=5)
+        self.chain = JewelryItem(id=2, sku='CHN-0002', quantity=3)
+
+        patchers = [
+            patch('zargar.jewelry.stock_services.transaction.atomic', MagicMock()),
+            patch.object(BulkStockUpdateService, '_lock_items', return_value=(
+                {1: self.ring, 2: self.chain}, {'RNG-0001': self.ring, 'CHN-0002': self.chain}
+            )),
+            patch.object(JewelryItem.objects, 'bulk_update'),
+            patch.object(StockMovement.objects, 'bulk_create'),
+            patch('zargar.jewelry.stock_services.record_changes'),
+            patch('zargar.jewelry.stock_services.invalidate_report_results'),
+        ]
+        mocks = [patcher.start() for patcher in patchers]
+        for patcher in patchers:
+            self.addCleanup(patcher.stop)
+        self.bulk_update, self.bulk_create, self.record_changes, self.invalidate_results = mocks[2:]
+
+    def test_rows_are_applied_in_one_bulk_write(self):
+        results = BulkStockUpdateService.apply_updates([
+            (1, {'item_id': 1, 'quantity': 8, 'adjustment_type': 'set'}),
+            (2, {'sku': 'CHN-0002', 'quantity': 2, 'adjustment_type': 'subtract'}),
+            (3, {'item_id': 1, 'quantity': 1, 'adjustment_type': 'add'}),
+        ], reference='count-7')
+
+        self.assertEqual(results, {'updated': 3, 'failed': 0, 'errors': []})
+        self.assertEqual((self.ring.quantity, self.chain.quantity), (9, 1))
+        self.bulk_update.assert_called_once()
+        self.assertEqual(list(self.bulk_update.call_args.args[0]), [self.ring, self.chain])
+
+        movements = self.bulk_create.call_args.args[0]
+        self.assertEqual(
+            [(m.jewelry_item_id, m.quantity_before, m.quantity_after, m.reference) for m in movements],
+            [(1, 5, 8, 'count-7'), (2, 3, 1, 'count-7'), (1, 8, 9, 'count-7')]
+        )
+        self.assertEqual(list(self.record_changes.call_args.args[1]), [1, 2])
+        self.invalidate_results.assert_called_once_with('inventory')
+
+    def test_per_row_errors(self):
+        results = BulkStockUpdateService.apply_updates([
+            (1, {'item_id': 99, 'quantity': 1}),
+            (2, {'item_id': 1, 'quantity': 4, 'expected_quantity': 6}),
+            (3, {'sku': 'CHN-0002', 'quantity': 4, 'adjustment_type': 'subtract'}),
+        ])
+
+        self.assertEqual(results['updated'], 0)
+        self.assertEqual([error['row'] for error in results['errors']], [1, 2, 3])
+        self.assertEqual(results['errors'][1]['current_quantity'], 5)
+        self.bulk_update.assert_not_called()
+        self.bulk_create.assert_not_called()
+
+    def test_matching_expected_quantity_is_applied(self):
+        results = BulkStockUpdateService.apply_updates([
+            (1, {'item_id': 1, 'quantity': 4, 'expected_quantity': 5}),
+        ])
+
+        self.assertEqual(results['updated'], 1)
+        self.assertEqual(self.ring.quantity, 4)
+
+    def test_long_reason_is_truncated(self):
+        BulkStockUpdateService.apply_updates([
+            (1, {'item_id': 1, 'quantity': 4, 'reason': 'x' * 250}),
+        ])
+
+        movement, = self.bulk_create.call_args.args[0]
+        self.assertEqual(movement.reason, 'x' * 200)
+
+
+class StockFileParsingTest(SimpleTestCase):
+    """Test lazy parsing of stock-take files."""
+
+    def test_csv_rows(self):
+        stream = io.BytesIO('﻿sku,quantity,expected_quantity\nRNG-0001,4,\nCHN-0002, 7 ,3\n'.encode('utf-8'))
+
+        self.assertEqual(list(iter_stock_update_rows(stream, 'csv')), [
+            (1, {'sku': 'RNG-0001', 'quantity': '4'}),
+            (2, {'sku': 'CHN-0002', 'quantity': '7', 'expected_quantity': '3'}),
+        ])
+
+    def test_json_lines(self):
+        stream = io.BytesIO(b'{"item_id": 1, "quantity": 4}\n\nnot json\n')
+
+        self.assertEqual(list(iter_stock_update_rows(stream, 'jsonl')), [
+            (1, {'item_id': 1, 'quantity': 4}),
+            (2, 'not json'),
+        ])
@@ -59,7 +59,7 @@ class DjangoConfigurationTest(TestCase):
         """Test that all required middleware are configured."""
         required_middleware = [
             'zargar.core.middleware.HealthCheckMiddleware',
-            'django_tenants.middleware.main.TenantMainMiddleware',
+            'zargar.tenants.middleware.CachedTenantMainMiddleware',
             'django.middleware.security.SecurityMiddleware',
             'django.contrib.sessions.middleware.SessionMiddleware',
             'corsheaders.middleware.CorsMiddleware',
@@ -118,7 +118,7 @@ class DockerHealthTestCase(TestCase):
         self.assertIn('django_tenants.routers.TenantSyncRouter', settings.DATABASE_ROUTERS)
         
         # Check middleware is configured
-        self.assertIn('django_tenants.middleware.main.TenantMainMiddleware', settings.MIDDLEWARE)
+        self.assertIn('zargar.tenants.middleware.CachedTenantMainMiddleware', settings.MIDDLEWARE)
 
     def test_storage_configuration(self):
         """Test storage backends configuration."""
@@ -0,0 +1,161 @@
+"""
+Tests for the shared gold price time series and its rollups.
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+
+from zargar.core import gold_price_history
+from zargar.core.external_services import IranianGoldPriceAPI
+from zargar.core.gold_price_history import (
+    RecentPriceWindow, bucket_start, choose_resolution, fold_points, roll_up,
+)
+
+
+def point(moment, open_price, high, low, close, average, count=1, karat=18, source='tgju'):
+    return {
+        'karat': karat, 'source': source, 'bucket_start': moment,
+        'open_price': Decimal(open_price), 'high_price': Decimal(high), 'low_price': Decimal(low),
+        'close_price': Decimal(close), 'average_price': Decimal(average), 'sample_count': count,
+    }
+
+
+class FoldPointsTest(SimpleTestCase):
+    """Test combining buckets into a coarser bucket."""
+
+    def test_ohlc_and_weighted_average(self):
+        now = timezone.now()
+        folded = fold_points([
+            point(now, '100', '120', '90', '110', '105', count=3),
+            point(now, '110', '130', '100', '125', '115', count=1),
+        ])
+
+        self.assertEqual(folded['open_price'], Decimal('100'))
+        self.assertEqual(folded['high_price'], Decimal('130'))
+        self.assertEqual(folded['low_price'], Decimal('90'))
+        self.assertEqual(folded['close_price'], Decimal('125'))
+        self.assertEqual(folded['average_price'], Decimal('107.50'))
+        self.assertEqual(folded['sample_count'], 4)
+
+    def test_empty(self):
+        self.assertIsNone(fold_points([]))
+
+
+class BucketStartTest(SimpleTestCase):
+    """Test bucket boundaries."""
+
+    def test_truncation(self):
+        moment = timezone.make_aware(datetime(2026, 10, 18, 14, 37, 12))
+
+        self.assertEqual(bucket_start(moment, 'minute').minute, 37)
+        self.assertEqual(bucket_start(moment, 'hour').minute, 0)
+        self.assertEqual(bucket_start(moment, 'day').hour, 0)
+
+
+@override_settings(
+    GOLD_PRICE_MINUTE_MAX_SPAN_DAYS=2, GOLD_PRICE_MINUTE_RETENTION_DAYS=7,
+    GOLD_PRICE_HOUR_MAX_SPAN_DAYS=90, GOLD_PRICE_HOUR_RETENTION_DAYS=365,
+)
+class ChooseResolutionTest(SimpleTestCase):
+    """Test picking a resolution for a range."""
+
+    def test_resolution_follows_span_and_retention(self):
+        now = timezone.now()
+
+        self.assertEqual(choose_resolution(now - timedelta(hours=6), now), 'minute')
+        self.assertEqual(choose_resolution(now - timedelta(days=30), now), 'hour')
+        self.assertEqual(choose_resolution(now - timedelta(days=400), now), 'day')
+        # Minute buckets of ten days ago are already pruned
+        self.assertEqual(
+            choose_resolution(now - timedelta(days=10), now - timedelta(days=9)), 'hour'
+        )
+
+
+class RollUpTest(SimpleTestCase):
+    """Test recomputing hourly and daily buckets."""
+
+    @patch('zargar.core.gold_price_history.GoldPricePoint')
+    def test_minute_buckets_roll_up_into_their_hour(self, point_model):
+        hour = bucket_start(timezone.now(), 'hour')
+        minutes = [
+            point(hour + timedelta(minutes=5), '100', '100', '100', '100', '100'),
+            point(hour + timedelta(minutes=10), '104', '104', '104', '104', '104'),
+        ]
+        point_model.objects.filter.return_value.order_by.return_value.values.side_effect = [minutes, []]
+
+        self.assertEqual(roll_up(hour), 1)
+
+        kwargs = point_model.objects.update_or_create.call_args.kwargs
+        self.assertEqual(kwargs['resolution'], 'hour')
+        self.assertEqual(kwargs['bucket_start'], hour)
+        self.assertEqual(kwargs['defaults']['open_price'], Decimal('100'))
+        self.assertEqual(kwargs['defaults']['close_price'], Decimal('104'))
+        self.assertEqual(kwargs['defaults']['average_price'], Decimal('102.00'))
+
+
+@override_settings(GOLD_PRICE_WINDOW_MINUTES=60, GOLD_PRICE_WINDOW_REFRESH_SECONDS=60)
+class RecentPriceWindowTest(SimpleTestCase):
+    """Test serving recent minute data from memory."""
+
+    def setUp(self):
+        now = bucket_start(timezone.now(), 'minute')
+        self.series = [
+            gold_price_history._series_point(now - timedelta(minutes=offset), {
+                'open_price': Decimal('100'), 'high_price': Decimal('101'), 'low_price': Decimal('99'),
+                'close_price': Decimal(100 + offset), 'average_price': Decimal('100'), 'sample_count': 1,
+            })
+            for offset in (30, 20, 10)
+        ]
+
+    def test_window_is_loaded_once_and_sliced(self):
+        window = RecentPriceWindow()
+        now = timezone.now()
+
+        with patch.object(gold_price_history, '_query_series', return_value=self.series) as query:
+            recent = window.series(18, now - timedelta(minutes=25), now)
+            window.series(18, now - timedelta(minutes=45), now)
+
+        query.assert_called_once()
+        self.assertEqual([p['close'] for p in recent], [Decimal('120.00'), Decimal('110.00')])
+
+    def test_range_before_window_is_not_served(self):
+        window = RecentPriceWindow()
+        now = timezone.now()
+
+        with patch.object(gold_price_history, '_query_series', return_value=self.series):
+            self.assertIsNone(window.series(18, now - timedelta(hours=3), now))
+
+
+class PriceTrendTest(SimpleTestCase):
+    """Test that price trends come from the shared history."""
+
+    @patch('zargar.core.external_services.get_price_series')
+    def test_trend_uses_daily_buckets(self, get_price_series):
+        today = timezone.localdate()
+        get_price_series.return_value = [{
+            'date': today - timedelta(days=3), 'price_per_gram': Decimal('3500000'), 'open': Decimal('3400000'),
+            'high': Decimal('3550000'), 'low': Decimal('3390000'), 'average': Decimal('3480000'),
+        }]
+
+        trend = IranianGoldPriceAPI.get_price_trend(18, 7)
+
+        self.assertEqual(get_price_series.call_args.kwargs['resolution'], 'day')
+        self.assertEqual(len(trend), 7)
+        self.assertEqual(trend[-1]['date'], today)
+        self.assertEqual([point['is_recorded'] for point in trend].count(True), 1)
+        # Missing days carry the nearest known price
+        self.assertTrue(all(point['price_per_gram'] == Decimal('3500000') for point in trend))
+        self.assertEqual(trend[3]['high'], Decimal('3550000'))
+
+    @patch('zargar.core.external_services.get_price_series', return_value=[])
+    def test_empty_history_falls_back_to_current_price(self, get_price_series):
+        with patch.object(IranianGoldPriceAPI, 'get_current_gold_price',
+                          return_value={'price_per_gram': Decimal('3600000')}):
+            trend = IranianGoldPriceAPI.get_price_trend(18, 7)
+
+        self.assertEqual(len(trend), 7)
+        self.assertEqual(trend[0]['price_per_gram'], Decimal('3600000'))
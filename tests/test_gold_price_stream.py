@@ -0,0 +1,112 @@
+"""
+Tests for pushing gold price updates over Server-Sent Events.
+"""
+
+import asyncio
+import json
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import AsyncMock, patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from zargar.core import gold_price_stream
+from zargar.core.gold_price_stream import (
+    GoldPriceBroadcaster, format_sse, get_latest_gold_prices, gold_price_events, publish_gold_prices,
+)
+
+
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'gold-price-stream-tests',
+    }
+}
+
+PRICES = {
+    18: {'price_per_gram': Decimal('3500000'), 'source': 'tgju', 'timestamp': datetime(2026, 10, 18, 10, 0)},
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES, GOLD_PRICE_CHANNEL='gold_prices')
+class PublishGoldPricesTest(SimpleTestCase):
+    """Test publishing refreshed prices."""
+
+    def setUp(self):
+        cache.clear()
+
+    @patch('zargar.core.gold_price_stream._get_redis')
+    def test_prices_are_published_and_kept_as_latest(self, get_redis):
+        self.assertTrue(publish_gold_prices(PRICES))
+
+        channel, message = get_redis.return_value.publish.call_args.args
+        self.assertEqual(channel, 'gold_prices')
+        self.assertEqual(json.loads(message)['prices']['18']['price_per_gram'], '3500000')
+        self.assertEqual(get_latest_gold_prices(), json.loads(message))
+        self.assertEqual(cache.get('current_gold_price'), 3500000.0)
+
+    @patch('zargar.core.gold_price_stream._get_redis', side_effect=ConnectionError('down'))
+    def test_redis_outage_keeps_latest_prices(self, get_redis):
+        self.assertFalse(publish_gold_prices(PRICES))
+        self.assertIsNotNone(get_latest_gold_prices())
+
+    def test_nothing_is_published_without_prices(self):
+        self.assertFalse(publish_gold_prices({}))
+
+
+class FormatSseTest(SimpleTestCase):
+    """Test the event stream wire format."""
+
+    def test_event_format(self):
+        self.assertEqual(
+            format_sse('{"a": 1}', event_id='1'),
+            'event: gold_price\nid: 1\ndata: {"a": 1}\n\n'
+        )
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    GOLD_PRICE_STREAM_QUEUE_SIZE=2,
+    GOLD_PRICE_STREAM_HEARTBEAT=0.05,
+    GOLD_PRICE_STREAM_MAX_AGE=60,
+)
+@patch.object(GoldPriceBroadcaster, '_listen', new_callable=lambda: AsyncMock(return_value=None))
+class GoldPriceEventsTest(SimpleTestCase):
+    """Test fanning published prices out to open connections."""
+
+    def setUp(self):
+        cache.clear()
+        self.broadcaster = GoldPriceBroadcaster()
+        patcher = patch.object(gold_price_stream, 'broadcaster', self.broadcaster)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_slow_client_keeps_newest_messages(self, listen):
+        async def scenario():
+            queue = self.broadcaster.subscribe()
+            for message in ('1', '2', '3'):
+                self.broadcaster.broadcast(message)
+            return [queue.get_nowait() for _ in range(queue.qsize())]
+
+        self.assertEqual(asyncio.run(scenario()), ['2', '3'])
+
+    def test_stream_sends_latest_then_updates(self, listen):
+        cache.set(gold_price_stream.LATEST_GOLD_PRICES_KEY, {'prices': {}, 'published_at': 'a'})
+
+        async def scenario():
+            events = gold_price_events()
+            received = [await events.__anext__(), await events.__anext__()]
+            self.broadcaster.broadcast(json.dumps({'prices': {'18': {}}, 'published_at': 'b'}))
+            received.append(await events.__anext__())
+            received.append(await events.__anext__())
+            await events.aclose()
+            return received
+
+        retry, latest, update, keepalive = asyncio.run(scenario())
+
+        self.assertTrue(retry.startswith('retry:'))
+        self.assertIn('id: a', latest)
+        self.assertIn('id: b', update)
+        self.assertEqual(keepalive, ': keepalive\n\n')
+        self.assertEqual(self.broadcaster.subscriber_count, 0)
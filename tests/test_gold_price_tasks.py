@@ -84,6 +84,13 @@ class GoldPriceTasksTest(TestCase):
         mock_queryset = Mock()
         mock_queryset.count.return_value = 0
         mock_queryset.__iter__ = Mock(return_value=iter([]))
+        mock_queryset.aggregate.return_value = {
+            'total_active_contracts': 0,
+            'overdue_contracts': 0,
+            'contracts_near_completion': 0,
+            'price_protection_active': 0,
+        }
+        mock_queryset.order_by.return_value.values.return_value.annotate.return_value = []
         
         with patch('zargar.gold_installments.models.GoldInstallmentContract.objects.filter', return_value=mock_queryset):
             # Mock gold price service
@@ -190,6 +197,13 @@ class TaskErrorHandlingTest(TestCase):
         mock_queryset = Mock()
         mock_queryset.count.return_value = 0
         mock_queryset.__iter__ = Mock(return_value=iter([]))
+        mock_queryset.aggregate.return_value = {
+            'total_active_contracts': 0,
+            'overdue_contracts': 0,
+            'contracts_near_completion': 0,
+            'price_protection_active': 0,
+        }
+        mock_queryset.order_by.return_value.values.return_value.annotate.return_value = []
         
         with patch('zargar.gold_installments.models.GoldInstallmentContract.objects.filter', return_value=mock_queryset):
             # Mock gold price service
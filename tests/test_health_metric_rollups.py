@@ -0,0 +1,213 @@
+"""
+Tests for the downsampled system health metric rollups.
+"""
+
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+
+from zargar.admin_panel.health_rollups import (
+    backfill_rollups, bucket_end, bucket_start, choose_resolution, fold_buckets, get_metric_series,
+    percentile, summarize, update_rollups,
+)
+from zargar.admin_panel.system_health import SystemHealthMonitor
+
+
+def bucket(count, low, high, average, p95, metric_type='cpu_usage'):
+    return {
+        'metric_type': metric_type, 'unit': '%', 'sample_count': count,
+        'min_value': low, 'max_value': high, 'avg_value': average, 'p95_value': p95,
+    }
+
+
+class StatisticsTest(SimpleTestCase):
+    """Test bucket statistics and folding."""
+
+    def test_nearest_rank_percentile(self):
+        values = list(range(1, 101))
+
+        self.assertEqual(percentile(values), 95)
+        self.assertEqual(percentile([7.0]), 7.0)
+        self.assertIsNone(percentile([]))
+
+    def test_weighted_percentile(self):
+        # 90 samples at 10 and 10 samples at 50
+        self.assertEqual(percentile([50, 10], weights=[10, 90]), 50)
+        self.assertEqual(percentile([50, 10], weights=[4, 96]), 10)
+
+    def test_summarize(self):
+        stats = summarize([10.0, 30.0, 20.0])
+
+        self.assertEqual(stats['sample_count'], 3)
+        self.assertEqual((stats['min_value'], stats['max_value']), (10.0, 30.0))
+        self.assertEqual(stats['avg_value'], 20.0)
+        self.assertEqual(stats['p95_value'], 30.0)
+
+    def test_fold_weights_average_by_samples(self):
+        folded = fold_buckets([bucket(3, 10, 40, 20, 35), bucket(1, 5, 90, 60, 90)])
+
+        self.assertEqual(folded['sample_count'], 4)
+        self.assertEqual((folded['min_value'], folded['max_value']), (5, 90))
+        self.assertEqual(folded['avg_value'], 30)
+        self.assertEqual(folded['p95_value'], 90)
+
+    def test_fold_empty(self):
+        self.assertIsNone(fold_buckets([]))
+
+
+class BucketBoundsTest(SimpleTestCase):
+    """Test bucket boundaries."""
+
+    def test_truncation_and_end(self):
+        moment = timezone.make_aware(datetime(2026, 10, 18, 14, 37, 12))
+
+        self.assertEqual(bucket_end(bucket_start(moment, 'minute'), 'minute').minute, 38)
+        self.assertEqual(bucket_end(bucket_start(moment, 'hour'), 'hour').hour, 15)
+        day_end = bucket_end(bucket_start(moment, 'day'), 'day')
+        self.assertEqual((day_end.day, day_end.hour, day_end.minute), (19, 0, 0))
+
+
+@override_settings(
+    HEALTH_METRIC_MINUTE_MAX_HOURS=24, HEALTH_METRIC_MINUTE_ROLLUP_RETENTION_DAYS=7,
+    HEALTH_METRIC_HOUR_MAX_HOURS=31 * 24, HEALTH_METRIC_HOUR_ROLLUP_RETENTION_DAYS=365,
+)
+class ChooseResolutionTest(SimpleTestCase):
+    """Test picking a resolution for a window."""
+
+    def test_resolution_follows_window(self):
+        self.assertEqual(choose_resolution(6), 'minute')
+        self.assertEqual(choose_resolution(24), 'minute')
+        self.assertEqual(choose_resolution(7 * 24), 'hour')
+        self.assertEqual(choose_resolution(90 * 24), 'day')
+
+    @override_settings(HEALTH_METRIC_MINUTE_ROLLUP_RETENTION_DAYS=0)
+    def test_pruned_resolution_is_skipped(self):
+        self.assertEqual(choose_resolution(6), 'hour')
+
+
+@patch('zargar.admin_panel.health_rollups.SystemHealthMetricRollup.objects')
+@patch('zargar.admin_panel.health_rollups.SystemHealthMetric.objects')
+class UpdateRollupsTest(SimpleTestCase):
+    """Test refreshing the buckets containing new metrics."""
+
+    def test_levels_fold_from_finer_buckets(self, metric_objects, rollup_objects):
+        moment = timezone.now()
+        metric_objects.filter.return_value.values_list.return_value = [
+            ('cpu_usage', 40.0, '%'), ('cpu_usage', 60.0, '%'),
+        ]
+        stored = rollup_objects.filter.return_value.exclude.return_value.values
+        stored.side_effect = [
+            [bucket(2, 10.0, 30.0, 20.0, 30.0)],  # earlier minute buckets of the hour
+            [bucket(4, 0.0, 90.0, 45.0, 90.0)],   # earlier hour buckets of the day
+        ]
+
+        written = update_rollups(['cpu_usage', 'cpu_usage'], moment)
+
+        self.assertEqual(written, 3)
+        rollups = {row.resolution: row for row in rollup_objects.bulk_create.call_args.args[0]}
+        self.assertEqual(rollups['minute'].sample_count, 2)
+        self.assertEqual(rollups['minute'].avg_value, 50.0)
+        self.assertEqual(rollups['minute'].bucket_start, bucket_start(moment, 'minute'))
+        self.assertEqual(rollups['hour'].sample_count, 4)
+        self.assertEqual(rollups['hour'].avg_value, 35.0)
+        self.assertEqual((rollups['hour'].min_value, rollups['hour'].max_value), (10.0, 60.0))
+        self.assertEqual(rollups['day'].sample_count, 8)
+        self.assertEqual(rollups['day'].avg_value, 40.0)
+        # The current finer bucket is taken from memory, not re-read
+        rollup_objects.filter.return_value.exclude.assert_any_call(bucket_start=bucket_start(moment, 'minute'))
+        self.assertEqual(
+            rollup_objects.bulk_create.call_args.kwargs['unique_fields'],
+            ['resolution', 'metric_type', 'bucket_start']
+        )
+
+    def test_nothing_stored(self, metric_objects, rollup_objects):
+        self.assertEqual(update_rollups([], timezone.now()), 0)
+        metric_objects.filter.assert_not_called()
+        rollup_objects.bulk_create.assert_not_called()
+
+
+@override_settings(HEALTH_METRIC_MINUTE_ROLLUP_RETENTION_DAYS=7, HEALTH_METRIC_HOUR_ROLLUP_RETENTION_DAYS=365)
+@patch('zargar.admin_panel.health_rollups.SystemHealthMetricRollup.objects')
+@patch('zargar.admin_panel.health_rollups.SystemHealthMetric.objects')
+class BackfillRollupsTest(SimpleTestCase):
+    """Test building rollups from metrics stored before they existed."""
+
+    def test_buckets_are_built_from_stored_metrics(self, metric_objects, rollup_objects):
+        hour = bucket_start(timezone.now() - timedelta(hours=2), 'hour')
+        metrics = metric_objects.all.return_value
+        metrics.order_by.return_value.values_list.return_value.distinct.return_value = ['cpu_usage']
+        metrics.filter.return_value.order_by.return_value.values_list.return_value.iterator.return_value = [
+            (hour, 10.0, '%'), (hour + timedelta(seconds=30), 30.0, '%'),
+            (hour + timedelta(minutes=5), 50.0, '%'),
+        ]
+
+        written = backfill_rollups()
+
+        self.assertEqual(written, {'minute': 2, 'hour': 1, 'day': 1})
+        metrics.filter.assert_called_once_with(metric_type='cpu_usage')
+        rollups = rollup_objects.bulk_create.call_args.args[0]
+        minutes = [row for row in rollups if row.resolution == 'minute']
+        self.assertEqual([row.sample_count for row in minutes], [2, 1])
+        self.assertEqual(minutes[0].avg_value, 20.0)
+        hourly = next(row for row in rollups if row.resolution == 'hour')
+        self.assertEqual(hourly.bucket_start, hour)
+        self.assertEqual((hourly.sample_count, hourly.min_value, hourly.max_value), (3, 10.0, 50.0))
+        self.assertEqual(hourly.avg_value, 30.0)
+
+    def test_expired_minute_buckets_are_not_written(self, metric_objects, rollup_objects):
+        old = bucket_start(timezone.now() - timedelta(days=30), 'minute')
+        metrics = metric_objects.all.return_value
+        metrics.order_by.return_value.values_list.return_value.distinct.return_value = ['cpu_usage']
+        metrics.filter.return_value.order_by.return_value.values_list.return_value.iterator.return_value = [
+            (old, 10.0, '%'),
+        ]
+
+        written = backfill_rollups()
+
+        self.assertEqual(written, {'minute': 0, 'hour': 1, 'day': 1})
+
+
+class MetricSeriesTest(SimpleTestCase):
+    """Test the compact series returned for charts."""
+
+    @patch('zargar.admin_panel.health_rollups.SystemHealthMetricRollup.objects')
+    def test_series_are_parallel_arrays(self, rollup_objects):
+        start = bucket_start(timezone.now() - timedelta(minutes=5), 'minute')
+        rollup_objects.filter.return_value.order_by.return_value.values_list.return_value = [
+            (start, '%', 2, 10.0, 30.0, 20.004, 30.0),
+            (start + timedelta(minutes=1), '%', 1, 25.0, 25.0, 25.0, 25.0),
+        ]
+
+        series = get_metric_series('cpu_usage', hours=1)
+
+        self.assertEqual(rollup_objects.filter.call_args.kwargs['resolution'], 'minute')
+        self.assertEqual(series['unit'], '%')
+        self.assertEqual(series['timestamps'], [int(start.timestamp()), int(start.timestamp()) + 60])
+        self.assertEqual(series['avg'], [20.0, 25.0])
+        self.assertEqual(series['max'], [30.0, 25.0])
+        self.assertEqual(series['count'], [2, 1])
+
+
+@patch('zargar.admin_panel.system_health.update_rollups')
+@patch('zargar.admin_panel.system_health.SystemHealthMetric.objects')
+class StoreMetricsTest(SimpleTestCase):
+    """Test writing a collection cycle in one insert."""
+
+    def test_cycle_is_one_bulk_insert(self, metric_objects, update):
+        with patch.object(SystemHealthMonitor, '_initialize_redis'):
+            monitor = SystemHealthMonitor()
+
+        monitor._store_metrics({
+            'cpu': {'usage_percent': 75.5},
+            'memory': {'usage_percent': 80.2},
+            'database': {'default': {'status': 'healthy', 'response_time_ms': 15.5}},
+            'redis': {'status': 'error'},
+        })
+
+        metric_objects.create.assert_not_called()
+        rows = metric_objects.bulk_create.call_args.args[0]
+        self.assertEqual([row.metric_type for row in rows], ['cpu_usage', 'memory_usage', 'response_time'])
+        self.assertEqual(len({row.timestamp for row in rows}), 1)
+        update.assert_called_once_with(['cpu_usage', 'memory_usage', 'response_time'], rows[0].timestamp)
@@ -0,0 +1,149 @@
+"""
+Tests for the stored due-date state of gold installment contracts.
+"""
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+from zargar.gold_installments.models import GoldInstallmentContract, GoldInstallmentPayment
+from zargar.gold_installments.signals import refresh_contract_due_state
+from zargar.gold_installments.tasks import send_payment_reminders
+
+
+def make_contract(**fields):
+    defaults = {
+        'contract_number': 'GIC-TEST-0001',
+        'contract_date': timezone.now().date() - timedelta(days=60),
+        'initial_gold_weight_grams': Decimal('10.000'),
+        'remaining_gold_weight_grams': Decimal('10.000'),
+        'gold_karat': 18,
+        'payment_schedule': 'monthly',
+        'status': 'active',
+        'balance_type': 'debt',
+    }
+    defaults.update(fields)
+    return GoldInstallmentContract(**defaults)
+
+
+class ContractDueStateTest(SimpleTestCase):
+
+    def test_first_payment_due_after_contract_date(self):
+        contract = make_contract()
+        self.assertEqual(
+            contract.calculate_next_due_date(),
+            contract.contract_date + timedelta(days=GoldInstallmentContract.FIRST_PAYMENT_DUE_DAYS)
+        )
+
+    def test_record_payment_date_advances_by_schedule(self):
+        today = timezone.now().date()
+        contract = make_contract(payment_schedule='weekly')
+
+        contract.record_payment_date(today - timedelta(days=3))
+        self.assertEqual(contract.next_due_date, today + timedelta(days=4))
+
+        # An older, back-dated payment does not move the due date back
+        contract.record_payment_date(today - timedelta(days=20))
+        self.assertEqual(contract.last_payment_date, today - timedelta(days=3))
+        self.assertFalse(contract.is_overdue)
+
+    @patch.object(GoldInstallmentContract, 'save')
+    @patch.object(GoldInstallmentContract, 'payments')
+    def test_refresh_keeps_restarted_period_while_latest_payment_is_unchanged(self, payments, save):
+        today = timezone.now().date()
+        last_payment = today - timedelta(days=40)
+        # Due date restarted when the balance turned into a debt
+        contract = make_contract(last_payment_date=last_payment, next_due_date=today + timedelta(days=30))
+        payments.aggregate.return_value = {'last': last_payment}
+
+        self.assertFalse(contract.refresh_due_state())
+        self.assertEqual(contract.next_due_date, today + timedelta(days=30))
+        save.assert_not_called()
+
+        payments.aggregate.return_value = {'last': today}
+
+        self.assertTrue(contract.refresh_due_state())
+        self.assertEqual(contract.last_payment_date, today)
+        self.assertEqual(contract.next_due_date, contract.calculate_next_payment_date(today))
+        save.assert_called_once_with(update_fields=['last_payment_date', 'next_due_date', 'updated_at'])
+
+    def test_days_overdue_from_stored_due_date(self):
+        today = timezone.now().date()
+        contract = make_contract(next_due_date=today - timedelta(days=12))
+        self.assertEqual(contract.days_overdue, 12)
+        self.assertTrue(contract.is_overdue)
+
+        contract.status = 'completed'
+        self.assertFalse(contract.is_overdue)
+
+        contract.status = 'active'
+        contract.balance_type = 'credit'
+        self.assertEqual(contract.days_overdue, 0)
+
+    def test_overdue_amount_counts_missed_periods(self):
+        today = timezone.now().date()
+        contract = make_contract(
+            next_due_date=today - timedelta(days=35),
+            payment_amount_per_period=Decimal('2000000.00'),
+        )
+        # Due 35 days ago on a 30 day schedule: two payments missed
+        self.assertEqual(contract.calculate_overdue_amount(), Decimal('4000000.00'))
+        # Capped at the value of the remaining gold
+        self.assertEqual(contract.calculate_overdue_amount(Decimal('300000')), Decimal('3000000.00'))
+
+    def test_overdue_amount_without_fixed_payment_is_remaining_value(self):
+        contract = make_contract(next_due_date=timezone.now().date() - timedelta(days=1))
+        self.assertEqual(contract.calculate_overdue_amount(Decimal('3500000')), Decimal('35000000.00'))
+        self.assertEqual(make_contract(next_due_date=None).calculate_overdue_amount(), Decimal('0.00'))
+
+    def test_overdue_query_filters_on_due_state(self):
+        sql = str(GoldInstallmentContract.objects.overdue(on_date=timezone.now().date()).query)
+
+        self.assertIn('"next_due_date" <', sql)
+        self.assertIn('"balance_type" = debt', sql)
+
+
+class PaymentReminderTaskTest(SimpleTestCase):
+
+    @patch('zargar.gold_installments.tasks.send_contract_payment_reminder')
+    @patch.object(GoldInstallmentContract.objects, 'overdue')
+    def test_reminders_use_overdue_query(self, overdue, send_reminder):
+        contracts = [make_contract(contract_number='GIC-1'), make_contract(contract_number='GIC-2')]
+        overdue.return_value.filter.return_value.select_related.return_value = contracts
+
+        result = send_payment_reminders()
+
+        overdue.assert_called_once_with()
+        self.assertEqual(result['overdue_contracts_found'], 2)
+        self.assertEqual(result['reminders_sent'], 2)
+        self.assertEqual(send_reminder.call_count, 2)
+
+
+class PaymentDueStateSignalTest(SimpleTestCase):
+
+    @patch.object(GoldInstallmentContract.objects, 'filter')
+    def test_payment_changes_refresh_due_state(self, filter_contracts):
+        contract = filter_contracts.return_value.first.return_value
+        payment = GoldInstallmentPayment(contract_id=7)
+
+        refresh_contract_due_state(GoldInstallmentPayment, payment, created=True, raw=False)
+        refresh_contract_due_state(GoldInstallmentPayment, payment)
+
+        filter_contracts.assert_called_with(pk=7)
+        self.assertEqual(contract.refresh_due_state.call_count, 2)
+
+    @patch.object(GoldInstallmentContract.objects, 'filter')
+    def test_deleted_contract_is_skipped(self, filter_contracts):
+        filter_contracts.return_value.first.return_value = None
+
+        refresh_contract_due_state(GoldInstallmentPayment, GoldInstallmentPayment(contract_id=7))
+
+        filter_contracts.assert_called_once_with(pk=7)
+
+    @patch.object(GoldInstallmentContract.objects, 'filter')
+    def test_fixture_loading_is_skipped(self, filter_contracts):
+        refresh_contract_due_state(GoldInstallmentPayment, GoldInstallmentPayment(contract_id=7), raw=True)
+
+        filter_contracts.assert_not_called()
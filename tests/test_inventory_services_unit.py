@@ -123,9 +123,10 @@ class TestStockAlertService(TestCase):
     
     def test_estimate_monthly_demand(self):
         """Test monthly demand estimation."""
-        # Mock jewelry item
+        # Mock jewelry item without a stored forecast
         item = Mock()
         item.category = Mock()
+        item.stock_forecast = None
         
         # Test different categories
         test_cases = [
@@ -0,0 +1,141 @@
+"""
+Tests for the JWT principal cache.
+"""
+
+from unittest.mock import patch
+
+from django.db.models.signals import post_save
+from django.test import SimpleTestCase, override_settings
+from rest_framework.exceptions import AuthenticationFailed
+
+from zargar.core.authentication import TenantAwareJWTAuthentication
+from zargar.core.models import User
+from zargar.core.principal_cache import PrincipalCache
+
+
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'principal-cache-tests',
+    }
+}
+
+
+def make_user(**overrides):
+    fields = {
+        'id': 5,
+        'username': 'cashier',
+        'password': 'pbkdf2_sha256$hash',
+        'role': 'salesperson',
+        'is_active': True,
+    }
+    fields.update(overrides)
+    return User(**fields)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class PrincipalCacheTest(SimpleTestCase):
+    """Test the versioned principal cache."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.principal_cache = PrincipalCache()
+
+    def test_roundtrip_excludes_password(self):
+        self.principal_cache.set('shop', make_user(), 0)
+
+        cached, version = self.principal_cache.get(User, 'shop', 5)
+
+        self.assertEqual(cached.username, 'cashier')
+        self.assertEqual(cached.role, 'salesperson')
+        self.assertIn('password', cached.get_deferred_fields())
+        self.assertEqual(version, 0)
+
+    def test_entries_are_per_schema(self):
+        self.principal_cache.set('shop', make_user(), 0)
+
+        self.assertIsNone(self.principal_cache.get(User, 'other_shop', 5)[0])
+
+    def test_invalidate_bumps_version(self):
+        self.principal_cache.set('shop', make_user(), 0)
+
+        self.principal_cache.invalidate('shop', 5)
+
+        self.assertIsNone(self.principal_cache.get(User, 'shop', 5)[0])
+
+    def test_save_during_load_is_not_cached_as_current(self):
+        # Miss: the version is read before the database load
+        cached, version = self.principal_cache.get(User, 'shop', 5)
+        self.assertIsNone(cached)
+
+        # The user is saved after the stale row was read
+        self.principal_cache.invalidate('shop', 5)
+        self.principal_cache.set('shop', make_user(), version)
+
+        self.assertIsNone(self.principal_cache.get(User, 'shop', 5)[0])
+
+    def test_user_save_invalidates_on_commit(self):
+        self.principal_cache.set('shop', make_user(), 0)
+
+        with patch('zargar.core.signals.connection') as connection, \
+                patch('zargar.core.signals.transaction.on_commit') as on_commit:
+            connection.schema_name = 'shop'
+            post_save.send(sender=User, instance=make_user(role='owner'), created=False)
+
+            # Still served until the change commits
+            self.assertIsNotNone(self.principal_cache.get(User, 'shop', 5)[0])
+            on_commit.call_args.args[0]()
+
+        self.assertIsNone(self.principal_cache.get(User, 'shop', 5)[0])
+
+
+@override_settings(CACHES=LOCMEM_CACHES, JWT_PRINCIPAL_CACHE_ENABLED=True)
+class CachedJWTAuthenticationTest(SimpleTestCase):
+    """Test that JWT authentication goes through the principal cache."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.token = {'user_id': 5, 'schema': 'shop', 'is_tenant_user': True}
+
+        connection_patcher = patch('zargar.core.authentication.connection')
+        connection_patcher.start().schema_name = 'shop'
+        self.addCleanup(connection_patcher.stop)
+
+    @patch.object(User.objects, 'get')
+    def test_second_request_is_served_from_cache(self, mock_get):
+        mock_get.return_value = make_user()
+        auth = TenantAwareJWTAuthentication()
+
+        auth.get_user(self.token)
+        user = auth.get_user(self.token)
+
+        self.assertEqual(user.username, 'cashier')
+        mock_get.assert_called_once_with(id=5)
+
+    @override_settings(JWT_PRINCIPAL_CACHE_ENABLED=False)
+    @patch.object(User.objects, 'get')
+    def test_disabled_cache_loads_every_time(self, mock_get):
+        mock_get.return_value = make_user()
+        auth = TenantAwareJWTAuthentication()
+
+        auth.get_user(self.token)
+        auth.get_user(self.token)
+
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch.object(User.objects, 'get')
+    def test_deactivation_takes_effect_after_save(self, mock_get):
+        mock_get.return_value = make_user()
+        auth = TenantAwareJWTAuthentication()
+        auth.get_user(self.token)
+
+        mock_get.return_value = make_user(is_active=False)
+        with patch('zargar.core.signals.connection') as connection, \
+                patch('zargar.core.signals.transaction.on_commit', side_effect=lambda func: func()):
+            connection.schema_name = 'shop'
+            post_save.send(sender=User, instance=mock_get.return_value, created=False)
+
+        with self.assertRaises(AuthenticationFailed):
+            auth.get_user(self.token)
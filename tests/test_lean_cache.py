@@ -0,0 +1,194 @@
+"""
+Tests for compact service cache records.
+"""
+
+import datetime
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase, override_settings
+
+from zargar.core.lean_cache import (
+    CacheRecordSchema, get_cached_records, payload_size_report, record_payload_size, set_cached_records
+)
+from zargar.jewelry.models import JewelryItem
+from zargar.gold_installments.services import GoldPriceService
+from zargar.jewelry.services import (
+    LOW_STOCK_CACHE_SCHEMA, TOP_VALUE_CACHE_SCHEMA, InventoryValuationService, StockAlertService
+)
+
+
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'lean-cache-tests',
+    }
+}
+
+SCHEMA = CacheRecordSchema(
+    'tests.items', 1,
+    fields=('item', 'value', 'seen_at', 'count'),
+    nested={'item': ('id', 'name')}
+)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, CACHE_PAYLOAD_STATS_ENABLED=False)
+class CacheRecordSchemaTest(SimpleTestCase):
+    """Test packing and rehydrating cached records."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.record = {
+            'item': JewelryItem(id=7, name='Ring', sku='RNG-0007'),
+            'value': Decimal('1250000.50'),
+            'seen_at': datetime.datetime(2026, 10, 18, 9, 30, tzinfo=datetime.timezone.utc),
+            'count': 3,
+            'ignored': 'not cached',
+        }
+
+    def test_round_trip_keeps_values_and_drops_instances(self):
+        set_cached_records('items', [self.record], SCHEMA, 60)
+
+        cached, = get_cached_records('items', SCHEMA)
+
+        self.assertEqual(cached['value'], Decimal('1250000.50'))
+        self.assertEqual(cached['seen_at'], self.record['seen_at'])
+        self.assertEqual(cached['count'], 3)
+        self.assertEqual((cached['item'].id, cached['item'].name), (7, 'Ring'))
+        self.assertNotIsInstance(cached['item'], JewelryItem)
+        self.assertNotIn('ignored', cached)
+
+    def test_fresh_records_match_cache_hits(self):
+        set_cached_records('items', [self.record], SCHEMA, 60)
+
+        self.assertEqual(SCHEMA.rehydrate([self.record]), get_cached_records('items', SCHEMA))
+
+    def test_other_version_is_a_miss(self):
+        set_cached_records('items', [self.record], SCHEMA, 60)
+        newer = CacheRecordSchema('tests.items', 2, fields=SCHEMA.fields, nested={'item': ('id', 'name')})
+
+        self.assertIsNone(get_cached_records('items', newer))
+
+    def test_empty_list_is_a_hit(self):
+        set_cached_records('items', [], SCHEMA, 60)
+
+        self.assertEqual(get_cached_records('items', SCHEMA), [])
+
+
+@override_settings(CACHE_PAYLOAD_STATS_ENABLED=True, CACHE_PAYLOAD_WARN_BYTES=1024,
+                   CACHE_PAYLOAD_LARGEST_KEYS=10)
+class PayloadSizeHistogramTest(SimpleTestCase):
+    """Test the cache payload size histogram."""
+
+    def setUp(self):
+        self.redis = MagicMock()
+        patcher = patch('zargar.core.lean_cache._get_redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_sizes_are_bucketed_by_power_of_two(self):
+        record_payload_size('tests.items', 'items', 1500)
+
+        pipe = self.redis.pipeline.return_value
+        pipe.hincrby.assert_called_once_with('cache_sizes:tests.items', 11, 1)
+        pipe.zadd.assert_called_once_with('cache_sizes:largest', {'tests.items|items': 1500})
+        pipe.zremrangebyrank.assert_called_once_with('cache_sizes:largest', 0, -11)
+
+    def test_report_flags_oversized_entries(self):
+        self.redis.smembers.return_value = {b'tests.items'}
+        self.redis.hgetall.return_value = {b'9': b'4', b'11': b'1'}
+        self.redis.zrevrange.return_value = [(b'tests.items|items', 1500.0), (b'tests.items|small', 300.0)]
+
+        report = payload_size_report()
+
+        self.assertEqual(report['families']['tests.items']['histogram'], {512: 4, 2048: 1})
+        self.assertEqual(report['families']['tests.items']['oversized'], 1)
+        self.assertEqual(report['oversized_count'], 1)
+        self.assertEqual(report['largest'][0]['key'], 'items')
+
+
+@override_settings(CACHES=LOCMEM_CACHES, CACHE_PAYLOAD_STATS_ENABLED=False)
+@patch('zargar.jewelry.services.connection', MagicMock(schema_name='shop'))
+class StockAlertCacheTest(SimpleTestCase):
+    """Test that stock alerts are served from compact records."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.row = {
+            'item': JewelryItem(id=7, name='Ring', sku='RNG-0007', barcode='ZRG-7'),
+            'current_quantity': 1,
+            'minimum_stock': 4,
+            'threshold_used': 4,
+            'shortage': 3,
+            'category': 'Rings',
+            'unit_value': Decimal('2000000.00'),
+            'value_at_risk': Decimal('2000000.00'),
+            'days_since_low': 2,
+            'estimated_monthly_demand': 3,
+            'forecast_reorder_quantity': None,
+            'days_of_cover': None,
+        }
+        set_cached_records('stock_alerts:shop:low_stock', [self.row], LOW_STOCK_CACHE_SCHEMA, 60)
+
+    def test_cache_hit_skips_database(self):
+        with patch('zargar.jewelry.services.JewelryItem.objects') as objects:
+            items = StockAlertService.get_low_stock_items()
+
+        objects.filter.assert_not_called()
+        self.assertEqual(items[0]['item'].sku, 'RNG-0007')
+        self.assertEqual(items[0]['value_at_risk'], Decimal('2000000.00'))
+
+    def test_reorder_suggestions_from_cached_rows(self):
+        suggestion, = StockAlertService.create_reorder_suggestions()
+
+        # Minimum stock + safety buffer + estimated demand without a forecast
+        self.assertEqual(suggestion['suggested_reorder_quantity'], 4 + 2 + 3)
+        self.assertEqual(suggestion['estimated_cost'], Decimal('18000000.00'))
+        self.assertEqual(suggestion['item'].id, 7)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, CACHE_PAYLOAD_STATS_ENABLED=False)
+@patch('zargar.reports.result_store.connection', MagicMock(schema_name='shop'))
+@patch('zargar.jewelry.services.connection', MagicMock(schema_name='shop'))
+class TopValueCacheTest(SimpleTestCase):
+    """Test that top value rankings go stale with inventory and gold price changes."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.row = {
+            'item': JewelryItem(id=7, name='Ring', sku='RNG-0007', barcode='ZRG-7'),
+            'current_total_value': Decimal('9000000.00'),
+            'current_gold_value': Decimal('7000000.00'),
+            'value_per_unit': Decimal('9000000.00'),
+            'category': 'Rings',
+            'has_serial': True,
+        }
+
+    def test_cache_hit_skips_database(self):
+        key = InventoryValuationService._top_value_key(InventoryValuationService.TOP_VALUE_CACHE_SIZE)
+        set_cached_records(key, [self.row], TOP_VALUE_CACHE_SCHEMA, 60)
+
+        with patch('zargar.jewelry.services.JewelryItem.objects') as objects:
+            items = InventoryValuationService.get_top_value_items(5)
+
+        objects.filter.assert_not_called()
+        self.assertEqual(items[0]['item'].sku, 'RNG-0007')
+
+    @patch('zargar.reports.result_store.transaction.on_commit', side_effect=lambda func: func())
+    def test_inventory_change_moves_every_ranking_size(self, on_commit):
+        keys = [InventoryValuationService._top_value_key(size) for size in (50, 100)]
+
+        InventoryValuationService.invalidate_cache()
+
+        for size, key in zip((50, 100), keys):
+            self.assertNotEqual(InventoryValuationService._top_value_key(size), key)
+
+    def test_gold_price_refresh_moves_ranking(self):
+        key = InventoryValuationService._top_value_key(50)
+
+        GoldPriceService.invalidate_cache(18)
+
+        self.assertNotEqual(InventoryValuationService._top_value_key(50), key)
@@ -0,0 +1,75 @@
+"""
+Tests for the shared per-process LRU and Redis generation counter.
+"""
+
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+
+from zargar.core.local_cache import GenerationCounter, LocalLRU
+
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'local-cache-tests',
+    }
+}
+
+
+@override_settings(TEST_LOCAL_CACHE_SIZE=2)
+class LocalLRUTest(SimpleTestCase):
+    """Test expiry, tags and eviction of the local LRU."""
+
+    def setUp(self):
+        self.lru = LocalLRU('TEST_LOCAL_CACHE_SIZE')
+
+    def test_least_recently_used_is_evicted(self):
+        self.lru.set('a', 1, 60)
+        self.lru.set('b', 2, 60)
+        self.lru.get('a')
+        self.lru.set('c', 3, 60)
+
+        self.assertEqual(list(self.lru), ['a', 'c'])
+
+    def test_expired_entries_are_dropped(self):
+        self.lru.set('a', 1, 0)
+
+        self.assertIsNone(self.lru.get('a'))
+        self.assertEqual(list(self.lru), [])
+
+    def test_tag_mismatch_is_a_miss(self):
+        self.lru.set('a', 1, 60, tag=3)
+
+        self.assertEqual(self.lru.get('a', tag=3), 1)
+        self.assertIsNone(self.lru.get('a', tag=4))
+
+
+@override_settings(CACHES=LOCMEM_CACHES, TEST_GENERATION_CHECK_INTERVAL=60)
+class GenerationCounterTest(SimpleTestCase):
+    """Test bumping and re-reading the generation."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.counter = GenerationCounter('test:generation', 'TEST_GENERATION_CHECK_INTERVAL', 'test')
+
+    def test_bump_is_seen_by_other_processes_after_reset(self):
+        other = GenerationCounter('test:generation', 'TEST_GENERATION_CHECK_INTERVAL', 'test')
+        self.assertEqual(other.get(), 0)
+
+        self.counter.bump()
+        self.counter.bump()
+
+        self.assertEqual(self.counter.get(), 2)
+        self.assertEqual(other.get(), 0)  # within the check interval
+        other.reset()
+        self.assertEqual(other.get(), 2)
+
+    @patch('zargar.core.local_cache.cache')
+    def test_redis_errors_keep_last_value(self, cache):
+        cache.get.side_effect = ConnectionError('down')
+        cache.add.side_effect = ConnectionError('down')
+
+        self.assertEqual(self.counter.get(), 0)
+        self.counter.bump()
+        self.assertEqual(self.counter.get(), 0)
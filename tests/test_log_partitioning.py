@@ -0,0 +1,200 @@
+"""
+Tests for the monthly partitioned log tables.
+"""
+from datetime import date, datetime, timezone as dt_timezone
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+
+from zargar.admin_panel.models import SystemHealthMetric
+from zargar.core import partitioning
+from zargar.core.notification_tasks import cleanup_tenant_notifications
+
+
+def make_connection():
+    connection = MagicMock()
+    connection.vendor = 'postgresql'
+    connection.ops.quote_name = lambda name: f'"{name}"'
+    cursor = connection.cursor.return_value.__enter__.return_value
+    return connection, cursor
+
+
+class MonthHelpersTest(SimpleTestCase):
+
+    def test_add_months_crosses_years(self):
+        self.assertEqual(partitioning.add_months(date(2024, 11, 1), 3), date(2025, 2, 1))
+        self.assertEqual(partitioning.add_months(date(2024, 1, 1), -1), date(2023, 12, 1))
+
+    def test_month_start_uses_utc(self):
+        moment = datetime(2024, 3, 31, 22, 0, tzinfo=dt_timezone.utc)
+        self.assertEqual(partitioning.month_start(timezone.localtime(moment)), date(2024, 3, 1))
+
+    def test_partition_name_and_bounds(self):
+        self.assertEqual(partitioning.partition_name('core_audit_log', date(2024, 2, 1)), 'core_audit_log_p202402')
+        start, end = partitioning.month_bounds(date(2024, 12, 1))
+        self.assertEqual((start.month, end.year, end.month), (12, 2025, 1))
+
+    def test_date_range_filter_is_half_open(self):
+        bounds = partitioning.date_range_filter('created_at', '2024-01-01', '2024-01-31')
+        self.assertEqual(set(bounds), {'created_at__gte', 'created_at__lt'})
+        self.assertEqual(timezone.localtime(bounds['created_at__lt']).date(), date(2024, 2, 1))
+        self.assertEqual(partitioning.date_range_filter('created_at'), {})
+
+
+@patch.object(partitioning, 'has_default_partition', return_value=False)
+@patch.object(partitioning, 'is_partitioned', return_value=True)
+class PartitionMaintenanceTest(SimpleTestCase):
+
+    @override_settings(LOG_PARTITION_MONTHS_AHEAD=2)
+    @patch.object(partitioning, 'create_partition', side_effect=lambda table, month, connection, column: month)
+    @patch.object(partitioning, 'list_partitions')
+    def test_ensure_partitions_creates_missing_months(self, list_partitions, create_partition, *_):
+        list_partitions.return_value = [('admin_system_health_metric_p202405', date(2024, 5, 1))]
+
+        created = partitioning.ensure_partitions(
+            SystemHealthMetric, now=datetime(2024, 5, 20, tzinfo=dt_timezone.utc), connection=MagicMock()
+        )
+
+        self.assertEqual(created, [date(2024, 6, 1), date(2024, 7, 1)])
+        self.assertEqual(create_partition.call_args.kwargs['column'], 'timestamp')
+
+    @override_settings(LOG_PARTITION_DETACH_EXPIRED=False)
+    @patch.object(partitioning, 'list_partitions')
+    def test_purge_drops_partitions_ending_before_cutoff(self, list_partitions, *_):
+        list_partitions.return_value = [
+            ('admin_system_health_metric_p202401', date(2024, 1, 1)),
+            ('admin_system_health_metric_p202402', date(2024, 2, 1)),
+            ('admin_system_health_metric_p202403', date(2024, 3, 1)),
+        ]
+        connection, cursor = make_connection()
+
+        result = partitioning.purge_before(
+            SystemHealthMetric, datetime(2024, 3, 10, tzinfo=dt_timezone.utc), connection=connection
+        )
+
+        self.assertEqual(result['partitions_dropped'], 2)
+        self.assertEqual(
+            [call.args[0] for call in cursor.execute.call_args_list],
+            ['DROP TABLE "admin_system_health_metric_p202401"', 'DROP TABLE "admin_system_health_metric_p202402"']
+        )
+
+    @patch.object(partitioning, 'list_partitions')
+    def test_purge_can_detach_for_archiving(self, list_partitions, *_):
+        list_partitions.return_value = [('admin_system_health_metric_p202401', date(2024, 1, 1))]
+        connection, cursor = make_connection()
+
+        result = partitioning.purge_before(
+            SystemHealthMetric, datetime(2024, 3, 10, tzinfo=dt_timezone.utc), detach=True, connection=connection
+        )
+
+        self.assertEqual(result['partitions_detached'], 1)
+        cursor.execute.assert_called_once_with(
+            'ALTER TABLE "admin_system_health_metric" DETACH PARTITION "admin_system_health_metric_p202401"'
+        )
+
+    @patch.object(partitioning, 'list_partitions', return_value=[])
+    def test_purge_deletes_expired_rows_of_default_partition(self, list_partitions, is_partitioned, has_default):
+        has_default.return_value = True
+        connection, cursor = make_connection()
+        cursor.rowcount = 4
+        cutoff = datetime(2024, 3, 10, tzinfo=dt_timezone.utc)
+
+        result = partitioning.purge_before(SystemHealthMetric, cutoff, connection=connection)
+
+        self.assertEqual(result['rows_deleted'], 4)
+        cursor.execute.assert_called_once_with(
+            'DELETE FROM "admin_system_health_metric_default" WHERE "timestamp" < %s', [cutoff]
+        )
+
+
+@patch.object(partitioning.transaction, 'atomic', MagicMock())
+@patch.object(partitioning, 'has_default_partition', return_value=True)
+class CreatePartitionTest(SimpleTestCase):
+
+    def test_empty_default_partition_is_left_alone(self, _):
+        connection, cursor = make_connection()
+        cursor.fetchone.return_value = None
+
+        partitioning.create_partition('core_audit_log', date(2024, 2, 1), connection, column='created_at')
+
+        statements = [call.args[0] for call in cursor.execute.call_args_list]
+        self.assertEqual(len(statements), 2)
+        self.assertTrue(statements[1].startswith('CREATE TABLE IF NOT EXISTS "core_audit_log_p202402"'))
+
+    def test_rows_in_default_partition_are_moved(self, _):
+        connection, cursor = make_connection()
+        cursor.fetchone.return_value = (1,)
+
+        name = partitioning.create_partition('core_audit_log', date(2024, 2, 1), connection, column='created_at')
+
+        self.assertEqual(name, 'core_audit_log_p202402')
+        statements = [call.args[0] for call in cursor.execute.call_args_list][1:]
+        self.assertEqual(statements[0], 'ALTER TABLE "core_audit_log" DETACH PARTITION "core_audit_log_default"')
+        self.assertIn('PARTITION OF "core_audit_log"', statements[1])
+        self.assertIn('DELETE FROM "core_audit_log_default"', statements[2])
+        self.assertIn('INSERT INTO "core_audit_log"', statements[2])
+        self.assertEqual(statements[3], 'ALTER TABLE "core_audit_log" ATTACH PARTITION "core_audit_log_default" DEFAULT')
+
+
+class RepartitionCloneTest(SimpleTestCase):
+
+    @override_settings(LOG_PARTITION_MONTHS_AHEAD=2)
+    @patch.object(partitioning, 'convert_to_partitioned')
+    @patch.object(partitioning, 'is_partitioned', return_value=False)
+    def test_plain_copies_are_converted(self, _, convert):
+        connection, cursor = make_connection()
+        cursor.fetchall.return_value = [
+            ('admin_system_health_metric_p202401',), ('admin_system_health_metric_default',),
+            ('admin_system_health_metric_rollup',),
+        ]
+
+        converted = partitioning.repartition_clone(['admin_panel.SystemHealthMetric'], connection=connection)
+
+        self.assertEqual(converted, ['admin_system_health_metric'])
+        dropped = [call.args[0] for call in cursor.execute.call_args_list if call.args[0].startswith('DROP')]
+        self.assertEqual(dropped, [
+            'DROP TABLE "admin_system_health_metric_p202401"', 'DROP TABLE "admin_system_health_metric_default"',
+        ])
+        convert.assert_called_once_with(
+            connection.schema_editor.return_value.__enter__.return_value, SystemHealthMetric, 'timestamp',
+            months_ahead=2
+        )
+
+    @patch.object(partitioning, 'convert_to_partitioned')
+    @patch.object(partitioning, 'is_partitioned', return_value=True)
+    def test_partitioned_tables_are_skipped(self, _, convert):
+        connection, _cursor = make_connection()
+
+        self.assertEqual(partitioning.repartition_clone(['admin_panel.SystemHealthMetric'], connection=connection), [])
+        convert.assert_not_called()
+
+
+class PurgeFallbackTest(SimpleTestCase):
+
+    @patch.object(partitioning, 'is_partitioned', return_value=False)
+    def test_unpartitioned_table_deletes_rows(self, _):
+        model = MagicMock()
+        model._meta.label = 'admin_panel.SystemHealthMetric'
+        model._base_manager.filter.return_value.delete.return_value = (7, {})
+        cutoff = timezone.now()
+
+        result = partitioning.purge_before(model, cutoff, connection=MagicMock())
+
+        model._base_manager.filter.assert_called_once_with(timestamp__lt=cutoff)
+        self.assertEqual(result['rows_deleted'], 7)
+
+
+class NotificationCleanupTest(SimpleTestCase):
+
+    @patch('zargar.core.notification_tasks.NotificationDeliveryLog.objects')
+    @patch('zargar.core.notification_tasks.purge_before')
+    def test_cleanup_drops_partitions_and_delivery_logs(self, purge_before, delivery_logs):
+        purge_before.return_value = {'partitions_dropped': 2, 'partitions_detached': 0, 'rows_deleted': 0}
+        delivery_logs.filter.return_value.delete.return_value = (15, {})
+
+        result = cleanup_tenant_notifications(MagicMock(name='tenant'))
+
+        self.assertEqual(result, {'expired_partitions': 2, 'deleted_notifications': 0, 'deleted_delivery_logs': 15})
+        cutoff = purge_before.call_args.args[1]
+        delivery_logs.filter.assert_called_once_with(timestamp__lt=cutoff)
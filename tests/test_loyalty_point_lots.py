@@ -0,0 +1,102 @@
+"""
+Tests for FIFO loyalty point lots.
+"""
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+from zargar.customers.models import Customer, CustomerLoyaltyPointLot
+
+
+def make_lot(pk, remaining, expires_in_days=None):
+    now = timezone.now()
+    return CustomerLoyaltyPointLot(
+        pk=pk,
+        customer_id=1,
+        points_earned=remaining,
+        points_remaining=remaining,
+        earned_at=now,
+        expires_at=now + timedelta(days=expires_in_days) if expires_in_days is not None else None,
+    )
+
+
+class ConsumeLotsTest(SimpleTestCase):
+
+    def test_fifo_order_puts_lots_without_expiry_last(self):
+        sql = str(CustomerLoyaltyPointLot.objects.open().fifo().query)
+        self.assertIn('"expires_at" ASC NULLS LAST', sql)
+        self.assertIn('"points_remaining" > 0', sql)
+
+    @patch.object(CustomerLoyaltyPointLot, 'objects')
+    def test_consume_takes_oldest_expiring_lots_first(self, lot_objects):
+        lots = [make_lot(1, 100, 10), make_lot(2, 50, 20), make_lot(3, 500)]
+        lot_objects.filter.return_value.open.return_value.fifo.return_value \
+            .select_for_update.return_value = lots
+
+        consumed = CustomerLoyaltyPointLot.consume(Customer(pk=1), 120)
+
+        self.assertEqual(consumed, lots[:2])
+        self.assertEqual([lot.points_remaining for lot in lots], [0, 30, 500])
+        lot_objects.bulk_update.assert_called_once_with(lots[:2], ['points_remaining', 'updated_at'])
+
+
+@patch('zargar.customers.models.transaction.atomic', MagicMock())
+class RedeemLoyaltyPointsTest(SimpleTestCase):
+
+    @patch('zargar.customers.models.CustomerLoyaltyTransaction.objects')
+    @patch.object(CustomerLoyaltyPointLot, 'consume')
+    @patch('zargar.customers.models.Customer.objects')
+    def test_insufficient_balance_touches_no_lots(self, customer_objects, consume, transaction_objects):
+        customer_objects.filter.return_value.update.return_value = 0
+
+        self.assertFalse(Customer(pk=1, loyalty_points=10).redeem_loyalty_points(50))
+
+        customer_objects.filter.assert_called_once_with(pk=1, loyalty_points__gte=50)
+        consume.assert_not_called()
+        transaction_objects.create.assert_not_called()
+
+    @patch('zargar.reports.result_store.invalidate_report_results')
+    @patch('zargar.core.sync_changes.record_changes')
+    @patch.object(Customer, 'refresh_from_db')
+    @patch('zargar.customers.models.CustomerLoyaltyTransaction.objects')
+    @patch.object(CustomerLoyaltyPointLot, 'consume')
+    @patch('zargar.customers.models.Customer.objects')
+    def test_redeem_decrements_balance_and_consumes_lots(self, customer_objects, consume,
+                                                         transaction_objects, refresh,
+                                                         record_changes, invalidate_results):
+        customer_objects.filter.return_value.update.return_value = 1
+        customer = Customer(pk=1, loyalty_points=100)
+
+        self.assertTrue(customer.redeem_loyalty_points(30, 'POS'))
+
+        consume.assert_called_once_with(customer, 30)
+        self.assertEqual(transaction_objects.create.call_args.kwargs['points'], -30)
+        refresh.assert_called_once()
+        record_changes.assert_called_once_with('customers', [1], 'update')
+        invalidate_results.assert_called_once_with('installments')
+
+
+@patch('zargar.customers.models.transaction.atomic', MagicMock())
+class AddLoyaltyPointsTest(SimpleTestCase):
+
+    @patch('zargar.reports.result_store.invalidate_report_results')
+    @patch('zargar.core.sync_changes.record_changes')
+    @patch.object(Customer, 'refresh_from_db')
+    @patch.object(CustomerLoyaltyPointLot, 'objects')
+    @patch('zargar.customers.models.CustomerLoyaltyTransaction.objects')
+    @patch('zargar.customers.models.Customer.objects')
+    def test_earn_creates_lot_with_given_expiry(self, customer_objects, transaction_objects,
+                                                lot_objects, refresh, record_changes, invalidate_results):
+        expires_at = timezone.now() + timedelta(days=365)
+
+        Customer(pk=1, loyalty_points=0).add_loyalty_points(250, 'Purchase', expires_at=expires_at)
+
+        lot = lot_objects.create.call_args.kwargs
+        self.assertEqual(lot['points_earned'], 250)
+        self.assertEqual(lot['points_remaining'], 250)
+        self.assertEqual(lot['expires_at'], expires_at)
+        self.assertEqual(lot['earned_transaction'], transaction_objects.create.return_value)
+        record_changes.assert_called_once_with('customers', [1], 'update')
+        invalidate_results.assert_called_once_with('installments')
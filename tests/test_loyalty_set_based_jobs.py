@@ -0,0 +1,156 @@
+"""
+Tests for the set-based loyalty tier and points expiry jobs.
+"""
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+
+from zargar.customers.engagement_services import CustomerLoyaltyService
+from zargar.customers.loyalty_models import CustomerLoyaltyProgram
+from zargar.customers.models import Customer
+
+
+def make_program():
+    return CustomerLoyaltyProgram(
+        name='Program',
+        name_persian='برنامه',
+        start_date=timezone.now().date(),
+        vip_threshold_bronze=Decimal('100'),
+        vip_threshold_silver=Decimal('200'),
+        vip_threshold_gold=Decimal('300'),
+        vip_threshold_platinum=Decimal('400'),
+        points_expire_months=12,
+    )
+
+
+class TierCaseTest(SimpleTestCase):
+
+    def test_thresholds_follow_get_vip_tier(self):
+        program = make_program()
+        for tier, threshold in program.get_tier_thresholds():
+            self.assertEqual(program.get_vip_tier(threshold), tier)
+        self.assertEqual(program.get_vip_tier(Decimal('99')), 'regular')
+
+    def test_tier_case_compiles_to_one_case(self):
+        program = make_program()
+        sql = str(Customer.objects.annotate(
+            new_tier=program.vip_tier_case(),
+            new_rank=program.vip_tier_rank_case(),
+        ).query)
+
+        self.assertEqual(sql.count('CASE WHEN'), 2)
+        self.assertIn('"total_purchases" >= 400', sql)
+        self.assertIn('ELSE regular END', sql)
+
+    def test_tier_rank_follows_tier_order(self):
+        sql = str(Customer.objects.annotate(
+            rank=CustomerLoyaltyProgram.tier_rank_case('customer_type')
+        ).query)
+        for rank, tier in enumerate(CustomerLoyaltyProgram.TIER_ORDER):
+            self.assertIn(f'= {tier} THEN {rank}', sql)
+
+
+class UpdateCustomerTiersTest(SimpleTestCase):
+
+    def setUp(self):
+        self.service = CustomerLoyaltyService(tenant=None)
+
+    def _customer(self, pk, current_tier, new_tier):
+        customer = Customer(pk=pk, first_name='A', last_name=str(pk))
+        customer.current_tier = current_tier
+        customer.new_tier = new_tier
+        customer.current_tier_record_id = None
+        return customer
+
+    @override_settings(LOYALTY_BATCH_SIZE=2)
+    def test_upgrades_are_written_in_batches(self):
+        upgrades = [
+            self._customer(1, 'regular', 'bronze'),
+            self._customer(2, 'bronze', 'gold'),
+            self._customer(3, 'silver', 'platinum'),
+        ]
+        customers = MagicMock()
+        customers.annotate.return_value.annotate.return_value.filter.return_value \
+            .only.return_value.order_by.return_value.iterator.return_value = iter(upgrades)
+
+        with patch.object(self.service, 'get_active_loyalty_program', return_value=make_program()), \
+                patch.object(self.service, '_apply_tier_upgrades') as apply_upgrades:
+            result = self.service.update_customer_tiers(customers)
+
+        self.assertEqual([len(call.args[1]) for call in apply_upgrades.call_args_list], [2, 1])
+        self.assertEqual(result[1], {'customer_id': 2, 'old_tier': 'bronze', 'new_tier': 'gold'})
+
+    def test_no_program_means_no_upgrades(self):
+        with patch.object(self.service, 'get_active_loyalty_program', return_value=None):
+            self.assertEqual(self.service.update_customer_tiers(MagicMock()), [])
+
+    @patch('zargar.customers.engagement_services.invalidate_report_results')
+    @patch('zargar.customers.engagement_services.record_changes')
+    @patch('zargar.customers.engagement_services.CustomerEngagementEvent.objects')
+    @patch('zargar.customers.engagement_services.CustomerVIPTier.objects')
+    @patch('zargar.customers.engagement_services.Customer.objects')
+    @patch('zargar.customers.engagement_services.transaction.atomic', MagicMock())
+    def test_applied_upgrades_are_recorded_for_sync(self, customer_objects, tier_objects, event_objects,
+                                                    record_changes, invalidate_results):
+        customers = [self._customer(1, 'regular', 'bronze'), self._customer(2, 'bronze', 'gold')]
+        for customer in customers:
+            customer.total_purchases = Decimal('0')
+            customer.loyalty_points = 0
+
+        self.service._apply_tier_upgrades(make_program(), customers)
+
+        customer_objects.filter.assert_called_once_with(pk__in=[1, 2])
+        record_changes.assert_called_once_with('customers', [1, 2], 'update')
+        invalidate_results.assert_called_once_with('installments')
+
+    def test_upgrade_event_is_built_unsaved(self):
+        event = self.service._build_vip_upgrade_event(self._customer(1, 'regular', 'gold'), 'gold', 'regular')
+        self.assertIsNone(event.pk)
+        self.assertEqual(event.event_type, 'vip_upgrade')
+        self.assertIn('طلایی', event.message_persian)
+
+
+@patch('zargar.customers.engagement_services.transaction.atomic', MagicMock())
+class ExpirePointsTest(SimpleTestCase):
+
+    @patch('zargar.customers.engagement_services.invalidate_report_results')
+    @patch('zargar.customers.engagement_services.record_changes')
+    @patch('zargar.customers.engagement_services.CustomerLoyaltyTransaction.objects')
+    @patch('zargar.customers.engagement_services.CustomerLoyaltyPointLot.objects')
+    @patch('zargar.customers.engagement_services.Customer.objects')
+    def test_expired_lots_are_emptied_and_written_in_bulk(self, customer_objects, lot_objects,
+                                                          transaction_objects, record_changes,
+                                                          invalidate_results):
+        now = timezone.now()
+        expired = lot_objects.expired.return_value
+        expired.values_list.return_value.order_by.return_value.distinct.return_value = [1, 2]
+        lots = expired.filter.return_value
+        lots.values.return_value.annotate.return_value.order_by.return_value \
+            .values_list.return_value = [(1, 300), (2, 800)]
+        customers = [Customer(pk=1, loyalty_points=1000), Customer(pk=2, loyalty_points=500)]
+        customer_objects.select_for_update.return_value.filter.return_value.only.return_value = customers
+
+        result = CustomerLoyaltyService(tenant=None).expire_points(now)
+
+        lot_objects.expired.assert_called_with(now)
+        expired.filter.assert_called_once_with(customer_id__in=[1, 2])
+        lots.update.assert_called_once_with(points_remaining=0, updated_at=now)
+        # Capped at the balance should lots and balance ever disagree
+        self.assertEqual(result, {'expired_points': 800, 'customers_affected': 2})
+        self.assertEqual([c.loyalty_points for c in customers], [700, 0])
+        customer_objects.bulk_update.assert_called_once_with(customers, ['loyalty_points', 'updated_at'])
+        ledger_rows = transaction_objects.bulk_create.call_args.args[0]
+        self.assertEqual([row.points for row in ledger_rows], [-300, -500])
+        self.assertTrue(all(row.transaction_type == 'expired' for row in ledger_rows))
+        record_changes.assert_called_once_with('customers', [1, 2], 'update')
+        invalidate_results.assert_called_once_with('installments')
+
+    def test_expired_query_is_an_open_lot_range(self):
+        from zargar.customers.models import CustomerLoyaltyPointLot
+
+        sql = str(CustomerLoyaltyPointLot.objects.expired(timezone.now()).query)
+
+        self.assertIn('"expires_at" <', sql)
+        self.assertIn('"points_remaining" > 0', sql)
@@ -0,0 +1,162 @@
+"""
+Tests for the shared PDF renderer and its content-hash cache.
+"""
+
+import os
+import tempfile
+import time
+from unittest import skipUnless
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase, override_settings
+
+from zargar.core import pdf_rendering
+from zargar.core.pdf_rendering import (
+    enqueue_pdf, get_cached_pdf, pdf_content_hash, prune_pdf_files, render_pdf,
+)
+from zargar.pos.services import REPORTLAB_AVAILABLE, render_invoice_pdf
+
+
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'pdf-rendering-tests',
+    }
+}
+
+INVOICE_DATA = {
+    'business_info': {'name': 'طلافروشی', 'address': 'تهران', 'phone': '۰۲۱', 'tax_id': '', 'economic_code': ''},
+    'customer_info': {'name': 'مشتری نقدی', 'phone': '', 'address': ''},
+    'invoice_details': {'invoice_number': 'INV-1', 'issue_date_shamsi': '1405/07/26', 'type_display': 'Sale'},
+    'line_items': [{
+        'name': 'انگشتر', 'sku': 'RNG-1', 'quantity': '۱',
+        'unit_price': '۱۰٬۰۰۰', 'line_total': '۱۰٬۰۰۰', 'gold_weight': '',
+    }],
+    'financial_totals': {
+        'subtotal': '۱۰٬۰۰۰', 'tax_amount': '۰', 'discount_amount': '۰',
+        'total_amount': '۱۰٬۰۰۰', 'total_in_words': 'ده هزار',
+    },
+    'notes': '',
+    'terms_and_conditions': '',
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES, PDF_CACHE_TIMEOUT=60, PDF_CACHE_MAX_BYTES=1024)
+@patch('zargar.core.pdf_rendering.connection', MagicMock(schema_name='shop'))
+class RenderPdfCacheTest(SimpleTestCase):
+    """Test that identical documents are rendered once."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.renderer = MagicMock(return_value=b'%PDF-1.7 invoice')
+        patcher = patch('zargar.core.pdf_rendering.import_string', return_value=self.renderer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_reprint_is_served_from_cache(self):
+        first = render_pdf('invoice', INVOICE_DATA)
+        second = render_pdf('invoice', dict(INVOICE_DATA))
+
+        self.assertEqual(first, second)
+        self.renderer.assert_called_once_with(INVOICE_DATA)
+        self.assertEqual(get_cached_pdf(pdf_content_hash('invoice', INVOICE_DATA)), first)
+
+    def test_changed_content_is_rendered_again(self):
+        render_pdf('invoice', INVOICE_DATA)
+        render_pdf('invoice', {**INVOICE_DATA, 'notes': 'تحویل فردا'})
+
+        self.assertEqual(self.renderer.call_count, 2)
+
+    def test_hash_depends_on_document_type(self):
+        self.assertNotEqual(pdf_content_hash('invoice', {}), pdf_content_hash('contract', {}))
+
+    def test_oversized_pdfs_are_stored_as_files(self):
+        self.renderer.return_value = b'x' * 2048
+        content_hash = pdf_content_hash('invoice', INVOICE_DATA)
+
+        with tempfile.TemporaryDirectory() as media_root, self.settings(MEDIA_ROOT=media_root):
+            render_pdf('invoice', INVOICE_DATA)
+
+            from django.core.cache import cache
+            self.assertIsNone(cache.get(f'pdf:shop:{content_hash}'))
+            self.assertEqual(get_cached_pdf(content_hash), b'x' * 2048)
+
+    def test_expired_files_are_ignored_and_pruned(self):
+        self.renderer.return_value = b'x' * 2048
+        content_hash = pdf_content_hash('invoice', INVOICE_DATA)
+
+        with tempfile.TemporaryDirectory() as media_root, self.settings(MEDIA_ROOT=media_root):
+            render_pdf('invoice', INVOICE_DATA)
+            file_path = os.path.join(media_root, 'pdf_cache', 'shop', f'{content_hash}.pdf')
+            old = time.time() - 120
+            os.utime(file_path, (old, old))
+
+            self.assertIsNone(get_cached_pdf(content_hash))
+            self.assertEqual(prune_pdf_files(), 1)
+            self.assertFalse(os.path.exists(file_path))
+
+
+@override_settings(PDF_TASK_QUEUE='pdf')
+@patch('zargar.core.pdf_rendering.connection', MagicMock(schema_name='shop'))
+class EnqueuePdfTest(SimpleTestCase):
+    """Test the PDF queue API."""
+
+    @patch('zargar.core.pdf_tasks.render_pdf_document')
+    def test_task_is_routed_to_pdf_queue(self, task):
+        task.apply_async.return_value.id = 'task-1'
+
+        self.assertEqual(enqueue_pdf('contract', 12), 'task-1')
+        task.apply_async.assert_called_once_with(args=('contract', 12, 'shop'), queue='pdf')
+
+    def test_unknown_document_type(self):
+        with self.assertRaises(ValueError):
+            enqueue_pdf('receipt', 1)
+
+
+@patch('zargar.reports.views.messages', MagicMock())
+class ReportPdfDownloadTest(SimpleTestCase):
+    """Test that report PDFs are served from the cache or queued."""
+
+    def setUp(self):
+        from zargar.reports.views import ReportDownloadView
+        self.view = ReportDownloadView()
+        self.report = MagicMock(report_id='3f1c', report_data={'report_type': 'trial_balance'})
+
+    @patch('zargar.reports.views.enqueue_pdf')
+    @patch('zargar.reports.views.get_cached_pdf', return_value=None)
+    def test_miss_is_queued_for_the_pdf_workers(self, get_cached, enqueue):
+        with patch('zargar.reports.views.redirect') as redirect:
+            response = self.view._pdf_response(MagicMock(), self.report, 'report.pdf')
+
+        enqueue.assert_called_once_with('report', '3f1c')
+        self.assertEqual(response, redirect.return_value)
+
+    @patch('zargar.reports.views.enqueue_pdf')
+    @patch('zargar.reports.views.get_cached_pdf', return_value=b'%PDF-1.7 report')
+    def test_rendered_pdf_is_served(self, get_cached, enqueue):
+        response = self.view._pdf_response(MagicMock(), self.report, 'report.pdf')
+
+        get_cached.assert_called_once_with(pdf_content_hash('report', self.report.report_data))
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF-1.7 report')
+        enqueue.assert_not_called()
+
+
+class WarmUpTest(SimpleTestCase):
+    """Test preloading resources in worker processes."""
+
+    def test_missing_libraries_do_not_break_warm_up(self):
+        with patch.object(pdf_rendering, 'WEASYPRINT_AVAILABLE', False), \
+                patch.object(pdf_rendering, 'REPORTLAB_AVAILABLE', False), \
+                patch.object(pdf_rendering, 'get_pdf_template', side_effect=Exception('missing')):
+            pdf_rendering.warm_up()
+
+
+@skipUnless(REPORTLAB_AVAILABLE, 'ReportLab not available')
+class InvoiceLayoutTest(SimpleTestCase):
+    """Test the ReportLab invoice layout."""
+
+    def test_invoice_renders_pdf(self):
+        pdf_content = render_invoice_pdf(INVOICE_DATA)
+
+        self.assertTrue(pdf_content.startswith(b'%PDF'))
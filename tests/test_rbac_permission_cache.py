@@ -0,0 +1,121 @@
+"""
+Tests for compiled super admin permission sets.
+"""
+
+import time
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+
+from zargar.admin_panel.models import SuperAdminPermission, SuperAdminRole, SuperAdminUserRole
+from zargar.admin_panel.permission_cache import CompiledPermissionCache
+
+
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'rbac-permission-cache-tests',
+    }
+}
+
+
+def compiled(version, codenames=('tenants.view',), next_expiry=None):
+    return {
+        'version': version,
+        'permission_ids': frozenset(range(len(codenames))),
+        'codenames': frozenset(codenames),
+        'next_expiry': next_expiry,
+    }
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CompiledPermissionCacheTest(SimpleTestCase):
+    """Test caching and invalidation of compiled permission sets."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.permission_cache = CompiledPermissionCache()
+
+        compile_patcher = patch.object(
+            CompiledPermissionCache, 'compile',
+            side_effect=lambda user_id, version: compiled(version)
+        )
+        self.mock_compile = compile_patcher.start()
+        self.addCleanup(compile_patcher.stop)
+
+    def test_repeated_checks_compile_once(self):
+        for _ in range(20):
+            self.assertTrue(self.permission_cache.has_permission(1, 'tenants.view'))
+
+        self.assertFalse(self.permission_cache.has_permission(1, 'tenants.delete'))
+        self.assertEqual(self.mock_compile.call_count, 1)
+        self.assertIsInstance(self.permission_cache.get_codenames(1), frozenset)
+
+    def test_redis_level_serves_other_processes(self):
+        self.permission_cache.get(1)
+
+        CompiledPermissionCache().get(1)
+
+        self.assertEqual(self.mock_compile.call_count, 1)
+
+    def test_bump_version_invalidates_all_processes(self):
+        other_process = CompiledPermissionCache()
+        self.permission_cache.get(1)
+        other_process.get(1)
+
+        self.permission_cache.bump_version()
+        other_process.clear_local()
+
+        self.assertEqual(other_process.get(1)['version'], 1)
+        self.assertEqual(self.mock_compile.call_count, 2)
+
+    def test_entry_recompiled_after_next_expiry(self):
+        self.mock_compile.side_effect = lambda user_id, version: compiled(
+            version, next_expiry=time.time() - 1
+        )
+
+        self.permission_cache.get(1)
+        self.permission_cache.get(1)
+
+        self.assertEqual(self.mock_compile.call_count, 2)
+
+    def test_legacy_payloads_are_ignored(self):
+        from django.core.cache import cache
+        cache.set('superadmin_permissions_1', {'tenants.delete'})
+
+        self.assertFalse(self.permission_cache.has_permission(1, 'tenants.delete'))
+        self.assertEqual(self.mock_compile.call_count, 1)
+
+
+class CompilePermissionsTest(SimpleTestCase):
+    """Test compiling permission sets from role rows."""
+
+    @patch.object(SuperAdminPermission, 'objects')
+    @patch.object(SuperAdminRole, 'objects')
+    @patch.object(SuperAdminUserRole, 'objects')
+    def test_compile_includes_parent_roles_and_skips_expired(self, user_roles, roles, permissions):
+        soon = timezone.now() + timedelta(hours=1)
+        user_roles.filter.return_value.values_list.return_value = [
+            (1, None),
+            (2, soon),
+            (3, timezone.now() - timedelta(days=1)),
+        ]
+        roles.filter.side_effect = [
+            MagicMock(**{'values_list.return_value': [4]}),
+            MagicMock(**{'values_list.return_value': []}),
+        ]
+        permissions.filter.return_value.values_list.return_value.distinct.return_value = [
+            (10, 'tenants.view'),
+            (11, 'billing.view'),
+        ]
+
+        result = CompiledPermissionCache.compile(7, version=3)
+
+        self.assertEqual(permissions.filter.call_args.kwargs['roles__id__in'], {1, 2, 4})
+        self.assertEqual(result['codenames'], frozenset({'tenants.view', 'billing.view'}))
+        self.assertEqual(result['permission_ids'], frozenset({10, 11}))
+        self.assertEqual(result['next_expiry'], soon.timestamp())
+        self.assertEqual(result['version'], 3)
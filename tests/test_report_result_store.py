@@ -0,0 +1,152 @@
+"""
+Tests for single-flight report generation and the persistent result store.
+"""
+
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase, override_settings
+
+from zargar.reports import result_store
+from zargar.reports.result_store import ReportResultStore, data_version, invalidate_report_results
+
+
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'report-result-store-tests',
+    }
+}
+
+
+class FakeGeneratedReport:
+    """In-memory stand-in for GeneratedReport rows."""
+
+    rows = {}
+
+    def __init__(self, **kwargs):
+        self.pk = None
+        self.report_id = 'RPT-TEST'
+        self.generation_started_at = None
+        self.__dict__.update(kwargs)
+
+    def save(self):
+        self.pk = self.pk or len(self.rows) + 1
+        self.rows[self.result_key] = self
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    REPORT_SINGLE_FLIGHT_LOCK_TIMEOUT=60,
+    REPORT_SINGLE_FLIGHT_WAIT=5,
+    REPORT_SINGLE_FLIGHT_POLL_INTERVAL=0.01,
+)
+class ReportResultStoreTest(SimpleTestCase):
+    """Test that identical report requests are computed once."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        FakeGeneratedReport.rows = {}
+
+        for target, value in (
+            ('connection', MagicMock(schema_name='shop')),
+            ('GeneratedReport', FakeGeneratedReport),
+        ):
+            patcher = patch.object(result_store, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        patcher = patch.object(ReportResultStore, 'find', side_effect=FakeGeneratedReport.rows.get)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # Outside a transaction, on_commit callbacks run immediately
+        patcher = patch.object(result_store.transaction, 'on_commit', side_effect=lambda func: func())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.engine = MagicMock()
+        self.engine.generate_report.return_value = {'report_type': 'trial_balance', 'total_debits': 10}
+        self.template = MagicMock(pk=1, report_type='trial_balance')
+        self.parameters = {'include_zero_balances': False}
+
+    def test_stored_result_is_reused(self):
+        store = ReportResultStore(self.engine)
+
+        first = store.get_or_generate(self.template, self.parameters)
+        second = store.get_or_generate(self.template, dict(self.parameters))
+
+        self.assertEqual(first, second)
+        self.engine.generate_report.assert_called_once()
+
+    def test_concurrent_requests_compute_once(self):
+        def slow_report(template, parameters):
+            time.sleep(0.2)
+            return {'report_type': 'trial_balance', 'total_debits': 10}
+
+        self.engine.generate_report.side_effect = slow_report
+        results = []
+
+        def request():
+            results.append(ReportResultStore(self.engine).get_or_generate(self.template, self.parameters))
+
+        threads = [threading.Thread(target=request) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.engine.generate_report.call_count, 1)
+        self.assertEqual(len(results), 4)
+        self.assertTrue(all(result == results[0] for result in results))
+
+    def test_ledger_change_invalidates_result(self):
+        store = ReportResultStore(self.engine)
+        store.get_or_generate(self.template, self.parameters)
+
+        invalidate_report_results('accounting')
+        store.get_or_generate(self.template, self.parameters)
+
+        self.assertEqual(self.engine.generate_report.call_count, 2)
+
+    def test_version_is_bumped_on_commit(self):
+        store = ReportResultStore(self.engine)
+        key = store.result_key(self.template, self.parameters)
+
+        with patch.object(result_store.transaction, 'on_commit') as on_commit:
+            invalidate_report_results('accounting')
+            # Uncommitted writes must not be hashed under a new version
+            self.assertEqual(store.result_key(self.template, self.parameters), key)
+            on_commit.call_args.args[0]()
+
+        self.assertNotEqual(store.result_key(self.template, self.parameters), key)
+
+    def test_other_domain_change_keeps_result(self):
+        store = ReportResultStore(self.engine)
+        key = store.result_key(self.template, self.parameters)
+
+        invalidate_report_results('inventory')
+
+        self.assertEqual(store.result_key(self.template, self.parameters), key)
+
+    def test_pending_record_is_completed_from_stored_result(self):
+        store = ReportResultStore(self.engine)
+        store.get_or_generate(self.template, self.parameters)
+        pending = FakeGeneratedReport(template=self.template, status='pending', result_key='')
+        pending.pk = 99
+
+        data = store.get_or_generate(self.template, self.parameters, pending)
+
+        self.assertEqual(pending.status, 'completed')
+        self.assertEqual(pending.report_data, data)
+        self.engine.generate_report.assert_called_once()
+
+    def test_data_version_is_seeded_per_tenant(self):
+        version = data_version('accounting')
+
+        with patch.object(result_store, 'connection', MagicMock(schema_name='other')):
+            invalidate_report_results('accounting')
+
+        self.assertEqual(data_version('accounting'), version)
@@ -0,0 +1,102 @@
+"""
+Tests for claiming due report schedules and dispatching them to workers.
+"""
+
+from datetime import timedelta
+from unittest.mock import MagicMock, call, patch
+
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+
+from zargar.reports.scheduler import ReportScheduler, generate_scheduled_report
+
+
+def make_schedule(schedule_id, template_id=1, parameters=None, frequency='daily'):
+    schedule = MagicMock(
+        id=schedule_id,
+        template_id=template_id,
+        frequency=frequency,
+        schedule_parameters=parameters or {},
+    )
+    schedule.name = f'schedule-{schedule_id}'
+    return schedule
+
+
+@patch('zargar.reports.scheduler.ComprehensiveReportingEngine', MagicMock())
+class ClaimDueSchedulesTest(SimpleTestCase):
+    """Test that due schedules are claimed atomically."""
+
+    @patch('zargar.reports.scheduler.transaction', MagicMock())
+    @patch('zargar.reports.scheduler.ReportSchedule')
+    def test_claimed_schedules_are_locked_and_advanced(self, schedule_model):
+        schedule = MagicMock(next_execution=timezone.now() - timedelta(hours=1))
+        locked = schedule_model.objects.select_for_update.return_value
+        locked.select_related.return_value.filter.return_value.order_by.return_value = [schedule]
+
+        claimed = ReportScheduler().claim_due_schedules(limit=10)
+
+        self.assertEqual(claimed, [schedule])
+        schedule_model.objects.select_for_update.assert_called_once_with(skip_locked=True, of=('self',))
+        schedule.calculate_next_execution.assert_called_once()
+        schedule.save.assert_called_once_with(update_fields=['last_execution', 'next_execution', 'updated_at'])
+
+
+@override_settings(REPORT_GENERATION_QUEUE='reports')
+@patch('zargar.reports.scheduler.connection', MagicMock(schema_name='shop'))
+@patch('zargar.reports.scheduler.ComprehensiveReportingEngine', MagicMock())
+class DispatchDueSchedulesTest(SimpleTestCase):
+    """Test that claimed schedules become independent generation tasks."""
+
+    @patch('zargar.reports.scheduler.generate_scheduled_report')
+    def test_identical_schedules_are_generated_once(self, task):
+        schedules = [
+            make_schedule(1, parameters={'include_zero_balances': True}),
+            make_schedule(2, parameters={'include_zero_balances': True}),
+            make_schedule(3, template_id=2),
+        ]
+
+        with patch.object(ReportScheduler, 'claim_due_schedules', return_value=schedules):
+            result = ReportScheduler().dispatch_due_schedules()
+
+        self.assertEqual(result, {'claimed_count': 3, 'dispatched_count': 2})
+        task.apply_async.assert_has_calls([
+            call(args=([1, 2], 'shop'), queue='reports'),
+            call(args=([3], 'shop'), queue='reports'),
+        ])
+
+
+@override_settings(REPORT_DELIVERY_QUEUE='report_delivery')
+@patch('zargar.reports.scheduler.schema_context', MagicMock())
+@patch('zargar.reports.scheduler.ComprehensiveReportingEngine', MagicMock())
+class GenerateScheduledReportTest(SimpleTestCase):
+    """Test the generation task of a schedule group."""
+
+    def setUp(self):
+        self.schedules = [make_schedule(1), make_schedule(2)]
+        patcher = patch('zargar.reports.scheduler.ReportSchedule')
+        schedule_model = patcher.start()
+        self.addCleanup(patcher.stop)
+        schedule_model.objects.select_related.return_value.filter.return_value.order_by.return_value = self.schedules
+
+    @patch('zargar.reports.scheduler.deliver_scheduled_report')
+    def test_delivery_is_queued_per_schedule(self, deliver_task):
+        report = MagicMock(id=7, report_id='RPT-7')
+
+        with patch.object(ReportScheduler, '_generate_scheduled_report', return_value=report) as generate:
+            self.assertEqual(generate_scheduled_report([1, 2], 'shop'), 'RPT-7')
+
+        generate.assert_called_once()
+        deliver_task.apply_async.assert_has_calls([
+            call(args=(1, 7, 'shop'), queue='report_delivery'),
+            call(args=(2, 7, 'shop'), queue='report_delivery'),
+        ])
+
+    @patch('zargar.reports.scheduler.deliver_scheduled_report')
+    def test_failed_generation_is_recorded_on_every_schedule(self, deliver_task):
+        with patch.object(ReportScheduler, '_generate_scheduled_report', side_effect=RuntimeError('boom')):
+            with self.assertRaises(RuntimeError):
+                generate_scheduled_report([1, 2], 'shop')
+
+        for schedule in self.schedules:
+            schedule.mark_execution.assert_called_once_with(success=False, advance=False)
+        deliver_task.apply_async.assert_not_called()
@@ -0,0 +1,165 @@
+"""
+Tests for the vectorised stock demand forecast.
+"""
+
+from datetime import date, timedelta
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from django.test import SimpleTestCase, override_settings
+
+from zargar.jewelry.forecasting import forecast_demand, seasonal_peak_mask
+from zargar.jewelry.models import Category, JewelryItem, StockForecast
+from zargar.jewelry.services import StockAlertService
+
+
+@override_settings(
+    STOCK_FORECAST_HALFLIFE_DAYS=30,
+    STOCK_FORECAST_SERVICE_Z=1.65,
+    STOCK_FORECAST_PEAK_RUN_UP_DAYS=21,
+)
+class ForecastDemandTest(SimpleTestCase):
+    """Test the forecast kernel on synthetic sales series."""
+
+    DAYS = 365
+
+    def forecast(self, sales, peak_mask=None, horizon_peaks=0, valid=None, quantity=None, minimum_stock=None):
+        sales = np.atleast_2d(np.asarray(sales, dtype=float))
+        items = sales.shape[0]
+        horizon_peak_mask = np.zeros(30, dtype=bool)
+        horizon_peak_mask[:horizon_peaks] = True
+        return forecast_demand(
+            sales,
+            np.ones_like(sales, dtype=bool) if valid is None else valid,
+            np.zeros(sales.shape[1], dtype=bool) if peak_mask is None else peak_mask,
+            horizon_peak_mask,
+            np.zeros(items) if quantity is None else quantity,
+            np.zeros(items) if minimum_stock is None else minimum_stock,
+        )
+
+    def test_steady_demand(self):
+        results = self.forecast(np.full(self.DAYS, 2.0), quantity=[10], minimum_stock=[5])
+
+        self.assertAlmostEqual(results['daily_demand'][0], 2.0)
+        self.assertAlmostEqual(results['forecast'][0], 60.0)
+        self.assertAlmostEqual(results['safety_stock'][0], 0.0)
+        self.assertAlmostEqual(results['days_of_cover'][0], 5.0)
+        self.assertEqual(results['suggested_reorder_quantity'][0], 55)
+
+    def test_items_are_independent(self):
+        sales = np.vstack([np.full(self.DAYS, 1.0), np.zeros(self.DAYS)])
+        results = self.forecast(sales, quantity=[0, 3], minimum_stock=[2, 2])
+
+        self.assertEqual(list(results['suggested_reorder_quantity']), [32, 0])
+        self.assertTrue(np.isnan(results['days_of_cover'][1]))
+
+    def test_seasonal_peak_raises_horizon_forecast(self):
+        peak_mask = np.zeros(self.DAYS, dtype=bool)
+        peak_mask[100:121] = True
+        sales = np.full(self.DAYS, 1.0)
+        sales[peak_mask] = 3.0
+
+        quiet = self.forecast(sales, peak_mask)
+        peak = self.forecast(sales, peak_mask, horizon_peaks=21)
+
+        self.assertGreater(quiet['seasonal_factor'][0], 2.5)
+        self.assertAlmostEqual(quiet['daily_demand'][0], 1.0, delta=0.1)
+        self.assertGreater(peak['forecast'][0], quiet['forecast'][0] * 2)
+
+    def test_seasonal_factor_shrinks_thin_history(self):
+        peak_mask = np.zeros(self.DAYS, dtype=bool)
+        peak_mask[100:121] = True
+        sales = np.zeros(self.DAYS)
+        sales[110] = 1.0
+
+        results = self.forecast(sales, peak_mask)
+
+        self.assertLess(results['seasonal_factor'][0], 1.5)
+
+    def test_days_before_item_existed_are_ignored(self):
+        sales = np.zeros(self.DAYS)
+        sales[-30:] = 1.0
+        valid = np.zeros((1, self.DAYS), dtype=bool)
+        valid[0, -30:] = True
+
+        results = self.forecast(sales, valid=valid)
+
+        self.assertAlmostEqual(results['daily_demand'][0], 1.0)
+
+    def test_recent_sales_weigh_more(self):
+        sales = np.zeros(self.DAYS)
+        sales[-30:] = 1.0
+
+        results = self.forecast(sales)
+
+        self.assertGreater(results['daily_demand'][0], 30 / self.DAYS)
+
+
+@override_settings(STOCK_FORECAST_PEAK_RUN_UP_DAYS=21)
+class SeasonalPeakMaskTest(SimpleTestCase):
+    """Test the Nowruz and Yalda run-up calendar."""
+
+    def test_run_ups_end_on_the_peaks(self):
+        start = date(2025, 1, 1)
+        mask = seasonal_peak_mask(start, 365)
+        peak_days = {start + timedelta(days=int(offset)) for offset in np.flatnonzero(mask)}
+
+        # 1 Farvardin 1404 and 30 Azar 1404
+        self.assertIn(date(2025, 3, 21), peak_days)
+        self.assertIn(date(2025, 3, 1), peak_days)
+        self.assertNotIn(date(2025, 3, 22), peak_days)
+        self.assertIn(date(2025, 12, 21), peak_days)
+        self.assertNotIn(date(2025, 12, 22), peak_days)
+        self.assertEqual(len(peak_days), 42)
+
+    def test_run_up_crossing_the_start(self):
+        mask = seasonal_peak_mask(date(2025, 3, 20), 5)
+
+        self.assertEqual(list(mask), [True, True, False, False, False])
+
+
+class StockAlertForecastTest(SimpleTestCase):
+    """Test that stock alerts read stored forecasts."""
+
+    def setUp(self):
+        self.item = JewelryItem(
+            id=7, quantity=1, minimum_stock=3, category=Category(name='Rings')
+        )
+
+    def test_stored_forecast_is_used(self):
+        self.item.stock_forecast = StockForecast(forecast_30d=7.2, suggested_reorder_quantity=12)
+
+        self.assertEqual(StockAlertService._estimate_monthly_demand(self.item), 8)
+
+    def test_category_estimate_without_forecast(self):
+        item = JewelryItem(quantity=1, minimum_stock=3, category=Category(name='Rings'))
+
+        self.assertEqual(StockAlertService._estimate_monthly_demand(item), 3)
+
+
+@patch('zargar.customers.models.transaction.atomic', MagicMock())
+class PurchaseOrderReceiptTest(SimpleTestCase):
+    """Test that receiving a purchase order only changes stock when asked to."""
+
+    def _item(self):
+        from zargar.customers.models import PurchaseOrderItem
+        item = PurchaseOrderItem(item_name='Ring', sku='RNG-1', quantity_ordered=10, quantity_received=0)
+        item.save = MagicMock()
+        item.receive_into_stock = MagicMock()
+        return item
+
+    def test_stock_is_left_alone_by_default(self):
+        item = self._item()
+
+        self.assertTrue(item.receive_quantity(4))
+
+        self.assertEqual(item.quantity_received, 4)
+        item.receive_into_stock.assert_not_called()
+
+    def test_stock_update_is_opt_in(self):
+        item = self._item()
+
+        item.receive_quantity(12, update_stock=True)
+
+        self.assertEqual(item.quantity_received, 10)
+        item.receive_into_stock.assert_called_once_with(10)
@@ -0,0 +1,147 @@
+"""
+Tests for streaming report exports.
+"""
+
+import csv
+import json
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+from unittest import skipUnless
+from unittest.mock import MagicMock, patch
+
+from django.http import StreamingHttpResponse
+from django.test import SimpleTestCase, override_settings
+
+from zargar.reports.exporters import OPENPYXL_AVAILABLE, ReportExporter
+from zargar.reports.services import ComprehensiveReportingEngine
+from zargar.reports.streaming import (
+    ROW_DATA, ROW_SECTION, ROW_TOTAL, ReportStream, report_stream_from_data
+)
+
+
+def synthetic_stream(row_count=1000, consumed=None):
+    """A stream whose rows are generated lazily and counted as they are consumed."""
+    totals = {}
+
+    def rows():
+        total = 0
+        yield ROW_SECTION, ['انگشتر', '', '']
+        for index in range(row_count):
+            if consumed is not None:
+                consumed.append(index)
+            total += index
+            yield ROW_DATA, [f'SKU-{index:05d}', f'Item {index}', Decimal(index)]
+        totals['total'] = total
+        yield ROW_TOTAL, ['', 'جمع کل', total]
+
+    return ReportStream(
+        {
+            'report_type': 'inventory_valuation',
+            'report_title_persian': 'گزارش ارزش‌گذاری موجودی',
+            'as_of_date_shamsi': '1405/07/26',
+            'generated_at_shamsi': '1405/07/26 10:00',
+        },
+        [('sku', 'کد کالا'), ('name', 'نام کالا'), ('value', 'ارزش کل')],
+        rows(), totals
+    )
+
+
+class StreamingExportTest(SimpleTestCase):
+    """Test that exporters consume report streams row by row."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.exporter = ReportExporter()
+
+    def test_csv_rows_are_generated_lazily(self):
+        consumed = []
+        chunks = self.exporter.iter_csv(synthetic_stream(consumed=consumed))
+
+        # Byte order mark, title, blank line, column labels, section, first item
+        for _ in range(6):
+            next(chunks)
+
+        self.assertEqual(len(consumed), 1)
+
+    def test_csv_file_layout(self):
+        file_path = self.exporter.export_stream(synthetic_stream(3), 'csv', 'report.csv')
+
+        with open(file_path, encoding='utf-8-sig', newline='') as f:
+            rows = list(csv.reader(f))
+
+        self.assertEqual(rows[0], ['گزارش ارزش‌گذاری موجودی', 'تاریخ: 1405/07/26 10:00'])
+        self.assertEqual(rows[2], ['کد کالا', 'نام کالا', 'ارزش کل'])
+        self.assertEqual(rows[4], ['SKU-00000', 'Item 0', '0'])
+        self.assertEqual(rows[-1], ['', 'جمع کل', '3'])
+
+    def test_jsonl_ends_with_streamed_totals(self):
+        lines = [json.loads(line) for line in self.exporter.iter_jsonl(synthetic_stream(10))]
+
+        self.assertEqual(lines[0]['type'], 'header')
+        self.assertEqual(lines[0]['columns']['sku'], 'کد کالا')
+        self.assertEqual(lines[2], {'type': 'data', 'sku': 'SKU-00000', 'name': 'Item 0', 'value': 0.0})
+        self.assertEqual(lines[-1], {'type': 'summary', 'total': 45})
+
+    def test_csv_download_is_streamed(self):
+        response = self.exporter.create_streaming_response(synthetic_stream(3), 'csv', 'report.csv')
+
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertIn('report.csv', response['Content-Disposition'])
+        content = b''.join(response.streaming_content).decode('utf-8')
+        self.assertTrue(content.startswith('\ufeff'))
+        self.assertIn('SKU-00002', content)
+
+    @skipUnless(OPENPYXL_AVAILABLE, 'openpyxl not available')
+    def test_excel_write_only_workbook(self):
+        import openpyxl
+
+        file_path = self.exporter.export_stream(synthetic_stream(50), 'excel', 'report.xlsx')
+
+        ws = openpyxl.load_workbook(file_path).active
+        rows = list(ws.iter_rows(values_only=True))
+        self.assertEqual(rows[0][0], 'گزارش ارزش‌گذاری موجودی')
+        self.assertTrue(ws.sheet_view.rightToLeft)
+        self.assertIn(('کد کالا', 'نام کالا', 'ارزش کل'), rows)
+        self.assertEqual(ws['A1'].style, 'report_title')
+
+    def test_report_data_layout_matches_exports(self):
+        report_data = {
+            'report_type': 'trial_balance',
+            'report_title_persian': 'تراز آزمایشی',
+            'accounts': [{
+                'account_code': '1101',
+                'account_name_persian': 'صندوق',
+                'account_type': 'asset',
+                'debit_amount_formatted': '۱۰۰',
+                'credit_amount_formatted': '۰',
+            }],
+            'total_debits_formatted': '۱۰۰',
+            'total_credits_formatted': '۰',
+        }
+
+        rows = list(report_stream_from_data(report_data))
+
+        self.assertEqual(rows[0], (ROW_DATA, ['1101', 'صندوق', 'asset', '۱۰۰', '۰']))
+        self.assertEqual(rows[-1], (ROW_TOTAL, ['جمع کل', '', '', '۱۰۰', '۰']))
+
+    def test_scheduled_export_keeps_summary_only(self):
+        engine = ComprehensiveReportingEngine()
+        template = MagicMock(report_type='inventory_valuation')
+
+        with patch.object(engine, 'stream_report', return_value=synthetic_stream(20)) as stream_report, \
+                patch.object(engine, 'generate_report') as generate_report:
+            file_path, report_data = self.exporter.export_template_report(
+                engine, template, {}, 'csv', 'scheduled.csv'
+            )
+
+        stream_report.assert_called_once_with(template, {})
+        generate_report.assert_not_called()
+        self.assertTrue(os.path.exists(file_path))
+        self.assertEqual(report_data['total'], 190)
+        self.assertTrue(report_data['streamed'])
@@ -0,0 +1,130 @@
+"""
+Tests for the delta sync change log.
+"""
+
+from unittest.mock import MagicMock, patch
+
+from django.db.models.signals import post_delete, post_save
+from django.test import SimpleTestCase, override_settings
+
+from zargar.core import sync_changes
+from zargar.core.sync_models import SyncChangeLog
+from zargar.customers.models import Customer
+from zargar.jewelry.models import JewelryItem
+
+
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'sync-change-log-tests',
+    }
+}
+
+
+def run_immediately(func):
+    func()
+
+
+@patch('zargar.core.sync_changes.transaction.on_commit', side_effect=run_immediately)
+@patch.object(SyncChangeLog.objects, 'bulk_create')
+class SyncChangeRecordingTest(SimpleTestCase):
+    """Test that model signals append change log entries."""
+
+    def recorded(self, bulk_create):
+        entries = bulk_create.call_args.args[0]
+        return [(entry.entity, entry.object_id, entry.action) for entry in entries]
+
+    def test_created_item_is_logged_as_insert(self, bulk_create, on_commit):
+        post_save.send(sender=JewelryItem, instance=JewelryItem(id=12), created=True)
+
+        self.assertEqual(self.recorded(bulk_create), [('jewelry_items', 12, 'insert')])
+
+    def test_updated_customer_is_logged_as_update(self, bulk_create, on_commit):
+        post_save.send(sender=Customer, instance=Customer(id=3), created=False)
+
+        self.assertEqual(self.recorded(bulk_create), [('customers', 3, 'update')])
+
+    def test_deleted_item_is_logged_as_delete(self, bulk_create, on_commit):
+        post_delete.send(sender=JewelryItem, instance=JewelryItem(id=12))
+
+        self.assertEqual(self.recorded(bulk_create), [('jewelry_items', 12, 'delete')])
+
+    def test_fixture_loading_is_ignored(self, bulk_create, on_commit):
+        post_save.send(sender=JewelryItem, instance=JewelryItem(id=12), created=True, raw=True)
+
+        bulk_create.assert_not_called()
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+@patch('zargar.core.sync_changes.connection')
+class SyncEpochTest(SimpleTestCase):
+    """Test that changes which cannot be logged force a full resync."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def test_epoch_starts_at_zero_and_bumps(self, connection):
+        connection.schema_name = 'shop'
+
+        self.assertEqual(sync_changes.get_sync_epoch(), 0)
+        sync_changes.bump_sync_epoch()
+        sync_changes.bump_sync_epoch()
+
+        self.assertEqual(sync_changes.get_sync_epoch(), 2)
+
+    @patch('zargar.core.sync_changes.transaction.on_commit', side_effect=run_immediately)
+    @patch.object(SyncChangeLog.objects, 'bulk_create', side_effect=RuntimeError('database gone'))
+    def test_failed_write_bumps_epoch_of_writing_tenant(self, bulk_create, on_commit, connection):
+        connection.schema_name = 'shop'
+
+        sync_changes.record_changes('customers', [3], 'update')
+
+        self.assertEqual(sync_changes.get_sync_epoch(), 1)
+        connection.schema_name = 'other_shop'
+        self.assertEqual(sync_changes.get_sync_epoch(), 0)
+
+
+class GetChangesTest(SimpleTestCase):
+    """Test paging through the change log."""
+
+    def page(self, rows, **kwargs):
+        entries = MagicMock()
+        entries.filter.return_value = entries
+        entries.order_by.return_value.values_list.return_value = rows
+
+        with patch('zargar.core.sync_changes._settled_entries', return_value=entries):
+            return sync_changes.get_changes(**kwargs)
+
+    def test_repeated_changes_collapse_to_latest(self):
+        changes, next_cursor, has_more = self.page([
+            (1, 'jewelry_items', 12, 'insert'),
+            (2, 'customers', 3, 'update'),
+            (3, 'jewelry_items', 12, 'update'),
+            (4, 'jewelry_items', 12, 'delete'),
+        ], since_cursor=0, limit=10)
+
+        self.assertEqual(changes, {
+            'jewelry_items': [(12, 'delete')],
+            'customers': [(3, 'update')],
+        })
+        self.assertEqual(next_cursor, 4)
+        self.assertFalse(has_more)
+
+    def test_page_is_cut_at_limit(self):
+        changes, next_cursor, has_more = self.page([
+            (5, 'customers', 1, 'insert'),
+            (6, 'customers', 2, 'insert'),
+            (7, 'customers', 3, 'insert'),
+        ], since_cursor=4, limit=2)
+
+        self.assertEqual(changes, {'customers': [(1, 'insert'), (2, 'insert')]})
+        self.assertEqual(next_cursor, 6)
+        self.assertTrue(has_more)
+
+    def test_empty_page_keeps_cursor(self):
+        changes, next_cursor, has_more = self.page([], since_cursor=42, limit=10)
+
+        self.assertEqual(changes, {})
+        self.assertEqual(next_cursor, 42)
+        self.assertFalse(has_more)
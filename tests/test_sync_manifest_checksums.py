@@ -0,0 +1,60 @@
+"""
+Tests for database-side sync manifest checksums.
+"""
+
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+from django.test import SimpleTestCase
+
+from zargar.api.offline_sync import (
+    _RowHash, _calculate_bucket_checksums, _calculate_manifest_entry, _format_checksum
+)
+from zargar.jewelry.models import Category
+
+
+class ManifestChecksumTest(SimpleTestCase):
+    """Test manifest entries computed from database aggregates."""
+
+    def test_row_hash_is_computed_in_sql(self):
+        sql = str(Category.objects.annotate(row_hash=_RowHash('id', 'name_persian')).query)
+
+        self.assertIn("md5(concat_ws('|', \"jewelry_category\".\"id\", \"jewelry_category\".\"name_persian\"))", sql)
+        self.assertIn('::bit(64)::bigint', sql)
+
+    def test_checksum_is_fixed_width_and_wraps(self):
+        self.assertEqual(_format_checksum(None), '0' * 16)
+        self.assertEqual(_format_checksum(Decimal(255)), '00000000000000ff')
+        self.assertEqual(_format_checksum(Decimal(-1)), 'f' * 16)
+        self.assertEqual(_format_checksum(Decimal(2 ** 64 + 1)), '0000000000000001')
+
+    def test_manifest_entry_uses_single_aggregate(self):
+        updated = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+        queryset = MagicMock()
+        queryset.order_by.return_value.aggregate.return_value = {
+            'count': 3, 'max_updated': updated, 'row_hash_sum': Decimal(16),
+        }
+
+        entry = _calculate_manifest_entry(queryset, ['id', 'updated_at'])
+
+        self.assertEqual(entry, {
+            'count': 3,
+            'last_updated': updated.isoformat(),
+            'checksum': '0000000000000010',
+        })
+        queryset.order_by.return_value.aggregate.assert_called_once()
+
+    def test_bucket_ranges(self):
+        queryset = MagicMock()
+        chain = queryset.order_by.return_value.annotate.return_value.values.return_value
+        chain.annotate.return_value.order_by.return_value = [
+            {'bucket': 0, 'count': 999, 'row_hash_sum': Decimal(1)},
+            {'bucket': 3, 'count': 10, 'row_hash_sum': Decimal(2)},
+        ]
+
+        buckets = _calculate_bucket_checksums(queryset, ['id'], 1000)
+
+        self.assertEqual(buckets[1], {
+            'bucket': 3, 'id_from': 3000, 'id_to': 3999, 'count': 10, 'checksum': '0000000000000002',
+        })
@@ -0,0 +1,129 @@
+"""
+Tests for compact, compressed and cacheable mobile sync payloads.
+"""
+
+import gzip
+import json
+import unittest
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase, override_settings
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+from zargar.api.offline_sync import download_sync_data
+from zargar.api.sync_payloads import MSGPACK_AVAILABLE, SyncPayloadMixin, columnize
+
+
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'sync-payload-tests',
+    }
+}
+
+ITEMS = [
+    {'id': index, 'name': f'انگشتر {index}', 'sku': f'RNG-{index:04d}', 'selling_price': '12500000.00'}
+    for index in range(50)
+]
+
+
+class ItemsView(SyncPayloadMixin, APIView):
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        return Response({'success': True, 'items': ITEMS})
+
+
+@override_settings(CACHES=LOCMEM_CACHES, SYNC_COMPRESSION_MIN_BYTES=512)
+class SyncPayloadTest(SimpleTestCase):
+    """Test ETags, compression and layouts of sync responses."""
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.view = ItemsView.as_view()
+
+    def test_columnize_homogeneous_lists(self):
+        data = columnize({'items': [{'id': 1, 'sku': 'A'}, {'id': 2, 'sku': 'B'}], 'mixed': [{'id': 1}, {'sku': 'B'}]})
+
+        self.assertEqual(data['items'], {'columns': ['id', 'sku'], 'rows': [[1, 'A'], [2, 'B']]})
+        self.assertEqual(data['mixed'], [{'id': 1}, {'sku': 'B'}])
+
+    def test_matching_etag_returns_not_modified(self):
+        response = self.view(self.factory.get('/items/'))
+        etag = response['ETag']
+
+        cached = self.view(self.factory.get('/items/', HTTP_IF_NONE_MATCH=etag))
+
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached['ETag'], etag)
+
+    def test_gzip_when_accepted(self):
+        plain = self.view(self.factory.get('/items/'))
+        compressed = self.view(self.factory.get('/items/', HTTP_ACCEPT_ENCODING='gzip'))
+
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+        self.assertLess(len(compressed.content), len(plain.content))
+        self.assertEqual(compressed['ETag'], plain['ETag'][:-1] + '-gzip"')
+
+        # The compressed representation's ETag also validates
+        revalidated = self.view(self.factory.get(
+            '/items/', HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=compressed['ETag']
+        ))
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_column_layout(self):
+        response = self.view(self.factory.get('/items/', {'layout': 'columns'}))
+        data = json.loads(response.content)
+
+        self.assertEqual(data['items']['columns'], ['id', 'name', 'sku', 'selling_price'])
+        self.assertEqual(len(data['items']['rows']), 50)
+
+    @unittest.skipUnless(MSGPACK_AVAILABLE, 'msgpack is not installed')
+    def test_msgpack_negotiation(self):
+        import msgpack
+
+        response = self.view(self.factory.get('/items/', HTTP_ACCEPT='application/x-msgpack'))
+
+        self.assertEqual(response['Content-Type'], 'application/x-msgpack')
+        self.assertEqual(msgpack.unpackb(response.content)['items'], ITEMS)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+@patch.object(download_sync_data.cls, 'throttle_classes', [])
+@patch.object(download_sync_data.cls, 'permission_classes', [AllowAny])
+@patch('zargar.api.offline_sync.connection', MagicMock(schema_name='shop'))
+class DownloadRetryTest(SimpleTestCase):
+    """Test that retried downloads are served from the cached snapshot."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.factory = APIRequestFactory()
+
+    def download(self, data):
+        request = self.factory.post('/sync/download/', data, format='json')
+        return json.loads(download_sync_data(request).content)
+
+    def test_retry_returns_original_snapshot(self):
+        first = self.download({'device_id': 'tablet-1'})
+
+        with patch('zargar.api.offline_sync.timezone.now') as now:
+            now.return_value.isoformat.return_value = 'later'
+            retry = self.download({'device_id': 'tablet-1', 'cache_key': first['cache_key']})
+
+        self.assertEqual(retry['cache_key'], first['cache_key'])
+        self.assertEqual(retry['sync_data'], first['sync_data'])
+
+    def test_key_of_another_tenant_is_not_served(self):
+        from django.core.cache import cache
+        cache.set('sync_data_other_shop_abc', {'data': {'customers': [{'id': 1}]}})
+
+        response = self.download({'cache_key': 'sync_data_other_shop_abc'})
+
+        self.assertEqual(response['sync_data']['data'], {})
+        self.assertTrue(response['cache_key'].startswith('sync_data_shop_'))
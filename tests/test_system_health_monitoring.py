@@ -23,7 +23,8 @@ from django.contrib.auth import get_user_model
 from django.db import connection
 from django.core.cache import cache
 
-from zargar.admin_panel.models import SystemHealthMetric, SystemHealthAlert
+from zargar.admin_panel.health_rollups import update_rollups
+from zargar.admin_panel.models import SystemHealthMetric, SystemHealthMetricRollup, SystemHealthAlert
 from zargar.admin_panel.system_health import SystemHealthMonitor, system_health_monitor
 from zargar.admin_panel.tasks import (
     collect_system_health_metrics,
@@ -273,6 +274,9 @@ class SystemHealthMonitorTest(TestCase):
         self.assertIsNotNone(response_time_metric)
         self.assertEqual(response_time_metric.value, 15.5)
         self.assertEqual(response_time_metric.unit, 'ms')
+        
+        # Every metric gets its minute, hour and day rollup buckets
+        self.assertEqual(SystemHealthMetricRollup.objects.count(), 6 * 3)
     
     def test_check_alert_thresholds(self):
         """Test alert threshold checking."""
@@ -317,31 +321,30 @@ class SystemHealthMonitorTest(TestCase):
         now = timezone.now()
         
         for i in range(5):
-            SystemHealthMetric.objects.create(
+            metric = SystemHealthMetric.objects.create(
                 metric_type='cpu_usage',
                 value=50.0 + i * 10,
                 unit='%',
                 timestamp=now - timedelta(hours=i),
                 hostname=self.monitor.hostname
             )
+            update_rollups(['cpu_usage'], metric.timestamp)
         
         # Get historical data
         historical_data = self.monitor.get_historical_metrics('cpu_usage', hours=6)
         
-        # Verify data
-        self.assertEqual(len(historical_data), 5)
-        
-        # Verify data structure
-        for data_point in historical_data:
-            self.assertIn('timestamp', data_point)
-            self.assertIn('value', data_point)
-            self.assertIn('unit', data_point)
-            self.assertEqual(data_point['unit'], '%')
+        # Verify data, served from minute buckets, oldest first
+        self.assertEqual(historical_data['resolution'], 'minute')
+        self.assertEqual(historical_data['unit'], '%')
+        self.assertEqual(historical_data['avg'], [90.0, 80.0, 70.0, 60.0, 50.0])
+        self.assertEqual(len(historical_data['timestamps']), 5)
+        self.assertEqual(historical_data['count'], [1] * 5)
     
     def test_cleanup_old_metrics(self):
         """Test cleanup of old metrics."""
-        # Create old and new metrics
-        old_time = timezone.now() - timedelta(days=35)
+        # Create old and new metrics; retention drops whole monthly
+        # partitions, so the old metric lies in a month fully past the cutoff
+        old_time = timezone.now() - timedelta(days=70)
         new_time = timezone.now() - timedelta(days=5)
         
         # Old metric (should be deleted)
@@ -863,23 +866,25 @@ class SystemHealthIntegrationTest(TransactionTestCase):
         base_time = timezone.now()
         
         for i in range(10):
-            SystemHealthMetric.objects.create(
+            metric = SystemHealthMetric.objects.create(
                 metric_type='cpu_usage',
                 value=50.0 + i * 5,
                 unit='%',
                 timestamp=base_time - timedelta(days=i * 5),
                 hostname='test'
             )
+            update_rollups(['cpu_usage'], metric.timestamp)
         
         # Verify all metrics exist
         self.assertEqual(SystemHealthMetric.objects.count(), 10)
         
         # Get historical data
         monitor = SystemHealthMonitor()
-        historical_data = monitor.get_historical_metrics('cpu_usage', hours=24*20)  # 20 days
+        historical_data = monitor.get_historical_metrics('cpu_usage', hours=24*18)  # 18 days
         
-        # Should get metrics from last 20 days (4 metrics)
-        self.assertEqual(len(historical_data), 4)
+        # Should get hourly buckets of the last 18 days (4 metrics)
+        self.assertEqual(historical_data['resolution'], 'hour')
+        self.assertEqual(len(historical_data['timestamps']), 4)
         
         # Test cleanup (keep 30 days)
         monitor.cleanup_old_metrics(days=30)
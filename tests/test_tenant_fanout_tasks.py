@@ -0,0 +1,148 @@
+"""
+Tests for the cross-tenant Celery fan-out primitive.
+"""
+
+from unittest.mock import patch, MagicMock
+
+from django.test import SimpleTestCase, override_settings
+
+from zargar.core.tenant_tasks import (
+    aggregate_tenant_results, map_over_tenants, run_tenant_subtask
+)
+
+
+def sample_tenant_job(tenant, multiplier=1):
+    """Per-tenant callable used by the tests."""
+    return {'processed_items': 2 * multiplier, 'label': tenant.schema_name}
+
+
+def failing_tenant_job(tenant):
+    """Per-tenant callable that always fails."""
+    raise RuntimeError('tenant database unavailable')
+
+
+class RunTenantSubtaskTest(SimpleTestCase):
+    """Test execution of a single tenant's share of a job."""
+    
+    def setUp(self):
+        tenant_model = MagicMock()
+        tenant_model.objects.get.side_effect = lambda schema_name: MagicMock(schema_name=schema_name)
+        
+        patcher_model = patch('zargar.core.tenant_tasks.get_tenant_model', return_value=tenant_model)
+        patcher_context = patch('zargar.core.tenant_tasks.tenant_context')
+        patcher_model.start()
+        patcher_context.start()
+        self.addCleanup(patcher_model.stop)
+        self.addCleanup(patcher_context.stop)
+    
+    def test_success_appends_outcome_to_lane(self):
+        """Successful tenants append their result to the lane outcomes."""
+        previous = [{'schema_name': 'shop_a', 'status': 'success', 'result': {}}]
+        
+        outcomes = run_tenant_subtask.run(
+            previous, 'shop_b', 'tests.test_tenant_fanout_tasks.sample_tenant_job',
+            [], {'multiplier': 3}, 'sample'
+        )
+        
+        self.assertEqual(len(outcomes), 2)
+        self.assertEqual(outcomes[1]['schema_name'], 'shop_b')
+        self.assertEqual(outcomes[1]['status'], 'success')
+        self.assertEqual(outcomes[1]['result']['processed_items'], 6)
+    
+    def test_failure_is_recorded_after_retries(self):
+        """A tenant that keeps failing is recorded without breaking the lane."""
+        with patch.object(run_tenant_subtask, 'max_retries', 0):
+            outcomes = run_tenant_subtask.run(
+                [], 'shop_c', 'tests.test_tenant_fanout_tasks.failing_tenant_job'
+            )
+        
+        self.assertEqual(outcomes[0]['status'], 'failed')
+        self.assertIn('tenant database unavailable', outcomes[0]['error'])
+
+
+class AggregateTenantResultsTest(SimpleTestCase):
+    """Test the chord callback summary."""
+    
+    def test_numeric_results_are_summed(self):
+        lane_results = [
+            [
+                {'schema_name': 'shop_a', 'status': 'success', 'result': {'sent_events': 2, 'note': 'x'}, 'duration_seconds': 0.5},
+                {'schema_name': 'shop_b', 'status': 'success', 'result': {'sent_events': 3}, 'duration_seconds': 2.0},
+            ],
+            [
+                {'schema_name': 'shop_c', 'status': 'timeout', 'error': 'Per-tenant time limit exceeded', 'duration_seconds': 300},
+            ],
+        ]
+        
+        summary = aggregate_tenant_results.run(lane_results, 'engagement')
+        
+        self.assertEqual(summary['status'], 'partial')
+        self.assertEqual(summary['sent_events'], 5)
+        self.assertNotIn('note', summary)
+        self.assertEqual(summary['tenants_processed'], 2)
+        self.assertEqual(summary['tenants_failed'], 1)
+        self.assertEqual(summary['failed_tenants'][0]['schema_name'], 'shop_c')
+        self.assertEqual(summary['slowest_tenant'], 'shop_c')
+
+
+@override_settings(TENANT_TASK_CONCURRENCY=2, TENANT_TASK_SOFT_TIME_LIMIT=60, TENANT_TASK_TIME_LIMIT=90)
+class MapOverTenantsTest(SimpleTestCase):
+    """Test dispatching of per-tenant subtasks."""
+    
+    @patch('zargar.core.tenant_tasks.chord')
+    def test_tenants_are_spread_over_bounded_lanes(self, mock_chord):
+        mock_chord.return_value.return_value = MagicMock(id='chord-id')
+        
+        result = map_over_tenants(
+            'tests.test_tenant_fanout_tasks.sample_tenant_job',
+            job_name='sample',
+            schemas=['shop_a', 'shop_b', 'shop_c', 'shop_d', 'shop_e']
+        )
+        
+        self.assertEqual(result['status'], 'dispatched')
+        self.assertEqual(result['tenant_count'], 5)
+        self.assertEqual(result['lanes'], 2)
+        self.assertEqual(result['aggregate_task_id'], 'chord-id')
+        
+        lanes = mock_chord.call_args.args[0]
+        self.assertEqual(len(lanes), 2)
+        
+        first_lane = lanes[0].tasks
+        self.assertEqual([sig.args[1] for sig in first_lane[:1]], ['shop_a'])
+        self.assertEqual(first_lane[0].args[0], [])
+        self.assertEqual([sig.args[0] for sig in first_lane[1:]], ['shop_c', 'shop_e'])
+        self.assertEqual(first_lane[0].options['soft_time_limit'], 60)
+        self.assertEqual(first_lane[0].options['time_limit'], 90)
+        
+        callback = mock_chord.return_value.call_args.args[0]
+        self.assertEqual(callback.args, ('sample',))
+        self.assertEqual(callback.options['link_error'][0]['task'],
+                         'zargar.core.tenant_tasks.report_tenant_job_failure')
+    
+    @patch('zargar.core.tenant_tasks.chord')
+    def test_no_tenants_skips_dispatch(self, mock_chord):
+        result = map_over_tenants('tests.test_tenant_fanout_tasks.sample_tenant_job', schemas=[])
+        
+        self.assertEqual(result['status'], 'skipped')
+        mock_chord.assert_not_called()
+
+
+class MonthlyInvoiceDispatchTest(SimpleTestCase):
+    """Test that monthly invoicing fans out over the tenants due."""
+    
+    @patch('zargar.tenants.billing_services.map_over_tenants')
+    @patch('zargar.tenants.billing_services.BillingWorkflow.get_due_monthly_billing_cycles')
+    def test_due_tenants_are_dispatched(self, due_cycles, mock_map):
+        from zargar.tenants.billing_services import BillingWorkflow
+        due_cycles.return_value.values_list.return_value = ['shop_a', 'shop_b']
+        mock_map.return_value = {'status': 'dispatched', 'tenant_count': 2}
+        
+        result = BillingWorkflow.generate_monthly_invoices_batch(admin_user_id=3)
+        
+        self.assertEqual(result['tenant_count'], 2)
+        mock_map.assert_called_once_with(
+            'zargar.tenants.tasks.generate_tenant_monthly_invoice',
+            job_name='monthly_invoices',
+            kwargs={'admin_user_id': 3},
+            schemas=['shop_a', 'shop_b']
+        )
@@ -3,13 +3,15 @@ Comprehensive tests for django-tenants implementation with real database operati
 This test suite validates complete tenant isolation and schema management.
 """
 import pytest
-from django.test import TestCase, TransactionTestCase
+from django.apps import apps
+from django.test import TestCase, TransactionTestCase, override_settings
 from django.db import connection, transaction
 from django.core.management import call_command
 from django.contrib.auth import get_user_model
 from django_tenants.utils import schema_context, tenant_context, get_public_schema_name
 from zargar.tenants.models import Tenant, Domain
 from zargar.core.models import AuditLog, SystemSettings
+from zargar.core.partitioning import TENANT_PARTITIONED_TABLES, is_partitioned, list_partitions
 import json
 import time
 
@@ -77,7 +79,7 @@ class DjangoTenantsImplementationTest(TestCase):
         
         # TenantMainMiddleware should be early in the middleware stack
         middleware_list = settings.MIDDLEWARE
-        tenant_middleware_index = middleware_list.index('django_tenants.middleware.main.TenantMainMiddleware')
+        tenant_middleware_index = middleware_list.index('zargar.tenants.middleware.CachedTenantMainMiddleware')
         
         # Should be after HealthCheckMiddleware but before most other middleware
         self.assertTrue(tenant_middleware_index < 5, "TenantMainMiddleware should be early in middleware stack")
@@ -342,6 +344,35 @@ class TenantMigrationComprehensiveTest(TransactionTestCase):
             self.assertTrue(len(auth_tables) > 0, "Auth tables should exist in tenant schema")
 
 
+@override_settings(
+    TENANT_TEMPLATE_PROVISIONING=True,
+    TENANT_CREATION_FAKES_MIGRATIONS=True,
+    TENANT_BASE_SCHEMA='tenant_template',
+    TENANT_TEMPLATE_SCHEMA='tenant_template',
+)
+class TemplateProvisioningPartitionTest(TransactionTestCase):
+    """
+    Tests that tenants cloned from the template keep partitioned log tables.
+    """
+    
+    def test_cloned_tenant_log_tables_are_partitioned(self):
+        """clone_schema() copies partitioned tables as plain ones; they are converted back."""
+        tenant = Tenant.objects.create(
+            name='Cloned Partition Tenant',
+            schema_name='cloned_partition_tenant',
+            owner_name='Clone Owner',
+            owner_email='clone@tenant.com'
+        )
+        
+        with schema_context(tenant.schema_name):
+            for label in TENANT_PARTITIONED_TABLES:
+                table = apps.get_model(label)._meta.db_table
+                self.assertTrue(is_partitioned(table), f"{table} should be partitioned in the cloned schema")
+                self.assertTrue(list_partitions(table), f"{table} should have monthly partitions")
+        
+        tenant.delete(force_drop=True)
+
+
 class TenantDataIsolationTest(TransactionTestCase):
     """
     Test complete data isolation between tenants using real database operations.
@@ -0,0 +1,127 @@
+"""
+Tests for the cached hostname -> tenant resolution middleware.
+"""
+
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+
+from zargar.tenants.cache import TenantResolutionCache, MISSING
+from zargar.tenants.middleware import CachedTenantMainMiddleware
+from zargar.tenants.models import Tenant, Domain
+from zargar.tenants.signals import invalidate_tenant_resolution
+
+
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tenant-resolution-tests',
+    }
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES, TENANT_RESOLUTION_LOCAL_CACHE_SIZE=2)
+class TenantResolutionCacheTest(SimpleTestCase):
+    """Test the two-level resolution cache."""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.resolution_cache = TenantResolutionCache()
+        self.tenant = Tenant(id=7, name='Aria Gold', schema_name='aria_gold', owner_name='Ali', owner_email='ali@example.com')
+    
+    def test_roundtrip_builds_fresh_instances(self):
+        self.resolution_cache.set('aria.zargar.com', self.tenant)
+        
+        first = self.resolution_cache.get('aria.zargar.com')
+        first.domain_url = 'aria.zargar.com'
+        second = self.resolution_cache.get('aria.zargar.com')
+        
+        self.assertEqual(first.schema_name, 'aria_gold')
+        self.assertEqual(second.pk, 7)
+        self.assertIsNot(first, second)
+        self.assertNotEqual(getattr(second, 'domain_url', None), 'aria.zargar.com')
+    
+    def test_redis_level_serves_other_processes(self):
+        self.resolution_cache.set('aria.zargar.com', self.tenant)
+        
+        other_process = TenantResolutionCache()
+        self.assertEqual(other_process.get('aria.zargar.com').schema_name, 'aria_gold')
+    
+    def test_invalidate_drops_both_levels(self):
+        self.resolution_cache.set('aria.zargar.com', self.tenant)
+        
+        self.resolution_cache.invalidate()
+        
+        self.assertIsNone(self.resolution_cache.get('aria.zargar.com'))
+        self.assertIsNone(TenantResolutionCache().get('aria.zargar.com'))
+    
+    @patch('zargar.tenants.signals.transaction.on_commit')
+    def test_signal_invalidates_on_commit(self, on_commit):
+        with patch('zargar.tenants.signals.tenant_resolution_cache', self.resolution_cache):
+            self.resolution_cache.set('aria.zargar.com', self.tenant)
+            invalidate_tenant_resolution(Tenant, self.tenant)
+            
+            # Still served until the suspension commits
+            self.assertEqual(self.resolution_cache.get('aria.zargar.com').pk, 7)
+            on_commit.call_args.args[0]()
+        
+        self.assertIsNone(self.resolution_cache.get('aria.zargar.com'))
+    
+    def test_missing_hosts_are_cached(self):
+        self.resolution_cache.set_missing('unknown.zargar.com')
+        
+        self.assertIs(self.resolution_cache.get('unknown.zargar.com'), MISSING)
+    
+    def test_local_lru_is_bounded(self):
+        for index in range(3):
+            self.resolution_cache.set(f'shop{index}.zargar.com', self.tenant)
+        
+        self.assertEqual(list(self.resolution_cache._local), ['shop1.zargar.com', 'shop2.zargar.com'])
+
+
+@override_settings(CACHES=LOCMEM_CACHES, TENANT_RESOLUTION_CACHE_ENABLED=True)
+class CachedTenantMainMiddlewareTest(SimpleTestCase):
+    """Test that the middleware only hits the database on a cache miss."""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        
+        patcher = patch('zargar.tenants.middleware.tenant_resolution_cache', TenantResolutionCache())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        
+        self.middleware = CachedTenantMainMiddleware(lambda request: None)
+        self.tenant = Tenant(id=3, name='Pars Jewelry', schema_name='pars', owner_name='Reza', owner_email='reza@example.com')
+    
+    @patch('django_tenants.middleware.main.TenantMainMiddleware.get_tenant')
+    def test_second_lookup_served_from_cache(self, mock_get_tenant):
+        mock_get_tenant.return_value = self.tenant
+        
+        first = self.middleware.get_tenant(Domain, 'pars.zargar.com')
+        second = self.middleware.get_tenant(Domain, 'pars.zargar.com')
+        
+        self.assertEqual(first.schema_name, 'pars')
+        self.assertEqual(second.schema_name, 'pars')
+        mock_get_tenant.assert_called_once()
+    
+    @patch('django_tenants.middleware.main.TenantMainMiddleware.get_tenant')
+    def test_unknown_host_still_404s(self, mock_get_tenant):
+        mock_get_tenant.side_effect = Domain.DoesNotExist
+        
+        for _ in range(2):
+            with self.assertRaises(Domain.DoesNotExist):
+                self.middleware.get_tenant(Domain, 'nope.zargar.com')
+        
+        mock_get_tenant.assert_called_once()
+    
+    @override_settings(TENANT_RESOLUTION_CACHE_ENABLED=False)
+    @patch('django_tenants.middleware.main.TenantMainMiddleware.get_tenant')
+    def test_disabled_cache_queries_every_time(self, mock_get_tenant):
+        mock_get_tenant.return_value = self.tenant
+        
+        self.middleware.get_tenant(Domain, 'pars.zargar.com')
+        self.middleware.get_tenant(Domain, 'pars.zargar.com')
+        
+        self.assertEqual(mock_get_tenant.call_count, 2)
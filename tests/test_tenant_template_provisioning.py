@@ -0,0 +1,165 @@
+"""
+Tests for provisioning tenants from the pre-migrated template schema.
+"""
+
+import io
+from unittest.mock import patch
+
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase, override_settings
+
+from zargar.tenants.models import Tenant
+from zargar.tenants.services import TenantProvisioningService, TenantTemplateSchemaService
+
+
+TEMPLATE_SETTINGS = {
+    'TENANT_TEMPLATE_PROVISIONING': True,
+    'TENANT_CREATION_FAKES_MIGRATIONS': True,
+    'TENANT_BASE_SCHEMA': 'tenant_template',
+    'TENANT_TEMPLATE_SCHEMA': 'tenant_template',
+}
+
+
+class TenantTemplateSchemaServiceTest(SimpleTestCase):
+    """Test template schema fingerprinting and rebuild decisions."""
+    
+    def setUp(self):
+        TenantTemplateSchemaService._fingerprint_cache = None
+    
+    def test_fingerprint_is_stable(self):
+        """Fingerprint is deterministic for the migrations on disk."""
+        first = TenantTemplateSchemaService.get_migration_fingerprint()
+        TenantTemplateSchemaService._fingerprint_cache = None
+        second = TenantTemplateSchemaService.get_migration_fingerprint()
+        
+        self.assertEqual(first, second)
+        self.assertEqual(len(first), 32)
+    
+    def test_fingerprint_changes_with_seed_version(self):
+        """Bumping the seed version forces a template rebuild."""
+        original = TenantTemplateSchemaService.get_migration_fingerprint()
+        TenantTemplateSchemaService._fingerprint_cache = None
+        
+        with patch.object(TenantTemplateSchemaService, 'SEED_VERSION', 999):
+            self.assertNotEqual(TenantTemplateSchemaService.get_migration_fingerprint(), original)
+    
+    def test_fingerprint_changes_with_migration_contents(self):
+        """Editing a migration in place makes the template stale."""
+        original = TenantTemplateSchemaService.get_migration_fingerprint()
+        TenantTemplateSchemaService._fingerprint_cache = None
+        
+        real_open = open
+        
+        def edited_open(path, *args, **kwargs):
+            if not str(path).endswith('0001_initial.py'):
+                return real_open(path, *args, **kwargs)
+            with real_open(path, 'rb') as migration_file:
+                return io.BytesIO(migration_file.read() + b'# edited\n')
+        
+        with patch('builtins.open', side_effect=edited_open):
+            self.assertNotEqual(TenantTemplateSchemaService.get_migration_fingerprint(), original)
+    
+    def test_invalid_schema_name_rejected(self):
+        """Template schema names go through django-tenants validation."""
+        with self.assertRaises(ValidationError):
+            TenantTemplateSchemaService('bad"; DROP SCHEMA public; --')
+    
+    @patch('zargar.tenants.services.connection')
+    def test_ensure_template_skips_current_template(self, mock_connection):
+        """A template stamped with the current fingerprint is not rebuilt."""
+        service = TenantTemplateSchemaService('tenant_template')
+        fingerprint = service.get_migration_fingerprint()
+        
+        with patch.object(service, 'get_stored_fingerprint', return_value=fingerprint), \
+             patch.object(service, 'rebuild_template') as mock_rebuild:
+            result = service.ensure_template()
+        
+        self.assertFalse(result['rebuilt'])
+        mock_rebuild.assert_not_called()
+    
+    @patch('zargar.tenants.services.connection')
+    def test_ensure_template_rebuilds_stale_template(self, mock_connection):
+        """A missing or stale fingerprint triggers a rebuild under the advisory lock."""
+        service = TenantTemplateSchemaService('tenant_template')
+        
+        with patch.object(service, 'get_stored_fingerprint', return_value='stale'), \
+             patch.object(service, 'rebuild_template', return_value={'success': True, 'rebuilt': True}) as mock_rebuild:
+            result = service.ensure_template()
+        
+        self.assertTrue(result['rebuilt'])
+        mock_rebuild.assert_called_once()
+        
+        executed = [call.args[0] for call in mock_connection.cursor.return_value.__enter__.return_value.execute.call_args_list]
+        self.assertTrue(any('pg_advisory_lock' in sql for sql in executed))
+        self.assertTrue(any('pg_advisory_unlock' in sql for sql in executed))
+    
+    @patch('zargar.tenants.services.connection')
+    def test_forced_rebuild_takes_advisory_lock(self, mock_connection):
+        """A forced rebuild of a current template still runs under the advisory lock."""
+        service = TenantTemplateSchemaService('tenant_template')
+        fingerprint = service.get_migration_fingerprint()
+        
+        with patch.object(service, 'get_stored_fingerprint', return_value=fingerprint), \
+             patch.object(service, 'rebuild_template', return_value={'success': True, 'rebuilt': True}) as mock_rebuild:
+            result = service.ensure_template(force=True)
+        
+        self.assertTrue(result['rebuilt'])
+        mock_rebuild.assert_called_once()
+        
+        executed = [call.args[0] for call in mock_connection.cursor.return_value.__enter__.return_value.execute.call_args_list]
+        self.assertIn('pg_advisory_lock', executed[0])
+        self.assertIn('pg_advisory_unlock', executed[-1])
+
+
+class TemplateProvisioningFlowTest(SimpleTestCase):
+    """Test that template provisioning skips the per-signup migration work."""
+    
+    @override_settings(**TEMPLATE_SETTINGS)
+    @patch('zargar.tenants.services.call_command')
+    def test_migrations_skipped_for_cloned_schema(self, mock_call_command):
+        """Cloned schemas already carry django_migrations state."""
+        tenant = Tenant(name='Template Shop', schema_name='template_shop')
+        
+        result = TenantProvisioningService()._run_tenant_migrations(tenant)
+        
+        self.assertTrue(result['success'])
+        self.assertIn('cloned from template', result['details'])
+        mock_call_command.assert_not_called()
+    
+    @override_settings(TENANT_TEMPLATE_PROVISIONING=False)
+    @patch('zargar.tenants.services.schema_context')
+    @patch('zargar.tenants.services.call_command')
+    def test_migrations_run_without_template(self, mock_call_command, mock_schema_context):
+        """Without template provisioning migrations still run per tenant."""
+        tenant = Tenant(name='Migrated Shop', schema_name='migrated_shop')
+        
+        result = TenantProvisioningService()._run_tenant_migrations(tenant)
+        
+        self.assertTrue(result['success'])
+        mock_call_command.assert_called_once()
+    
+    @override_settings(**TEMPLATE_SETTINGS)
+    def test_create_schema_refreshes_template(self):
+        """Saving a tenant refreshes the template before django-tenants clones it."""
+        tenant = Tenant(name='Clone Shop', schema_name='clone_shop')
+        
+        with patch.object(TenantTemplateSchemaService, 'ensure_template') as mock_ensure, \
+             patch.object(TenantTemplateSchemaService, 'repartition_clone') as mock_repartition, \
+             patch('django_tenants.models.TenantMixin.create_schema', return_value=None) as mock_create:
+            tenant.create_schema(check_if_exists=True)
+        
+        mock_ensure.assert_called_once()
+        mock_create.assert_called_once_with(check_if_exists=True, sync_schema=True, verbosity=1)
+        mock_repartition.assert_called_once_with('clone_shop')
+    
+    @override_settings(**TEMPLATE_SETTINGS)
+    def test_existing_schema_is_not_repartitioned(self):
+        """Nothing is cloned, so nothing is repartitioned, when the schema already exists."""
+        tenant = Tenant(name='Clone Shop', schema_name='clone_shop')
+        
+        with patch.object(TenantTemplateSchemaService, 'ensure_template'), \
+             patch.object(TenantTemplateSchemaService, 'repartition_clone') as mock_repartition, \
+             patch('django_tenants.models.TenantMixin.create_schema', return_value=False):
+            self.assertFalse(tenant.create_schema(check_if_exists=True))
+        
+        mock_repartition.assert_not_called()
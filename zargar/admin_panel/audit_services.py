@@ -14,6 +14,7 @@ import json
 import logging
 from typing import Dict, List, Optional, Tuple, Any
 
+from zargar.core.partitioning import date_range_filter
 from zargar.tenants.admin_models import PublicAuditLog
 from zargar.core.models import User
 
@@ -70,18 +71,17 @@ class AuditLogFilterService:
         if filters.get('ip_address'):
             queryset = queryset.filter(ip_address__icontains=filters['ip_address'])
         
-        # Date range filters
+        # Date range filters, as plain created_at bounds so only the
+        # matching monthly partitions are scanned
         if filters.get('date_from'):
             try:
-                date_from = datetime.strptime(filters['date_from'], '%Y-%m-%d').date()
-                queryset = queryset.filter(created_at__date__gte=date_from)
+                queryset = queryset.filter(**date_range_filter('created_at', date_from=filters['date_from']))
             except ValueError:
                 pass
         
         if filters.get('date_to'):
             try:
-                date_to = datetime.strptime(filters['date_to'], '%Y-%m-%d').date()
-                queryset = queryset.filter(created_at__date__lte=date_to)
+                queryset = queryset.filter(**date_range_filter('created_at', date_to=filters['date_to']))
             except ValueError:
                 pass
         
@@ -0,0 +1,340 @@
+"""
+Downsampled rollups of the system health metrics.
+
+Every collection cycle writes its metrics in one insert and then refreshes
+the minute, hour and day buckets containing them in SystemHealthMetricRollup.
+The minute bucket is recomputed from the raw metrics of that minute; the hour
+bucket from its stored minute buckets and the day bucket from its hours, so
+each level is folded from a bounded number of rows and no batch job ever
+rescans the raw table. Each bucket holds the sample count, min, max, average
+and 95th percentile.
+
+The percentile is exact for minute buckets. Hour and day buckets take the
+sample-weighted 95th percentile of the finer buckets' percentiles, which is
+close for the steady series collected here without keeping every sample.
+
+Minute buckets are kept for HEALTH_METRIC_MINUTE_ROLLUP_RETENTION_DAYS and
+hourly ones for HEALTH_METRIC_HOUR_ROLLUP_RETENTION_DAYS; daily buckets are
+kept forever. get_metric_series() picks the resolution from the window size
+and returns the series as parallel arrays for charting. backfill_rollups()
+builds the buckets for metrics stored before the rollups existed.
+"""
+import logging
+import math
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from zargar.core.time_buckets import bucket_end, bucket_start
+
+from .models import SystemHealthMetric, SystemHealthMetricRollup
+
+logger = logging.getLogger(__name__)
+
+RESOLUTIONS = ('minute', 'hour', 'day')
+
+# Resolution of the buckets each coarser resolution is folded from
+FINER = {'hour': 'minute', 'day': 'hour'}
+
+STAT_FIELDS = ('sample_count', 'min_value', 'max_value', 'avg_value', 'p95_value')
+
+
+def percentile(values: Iterable[float], fraction: float = 0.95,
+               weights: Optional[Iterable[int]] = None) -> Optional[float]:
+    """
+    Nearest-rank percentile of values.
+
+    Args:
+        values: Values to rank
+        fraction: Percentile as a fraction, 0.95 for the 95th
+        weights: Number of samples each value stands for, 1 each if omitted
+
+    Returns:
+        The percentile, or None if there are no values
+    """
+    values = list(values)
+    weights = [1] * len(values) if weights is None else list(weights)
+    total = sum(weights)
+    if not total:
+        return None
+
+    rank = max(1, math.ceil(fraction * total))
+    seen = 0
+    for value, weight in sorted(zip(values, weights)):
+        seen += weight
+        if seen >= rank:
+            return value
+    return None
+
+
+def summarize(values: List[float]) -> Optional[Dict[str, Any]]:
+    """Bucket statistics of raw metric values, or None if there are none."""
+    if not values:
+        return None
+    return {
+        'sample_count': len(values),
+        'min_value': min(values),
+        'max_value': max(values),
+        'avg_value': sum(values) / len(values),
+        'p95_value': percentile(values),
+    }
+
+
+def fold_buckets(buckets: Iterable[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Combine finer buckets into one bucket.
+
+    Args:
+        buckets: Dicts with the STAT_FIELDS
+
+    Returns:
+        Dict with the combined STAT_FIELDS, or None if empty
+    """
+    buckets = [bucket for bucket in buckets if bucket['sample_count']]
+    if not buckets:
+        return None
+
+    sample_count = sum(bucket['sample_count'] for bucket in buckets)
+    return {
+        'sample_count': sample_count,
+        'min_value': min(bucket['min_value'] for bucket in buckets),
+        'max_value': max(bucket['max_value'] for bucket in buckets),
+        'avg_value': sum(bucket['avg_value'] * bucket['sample_count'] for bucket in buckets) / sample_count,
+        'p95_value': percentile(
+            [bucket['p95_value'] for bucket in buckets],
+            weights=[bucket['sample_count'] for bucket in buckets]
+        ),
+    }
+
+
+def update_rollups(metric_types: Iterable[str], moment: datetime) -> int:
+    """
+    Refresh the minute, hour and day buckets of metrics containing moment.
+
+    Args:
+        metric_types: Metric types just stored
+        moment: Timestamp of the stored metrics
+
+    Returns:
+        Number of buckets written
+    """
+    metric_types = sorted(set(metric_types))
+    if not metric_types:
+        return 0
+
+    starts = {resolution: bucket_start(moment, resolution) for resolution in RESOLUTIONS}
+    current = {resolution: {} for resolution in RESOLUTIONS}
+    units = {}
+
+    values = {}
+    rows = SystemHealthMetric.objects.filter(
+        metric_type__in=metric_types,
+        timestamp__gte=starts['minute'],
+        timestamp__lt=bucket_end(starts['minute'], 'minute')
+    ).values_list('metric_type', 'value', 'unit')
+    for metric_type, value, unit in rows:
+        values.setdefault(metric_type, []).append(value)
+        units[metric_type] = unit
+
+    for metric_type, metric_values in values.items():
+        current['minute'][metric_type] = summarize(metric_values)
+
+    # Stored finer buckets of the period, except the one just recomputed
+    for resolution in ('hour', 'day'):
+        finer = FINER[resolution]
+        buckets = {metric_type: [stats] for metric_type, stats in current[finer].items()}
+        rows = SystemHealthMetricRollup.objects.filter(
+            resolution=finer,
+            metric_type__in=metric_types,
+            bucket_start__gte=starts[resolution],
+            bucket_start__lt=bucket_end(starts[resolution], resolution)
+        ).exclude(bucket_start=starts[finer]).values('metric_type', 'unit', *STAT_FIELDS)
+        for row in rows:
+            buckets.setdefault(row['metric_type'], []).append(row)
+            units.setdefault(row['metric_type'], row['unit'])
+
+        for metric_type, finer_buckets in buckets.items():
+            folded = fold_buckets(finer_buckets)
+            if folded is not None:
+                current[resolution][metric_type] = folded
+
+    rollups = [
+        SystemHealthMetricRollup(
+            resolution=resolution,
+            metric_type=metric_type,
+            bucket_start=starts[resolution],
+            unit=units[metric_type],
+            **stats
+        )
+        for resolution in RESOLUTIONS
+        for metric_type, stats in current[resolution].items()
+    ]
+    if rollups:
+        _write_rollups(rollups)
+    return len(rollups)
+
+
+def _write_rollups(rollups: List[SystemHealthMetricRollup], batch_size: Optional[int] = None) -> None:
+    SystemHealthMetricRollup.objects.bulk_create(
+        rollups,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['resolution', 'metric_type', 'bucket_start'],
+        update_fields=['unit', 'updated_at', *STAT_FIELDS]
+    )
+
+
+def _minute_buckets(rows: Iterable[tuple]) -> Iterable[tuple]:
+    """Yield (start, unit, stats) per minute from (timestamp, value, unit) rows ordered by time."""
+    start, unit, values = None, '', []
+    for timestamp, value, row_unit in rows:
+        minute = bucket_start(timestamp, 'minute')
+        if minute != start and values:
+            yield start, unit, summarize(values)
+            values = []
+        start, unit = minute, row_unit
+        values.append(value)
+    if values:
+        yield start, unit, summarize(values)
+
+
+def backfill_rollups(since: Optional[datetime] = None, batch_size: int = 1000) -> Dict[str, int]:
+    """
+    Build the rollups of metrics already stored, one metric type at a time.
+
+    Hour and day buckets are folded in memory from the minute buckets, so the
+    raw metrics are read once. Minute and hour buckets past their retention
+    are not written.
+
+    Args:
+        since: Only rebuild from this moment, rounded down to its day;
+            everything if omitted
+        batch_size: Rows read and written per query
+
+    Returns:
+        Number of buckets written per resolution
+    """
+    now = timezone.now()
+    keep_after = {
+        'minute': now - timedelta(days=settings.HEALTH_METRIC_MINUTE_ROLLUP_RETENTION_DAYS),
+        'hour': now - timedelta(days=settings.HEALTH_METRIC_HOUR_ROLLUP_RETENTION_DAYS),
+    }
+
+    metrics = SystemHealthMetric.objects.all()
+    if since is not None:
+        metrics = metrics.filter(timestamp__gte=bucket_start(since, 'day'))
+
+    written = {resolution: 0 for resolution in RESOLUTIONS}
+    metric_types = metrics.order_by().values_list('metric_type', flat=True).distinct()
+
+    for metric_type in sorted(metric_types):
+        rows = metrics.filter(metric_type=metric_type).order_by('timestamp').values_list(
+            'timestamp', 'value', 'unit'
+        ).iterator(chunk_size=batch_size)
+
+        buckets = {resolution: {} for resolution in RESOLUTIONS}
+        unit = ''
+        for start, unit, stats in _minute_buckets(rows):
+            buckets['minute'][start] = stats
+
+        for resolution in ('hour', 'day'):
+            grouped = {}
+            for start, stats in buckets[FINER[resolution]].items():
+                grouped.setdefault(bucket_start(start, resolution), []).append(stats)
+            buckets[resolution] = {start: fold_buckets(group) for start, group in grouped.items()}
+
+        rollups = [
+            SystemHealthMetricRollup(
+                resolution=resolution,
+                metric_type=metric_type,
+                bucket_start=start,
+                unit=unit,
+                **stats
+            )
+            for resolution in RESOLUTIONS
+            for start, stats in buckets[resolution].items()
+            if resolution == 'day' or start >= keep_after[resolution]
+        ]
+        if rollups:
+            _write_rollups(rollups, batch_size)
+        for rollup in rollups:
+            written[rollup.resolution] += 1
+
+        logger.info(f"Backfilled {len(rollups)} {metric_type} rollups")
+
+    return written
+
+
+def prune_rollups() -> Dict[str, int]:
+    """Delete minute and hour buckets past their retention."""
+    now = timezone.now()
+    retention = {
+        'minute': timedelta(days=settings.HEALTH_METRIC_MINUTE_ROLLUP_RETENTION_DAYS),
+        'hour': timedelta(days=settings.HEALTH_METRIC_HOUR_ROLLUP_RETENTION_DAYS),
+    }
+
+    deleted = {}
+    for resolution, keep in retention.items():
+        deleted[resolution], _ = SystemHealthMetricRollup.objects.filter(
+            resolution=resolution, bucket_start__lt=now - keep
+        ).delete()
+    return deleted
+
+
+def choose_resolution(hours: float) -> str:
+    """Finest retained resolution that keeps a window of hours to a reasonable size."""
+    if (hours <= settings.HEALTH_METRIC_MINUTE_MAX_HOURS
+            and hours <= settings.HEALTH_METRIC_MINUTE_ROLLUP_RETENTION_DAYS * 24):
+        return 'minute'
+    if (hours <= settings.HEALTH_METRIC_HOUR_MAX_HOURS
+            and hours <= settings.HEALTH_METRIC_HOUR_ROLLUP_RETENTION_DAYS * 24):
+        return 'hour'
+    return 'day'
+
+
+def get_metric_series(metric_type: str, hours: float = 24, resolution: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Rolled up series of a metric over the last hours.
+
+    Args:
+        metric_type: Type of metric to retrieve
+        hours: Size of the window, ending now
+        resolution: 'minute', 'hour' or 'day'; chosen from the window if omitted
+
+    Returns:
+        Dict with metric_type, unit, resolution and parallel arrays of bucket
+        timestamps (epoch seconds), avg, min, max, p95 and count, oldest first
+    """
+    resolution = resolution or choose_resolution(hours)
+    since = timezone.now() - timedelta(hours=hours)
+
+    series = {
+        'metric_type': metric_type,
+        'unit': '',
+        'resolution': resolution,
+        'timestamps': [],
+        'avg': [],
+        'min': [],
+        'max': [],
+        'p95': [],
+        'count': [],
+    }
+
+    rows = SystemHealthMetricRollup.objects.filter(
+        resolution=resolution,
+        metric_type=metric_type,
+        bucket_start__gte=bucket_start(since, resolution)
+    ).order_by('bucket_start').values_list('bucket_start', 'unit', *STAT_FIELDS)
+
+    for start, unit, sample_count, min_value, max_value, avg_value, p95_value in rows:
+        series['unit'] = unit
+        series['timestamps'].append(int(start.timestamp()))
+        series['avg'].append(round(avg_value, 2))
+        series['min'].append(round(min_value, 2))
+        series['max'].append(round(max_value, 2))
+        series['p95'].append(round(p95_value, 2))
+        series['count'].append(sample_count)
+
+    return series
@@ -0,0 +1,40 @@
+"""
+Management command to build the health metric rollups from stored metrics.
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from zargar.admin_panel.health_rollups import backfill_rollups
+
+
+class Command(BaseCommand):
+    help = 'Build minute, hour and day health metric rollups from existing SystemHealthMetric rows'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            help='Only rebuild the last N days (default: all stored metrics)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows read and written per query',
+        )
+    
+    def handle(self, *args, **options):
+        since = None
+        if options['days']:
+            since = timezone.now() - timedelta(days=options['days'])
+        
+        written = backfill_rollups(since=since, batch_size=options['batch_size'])
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✓ Wrote {written['minute']} minute, {written['hour']} hour "
+                f"and {written['day']} day rollups"
+            )
+        )
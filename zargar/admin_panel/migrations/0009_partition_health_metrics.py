@@ -0,0 +1,26 @@
+# Generated by Django 4.2.24 on 2026-10-18 22:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from zargar.core.partitioning import convert_to_partitioned
+
+
+def partition_health_metrics(apps, schema_editor):
+    convert_to_partitioned(schema_editor, apps.get_model('admin_panel', 'SystemHealthMetric'), 'timestamp')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0008_apiratelimitconfiguration_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='systemhealthalert',
+            name='source_metric',
+            field=models.ForeignKey(blank=True, db_constraint=False, help_text='Metric that triggered this alert', null=True, on_delete=django.db.models.deletion.SET_NULL, to='admin_panel.systemhealthmetric', verbose_name='Source Metric'),
+        ),
+        migrations.RunPython(partition_health_metrics, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.24 on 2026-10-18 22:22
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0009_partition_health_metrics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SystemHealthMetricRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric_type', models.CharField(choices=[('cpu_usage', 'CPU Usage'), ('memory_usage', 'Memory Usage'), ('disk_usage', 'Disk Usage'), ('database_connections', 'Database Connections'), ('redis_memory', 'Redis Memory Usage'), ('celery_workers', 'Celery Workers'), ('response_time', 'Response Time'), ('error_rate', 'Error Rate')], max_length=30, verbose_name='Metric Type')),
+                ('resolution', models.CharField(choices=[('minute', 'Minute'), ('hour', 'Hour'), ('day', 'Day')], max_length=10, verbose_name='Resolution')),
+                ('bucket_start', models.DateTimeField(verbose_name='Bucket Start')),
+                ('unit', models.CharField(max_length=20, verbose_name='Unit')),
+                ('sample_count', models.PositiveIntegerField(default=0, verbose_name='Sample Count')),
+                ('min_value', models.FloatField(verbose_name='Minimum')),
+                ('max_value', models.FloatField(verbose_name='Maximum')),
+                ('avg_value', models.FloatField(verbose_name='Average')),
+                ('p95_value', models.FloatField(verbose_name='95th Percentile')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'System Health Metric Rollup',
+                'verbose_name_plural': 'System Health Metric Rollups',
+                'db_table': 'admin_system_health_metric_rollup',
+                'ordering': ['resolution', 'metric_type', 'bucket_start'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='systemhealthmetric',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Timestamp'),
+        ),
+        migrations.AddConstraint(
+            model_name='systemhealthmetricrollup',
+            constraint=models.UniqueConstraint(fields=('resolution', 'metric_type', 'bucket_start'), name='admin_health_metric_rollup_bucket_unique'),
+        ),
+    ]
@@ -1994,7 +1994,7 @@ class SystemHealthMetric(models.Model):
     
     # Timing
     timestamp = models.DateTimeField(
-        auto_now_add=True,
+        default=timezone.now,
         verbose_name=_('Timestamp')
     )
     
@@ -2026,6 +2026,74 @@ class SystemHealthMetric(models.Model):
         return f"{self.get_metric_type_display()}: {self.value}{self.unit} at {self.timestamp}"
 
 
+class SystemHealthMetricRollup(models.Model):
+    """
+    One bucket of a downsampled health metric series.
+    
+    Stored metrics are rolled up into minute, hourly and daily buckets as
+    they are written (see zargar.admin_panel.health_rollups), each holding
+    the sample count, minimum, maximum, average and 95th percentile, so
+    charts over long windows never read the raw metrics.
+    """
+    RESOLUTION_CHOICES = [
+        ('minute', _('Minute')),
+        ('hour', _('Hour')),
+        ('day', _('Day')),
+    ]
+    
+    metric_type = models.CharField(
+        max_length=30,
+        choices=SystemHealthMetric.METRIC_TYPES,
+        verbose_name=_('Metric Type')
+    )
+    resolution = models.CharField(
+        max_length=10,
+        choices=RESOLUTION_CHOICES,
+        verbose_name=_('Resolution')
+    )
+    bucket_start = models.DateTimeField(
+        verbose_name=_('Bucket Start')
+    )
+    unit = models.CharField(
+        max_length=20,
+        verbose_name=_('Unit')
+    )
+    
+    sample_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_('Sample Count')
+    )
+    min_value = models.FloatField(
+        verbose_name=_('Minimum')
+    )
+    max_value = models.FloatField(
+        verbose_name=_('Maximum')
+    )
+    avg_value = models.FloatField(
+        verbose_name=_('Average')
+    )
+    p95_value = models.FloatField(
+        verbose_name=_('95th Percentile')
+    )
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = _('System Health Metric Rollup')
+        verbose_name_plural = _('System Health Metric Rollups')
+        db_table = 'admin_system_health_metric_rollup'
+        ordering = ['resolution', 'metric_type', 'bucket_start']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['resolution', 'metric_type', 'bucket_start'],
+                name='admin_health_metric_rollup_bucket_unique'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_metric_type_display()} ({self.resolution}) at {self.bucket_start}: avg {self.avg_value}{self.unit}"
+
+
 class SystemHealthAlert(models.Model):
     """
     Model to track system health alerts and notifications.
@@ -2104,6 +2172,7 @@ class SystemHealthAlert(models.Model):
         on_delete=models.SET_NULL,
         null=True,
         blank=True,
+        db_constraint=False,  # Metrics are partitioned by month
         verbose_name=_('Source Metric'),
         help_text=_('Metric that triggered this alert')
     )
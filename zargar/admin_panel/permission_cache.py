@@ -0,0 +1,164 @@
+"""
+Compiled super admin permission sets with versioned caching.
+
+A user's permissions are compiled once from SuperAdminUserRole,
+SuperAdminRole (including parent roles) and SuperAdminPermission rows into
+frozen sets of permission ids and codenames. Compiled sets are kept in a
+per-process LRU and in Redis, tagged with a global RBAC version. Any change to
+roles, assignments or role permissions bumps the version, which invalidates
+every compiled set in every process at once.
+
+Temporary role assignments are handled by storing the earliest upcoming
+``expires_at`` in the entry; the entry is recompiled once that moment passes.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from zargar.core.local_cache import GenerationCounter, LocalLRU
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'rbac:version'
+
+
+class CompiledPermissionCache:
+    """
+    Cache of user_id -> compiled permission sets.
+    """
+
+    def __init__(self):
+        self._local = LocalLRU('RBAC_PERMISSION_LOCAL_CACHE_SIZE')
+        self._version = GenerationCounter(VERSION_KEY, 'RBAC_VERSION_CHECK_INTERVAL', 'RBAC version')
+
+    def get(self, user_id):
+        """
+        Return the compiled permissions of a user.
+
+        Returns:
+            Dict with frozen sets 'permission_ids' and 'codenames', the RBAC
+            'version' and 'next_expiry' (POSIX timestamp or None)
+        """
+        version = self._version.get()
+
+        compiled = self._local.get(user_id, tag=version)
+        if self._is_valid(compiled, version):
+            return compiled
+
+        try:
+            compiled = cache.get(self._redis_key(user_id))
+        except Exception as e:
+            logger.warning(f"RBAC permission cache unavailable: {e}")
+            compiled = None
+
+        if not self._is_valid(compiled, version):
+            compiled = self.compile(user_id, version)
+            try:
+                cache.set(self._redis_key(user_id), compiled, settings.RBAC_PERMISSION_CACHE_TIMEOUT)
+            except Exception as e:
+                logger.warning(f"RBAC permission cache unavailable: {e}")
+
+        self._local.set(user_id, compiled, settings.RBAC_PERMISSION_LOCAL_TIMEOUT, tag=version)
+        return compiled
+
+    def get_codenames(self, user_id):
+        """Return the frozen set of permission codenames of a user."""
+        return self.get(user_id)['codenames']
+
+    def get_permission_ids(self, user_id):
+        """Return the frozen set of permission ids of a user."""
+        return self.get(user_id)['permission_ids']
+
+    def has_permission(self, user_id, permission_codename):
+        """Check a single permission against the compiled set."""
+        return permission_codename in self.get_codenames(user_id)
+
+    @staticmethod
+    def compile(user_id, version):
+        """
+        Build the permission sets of a user from the database.
+        """
+        from .models import SuperAdminPermission, SuperAdminRole, SuperAdminUserRole
+
+        now = timezone.now()
+        assignments = SuperAdminUserRole.objects.filter(
+            user_id=user_id,
+            is_active=True,
+            role__is_active=True
+        ).values_list('role_id', 'expires_at')
+
+        role_ids = set()
+        next_expiry = None
+        for role_id, expires_at in assignments:
+            if expires_at and expires_at <= now:
+                continue
+            role_ids.add(role_id)
+            if expires_at and (next_expiry is None or expires_at < next_expiry):
+                next_expiry = expires_at
+
+        # Walk up parent roles, one query per inheritance level
+        pending = set(role_ids)
+        while pending:
+            parent_ids = set(
+                SuperAdminRole.objects.filter(
+                    id__in=pending,
+                    parent_role__isnull=False
+                ).values_list('parent_role_id', flat=True)
+            )
+            pending = parent_ids - role_ids
+            role_ids |= pending
+
+        permissions = SuperAdminPermission.objects.filter(
+            is_active=True,
+            roles__id__in=role_ids
+        ).values_list('id', 'codename').distinct() if role_ids else []
+
+        permission_ids = set()
+        codenames = set()
+        for permission_id, codename in permissions:
+            permission_ids.add(permission_id)
+            codenames.add(codename)
+
+        return {
+            'version': version,
+            'permission_ids': frozenset(permission_ids),
+            'codenames': frozenset(codenames),
+            'next_expiry': next_expiry.timestamp() if next_expiry else None,
+        }
+
+    def bump_version(self):
+        """Invalidate every compiled permission set in all processes."""
+        self._local.clear()
+        self._version.bump()
+
+    def clear_user(self, user_id):
+        """Drop the compiled permissions of one user in this process and Redis."""
+        self._local.pop(user_id)
+
+        try:
+            cache.delete(self._redis_key(user_id))
+        except Exception as e:
+            logger.warning(f"RBAC permission cache unavailable: {e}")
+
+    def clear_local(self):
+        """Drop this process's LRU entries."""
+        self._local.clear()
+        self._version.reset()
+
+    @staticmethod
+    def _is_valid(compiled, version):
+        if not isinstance(compiled, dict) or compiled.get('version') != version:
+            return False
+
+        next_expiry = compiled.get('next_expiry')
+        return next_expiry is None or time.time() < next_expiry
+
+    @staticmethod
+    def _redis_key(user_id):
+        return f'superadmin_permissions_{user_id}'
+
+
+compiled_permission_cache = CompiledPermissionCache()
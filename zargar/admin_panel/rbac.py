@@ -7,11 +7,12 @@ from django.shortcuts import redirect
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 from django.contrib import messages
-from django.core.cache import cache
 from django.utils.decorators import method_decorator
 from functools import wraps
 import logging
 
+from .permission_cache import compiled_permission_cache
+
 logger = logging.getLogger(__name__)
 
 
@@ -170,52 +171,26 @@ class RBACMiddleware:
     def user_has_permission(self, user, permission_codename):
         """
         Check if user has specific permission through their roles.
-        Uses caching for performance.
+        Uses the compiled permission cache for performance.
         """
         if not user or not user.is_authenticated:
             return False
         
-        # Cache key for user permissions
-        cache_key = f"superadmin_permissions_{user.id}"
-        user_permissions = cache.get(cache_key)
-        
-        if user_permissions is None:
-            # Get user permissions from database
-            user_permissions = self.get_user_permissions(user)
-            # Cache for 5 minutes
-            cache.set(cache_key, user_permissions, 300)
-        
-        return permission_codename in user_permissions
+        return permission_codename in self.get_user_permissions(user)
     
     def get_user_permissions(self, user):
         """
-        Get all permissions for a user through their active roles.
+        Get the frozen set of permission codenames granted by the user's active roles.
         """
-        from .models import SuperAdminUserRole
+        if not user or not user.is_authenticated:
+            return frozenset()
         
         try:
-            # Get all active roles for the user
-            user_roles = SuperAdminUserRole.objects.filter(
-                user_id=user.id,
-                is_active=True,
-                role__is_active=True
-            ).select_related('role').prefetch_related('role__permissions')
-            
-            permissions = set()
-            for user_role in user_roles:
-                # Skip expired roles
-                if user_role.is_expired:
-                    continue
-                
-                # Get all permissions for this role (including inherited)
-                role_permissions = user_role.role.get_all_permissions()
-                permissions.update(perm.codename for perm in role_permissions)
-            
-            return permissions
+            return compiled_permission_cache.get_codenames(user.id)
             
         except Exception as e:
             logger.error(f"Error getting user permissions for {user.username}: {e}")
-            return set()
+            return frozenset()
 
 
 def require_permission(permission_codename, raise_exception=False):
@@ -396,8 +371,8 @@ def clear_user_permission_cache(user_id):
     Clear cached permissions for a specific user.
     Call this when user roles or permissions change.
     """
-    cache_key = f"superadmin_permissions_{user_id}"
-    cache.delete(cache_key)
+    compiled_permission_cache.clear_user(user_id)
+    compiled_permission_cache.bump_version()
 
 
 def get_user_accessible_sections(user):
@@ -16,7 +16,7 @@ from ..models import (
     SuperAdminUserRole,
     RolePermissionAuditLog
 )
-from ..rbac import clear_user_permission_cache
+from ..permission_cache import compiled_permission_cache
 
 logger = logging.getLogger(__name__)
 
@@ -500,10 +500,8 @@ class RBACService:
                 )
                 role.permissions.set(permission_objects)
             
-            # Clear cache for all users with this role
-            user_roles = SuperAdminUserRole.objects.filter(role=role, is_active=True)
-            for user_role in user_roles:
-                clear_user_permission_cache(user_role.user_id)
+            # Invalidate compiled permissions once the change is committed
+            transaction.on_commit(compiled_permission_cache.bump_version)
             
             # Log the action
             new_values = {
@@ -632,8 +630,8 @@ class RBACService:
                 user_role.notes = notes
                 user_role.save()
             
-            # Clear user permission cache
-            clear_user_permission_cache(user_id)
+            # Invalidate compiled permissions once the change is committed
+            transaction.on_commit(compiled_permission_cache.bump_version)
             
             # Log the action
             RolePermissionAuditLog.log_action(
@@ -677,8 +675,8 @@ class RBACService:
             
             user_role.revoke(revoked_by_id, revoked_by_username, reason)
             
-            # Clear user permission cache
-            clear_user_permission_cache(user_id)
+            # Invalidate compiled permissions once the change is committed
+            transaction.on_commit(compiled_permission_cache.bump_version)
             
             logger.info(f"Revoked role {user_role.role.name} from user {user_role.user_username} by {revoked_by_username}")
             return True
@@ -705,23 +703,18 @@ class RBACService:
         """
         Get all permissions for a user through their roles.
         """
-        user_roles = RBACService.get_user_roles(user_id)
-        permissions = set()
+        permission_ids = compiled_permission_cache.get_permission_ids(user_id)
+        if not permission_ids:
+            return set()
         
-        for user_role in user_roles:
-            if not user_role.is_expired:
-                role_permissions = user_role.role.get_all_permissions()
-                permissions.update(role_permissions)
-        
-        return permissions
+        return set(SuperAdminPermission.objects.filter(id__in=permission_ids))
     
     @staticmethod
     def user_has_permission(user_id, permission_codename):
         """
         Check if user has specific permission.
         """
-        user_permissions = RBACService.get_user_permissions(user_id)
-        return any(perm.codename == permission_codename for perm in user_permissions)
+        return compiled_permission_cache.has_permission(user_id, permission_codename)
     
     @staticmethod
     def get_role_statistics():
@@ -755,11 +748,11 @@ class RBACService:
             assignment.is_active = False
             assignment.notes = (assignment.notes or '') + f"\nAuto-expired at {timezone.now()}"
             assignment.save()
-            
-            # Clear user permission cache
-            clear_user_permission_cache(assignment.user_id)
             count += 1
         
+        if count:
+            transaction.on_commit(compiled_permission_cache.bump_version)
+        
         logger.info(f"Cleaned up {count} expired role assignments")
         return count
     
@@ -796,10 +789,8 @@ class RBACService:
                 action = 'added'
                 audit_action = 'permission_added_to_role'
             
-            # Clear cache for all users with this role
-            user_roles = SuperAdminUserRole.objects.filter(role=role, is_active=True)
-            for user_role in user_roles:
-                clear_user_permission_cache(user_role.user_id)
+            # Invalidate compiled permissions once the change is committed
+            transaction.on_commit(compiled_permission_cache.bump_version)
             
             # Log the action
             RolePermissionAuditLog.log_action(
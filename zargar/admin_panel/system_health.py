@@ -17,6 +17,9 @@ from django.conf import settings
 from celery import current_app as celery_app
 from celery.events.state import State
 
+from zargar.core.partitioning import purge_before
+
+from .health_rollups import choose_resolution, get_metric_series, prune_rollups, update_rollups
 from .models import SystemHealthMetric, SystemHealthAlert
 
 logger = logging.getLogger(__name__)
@@ -455,6 +458,9 @@ class SystemHealthMonitor:
             # Cache hit rate
             cache_stats = self._get_cache_hit_rate()
             
+            # Encoded sizes of service cache entries
+            cache_payloads = self._get_cache_payload_sizes()
+            
             return {
                 'application': {
                     'tenants': {
@@ -467,6 +473,7 @@ class SystemHealthMonitor:
                         'active': active_admins,
                     },
                     'cache': cache_stats,
+                    'cache_payloads': cache_payloads,
                 }
             }
         
@@ -499,74 +506,65 @@ class SystemHealthMonitor:
             logger.error(f"Error calculating cache hit rate: {e}")
             return {'status': 'error', 'error': str(e)}
     
+    def _get_cache_payload_sizes(self) -> Dict[str, Any]:
+        """Size histograms and largest entries of service cache payloads."""
+        try:
+            from zargar.core.lean_cache import payload_size_report
+            return {'status': 'available', **payload_size_report()}
+        
+        except Exception as e:
+            logger.error(f"Error collecting cache payload sizes: {e}")
+            return {'status': 'error', 'error': str(e)}
+    
     def _store_metrics(self, metrics: Dict[str, Any]):
-        """Store collected metrics in the database."""
+        """
+        Store collected metrics in the database.
+        
+        All metrics of the cycle are written in one insert sharing one
+        timestamp, then their rollup buckets are refreshed.
+        """
         try:
             timestamp = timezone.now()
+            rows = []
+            
+            def add(metric_type, value, unit, metadata):
+                rows.append(SystemHealthMetric(
+                    metric_type=metric_type,
+                    value=value,
+                    unit=unit,
+                    timestamp=timestamp,
+                    hostname=self.hostname,
+                    metadata=metadata
+                ))
             
-            # Store system metrics
+            # System metrics
             if 'cpu' in metrics:
-                SystemHealthMetric.objects.create(
-                    metric_type='cpu_usage',
-                    value=metrics['cpu']['usage_percent'],
-                    unit='%',
-                    hostname=self.hostname,
-                    metadata=metrics['cpu']
-                )
+                add('cpu_usage', metrics['cpu']['usage_percent'], '%', metrics['cpu'])
             
             if 'memory' in metrics:
-                SystemHealthMetric.objects.create(
-                    metric_type='memory_usage',
-                    value=metrics['memory']['usage_percent'],
-                    unit='%',
-                    hostname=self.hostname,
-                    metadata=metrics['memory']
-                )
+                add('memory_usage', metrics['memory']['usage_percent'], '%', metrics['memory'])
             
             if 'disk' in metrics:
-                SystemHealthMetric.objects.create(
-                    metric_type='disk_usage',
-                    value=metrics['disk']['usage_percent'],
-                    unit='%',
-                    hostname=self.hostname,
-                    metadata=metrics['disk']
-                )
+                add('disk_usage', metrics['disk']['usage_percent'], '%', metrics['disk'])
             
-            # Store database metrics
+            # Database metrics
             if 'database' in metrics and 'default' in metrics['database']:
                 db_metrics = metrics['database']['default']
                 if 'response_time_ms' in db_metrics:
-                    SystemHealthMetric.objects.create(
-                        metric_type='response_time',
-                        value=db_metrics['response_time_ms'],
-                        unit='ms',
-                        hostname=self.hostname,
-                        metadata={'service': 'database', **db_metrics}
-                    )
+                    add('response_time', db_metrics['response_time_ms'], 'ms',
+                        {'service': 'database', **db_metrics})
             
-            # Store Redis metrics
+            # Redis metrics
             if 'redis' in metrics and metrics['redis']['status'] == 'healthy':
-                redis_metrics = metrics['redis']
-                
-                SystemHealthMetric.objects.create(
-                    metric_type='redis_memory',
-                    value=redis_metrics['memory_usage_percent'],
-                    unit='%',
-                    hostname=self.hostname,
-                    metadata=redis_metrics
-                )
+                add('redis_memory', metrics['redis']['memory_usage_percent'], '%', metrics['redis'])
             
-            # Store Celery metrics
+            # Celery metrics
             if 'celery' in metrics:
-                celery_metrics = metrics['celery']
-                
-                SystemHealthMetric.objects.create(
-                    metric_type='celery_workers',
-                    value=celery_metrics['total_workers'],
-                    unit='count',
-                    hostname=self.hostname,
-                    metadata=celery_metrics
-                )
+                add('celery_workers', metrics['celery']['total_workers'], 'count', metrics['celery'])
+            
+            if rows:
+                SystemHealthMetric.objects.bulk_create(rows)
+                update_rollups([row.metric_type for row in rows], timestamp)
             
         except Exception as e:
             logger.error(f"Error storing metrics: {e}")
@@ -697,38 +695,30 @@ class SystemHealthMonitor:
         except Exception as e:
             logger.error(f"Error checking service availability: {e}")
     
-    def get_historical_metrics(self, metric_type: str, hours: int = 24) -> List[Dict[str, Any]]:
+    def get_historical_metrics(self, metric_type: str, hours: int = 24) -> Dict[str, Any]:
         """
         Get historical metrics for a specific type.
         
+        Served from the rollup buckets, minute, hourly or daily depending on
+        the window (see zargar.admin_panel.health_rollups).
+        
         Args:
             metric_type: Type of metric to retrieve
             hours: Number of hours of history to retrieve
             
         Returns:
-            List of historical metric data points
+            Dict with metric_type, unit, resolution and parallel arrays of
+            timestamps (epoch seconds), avg, min, max, p95 and count
         """
         try:
-            since = timezone.now() - timedelta(hours=hours)
-            
-            metrics = SystemHealthMetric.objects.filter(
-                metric_type=metric_type,
-                timestamp__gte=since
-            ).order_by('timestamp')
-            
-            return [
-                {
-                    'timestamp': metric.timestamp.isoformat(),
-                    'value': metric.value,
-                    'unit': metric.unit,
-                    'metadata': metric.metadata,
-                }
-                for metric in metrics
-            ]
+            return get_metric_series(metric_type, hours)
         
         except Exception as e:
             logger.error(f"Error getting historical metrics for {metric_type}: {e}")
-            return []
+            return {
+                'metric_type': metric_type, 'unit': '', 'resolution': choose_resolution(hours),
+                'timestamps': [], 'avg': [], 'min': [], 'max': [], 'p95': [], 'count': [],
+            }
     
     def get_active_alerts(self) -> List[SystemHealthAlert]:
         """Get all active system health alerts."""
@@ -741,21 +731,29 @@ class SystemHealthMonitor:
             logger.error(f"Error getting active alerts: {e}")
             return []
     
-    def cleanup_old_metrics(self, days: int = 30):
+    def cleanup_old_metrics(self, days: Optional[int] = None):
         """
         Clean up old metrics to prevent database bloat.
         
+        Metrics are partitioned by month, so whole expired months are
+        dropped (see zargar.core.partitioning.purge_before). Minute and hour
+        rollup buckets past their own retention are deleted too.
+        
         Args:
-            days: Number of days of metrics to keep
+            days: Number of days of metrics to keep, HEALTH_METRIC_RETENTION_DAYS by default
         """
         try:
+            days = settings.HEALTH_METRIC_RETENTION_DAYS if days is None else days
             cutoff_date = timezone.now() - timedelta(days=days)
             
-            deleted_count = SystemHealthMetric.objects.filter(
-                timestamp__lt=cutoff_date
-            ).delete()[0]
+            result = purge_before(SystemHealthMetric, cutoff_date)
+            rollups_deleted = prune_rollups()
             
-            logger.info(f"Cleaned up {deleted_count} old health metrics")
+            logger.info(
+                f"Cleaned up old health metrics: {result['partitions_dropped'] + result['partitions_detached']} "
+                f"partitions, {result['rows_deleted']} rows, "
+                f"{sum(rollups_deleted.values())} rollup buckets"
+            )
             
         except Exception as e:
             logger.error(f"Error cleaning up old metrics: {e}")
@@ -1254,8 +1254,8 @@ def cleanup_old_health_metrics(self):
         
         logger.info("Starting cleanup of old health metrics")
         
-        # Clean up metrics older than 30 days
-        system_health_monitor.cleanup_old_metrics(days=30)
+        # Drop metrics older than HEALTH_METRIC_RETENTION_DAYS
+        system_health_monitor.cleanup_old_metrics()
         
         logger.info("Successfully cleaned up old health metrics")
         
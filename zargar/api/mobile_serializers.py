@@ -298,6 +298,31 @@ class MobileInventoryUpdateSerializer(serializers.Serializer):
         return value
 
 
+class MobileStockUpdateSerializer(MobileInventoryUpdateSerializer):
+    """
+    Serializer for one row of a bulk stock update.
+    Items are identified by id or SKU and resolved in bulk by the service,
+    so rows are not looked up one by one here.
+    """
+    item_id = serializers.IntegerField(required=False)
+    sku = serializers.CharField(max_length=50, required=False)
+    expected_quantity = serializers.IntegerField(
+        min_value=0,
+        required=False,
+        help_text=_('Quantity the client last saw; the row is rejected if it has changed.')
+    )
+
+    def validate_item_id(self, value):
+        """Existence is checked in bulk when the update is applied."""
+        return value
+
+    def validate(self, attrs):
+        """Require an item id or SKU."""
+        if not attrs.get('item_id') and not attrs.get('sku'):
+            raise serializers.ValidationError(_('Either item_id or sku is required.'))
+        return attrs
+
+
 class MobileSyncDataSerializer(serializers.Serializer):
     """
     Serializer for mobile synchronization data.
@@ -4,11 +4,13 @@ Optimized for mobile POS and inventory management with offline synchronization s
 """
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from rest_framework.throttling import UserRateThrottle
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django.db.models import Q, F, Sum, Count
+from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 from django.core.exceptions import ValidationError
 from django.utils import timezone
@@ -23,7 +25,10 @@ from zargar.core.permissions import (
     TenantPermission, OwnerPermission, AccountingPermission, 
     POSPermission, AllRolesPermission
 )
-from zargar.jewelry.models import JewelryItem, Category
+from zargar.jewelry.models import JewelryItem, Category, StockMovementType
+from zargar.jewelry.stock_services import (
+    BulkStockUpdateService, iter_stock_update_rows, record_stock_movements, stock_movement
+)
 from zargar.customers.models import Customer
 from zargar.pos.models import POSTransaction, POSTransactionLineItem
 from zargar.core.notification_services import PushNotificationSystem
@@ -34,11 +39,20 @@ from .serializers import (
 from .mobile_serializers import (
     MobileJewelryItemSerializer, MobileCustomerSerializer,
     MobilePOSTransactionSerializer, OfflineTransactionSerializer,
-    MobileInventoryUpdateSerializer, MobileSyncDataSerializer
+    MobileStockUpdateSerializer, MobileSyncDataSerializer
 )
+from .sync_payloads import SyncPayloadMixin
 from .throttling import TenantAPIThrottle
 
 
+# Raw-body content types accepted by the stock file upload
+STOCK_UPLOAD_CONTENT_TYPES = {
+    'text/csv': 'csv',
+    'application/x-ndjson': 'jsonl',
+    'application/jsonl': 'jsonl',
+}
+
+
 class MobilePOSViewSet(viewsets.ModelViewSet):
     """
     Mobile-optimized POS ViewSet for tablet and mobile devices.
@@ -272,7 +286,7 @@ class MobilePOSViewSet(viewsets.ModelViewSet):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-class MobileInventoryViewSet(viewsets.ReadOnlyModelViewSet):
+class MobileInventoryViewSet(SyncPayloadMixin, viewsets.ReadOnlyModelViewSet):
     """
     Mobile-optimized inventory ViewSet for quick item lookup and management.
     Provides barcode scanning and touch-friendly search.
@@ -367,6 +381,10 @@ class MobileInventoryViewSet(viewsets.ReadOnlyModelViewSet):
         """
         Bulk update stock levels for mobile inventory management.
         Supports offline stock adjustments.
+
+        Rows identify items by item_id or sku and may carry expected_quantity
+        for optimistic concurrency. Rows are applied in set-based batches and
+        failures are reported per row.
         """
         try:
             updates = request.data.get('updates', [])
@@ -376,50 +394,25 @@ class MobileInventoryViewSet(viewsets.ReadOnlyModelViewSet):
                     'error': _('No updates provided')
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            update_results = {
-                'total': len(updates),
-                'updated': 0,
-                'failed': 0,
-                'errors': []
-            }
+            if len(updates) > settings.STOCK_UPDATE_MAX_ROWS:
+                return Response({
+                    'success': False,
+                    'error': _('Too many updates; upload a stock file instead')
+                }, status=status.HTTP_400_BAD_REQUEST)
             
-            with transaction.atomic():
-                for update_data in updates:
-                    try:
-                        serializer = MobileInventoryUpdateSerializer(data=update_data)
-                        if serializer.is_valid():
-                            item_id = serializer.validated_data['item_id']
-                            new_quantity = serializer.validated_data['quantity']
-                            reason = serializer.validated_data.get('reason', 'Mobile update')
-                            
-                            item = JewelryItem.objects.get(id=item_id)
-                            old_quantity = item.quantity
-                            item.quantity = new_quantity
-                            item.save(update_fields=['quantity'])
-                            
-                            # Log the change
-                            # TODO: Create inventory adjustment log entry
-                            
-                            update_results['updated'] += 1
-                        else:
-                            update_results['failed'] += 1
-                            update_results['errors'].append({
-                                'item_id': update_data.get('item_id'),
-                                'errors': serializer.errors
-                            })
-                            
-                    except JewelryItem.DoesNotExist:
-                        update_results['failed'] += 1
-                        update_results['errors'].append({
-                            'item_id': update_data.get('item_id'),
-                            'error': 'Item not found'
-                        })
-                    except Exception as e:
-                        update_results['failed'] += 1
-                        update_results['errors'].append({
-                            'item_id': update_data.get('item_id'),
-                            'error': str(e)
-                        })
+            movement_type = request.data.get('movement_type', StockMovementType.ADJUSTMENT)
+            if movement_type not in StockMovementType.values:
+                return Response({
+                    'success': False,
+                    'error': _('Invalid movement type')
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            update_results = self._apply_stock_updates(
+                request,
+                enumerate(updates, start=1),
+                movement_type=movement_type,
+                reference=request.data.get('reference', '')
+            )
             
             return Response({
                 'success': True,
@@ -431,9 +424,103 @@ class MobileInventoryViewSet(viewsets.ReadOnlyModelViewSet):
                 'success': False,
                 'error': str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser])
+    def bulk_update_stock_upload(self, request):
+        """
+        Apply a large stock-take from a CSV or JSON-lines file.
+
+        The file is sent as the raw body (Content-Type text/csv or
+        application/x-ndjson) or as a multipart ``file`` field, and is parsed
+        and applied batch by batch without loading it whole.
+        """
+        try:
+            movement_type = request.query_params.get('movement_type', StockMovementType.STOCK_TAKE)
+            if movement_type not in StockMovementType.values:
+                return Response({
+                    'success': False,
+                    'error': _('Invalid movement type')
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            content_type = request.content_type.split(';')[0].strip()
+            if content_type in STOCK_UPLOAD_CONTENT_TYPES:
+                stream = request.stream
+                file_format = STOCK_UPLOAD_CONTENT_TYPES[content_type]
+            else:
+                stream = request.FILES.get('file')
+                file_format = 'jsonl' if stream and stream.name.endswith(('.jsonl', '.ndjson')) else 'csv'
+            
+            if stream is None:
+                return Response({
+                    'success': False,
+                    'error': _('No stock file provided')
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            update_results = self._apply_stock_updates(
+                request,
+                iter_stock_update_rows(stream, file_format),
+                movement_type=movement_type,
+                reference=request.query_params.get('reference', '')
+            )
+            
+            return Response({
+                'success': True,
+                'update_results': update_results
+            }, status=status.HTTP_200_OK)
+            
+        except Exception as e:
+            return Response({
+                'success': False,
+                'error': str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    def _apply_stock_updates(self, request, rows, movement_type, reference) -> Dict:
+        """
+        Validate (row number, row) pairs and apply them in batches.
+
+        Each batch is its own transaction so a large upload never holds item
+        locks for long.
+        """
+        update_results = {
+            'total': 0,
+            'updated': 0,
+            'failed': 0,
+            'errors': []
+        }
+        batch = []
+        
+        def flush():
+            batch_results = BulkStockUpdateService.apply_updates(
+                batch, user=request.user, movement_type=movement_type, reference=reference[:100]
+            )
+            update_results['updated'] += batch_results['updated']
+            update_results['failed'] += batch_results['failed']
+            update_results['errors'].extend(batch_results['errors'])
+            batch.clear()
+        
+        for row_number, update_data in rows:
+            update_results['total'] += 1
+            serializer = MobileStockUpdateSerializer(data=update_data)
+            if serializer.is_valid():
+                batch.append((row_number, serializer.validated_data))
+            else:
+                update_results['failed'] += 1
+                update_results['errors'].append({
+                    'row': row_number,
+                    'item_id': update_data.get('item_id') if isinstance(update_data, dict) else None,
+                    'errors': serializer.errors
+                })
+            
+            if len(batch) >= settings.STOCK_UPDATE_BATCH_SIZE:
+                flush()
+        
+        if batch:
+            flush()
+        
+        return update_results
 
 
-class MobileCustomerViewSet(viewsets.ReadOnlyModelViewSet):
+class MobileCustomerViewSet(SyncPayloadMixin, viewsets.ReadOnlyModelViewSet):
     """
     Mobile-optimized customer ViewSet for quick customer lookup and management.
     Provides touch-friendly search and customer creation.
@@ -512,7 +599,7 @@ class MobileCustomerViewSet(viewsets.ReadOnlyModelViewSet):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-class MobileSyncViewSet(viewsets.ViewSet):
+class MobileSyncViewSet(SyncPayloadMixin, viewsets.ViewSet):
     """
     Mobile synchronization ViewSet for offline data management.
     Handles data sync between mobile devices and server.
@@ -644,9 +731,14 @@ class MobileSyncViewSet(viewsets.ViewSet):
                             item_id = update_data.get('item_id')
                             new_quantity = update_data.get('quantity')
                             
-                            item = JewelryItem.objects.get(id=item_id)
+                            item = JewelryItem.objects.select_for_update().get(id=item_id)
+                            quantity_before = item.quantity
                             item.quantity = new_quantity
                             item.save(update_fields=['quantity'])
+                            record_stock_movements([stock_movement(
+                                item, quantity_before, item.quantity,
+                                StockMovementType.ADJUSTMENT, reason='Mobile sync'
+                            )])
                             
                             sync_results['inventory_updates'] += 1
                         except Exception as e:
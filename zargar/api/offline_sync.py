@@ -3,14 +3,15 @@ Offline synchronization API for ZARGAR jewelry SaaS platform.
 Handles data synchronization between mobile devices and server for offline POS operations.
 """
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes, throttle_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes, throttle_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
-from django.db import transaction
-from django.db.models import Q, F, Sum, Count, Max
+from django.db import connection, transaction
+from django.db.models import Q, F, Sum, Count, Max, Func, BigIntegerField, DecimalField
 from django.core.cache import cache
+from django.conf import settings
 from decimal import Decimal
 import json
 import hashlib
@@ -18,19 +19,24 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 
 from zargar.core.permissions import TenantPermission, POSPermission, AllRolesPermission
-from zargar.jewelry.models import JewelryItem, Category
+from zargar.jewelry.models import JewelryItem, Category, StockMovementType
+from zargar.jewelry.stock_services import record_stock_movements, stock_movement
 from zargar.customers.models import Customer
 from zargar.pos.models import POSTransaction, POSTransactionLineItem
 from zargar.core.models import User
+from zargar.core.sync_changes import SYNC_ENTITIES, get_changes, get_latest_cursor, get_sync_epoch
 from .mobile_serializers import (
     MobileJewelryItemSerializer, MobileCustomerSerializer,
     MobilePOSTransactionSerializer, OfflineTransactionSerializer,
     MobileSyncDataSerializer
 )
+from .sync_payloads import SYNC_RENDERER_CLASSES, sync_payload
 from .throttling import TenantAPIThrottle
 
 
+@sync_payload
 @api_view(['GET'])
+@renderer_classes(SYNC_RENDERER_CLASSES)
 @permission_classes([IsAuthenticated, TenantPermission, AllRolesPermission])
 @throttle_classes([TenantAPIThrottle])
 def get_sync_manifest(request):
@@ -49,6 +55,16 @@ def get_sync_manifest(request):
         else:
             last_sync_dt = None
         
+        # Entities for which the client wants per-range checksums
+        bucket_entities = [
+            entity.strip() for entity in request.GET.get('buckets', '').split(',') if entity.strip()
+        ]
+        try:
+            bucket_size = int(request.GET.get('bucket_size', settings.SYNC_MANIFEST_BUCKET_SIZE))
+        except ValueError:
+            bucket_size = settings.SYNC_MANIFEST_BUCKET_SIZE
+        bucket_size = max(bucket_size, settings.SYNC_MANIFEST_MIN_BUCKET_SIZE)
+        
         # Calculate data counts and checksums
         manifest = {
             'server_time': timezone.now().isoformat(),
@@ -56,51 +72,37 @@ def get_sync_manifest(request):
             'data_manifest': {}
         }
         
-        # Categories manifest
-        categories_qs = Category.objects.filter(is_active=True)
-        if last_sync_dt:
-            categories_qs = categories_qs.filter(updated_at__gt=last_sync_dt)
-        
-        manifest['data_manifest']['categories'] = {
-            'count': categories_qs.count(),
-            'last_updated': categories_qs.aggregate(
-                max_updated=Max('updated_at')
-            )['max_updated'].isoformat() if categories_qs.exists() else None,
-            'checksum': _calculate_queryset_checksum(categories_qs, ['id', 'name_persian', 'updated_at'])
+        entity_querysets = {
+            'categories': (
+                Category.objects.filter(is_active=True),
+                ['id', 'name_persian', 'updated_at']
+            ),
+            'jewelry_items': (
+                JewelryItem.objects.filter(status__in=['available', 'reserved']),
+                ['id', 'name', 'sku', 'selling_price', 'updated_at']
+            ),
+            'customers': (
+                Customer.objects.filter(is_active=True),
+                ['id', 'phone_number', 'updated_at']
+            ),
         }
         
-        # Jewelry items manifest
-        items_qs = JewelryItem.objects.filter(status__in=['available', 'reserved'])
-        if last_sync_dt:
-            items_qs = items_qs.filter(updated_at__gt=last_sync_dt)
-        
-        manifest['data_manifest']['jewelry_items'] = {
-            'count': min(items_qs.count(), 500),  # Limit for performance
-            'last_updated': items_qs.aggregate(
-                max_updated=Max('updated_at')
-            )['max_updated'].isoformat() if items_qs.exists() else None,
-            'checksum': _calculate_queryset_checksum(
-                items_qs[:500], ['id', 'name', 'sku', 'selling_price', 'updated_at']
-            )
-        }
+        for entity, (queryset, fields) in entity_querysets.items():
+            if last_sync_dt:
+                queryset = queryset.filter(updated_at__gt=last_sync_dt)
+            
+            # One query per entity: count, last update and checksum
+            entity_manifest = _calculate_manifest_entry(queryset, fields)
+            
+            if entity in bucket_entities:
+                entity_manifest['bucket_size'] = bucket_size
+                entity_manifest['buckets'] = _calculate_bucket_checksums(queryset, fields, bucket_size)
+            
+            manifest['data_manifest'][entity] = entity_manifest
         
-        # Customers manifest
-        customers_qs = Customer.objects.filter(is_active=True)
-        if last_sync_dt:
-            customers_qs = customers_qs.filter(updated_at__gt=last_sync_dt)
-        else:
-            # For initial sync, get recent customers only
-            customers_qs = customers_qs.order_by('-created_at')[:200]
-        
-        manifest['data_manifest']['customers'] = {
-            'count': customers_qs.count(),
-            'last_updated': customers_qs.aggregate(
-                max_updated=Max('updated_at')
-            )['max_updated'].isoformat() if customers_qs.exists() else None,
-            'checksum': _calculate_queryset_checksum(
-                customers_qs, ['id', 'phone_number', 'updated_at']
-            )
-        }
+        # Cursor and epoch for the delta sync protocol (see get_sync_changes)
+        manifest['sync_epoch'] = get_sync_epoch()
+        manifest['latest_cursor'] = get_latest_cursor()
         
         # System settings
         manifest['system_settings'] = {
@@ -123,15 +125,31 @@ def get_sync_manifest(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@sync_payload
 @api_view(['POST'])
+@renderer_classes(SYNC_RENDERER_CLASSES)
 @permission_classes([IsAuthenticated, TenantPermission, AllRolesPermission])
 @throttle_classes([TenantAPIThrottle])
 def download_sync_data(request):
     """
     Download synchronization data for mobile app.
     Returns data based on requested categories and timestamps.
+    
+    Every response carries a cache_key. A client retrying an interrupted
+    download sends it back and receives the same snapshot for up to an hour.
     """
     try:
+        # Serve a retry from the snapshot cached by the original download
+        retry_key = request.data.get('cache_key')
+        if retry_key and retry_key.startswith(f"sync_data_{connection.schema_name}_"):
+            cached_sync_data = cache.get(retry_key)
+            if cached_sync_data is not None:
+                return Response({
+                    'success': True,
+                    'sync_data': cached_sync_data,
+                    'cache_key': retry_key
+                }, status=status.HTTP_200_OK)
+        
         # Parse request data
         requested_data = request.data.get('requested_data', {})
         last_sync = request.data.get('last_sync')
@@ -202,8 +220,12 @@ def download_sync_data(request):
             'server_time': timezone.now().isoformat()
         }
         
-        # Cache the sync data for potential retry
-        cache_key = f"sync_data_{request.user.id}_{device_id}_{timezone.now().timestamp()}"
+        # Cache the sync data for potential retry, keyed by content so
+        # identical downloads from different devices share one entry
+        content_hash = hashlib.sha256(
+            json.dumps(sync_data['data'], sort_keys=True, default=str).encode('utf-8')
+        ).hexdigest()[:32]
+        cache_key = f"sync_data_{connection.schema_name}_{content_hash}"
         cache.set(cache_key, sync_data, timeout=3600)  # Cache for 1 hour
         
         return Response({
@@ -219,6 +241,87 @@ def download_sync_data(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@sync_payload
+@api_view(['GET'])
+@renderer_classes(SYNC_RENDERER_CLASSES)
+@permission_classes([IsAuthenticated, TenantPermission, AllRolesPermission])
+@throttle_classes([TenantAPIThrottle])
+def get_sync_changes(request):
+    """
+    Get one page of changes from the tenant's sync change log.
+    
+    Clients start with since_cursor=0 for an initial sync and keep requesting
+    with the returned next_cursor while has_more is true. Objects that were
+    deleted, or no longer qualify for sync (e.g. sold items), are returned
+    as deleted ids.
+    
+    Clients keep the epoch returned with their cursor. When changes could
+    not be logged the epoch moves on, and a request with an older epoch gets
+    resync_required instead of changes: the client downloads everything
+    again and continues from the returned latest_cursor and epoch.
+    
+    Query parameters:
+        since_cursor: Last cursor the client has applied (default 0)
+        epoch: Sync epoch the cursor belongs to
+        limit: Maximum number of change log entries per page
+        entities: Comma separated subset of categories, jewelry_items, customers
+    """
+    try:
+        try:
+            since_cursor = max(int(request.GET.get('since_cursor', 0)), 0)
+            limit = int(request.GET.get('limit', settings.SYNC_CHANGES_PAGE_SIZE))
+            client_epoch = request.GET.get('epoch')
+            client_epoch = int(client_epoch) if client_epoch is not None else None
+        except ValueError:
+            return Response({
+                'success': False,
+                'error': _('since_cursor, epoch and limit must be integers')
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        epoch = get_sync_epoch()
+        if client_epoch is not None and client_epoch != epoch and since_cursor:
+            return Response({
+                'success': True,
+                'resync_required': True,
+                'epoch': epoch,
+                'latest_cursor': get_latest_cursor(),
+            }, status=status.HTTP_200_OK)
+        
+        limit = min(max(limit, 1), settings.SYNC_CHANGES_MAX_PAGE_SIZE)
+        
+        entities = request.GET.get('entities')
+        if entities:
+            entities = [entity.strip() for entity in entities.split(',') if entity.strip()]
+            unknown = set(entities) - set(SYNC_ENTITIES)
+            if unknown:
+                return Response({
+                    'success': False,
+                    'error': _('Unknown sync entities: {}').format(', '.join(sorted(unknown)))
+                }, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            entities = None
+        
+        # Pages are shared across devices until the change log moves on
+        page_key = _sync_changes_page_key(request, since_cursor, limit, entities)
+        page = cache.get(page_key)
+        if page is None:
+            page = _build_sync_changes_page(request, since_cursor, limit, entities)
+            cache.set(page_key, page, settings.SYNC_PAYLOAD_CACHE_TIMEOUT)
+        
+        return Response({
+            'success': True,
+            'resync_required': False,
+            'epoch': epoch,
+            **page
+        }, status=status.HTTP_200_OK)
+        
+    except Exception as e:
+        return Response({
+            'success': False,
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated, TenantPermission, POSPermission])
 @throttle_classes([TenantAPIThrottle])
@@ -408,8 +511,10 @@ def upload_inventory_changes(request):
                     
                     item.save(update_fields=['quantity', 'updated_at'])
                     
-                    # TODO: Create inventory adjustment log entry
-                    # This would record the change for audit purposes
+                    record_stock_movements([stock_movement(
+                        item, old_quantity, item.quantity,
+                        StockMovementType.ADJUSTMENT, reason=change_data.get('reason') or 'Offline inventory sync'
+                    )])
                     
                     update_results['successful_updates'] += 1
                     
@@ -542,8 +647,13 @@ def resolve_sync_conflicts(request):
                         item = JewelryItem.objects.get(id=item_id)
                         
                         if resolution == 'use_mobile':
+                            quantity_before = item.quantity
                             item.quantity = mobile_quantity
                             item.save(update_fields=['quantity'])
+                            record_stock_movements([stock_movement(
+                                item, quantity_before, item.quantity,
+                                StockMovementType.ADJUSTMENT, reason='Sync conflict resolved with mobile quantity'
+                            )])
                         elif resolution == 'use_server':
                             # Keep server value, no action needed
                             pass
@@ -576,22 +686,134 @@ def resolve_sync_conflicts(request):
 
 # Helper functions
 
-def _calculate_queryset_checksum(queryset, fields: List[str]) -> str:
-    """Calculate checksum for queryset based on specified fields."""
-    try:
-        data_string = ""
-        for obj in queryset:
-            field_values = []
-            for field in fields:
-                value = getattr(obj, field, '')
-                if hasattr(value, 'isoformat'):  # DateTime field
-                    value = value.isoformat()
-                field_values.append(str(value))
-            data_string += '|'.join(field_values) + '\n'
-        
-        return hashlib.md5(data_string.encode('utf-8')).hexdigest()
-    except Exception:
-        return 'error'
+class _RowHash(Func):
+    """
+    64-bit hash of a row's fields: the first 16 hex digits of an MD5 over the
+    '|'-joined values, as a signed bigint. Summing row hashes gives a
+    checksum that does not depend on row order.
+    """
+    template = "('x' || substr(md5(concat_ws('|', %(expressions)s)), 1, 16))::bit(64)::bigint"
+    output_field = BigIntegerField()
+
+
+def _row_hash_sum(fields: List[str]):
+    """Order-independent sum of row hashes, computed in the database."""
+    return Sum(_RowHash(*fields), output_field=DecimalField(max_digits=40, decimal_places=0))
+
+
+def _format_checksum(row_hash_sum) -> str:
+    """Render a row hash sum as a fixed-width hex checksum."""
+    return format(int(row_hash_sum or 0) % (1 << 64), '016x')
+
+
+def _calculate_manifest_entry(queryset, fields: List[str]) -> Dict[str, Any]:
+    """Calculate count, last update and checksum of a queryset in one query."""
+    stats = queryset.order_by().aggregate(
+        count=Count('pk'),
+        max_updated=Max('updated_at'),
+        row_hash_sum=_row_hash_sum(fields)
+    )
+    
+    return {
+        'count': stats['count'],
+        'last_updated': stats['max_updated'].isoformat() if stats['max_updated'] else None,
+        'checksum': _format_checksum(stats['row_hash_sum'])
+    }
+
+
+def _calculate_bucket_checksums(queryset, fields: List[str], bucket_size: int) -> List[Dict[str, Any]]:
+    """
+    Calculate checksums per id range so clients can find which slice of an
+    entity differs and re-download only that slice.
+    """
+    buckets = (
+        queryset.order_by()
+        .annotate(bucket=F('pk') / bucket_size)
+        .values('bucket')
+        .annotate(
+            count=Count('pk'),
+            row_hash_sum=_row_hash_sum(fields)
+        )
+        .order_by('bucket')
+    )
+    
+    return [
+        {
+            'bucket': bucket['bucket'],
+            'id_from': bucket['bucket'] * bucket_size,
+            'id_to': (bucket['bucket'] + 1) * bucket_size - 1,
+            'count': bucket['count'],
+            'checksum': _format_checksum(bucket['row_hash_sum'])
+        }
+        for bucket in buckets
+    ]
+
+
+def _sync_changes_page_key(request, since_cursor: int, limit: int, entities: Optional[List[str]]) -> str:
+    """Cache key of a change log page; it moves on whenever a new change settles."""
+    entity_key = ','.join(sorted(entities or SYNC_ENTITIES))
+    return (
+        f"sync_changes:{connection.schema_name}:{request.get_host()}:{get_latest_cursor()}:"
+        f"{since_cursor}:{limit}:{entity_key}"
+    )
+
+
+def _build_sync_changes_page(request, since_cursor: int, limit: int,
+                             entities: Optional[List[str]]) -> Dict[str, Any]:
+    """Read a page of the change log and serialize the changed objects."""
+    changes, next_cursor, has_more = get_changes(since_cursor, limit, entities)
+    
+    data = {}
+    for entity, entity_changes in changes.items():
+        changed_ids = [object_id for object_id, action in entity_changes if action != 'delete']
+        upserts = _serialize_sync_entities(entity, changed_ids, request)
+        upserted_ids = {obj['id'] for obj in upserts}
+        
+        data[entity] = {
+            'upserts': upserts,
+            'deleted_ids': [
+                object_id for object_id, action in entity_changes
+                if object_id not in upserted_ids
+            ],
+        }
+    
+    return {
+        'since_cursor': since_cursor,
+        'next_cursor': next_cursor,
+        'has_more': has_more,
+        'changes': data,
+    }
+
+
+def _serialize_sync_entities(entity: str, object_ids: List[int], request) -> List[Dict[str, Any]]:
+    """Serialize the objects of a sync entity that still qualify for sync."""
+    if not object_ids:
+        return []
+    
+    if entity == 'categories':
+        return [
+            {
+                'id': cat.id,
+                'name': cat.name_persian,
+                'description': cat.description,
+                'is_active': cat.is_active,
+                'updated_at': cat.updated_at.isoformat()
+            }
+            for cat in Category.objects.filter(id__in=object_ids, is_active=True)
+        ]
+    
+    if entity == 'jewelry_items':
+        items_qs = JewelryItem.objects.filter(
+            id__in=object_ids,
+            status__in=['available', 'reserved']
+        ).select_related('category').prefetch_related('photos')
+        return MobileJewelryItemSerializer(items_qs, many=True, context={'request': request}).data
+    
+    if entity == 'customers':
+        customers_qs = Customer.objects.filter(id__in=object_ids, is_active=True)
+        return MobileCustomerSerializer(customers_qs, many=True, context={'request': request}).data
+    
+    return []
 
 
 def _get_current_gold_price() -> float:
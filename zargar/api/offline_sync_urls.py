@@ -7,6 +7,7 @@ from . import offline_sync
 urlpatterns = [
     path('manifest/', offline_sync.get_sync_manifest, name='sync-manifest'),
     path('download/', offline_sync.download_sync_data, name='sync-download'),
+    path('changes/', offline_sync.get_sync_changes, name='sync-changes'),
     path('upload/transactions/', offline_sync.upload_offline_transactions, name='sync-upload-transactions'),
     path('upload/inventory/', offline_sync.upload_inventory_changes, name='sync-upload-inventory'),
     path('status/', offline_sync.get_sync_status, name='sync-status'),
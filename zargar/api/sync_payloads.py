@@ -0,0 +1,211 @@
+"""
+Compact, compressed and cacheable payloads for mobile sync endpoints.
+
+Mobile clients on slow networks can ask for:
+- MessagePack instead of JSON (``Accept: application/x-msgpack`` or
+  ``?format=msgpack``) when msgpack is installed
+- column-oriented lists (``?layout=columns``): a list of dicts sharing the same
+  keys is sent as ``{'columns': [...], 'rows': [[...], ...]}``
+- brotli or gzip compression through ``Accept-Encoding``
+
+Successful GET responses carry a strong ETag derived from the encoded body and
+answer ``If-None-Match`` with 304. Compressed bodies are cached in Redis by
+content hash, so identical pages requested by many devices are compressed once.
+"""
+import datetime
+import functools
+import gzip
+import hashlib
+import logging
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.encoding import force_str
+from django.utils.functional import Promise
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+logger = logging.getLogger(__name__)
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+
+def _msgpack_default(obj):
+    """Encode values msgpack does not support natively."""
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if isinstance(obj, Promise):
+        return force_str(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    return str(obj)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Renders response data as MessagePack.
+    """
+    media_type = 'application/x-msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_msgpack_default, use_bin_type=True)
+
+
+SYNC_RENDERER_CLASSES = [JSONRenderer] + ([MessagePackRenderer] if MSGPACK_AVAILABLE else [])
+
+
+def columnize(data):
+    """
+    Convert lists of dicts sharing the same keys into column-oriented form.
+
+    Applied recursively; other values are returned unchanged.
+    """
+    if isinstance(data, dict):
+        return {key: columnize(value) for key, value in data.items()}
+
+    if isinstance(data, list):
+        if len(data) > 1 and all(isinstance(row, dict) for row in data):
+            columns = list(data[0].keys())
+            if all(list(row.keys()) == columns for row in data):
+                return {
+                    'columns': columns,
+                    'rows': [[columnize(row[column]) for column in columns] for row in data],
+                }
+        return [columnize(value) for value in data]
+
+    return data
+
+
+def encode_sync_response(request, response):
+    """
+    Apply layout, ETag and compression to a successful DRF response.
+
+    Must be called with a finalized (not yet rendered) DRF Response.
+    """
+    if response.status_code != 200 or not hasattr(response, 'accepted_renderer'):
+        return response
+
+    if request.GET.get('layout') == 'columns':
+        response.data = columnize(response.data)
+
+    response.render()
+    content = response.content
+    content_hash = hashlib.sha256(content).hexdigest()[:32]
+
+    patch_vary_headers(response, ('Accept', 'Accept-Encoding'))
+
+    if request.method in ('GET', 'HEAD'):
+        etag = f'"{content_hash}"'
+        if etag in _parse_if_none_match(request):
+            not_modified = HttpResponseNotModified()
+            not_modified['ETag'] = etag
+            patch_vary_headers(not_modified, ('Accept', 'Accept-Encoding'))
+            return not_modified
+        response['ETag'] = etag
+
+    encoding = _choose_encoding(request)
+    if encoding and len(content) >= settings.SYNC_COMPRESSION_MIN_BYTES:
+        response.content = _compress(content, content_hash, encoding)
+        response['Content-Encoding'] = encoding
+        response['Content-Length'] = str(len(response.content))
+        if response.has_header('ETag'):
+            # A compressed body is a different representation
+            response['ETag'] = f'"{content_hash}-{encoding}"'
+
+    return response
+
+
+def sync_payload(view):
+    """
+    Decorator applying encode_sync_response to an @api_view function view.
+
+    Place it above @api_view so authentication, permissions and throttling
+    run before any cached or not-modified response is produced.
+    """
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        return encode_sync_response(request, response)
+    return wrapper
+
+
+class SyncPayloadMixin:
+    """
+    ViewSet mixin applying encode_sync_response to every response.
+    """
+    renderer_classes = SYNC_RENDERER_CLASSES
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        return encode_sync_response(request, response)
+
+
+def _parse_if_none_match(request):
+    header = request.META.get('HTTP_IF_NONE_MATCH', '')
+    tags = set()
+    for tag in header.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        for encoding in ('br', 'gzip'):
+            suffix = f'-{encoding}"'
+            if tag.endswith(suffix):
+                tag = tag[:-len(suffix)] + '"'
+        if tag:
+            tags.add(tag)
+    return tags
+
+
+def _choose_encoding(request):
+    accepted = {
+        part.split(';')[0].strip().lower()
+        for part in request.META.get('HTTP_ACCEPT_ENCODING', '').split(',')
+    }
+    if BROTLI_AVAILABLE and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def _compress(content, content_hash, encoding):
+    """Compress a body, sharing the result across requests with the same content."""
+    cache_key = f'sync_payload:{content_hash}:{encoding}'
+
+    try:
+        compressed = cache.get(cache_key)
+    except Exception as e:
+        logger.warning(f"Sync payload cache unavailable: {e}")
+        compressed = None
+
+    if compressed is None:
+        if encoding == 'br':
+            compressed = brotli.compress(content, quality=5)
+        else:
+            compressed = gzip.compress(content, compresslevel=6, mtime=0)
+
+        try:
+            cache.set(cache_key, compressed, settings.SYNC_PAYLOAD_CACHE_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"Sync payload cache unavailable: {e}")
+
+    return compressed
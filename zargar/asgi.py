@@ -3,14 +3,25 @@ ASGI config for zargar project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve it with an ASGI server (``uvicorn zargar.asgi:application``) to keep
+the gold price Server-Sent Events stream on async views, where each idle
+POS connection is a coroutine rather than a worker thread. Under WSGI
+(runserver, gunicorn sync workers) the stream is buffered and never reaches
+the terminal. With DEBUG on, static files are served as runserver would.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'zargar.settings.production')
 
-application = get_asgi_application()
\ No newline at end of file
+application = get_asgi_application()
+
+if settings.DEBUG:
+    from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
+    application = ASGIStaticFilesHandler(application)
\ No newline at end of file
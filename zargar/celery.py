@@ -14,6 +14,8 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 
 # Load task modules from all registered Django apps.
 app.autodiscover_tasks()
+app.autodiscover_tasks(['zargar.core'], related_name='pdf_tasks')
+app.autodiscover_tasks(['zargar.reports'], related_name='scheduler')
 
 # Celery configuration
 app.conf.update(
@@ -99,6 +101,12 @@ app.conf.beat_schedule = {
         'schedule': crontab(minute=30),
     },
     
+    # Drop expired minute and hourly gold price history at 4:30 AM
+    'prune-gold-price-history': {
+        'task': 'zargar.core.gold_price_tasks.prune_gold_price_history',
+        'schedule': crontab(hour=4, minute=30),
+    },
+    
     # Generate daily gold price report at 7:00 PM
     'daily-gold-price-report': {
         'task': 'zargar.core.gold_price_tasks.generate_gold_price_report',
@@ -113,6 +121,55 @@ app.conf.beat_schedule = {
         'args': ('weekly',),
     },
     
+    # === SYNC TASKS ===
+    # Compact mobile sync change logs daily at 2:30 AM
+    'compact-sync-change-logs': {
+        'task': 'zargar.core.sync_tasks.compact_sync_change_logs',
+        'schedule': crontab(hour=2, minute=30),
+    },
+    
+    # === LOG PARTITION TASKS ===
+    # Create upcoming monthly log partitions and drop expired ones at 0:30 AM
+    'maintain-log-partitions': {
+        'task': 'zargar.core.partition_tasks.maintain_log_partitions',
+        'schedule': crontab(hour=0, minute=30),
+    },
+    
+    # === PDF TASKS ===
+    # Delete stored PDF files past their cache lifetime daily at 4:45 AM
+    'prune-pdf-cache': {
+        'task': 'zargar.core.pdf_tasks.prune_pdf_cache',
+        'schedule': crontab(hour=4, minute=45),
+    },
+    
+    # === BILLING TASKS ===
+    # Invoice tenants whose monthly billing cycle is due daily at 5:00 AM
+    'generate-monthly-invoices': {
+        'task': 'zargar.tenants.tasks.generate_monthly_invoices',
+        'schedule': crontab(hour=5, minute=0),
+    },
+    
+    # === BARCODE TASKS ===
+    # Write buffered barcode scan history every minute
+    'flush-pending-barcode-scans': {
+        'task': 'zargar.jewelry.tasks.flush_pending_barcode_scans',
+        'schedule': crontab(minute='*'),
+    },
+    
+    # === STOCK TASKS ===
+    # Forecast demand and reorder quantities daily at 1:30 AM
+    'compute-stock-forecasts': {
+        'task': 'zargar.jewelry.tasks.compute_stock_forecasts',
+        'schedule': crontab(hour=1, minute=30),
+    },
+    
+    # === REPORT TASKS ===
+    # Claim due report schedules and queue their generation every 5 minutes
+    'dispatch-report-schedules': {
+        'task': 'zargar.reports.scheduler.execute_scheduled_reports',
+        'schedule': crontab(minute='*/5'),
+    },
+    
     # === NOTIFICATION TASKS ===
     # Process scheduled notifications every minute
     'process-scheduled-notifications': {
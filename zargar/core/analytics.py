@@ -0,0 +1,232 @@
+"""
+Vectorised analytics kernel for trend reports and dashboards.
+
+Trend sections load their series in one query into NumPy arrays (daily
+counts or sums with load_daily_series(), gold prices with
+price_series_arrays()) and compute moving averages, volatility, extremes,
+percent changes and linear forecasts with the functions below. Values stay
+floats inside the kernel and are converted to quantised Decimal only at the
+edge, by to_decimal() and the summary helpers.
+"""
+import logging
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Dict, List, Optional, Sequence
+
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+CENT = Decimal('0.01')
+
+# Percent change beyond which a trend counts as increasing or decreasing
+TREND_THRESHOLD = 1.0
+
+
+def _require_numpy():
+    if not NUMPY_AVAILABLE:
+        raise ImportError("numpy is required for trend analytics")
+
+
+def to_decimal(value, places: Decimal = CENT) -> Optional[Decimal]:
+    """Quantise a float or NumPy scalar to Decimal; NaN becomes None."""
+    value = float(value)
+    if value != value:
+        return None
+    return Decimal(repr(value)).quantize(places, rounding=ROUND_HALF_UP)
+
+
+def to_decimals(values, places: Decimal = CENT) -> List[Optional[Decimal]]:
+    """Quantise an array to a list of Decimals."""
+    return [to_decimal(value, places) for value in values]
+
+
+def as_array(values: Sequence) -> 'np.ndarray':
+    """Float array from Decimals, numbers or None (as NaN)."""
+    _require_numpy()
+    return np.array([np.nan if value is None else float(value) for value in values], dtype=float)
+
+
+def load_daily_series(queryset, date_field: str, start: date, days: int,
+                      value=None) -> 'np.ndarray':
+    """
+    Daily aggregate of a queryset as an array, in one query.
+
+    Args:
+        queryset: Rows to aggregate
+        date_field: Date or datetime field that places a row on a day
+        start: First day of the series
+        days: Number of days
+        value: Aggregate per day, row count by default
+
+    Returns:
+        Array of length days, zero on days without rows
+    """
+    _require_numpy()
+    series = np.zeros(days)
+    since = timezone.make_aware(datetime.combine(start, time.min))
+
+    rows = queryset.filter(**{f'{date_field}__gte': since}).annotate(
+        day=TruncDate(date_field)
+    ).values('day').annotate(
+        value=value if value is not None else Count('pk')
+    ).values_list('day', 'value')
+
+    for day, day_value in rows:
+        index = (day - start).days
+        if 0 <= index < days and day_value is not None:
+            series[index] += float(day_value)
+    return series
+
+
+def price_series_arrays(series: List[Dict[str, Any]]) -> Dict[str, 'np.ndarray']:
+    """Columns of a gold price series (see get_price_series) as arrays."""
+    _require_numpy()
+    return {
+        column: as_array([point.get(column, point['price_per_gram']) for point in series])
+        for column in ('open', 'high', 'low', 'close', 'average')
+    }
+
+
+def moving_average(values: 'np.ndarray', window: int) -> 'np.ndarray':
+    """Trailing moving average; shorter windows are used for the first values."""
+    _require_numpy()
+    if len(values) == 0:
+        return values
+    sums = np.cumsum(values)
+    sums[window:] = sums[window:] - sums[:-window]
+    counts = np.minimum(np.arange(1, len(values) + 1), window)
+    return sums / counts
+
+
+def percent_changes(values: 'np.ndarray') -> 'np.ndarray':
+    """Percent change of each value from the previous one; 0 for the first."""
+    _require_numpy()
+    changes = np.zeros(len(values))
+    if len(values) > 1:
+        previous = values[:-1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            changes[1:] = np.where(previous != 0, (values[1:] - previous) / previous * 100, 0.0)
+    return changes
+
+
+def percent_change(first: float, last: float) -> float:
+    """Percent change from first to last; 100 when growing from zero."""
+    if first:
+        return (last - first) / first * 100
+    return 100.0 if last > 0 else 0.0
+
+
+def linear_forecast(values: 'np.ndarray', horizon: int) -> Dict[str, Any]:
+    """
+    Least-squares line through the series, extended horizon steps ahead.
+
+    Returns:
+        Dictionary with slope (per step) and forecast array
+    """
+    _require_numpy()
+    if len(values) < 2:
+        last = values[-1] if len(values) else np.nan
+        return {'slope': 0.0, 'forecast': np.full(horizon, last)}
+
+    steps = np.arange(len(values))
+    slope, intercept = np.polyfit(steps, values, 1)
+    future = np.arange(len(values), len(values) + horizon)
+    return {'slope': float(slope), 'forecast': slope * future + intercept}
+
+
+def trend_direction(change_percentage: float, threshold: float = TREND_THRESHOLD) -> str:
+    if change_percentage > threshold:
+        return 'increasing'
+    if change_percentage < -threshold:
+        return 'decreasing'
+    return 'stable'
+
+
+def summarize_series(values: 'np.ndarray', highs: Optional['np.ndarray'] = None,
+                     lows: Optional['np.ndarray'] = None, moving_window: int = 7,
+                     forecast_horizon: int = 7) -> Dict[str, Any]:
+    """
+    Trend statistics of a series, as Decimals.
+
+    Args:
+        values: Series, oldest first (e.g. daily closes)
+        highs: Per-step highs for the maximum, values if omitted
+        lows: Per-step lows for the minimum, values if omitted
+        moving_window: Steps in the moving average
+        forecast_horizon: Steps forecast ahead
+
+    Returns:
+        Dictionary with first, last, minimum, maximum, average, volatility
+        (range as a percentage of the average), standard deviation of the
+        step changes, change_percentage, direction, moving_average, step
+        changes, forecast and forecast slope
+    """
+    _require_numpy()
+    if len(values) == 0:
+        return {
+            'first': None, 'last': None, 'minimum': None, 'maximum': None, 'average': None,
+            'volatility': Decimal('0.00'), 'change_std': Decimal('0.00'),
+            'change_percentage': Decimal('0.00'), 'direction': 'stable',
+            'moving_average': [], 'changes': [], 'forecast': [], 'forecast_slope': Decimal('0.00'),
+        }
+
+    highs = values if highs is None else highs
+    lows = values if lows is None else lows
+    minimum = np.nanmin(lows)
+    maximum = np.nanmax(highs)
+    average = np.nanmean(values)
+    changes = percent_changes(values)
+    change = percent_change(values[0], values[-1])
+    forecast = linear_forecast(values, forecast_horizon)
+
+    return {
+        'first': to_decimal(values[0]),
+        'last': to_decimal(values[-1]),
+        'minimum': to_decimal(minimum),
+        'maximum': to_decimal(maximum),
+        'average': to_decimal(average),
+        'volatility': to_decimal((maximum - minimum) / average * 100 if average else 0.0),
+        'change_std': to_decimal(np.std(changes[1:]) if len(values) > 1 else 0.0),
+        'change_percentage': to_decimal(change),
+        'direction': trend_direction(change),
+        'moving_average': to_decimals(moving_average(values, moving_window)),
+        'changes': to_decimals(changes),
+        'forecast': to_decimals(forecast['forecast']),
+        'forecast_slope': to_decimal(forecast['slope']),
+    }
+
+
+def compare_periods(values: 'np.ndarray', period: int) -> Dict[str, Any]:
+    """
+    Compare the total of the last period steps with the period before it.
+
+    Returns:
+        Dictionary with current and previous totals, change_percentage,
+        direction and a linear forecast of the next period's total
+    """
+    _require_numpy()
+    current = float(values[-period:].sum())
+    previous = float(values[-2 * period:-period].sum())
+    change = percent_change(previous, current)
+    forecast = linear_forecast(values, period)['forecast']
+
+    return {
+        'current_total': current,
+        'previous_total': previous,
+        'change_percentage': to_decimal(change),
+        'direction': trend_direction(change, threshold=0),
+        'forecast_next_period': to_decimal(max(float(np.nansum(forecast)), 0.0)),
+    }
+
+
+def daily_dates(start: date, days: int) -> List[date]:
+    return [start + timedelta(days=offset) for offset in range(days)]
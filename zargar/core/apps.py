@@ -4,4 +4,8 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'zargar.core'
-    verbose_name = 'Core'
\ No newline at end of file
+    verbose_name = 'Core'
+    
+    def ready(self):
+        """Import signals when app is ready."""
+        import zargar.core.signals
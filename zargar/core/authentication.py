@@ -5,12 +5,14 @@ from rest_framework.authentication import TokenAuthentication
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from rest_framework.exceptions import AuthenticationFailed
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import connection
 from django_tenants.utils import get_public_schema_name
 from django.utils.translation import gettext_lazy as _
 
 from .models import set_current_tenant, get_current_tenant
+from .principal_cache import principal_cache
 
 
 class TenantAwareJWTAuthentication(JWTAuthentication):
@@ -31,11 +33,12 @@ class TenantAwareJWTAuthentication(JWTAuthentication):
             return None
         
         validated_token = self.get_validated_token(raw_token)
-        user = self.get_user(validated_token)
         
-        # Validate tenant context
+        # Validate tenant context before loading the user
         self._validate_tenant_context(validated_token, request)
         
+        user = self.get_user(validated_token)
+        
         # Set current tenant in thread-local storage
         self._set_tenant_context(user)
         
@@ -65,22 +68,41 @@ class TenantAwareJWTAuthentication(JWTAuthentication):
             # SuperAdmin authentication
             try:
                 from zargar.tenants.admin_models import SuperAdmin
-                user = SuperAdmin.objects.get(id=user_id)
-            except (SuperAdmin.DoesNotExist, ImportError):
+            except ImportError:
                 raise AuthenticationFailed(_('User not found.'))
+            model = SuperAdmin
         else:
             # Regular user authentication
-            User = get_user_model()
-            try:
-                user = User.objects.get(id=user_id)
-            except User.DoesNotExist:
-                raise AuthenticationFailed(_('User not found.'))
+            model = get_user_model()
+        
+        user = self._load_user(model, current_schema, user_id)
         
         if not user.is_active:
             raise AuthenticationFailed(_('User is inactive.'))
         
         return user
     
+    def _load_user(self, model, schema_name, user_id):
+        """
+        Load the token's user, going through the principal cache when enabled.
+        """
+        cache_enabled = settings.JWT_PRINCIPAL_CACHE_ENABLED
+        
+        if cache_enabled:
+            user, version = principal_cache.get(model, schema_name, user_id)
+            if user is not None:
+                return user
+        
+        try:
+            user = model.objects.get(id=user_id)
+        except model.DoesNotExist:
+            raise AuthenticationFailed(_('User not found.'))
+        
+        if cache_enabled:
+            principal_cache.set(schema_name, user, version)
+        
+        return user
+    
     def _validate_tenant_context(self, validated_token, request):
         """
         Validate that token is being used in correct tenant context.
@@ -11,6 +11,10 @@ from django.core.cache import cache
 from django.conf import settings
 import logging
 
+from .analytics import (
+    as_array, compare_periods, daily_dates, load_daily_series, summarize_series
+)
+
 logger = logging.getLogger(__name__)
 
 
@@ -422,11 +426,10 @@ class TenantDashboardService:
                 'contract', 'contract__customer'
             ).order_by('-payment_date')[:10]
             
-            # Overdue contracts
-            overdue_contracts = []
-            for contract in GoldInstallmentContract.objects.filter(status='active'):
-                if contract.is_overdue:
-                    overdue_contracts.append(contract)
+            # Overdue contracts, longest overdue first
+            overdue_contracts = GoldInstallmentContract.objects.overdue().filter(status='active')
+            overdue_count = overdue_contracts.count()
+            top_overdue = overdue_contracts.select_related('customer').order_by('next_due_date')[:5]
             
             # Payment trends (last 30 days)
             thirty_days_ago = timezone.now().date() - timedelta(days=30)
@@ -456,15 +459,16 @@ class TenantDashboardService:
                     'display': self._format_currency(current_gold_price)
                 },
                 'overdue_contracts': {
-                    'count': len(overdue_contracts),
+                    'count': overdue_count,
                     'contracts': [
                         {
                             'contract_number': contract.contract_number,
                             'customer_name': contract.customer.full_persian_name,
                             'remaining_weight': contract.remaining_gold_weight_grams,
-                            'days_overdue': (timezone.now().date() - contract.contract_date).days
+                            'days_overdue': contract.days_overdue,
+                            'overdue_amount': contract.calculate_overdue_amount(current_gold_price)
                         }
-                        for contract in overdue_contracts[:5]  # Top 5 overdue
+                        for contract in top_overdue  # Top 5 overdue
                     ]
                 },
                 'recent_payments': [
@@ -718,10 +722,7 @@ class TenantDashboardService:
             # Overdue installment contracts (if gold_installments app exists)
             try:
                 GoldInstallmentContract = apps.get_model('gold_installments', 'GoldInstallmentContract')
-                overdue_count = 0
-                for contract in GoldInstallmentContract.objects.filter(status='active'):
-                    if hasattr(contract, 'is_overdue') and contract.is_overdue:
-                        overdue_count += 1
+                overdue_count = GoldInstallmentContract.objects.overdue().filter(status='active').count()
                 
                 if overdue_count > 0:
                     alerts['critical'].append({
@@ -834,20 +835,15 @@ class TenantDashboardService:
             except LookupError:
                 return []
             
-            trend_data = []
-            for i in range(7):
-                date_point = timezone.now().date() - timedelta(days=6-i)
-                daily_sales = JewelryItem.objects.filter(
-                    status='sold',
-                    updated_at__date=date_point
-                ).count()
-                
-                trend_data.append({
-                    'date': date_point,
-                    'sales_count': daily_sales
-                })
+            start = timezone.now().date() - timedelta(days=6)
+            daily_sales = load_daily_series(
+                JewelryItem.objects.filter(status='sold'), 'updated_at', start, 7
+            )
             
-            return trend_data
+            return [
+                {'date': date_point, 'sales_count': int(count)}
+                for date_point, count in zip(daily_dates(start, 7), daily_sales)
+            ]
         except:
             return []
     
@@ -856,24 +852,17 @@ class TenantDashboardService:
         if len(price_trend) < 2:
             return {'direction': 'stable', 'change_percentage': 0}
         
-        first_price = price_trend[0]['price_per_gram']
-        last_price = price_trend[-1]['price_per_gram']
-        
-        change_percentage = ((last_price - first_price) / first_price * 100).quantize(
-            Decimal('0.01'), rounding=ROUND_HALF_UP
+        trend = summarize_series(
+            as_array([point['price_per_gram'] for point in price_trend]), forecast_horizon=1
         )
         
-        if change_percentage > 1:
-            direction = 'increasing'
-        elif change_percentage < -1:
-            direction = 'decreasing'
-        else:
-            direction = 'stable'
-        
         return {
-            'direction': direction,
-            'change_percentage': change_percentage,
-            'change_display': self._format_percentage(abs(change_percentage))
+            'direction': trend['direction'],
+            'change_percentage': trend['change_percentage'],
+            'change_display': self._format_percentage(abs(trend['change_percentage'])),
+            'volatility': trend['volatility'],
+            'moving_average': trend['moving_average'][-1],
+            'next_day_forecast': trend['forecast'][0],
         }
     
     def _calculate_profit_margin_estimate(self, revenue: Decimal, costs: Decimal) -> Dict:
@@ -921,13 +910,35 @@ class TenantDashboardService:
             return 'general'
     
     def _calculate_sales_trend(self) -> Dict:
-        """Calculate sales trend analysis."""
-        # Mock implementation - would use actual sales data
-        return {
-            'direction': 'increasing',
-            'change_percentage': Decimal('15.5'),
-            'period': '30_days'
-        }
+        """Calculate sales trend analysis: last 30 days against the 30 before."""
+        fallback = {'direction': 'stable', 'change_percentage': Decimal('0'), 'period': '30_days'}
+        try:
+            from django.apps import apps
+            
+            if not apps.ready:
+                return fallback
+            
+            try:
+                JewelryItem = apps.get_model('jewelry', 'JewelryItem')
+            except LookupError:
+                return fallback
+            
+            start = timezone.now().date() - timedelta(days=59)
+            daily_sales = load_daily_series(
+                JewelryItem.objects.filter(status='sold'), 'updated_at', start, 60
+            )
+            comparison = compare_periods(daily_sales, 30)
+            
+            return {
+                'direction': comparison['direction'],
+                'change_percentage': comparison['change_percentage'],
+                'period': '30_days',
+                'sales_30_days': int(comparison['current_total']),
+                'forecast_next_30_days': comparison['forecast_next_period'],
+            }
+        except Exception as e:
+            logger.error(f"Error calculating sales trend: {e}")
+            return fallback
     
     def _calculate_customer_acquisition_trend(self) -> Dict:
         """Calculate customer acquisition trend."""
@@ -942,27 +953,15 @@ class TenantDashboardService:
             except LookupError:
                 return {'direction': 'stable', 'change_percentage': Decimal('0'), 'new_customers_30_days': 0}
             
-            thirty_days_ago = timezone.now() - timedelta(days=30)
-            sixty_days_ago = timezone.now() - timedelta(days=60)
-            
-            recent_customers = Customer.objects.filter(
-                created_at__gte=thirty_days_ago
-            ).count()
-            
-            previous_customers = Customer.objects.filter(
-                created_at__gte=sixty_days_ago,
-                created_at__lt=thirty_days_ago
-            ).count()
-            
-            if previous_customers > 0:
-                change_percentage = ((recent_customers - previous_customers) / previous_customers * 100)
-            else:
-                change_percentage = 100 if recent_customers > 0 else 0
+            start = timezone.now().date() - timedelta(days=59)
+            comparison = compare_periods(
+                load_daily_series(Customer.objects.all(), 'created_at', start, 60), 30
+            )
             
             return {
-                'direction': 'increasing' if change_percentage > 0 else 'decreasing' if change_percentage < 0 else 'stable',
-                'change_percentage': Decimal(str(change_percentage)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP),
-                'new_customers_30_days': recent_customers
+                'direction': comparison['direction'],
+                'change_percentage': comparison['change_percentage'],
+                'new_customers_30_days': int(comparison['current_total'])
             }
         except:
             return {'direction': 'stable', 'change_percentage': Decimal('0'), 'new_customers_30_days': 0}
@@ -17,6 +17,8 @@ from .external_services import (
     PersianEmailService,
     validate_all_external_services
 )
+from .gold_price_history import record_gold_prices
+from .gold_price_stream import publish_gold_prices
 
 logger = logging.getLogger(__name__)
 
@@ -47,6 +49,7 @@ def update_iranian_gold_prices(self):
         # Clear existing cache to force fresh API calls
         IranianGoldPriceAPI.invalidate_cache()
         results['cache_invalidated'] = True
+        published_prices = {}
         
         # Update prices for each karat
         for karat in karats:
@@ -59,6 +62,7 @@ def update_iranian_gold_prices(self):
                 price_data = IranianGoldPriceAPI.get_current_gold_price(karat)
                 
                 if price_data and not price_data.get('is_fallback', False):
+                    published_prices[karat] = price_data
                     results['updated_karats'].append({
                         'karat': karat,
                         'price_per_gram': str(price_data['price_per_gram']),
@@ -85,6 +89,10 @@ def update_iranian_gold_prices(self):
                     'reason': error_msg
                 })
         
+        # Append to the shared price history and push to connected POS terminals
+        results['recorded'] = record_gold_prices(published_prices)
+        results['published'] = publish_gold_prices(published_prices)
+        
         # Record system health metric
         success_rate = len(results['updated_karats']) / len(karats) * 100
         record_iranian_gold_price_health_metric.apply_async(
@@ -17,6 +17,8 @@ from django.template import Template, Context
 from django.core.exceptions import ValidationError
 import xml.etree.ElementTree as ET
 
+from .gold_price_history import get_price_series
+
 logger = logging.getLogger(__name__)
 
 
@@ -62,6 +64,9 @@ class IranianGoldPriceAPI:
     
     CACHE_KEY_PREFIX = 'iranian_gold_price'
     CACHE_TIMEOUT = 300  # 5 minutes
+    # Bumped whenever a fresh price is cached, so caches of values derived
+    # from gold prices can key on it
+    PRICE_GENERATION_KEY = 'iranian_gold_price:generation'
     
     # Fallback prices in Toman per gram (updated regularly)
     FALLBACK_PRICES = {
@@ -99,6 +104,7 @@ class IranianGoldPriceAPI:
         if price_data:
             # Cache the result
             cache.set(cache_key, price_data, cls.CACHE_TIMEOUT)
+            cls._bump_price_generation()
             logger.info(f"Fetched and cached Iranian gold price for {karat}k: {price_data['price_per_gram']} Toman")
             return price_data
         
@@ -256,36 +262,51 @@ class IranianGoldPriceAPI:
     @classmethod
     def get_price_trend(cls, karat: int = 18, days: int = 30) -> List[Dict]:
         """
-        Get gold price trend for specified period from Iranian market.
+        Get gold price trend for specified period from the shared price history.
+        
+        Days without recorded prices carry the previous day's close forward;
+        days before the first recorded price use the earliest known price.
         
         Args:
             karat: Gold karat
             days: Number of days for trend analysis
             
         Returns:
-            List of price data points
+            List of one price data point per day, oldest first
         """
-        # For now, return mock trend data based on current price
-        # In production, this would fetch historical data from Iranian sources
-        current_price_data = cls.get_current_gold_price(karat)
-        current_price = current_price_data['price_per_gram']
+        today = timezone.localdate()
+        first_day = today - timedelta(days=days - 1)
+        series = get_price_series(
+            karat,
+            timezone.make_aware(datetime.combine(first_day, datetime.min.time())),
+            resolution='day'
+        )
+        by_date = {point['date']: point for point in series}
         
-        trend_data = []
+        if series:
+            last_price = series[0]['price_per_gram']
+        else:
+            # No history recorded yet
+            last_price = cls.get_current_gold_price(karat)['price_per_gram']
         
-        for i in range(days):
-            date = timezone.now().date() - timedelta(days=days-i-1)
-            
-            # Mock price variation (±3% daily volatility typical for Iranian gold market)
-            import random
-            variation = Decimal('0.97') + (Decimal(str(random.randint(0, 60))) / Decimal('1000'))
-            price = (current_price * variation).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        trend_data = []
+        for offset in range(days):
+            date = first_day + timedelta(days=offset)
+            point = by_date.get(date)
+            if point:
+                last_price = point['price_per_gram']
             
             trend_data.append({
                 'date': date,
-                'price_per_gram': price,
+                'price_per_gram': last_price,
+                'open': point['open'] if point else last_price,
+                'high': point['high'] if point else last_price,
+                'low': point['low'] if point else last_price,
+                'average': point['average'] if point else last_price,
                 'karat': karat,
                 'currency': 'TMN',
-                'market': 'iranian'
+                'market': 'iranian',
+                'is_recorded': point is not None
             })
         
         return trend_data
@@ -370,6 +391,25 @@ class IranianGoldPriceAPI:
                 cache_key = f"{cls.CACHE_KEY_PREFIX}_{k}"
                 cache.delete(cache_key)
             logger.info("Invalidated all Iranian gold price caches")
+        
+        cls._bump_price_generation()
+    
+    @classmethod
+    def get_price_generation(cls) -> int:
+        """Generation of the cached gold prices; 0 until the first fetch."""
+        try:
+            return cache.get(cls.PRICE_GENERATION_KEY, 0)
+        except Exception as e:
+            logger.warning(f"Gold price generation unavailable: {e}")
+            return 0
+    
+    @classmethod
+    def _bump_price_generation(cls):
+        try:
+            if not cache.add(cls.PRICE_GENERATION_KEY, 1, timeout=None):
+                cache.incr(cls.PRICE_GENERATION_KEY)
+        except Exception as e:
+            logger.error(f"Could not bump gold price generation: {e}")
 
 
 class IranianSMSService:
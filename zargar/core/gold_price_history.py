@@ -0,0 +1,306 @@
+"""
+Shared gold price time series with downsampled rollups.
+
+Every price fetched by the update task is appended to GoldPricePoint in the
+public schema as a minute bucket, and the hour and day buckets containing it
+are recomputed from the finer level, so the rollups stay current without a
+separate batch job. Each bucket holds open/high/low/close, the average of its
+samples and the sample count, so rolling up never needs the raw samples.
+
+Minute buckets are kept for GOLD_PRICE_MINUTE_RETENTION_DAYS and hourly ones
+for GOLD_PRICE_HOUR_RETENTION_DAYS; daily buckets are kept forever.
+get_price_series() picks the finest resolution that is still retained and
+keeps the number of points reasonable for the requested range. Recent minute
+data is also held per process in flat arrays (RecentPriceWindow), so charts
+and dashboards refreshing the last hours do not query the table each time.
+
+All tenants read this one series instead of rebuilding trends per tenant.
+"""
+import logging
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from zargar.core.time_buckets import bucket_start
+from zargar.system.models import GoldPricePoint
+
+logger = logging.getLogger(__name__)
+
+# (finer, coarser) resolution pairs, in rollup order
+ROLLUP_CHAIN = (('minute', 'hour'), ('hour', 'day'))
+
+PRICE_FIELDS = ('open_price', 'high_price', 'low_price', 'close_price', 'average_price')
+
+CENT = Decimal('0.01')
+
+
+def fold_points(points: Iterable[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Combine buckets, ordered by time, into one bucket.
+
+    Args:
+        points: Dicts with the PRICE_FIELDS and sample_count
+
+    Returns:
+        Dict with the combined PRICE_FIELDS and sample_count, or None if empty
+    """
+    folded = None
+    weighted_sum = Decimal('0')
+
+    for point in points:
+        weighted_sum += point['average_price'] * point['sample_count']
+        if folded is None:
+            folded = {field: point[field] for field in PRICE_FIELDS}
+            folded['sample_count'] = point['sample_count']
+            continue
+        folded['high_price'] = max(folded['high_price'], point['high_price'])
+        folded['low_price'] = min(folded['low_price'], point['low_price'])
+        folded['close_price'] = point['close_price']
+        folded['sample_count'] += point['sample_count']
+
+    if folded is not None:
+        folded['average_price'] = (weighted_sum / folded['sample_count']).quantize(CENT, rounding=ROUND_HALF_UP)
+    return folded
+
+
+def record_gold_prices(prices: Dict[int, Dict[str, Any]]) -> int:
+    """
+    Append fetched prices to the time series and refresh their rollups.
+
+    Args:
+        prices: Price data by karat, as returned by IranianGoldPriceAPI
+
+    Returns:
+        Number of prices recorded
+    """
+    if not prices:
+        return 0
+
+    earliest = None
+    for karat, price_data in prices.items():
+        price = Decimal(str(price_data['price_per_gram'])).quantize(CENT, rounding=ROUND_HALF_UP)
+        fetched_at = price_data.get('timestamp') or timezone.now()
+        minute = bucket_start(fetched_at, 'minute')
+        earliest = minute if earliest is None else min(earliest, minute)
+
+        with transaction.atomic():
+            point = GoldPricePoint.objects.select_for_update().filter(
+                resolution='minute', karat=karat, source=price_data.get('source', ''), bucket_start=minute
+            ).first()
+
+            if point is None:
+                GoldPricePoint.objects.create(
+                    resolution='minute', karat=karat, source=price_data.get('source', ''),
+                    bucket_start=minute, open_price=price, high_price=price, low_price=price,
+                    close_price=price, average_price=price, sample_count=1
+                )
+                continue
+
+            total = point.average_price * point.sample_count + price
+            point.sample_count += 1
+            point.average_price = (total / point.sample_count).quantize(CENT, rounding=ROUND_HALF_UP)
+            point.high_price = max(point.high_price, price)
+            point.low_price = min(point.low_price, price)
+            point.close_price = price
+            point.save(update_fields=PRICE_FIELDS[1:] + ('sample_count', 'updated_at'))
+
+    roll_up(earliest)
+    return len(prices)
+
+
+def roll_up(since: datetime) -> int:
+    """
+    Recompute hour and day buckets from the finer level.
+
+    Args:
+        since: Buckets containing this moment and later are recomputed
+
+    Returns:
+        Number of buckets written
+    """
+    written = 0
+
+    for finer, coarser in ROLLUP_CHAIN:
+        start = bucket_start(since, coarser)
+        groups = {}
+        rows = GoldPricePoint.objects.filter(
+            resolution=finer, bucket_start__gte=start
+        ).order_by('karat', 'source', 'bucket_start').values(
+            'karat', 'source', 'bucket_start', 'sample_count', *PRICE_FIELDS
+        )
+        for row in rows:
+            key = (row['karat'], row['source'], bucket_start(row['bucket_start'], coarser))
+            groups.setdefault(key, []).append(row)
+
+        for (karat, source, coarse_start), points in groups.items():
+            GoldPricePoint.objects.update_or_create(
+                resolution=coarser, karat=karat, source=source, bucket_start=coarse_start,
+                defaults=fold_points(points)
+            )
+            written += 1
+
+    return written
+
+
+def prune_gold_price_history() -> Dict[str, int]:
+    """Delete minute and hour buckets past their retention."""
+    now = timezone.now()
+    retention = {
+        'minute': timedelta(days=settings.GOLD_PRICE_MINUTE_RETENTION_DAYS),
+        'hour': timedelta(days=settings.GOLD_PRICE_HOUR_RETENTION_DAYS),
+    }
+
+    deleted = {}
+    for resolution, keep in retention.items():
+        deleted[resolution], _ = GoldPricePoint.objects.filter(
+            resolution=resolution, bucket_start__lt=now - keep
+        ).delete()
+    return deleted
+
+
+def choose_resolution(start: datetime, end: datetime) -> str:
+    """Finest retained resolution that keeps the range to a reasonable size."""
+    now = timezone.now()
+    span = end - start
+
+    if (span <= timedelta(days=settings.GOLD_PRICE_MINUTE_MAX_SPAN_DAYS)
+            and start >= now - timedelta(days=settings.GOLD_PRICE_MINUTE_RETENTION_DAYS)):
+        return 'minute'
+    if (span <= timedelta(days=settings.GOLD_PRICE_HOUR_MAX_SPAN_DAYS)
+            and start >= now - timedelta(days=settings.GOLD_PRICE_HOUR_RETENTION_DAYS)):
+        return 'hour'
+    return 'day'
+
+
+def _series_point(moment: datetime, fields: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'timestamp': moment,
+        'date': timezone.localtime(moment).date(),
+        'open': fields['open_price'],
+        'high': fields['high_price'],
+        'low': fields['low_price'],
+        'close': fields['close_price'],
+        'average': fields['average_price'],
+        'price_per_gram': fields['close_price'],
+        'sample_count': fields['sample_count'],
+    }
+
+
+def _query_series(karat: int, start: datetime, end: datetime, resolution: str,
+                  source: Optional[str] = None) -> List[Dict[str, Any]]:
+    rows = GoldPricePoint.objects.filter(
+        resolution=resolution, karat=karat,
+        bucket_start__gte=bucket_start(start, resolution), bucket_start__lte=end
+    )
+    if source:
+        rows = rows.filter(source=source)
+
+    # Buckets of the same time from different sources are combined
+    buckets = {}
+    for row in rows.order_by('bucket_start', 'source').values('bucket_start', 'sample_count', *PRICE_FIELDS):
+        buckets.setdefault(row['bucket_start'], []).append(row)
+
+    return [_series_point(moment, fold_points(points)) for moment, points in buckets.items()]
+
+
+class RecentPriceWindow:
+    """
+    Minute buckets of the last GOLD_PRICE_WINDOW_MINUTES per karat, in arrays.
+
+    Each karat's window is a tuple of flat arrays (timestamps and prices as
+    doubles, sample counts as unsigned ints), replaced as a whole when it is
+    reloaded, so readers never see a partially updated window.
+    """
+
+    def __init__(self):
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def series(self, karat: int, start: datetime, end: datetime) -> Optional[List[Dict[str, Any]]]:
+        """Minute points in [start, end], or None if start is outside the window."""
+        window = self._get(karat)
+        if start.timestamp() < window['since']:
+            return None
+
+        timestamps = window['timestamp']
+        first = bisect_left(timestamps, bucket_start(start, 'minute').timestamp())
+        last = bisect_right(timestamps, end.timestamp())
+
+        series = []
+        for index in range(first, last):
+            fields = {
+                field: Decimal(window[field][index]).quantize(CENT, rounding=ROUND_HALF_UP)
+                for field in PRICE_FIELDS
+            }
+            fields['sample_count'] = window['sample_count'][index]
+            moment = datetime.fromtimestamp(timestamps[index], tz=timezone.get_current_timezone())
+            series.append(_series_point(moment, fields))
+        return series
+
+    def clear(self):
+        self._windows = {}
+
+    def _get(self, karat: int) -> Dict[str, Any]:
+        window = self._windows.get(karat)
+        if window is None or time.monotonic() - window['loaded_at'] > settings.GOLD_PRICE_WINDOW_REFRESH_SECONDS:
+            with self._lock:
+                window = self._load(karat)
+                self._windows[karat] = window
+        return window
+
+    def _load(self, karat: int) -> Dict[str, Any]:
+        now = timezone.now()
+        since = now - timedelta(minutes=settings.GOLD_PRICE_WINDOW_MINUTES)
+        window = {field: array('d') for field in ('timestamp',) + PRICE_FIELDS}
+        window['sample_count'] = array('L')
+
+        for point in _query_series(karat, since, now, 'minute'):
+            window['timestamp'].append(point['timestamp'].timestamp())
+            window['open_price'].append(float(point['open']))
+            window['high_price'].append(float(point['high']))
+            window['low_price'].append(float(point['low']))
+            window['close_price'].append(float(point['close']))
+            window['average_price'].append(float(point['average']))
+            window['sample_count'].append(point['sample_count'])
+
+        window['since'] = since.timestamp()
+        window['loaded_at'] = time.monotonic()
+        return window
+
+
+recent_window = RecentPriceWindow()
+
+
+def get_price_series(karat: int, start: datetime, end: Optional[datetime] = None,
+                     resolution: Optional[str] = None, source: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Gold price buckets of a karat over a time range.
+
+    Args:
+        karat: Gold karat
+        start: Start of the range
+        end: End of the range, now if omitted
+        resolution: 'minute', 'hour' or 'day'; chosen from the range if omitted
+        source: Only buckets of this price API; all sources combined if omitted
+
+    Returns:
+        List of dicts with timestamp, date, open, high, low, close, average,
+        price_per_gram (the close) and sample_count, oldest first
+    """
+    end = end or timezone.now()
+    resolution = resolution or choose_resolution(start, end)
+
+    if resolution == 'minute' and source is None:
+        series = recent_window.series(karat, start, end)
+        if series is not None:
+            return series
+
+    return _query_series(karat, start, end, resolution, source)
@@ -0,0 +1,205 @@
+"""
+Server-Sent Events push of gold price updates.
+
+POS screens used to poll the gold price endpoint, and each poll read the
+cache and, on a miss, the upstream price APIs. The price update task now
+publishes every refreshed price set to the GOLD_PRICE_CHANNEL Redis pub/sub
+channel and keeps the latest set in the cache. Clients hold one idle
+EventSource connection to the stream endpoint instead.
+
+Under ASGI (``uvicorn zargar.asgi:application``) the stream endpoint is an
+async view. Each worker process keeps a single Redis subscription and fans
+messages out to per-connection queues, so thousands of idle connections
+cost one coroutine and one small queue each, not a thread or a Redis
+connection. Connections end after GOLD_PRICE_STREAM_MAX_AGE seconds, and
+EventSource reconnects on its own, so connections left behind by clients
+that went away without closing are eventually dropped.
+"""
+import asyncio
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, Optional, Set
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Latest published price set, sent to clients when they connect
+LATEST_GOLD_PRICES_KEY = 'gold_price_stream:latest'
+
+# 18k price per gram read by the offline sync settings
+CURRENT_GOLD_PRICE_KEY = 'current_gold_price'
+
+SSE_EVENT = 'gold_price'
+
+
+def _get_redis():
+    from django_redis import get_redis_connection
+    return get_redis_connection('default')
+
+
+def gold_price_payload(prices: Dict[int, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Build the JSON-safe message for a set of karat prices.
+
+    Args:
+        prices: Price data by karat, as returned by IranianGoldPriceAPI
+
+    Returns:
+        Dictionary with prices keyed by karat and the publish time
+    """
+    return {
+        'prices': {
+            str(karat): {
+                'price_per_gram': str(price_data['price_per_gram']),
+                'karat': karat,
+                'source': price_data.get('source', ''),
+                'timestamp': price_data['timestamp'].isoformat()
+                if hasattr(price_data.get('timestamp'), 'isoformat') else price_data.get('timestamp'),
+            }
+            for karat, price_data in prices.items()
+        },
+        'published_at': timezone.now().isoformat(),
+    }
+
+
+def publish_gold_prices(prices: Dict[int, Dict[str, Any]]) -> bool:
+    """
+    Store the latest prices and publish them to connected clients.
+
+    Args:
+        prices: Price data by karat
+
+    Returns:
+        True when the message reached Redis pub/sub
+    """
+    if not prices:
+        return False
+
+    payload = gold_price_payload(prices)
+    cache.set(LATEST_GOLD_PRICES_KEY, payload, timeout=None)
+    if 18 in prices:
+        cache.set(
+            CURRENT_GOLD_PRICE_KEY, float(prices[18]['price_per_gram']),
+            timeout=settings.IRANIAN_GOLD_PRICE_CACHE_TIMEOUT * 2
+        )
+
+    try:
+        _get_redis().publish(settings.GOLD_PRICE_CHANNEL, json.dumps(payload))
+        return True
+    except Exception as e:
+        logger.warning(f"Could not publish gold prices: {e}")
+        return False
+
+
+def get_latest_gold_prices() -> Optional[Dict[str, Any]]:
+    """Return the last published price set, or None."""
+    return cache.get(LATEST_GOLD_PRICES_KEY)
+
+
+def format_sse(data: str, event: str = SSE_EVENT, event_id: Optional[str] = None) -> str:
+    """Format one Server-Sent Events message."""
+    lines = [f'event: {event}']
+    if event_id:
+        lines.append(f'id: {event_id}')
+    lines.extend(f'data: {line}' for line in data.splitlines() or [''])
+    return '\n'.join(lines) + '\n\n'
+
+
+class GoldPriceBroadcaster:
+    """
+    One Redis subscription per process, fanned out to every open stream.
+    """
+
+    def __init__(self):
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._listener: Optional[asyncio.Task] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> asyncio.Queue:
+        """Register a connection and start listening to Redis if needed."""
+        queue = asyncio.Queue(maxsize=settings.GOLD_PRICE_STREAM_QUEUE_SIZE)
+        self._subscribers.add(queue)
+
+        loop = asyncio.get_running_loop()
+        if self._listener is None or self._listener.done() or self._listener.get_loop() is not loop:
+            self._listener = loop.create_task(self._listen())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def broadcast(self, message: str):
+        """Queue a message for every connection without waiting on slow clients."""
+        for queue in list(self._subscribers):
+            if queue.full():
+                # A client that fell behind only needs the newest prices
+                queue.get_nowait()
+            queue.put_nowait(message)
+
+    async def _listen(self):
+        import redis.asyncio as aioredis
+
+        while self._subscribers:
+            client = aioredis.from_url(settings.REDIS_URL)
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(settings.GOLD_PRICE_CHANNEL)
+                    while self._subscribers:
+                        message = await pubsub.get_message(
+                            ignore_subscribe_messages=True,
+                            timeout=settings.GOLD_PRICE_STREAM_HEARTBEAT
+                        )
+                        if message is not None:
+                            data = message['data']
+                            self.broadcast(data.decode('utf-8') if isinstance(data, bytes) else data)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Gold price subscription lost, reconnecting: {e}")
+                await asyncio.sleep(settings.GOLD_PRICE_STREAM_RECONNECT_DELAY)
+            finally:
+                await client.aclose()
+
+
+broadcaster = GoldPriceBroadcaster()
+
+
+async def gold_price_events() -> AsyncIterator[str]:
+    """
+    Yield Server-Sent Events for one client connection.
+
+    The latest known prices are sent first, followed by every published
+    update and a comment line as heartbeat while prices are unchanged.
+    """
+    queue = broadcaster.subscribe()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.GOLD_PRICE_STREAM_MAX_AGE
+
+    try:
+        yield f'retry: {settings.GOLD_PRICE_STREAM_RETRY_MS}\n\n'
+
+        latest = await sync_to_async(get_latest_gold_prices)()
+        if latest:
+            yield format_sse(json.dumps(latest), event_id=latest.get('published_at'))
+
+        while loop.time() < deadline:
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=settings.GOLD_PRICE_STREAM_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+
+            try:
+                event_id = json.loads(message).get('published_at')
+            except ValueError:
+                event_id = None
+            yield format_sse(message, event_id=event_id)
+    finally:
+        broadcaster.unsubscribe(queue)
@@ -18,6 +18,7 @@ from zargar.core.external_service_tasks import (
     validate_iranian_gold_price_apis
 )
 from zargar.system.models import BackupRecord
+from zargar.core import gold_price_history
 import logging
 
 logger = logging.getLogger(__name__)
@@ -160,6 +161,31 @@ def cleanup_gold_price_cache(self):
         return {'success': False, 'error': error_msg}
 
 
+@shared_task(bind=True)
+def prune_gold_price_history(self):
+    """
+    Delete minute and hourly gold price buckets past their retention.
+    This task should run daily.
+    
+    Returns:
+        Dict containing the number of deleted buckets per resolution
+    """
+    try:
+        deleted = gold_price_history.prune_gold_price_history()
+        logger.info(f"Gold price history pruned: {deleted}")
+        
+        return {
+            'success': True,
+            'deleted': deleted,
+            'cleanup_timestamp': timezone.now().isoformat()
+        }
+        
+    except Exception as e:
+        error_msg = f"Error pruning gold price history: {str(e)}"
+        logger.error(error_msg)
+        return {'success': False, 'error': error_msg}
+
+
 @shared_task(bind=True)
 def generate_gold_price_report(self, report_type: str = 'daily'):
     """
@@ -194,7 +220,7 @@ def generate_gold_price_report(self, report_type: str = 'daily'):
                 'timestamp': price_data['timestamp'].isoformat()
             }
         
-        # Get price trends (mock data for now)
+        # Get daily price trends from the shared price history
         price_trends = {}
         for karat in [14, 18, 21, 22, 24]:
             trend_data = GoldPriceService.get_price_trend(karat, days)
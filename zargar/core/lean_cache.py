@@ -0,0 +1,227 @@
+"""
+Compact cache records for service-layer caches.
+
+Services used to cache lists of dicts holding whole model instances (with
+their select_related relations), so every entry pickled the full model state
+and every hit paid to unpickle it. A CacheRecordSchema instead stores each
+record as a tuple of primitives in a fixed field order, MessagePack-encoded
+when msgpack is installed, behind a schema name and version. Hits rehydrate
+plain dicts; a nested group of fields (e.g. the ``item`` a row is about) comes
+back as a small named tuple exposing only the fields templates read.
+
+Bumping a schema's version turns entries written by older code into misses
+instead of unpacking them with the wrong field order.
+
+Every write also records the encoded size per schema in a power-of-two
+histogram in Redis and keeps the largest keys, which the admin health
+dashboard reports so oversized entries show up.
+"""
+import datetime
+import logging
+import pickle
+from collections import namedtuple
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+# MessagePack extension codes for values it has no native type for
+EXT_DECIMAL = 1
+EXT_DATETIME = 2
+EXT_DATE = 3
+
+SIZE_FAMILIES_KEY = 'cache_sizes:families'
+SIZE_LARGEST_KEY = 'cache_sizes:largest'
+
+
+def _msgpack_default(obj):
+    if isinstance(obj, Decimal):
+        return msgpack.ExtType(EXT_DECIMAL, str(obj).encode())
+    if isinstance(obj, datetime.datetime):
+        return msgpack.ExtType(EXT_DATETIME, obj.isoformat().encode())
+    if isinstance(obj, datetime.date):
+        return msgpack.ExtType(EXT_DATE, obj.isoformat().encode())
+    raise TypeError(f"Cannot cache value of type {type(obj).__name__}")
+
+
+def _msgpack_ext_hook(code, data):
+    if code == EXT_DECIMAL:
+        return Decimal(data.decode())
+    if code == EXT_DATETIME:
+        return datetime.datetime.fromisoformat(data.decode())
+    if code == EXT_DATE:
+        return datetime.date.fromisoformat(data.decode())
+    return msgpack.ExtType(code, data)
+
+
+class CacheRecordSchema:
+    """
+    Field layout of one family of cached records.
+
+    Args:
+        name: Schema name, also the size histogram family
+        version: Bumped whenever the fields change
+        fields: Top-level record keys, in storage order
+        nested: Mapping of a record key to the attribute names of the named
+            tuple stored under it, e.g. ``{'item': ('id', 'sku', 'name')}``
+    """
+
+    def __init__(self, name: str, version: int, fields: Sequence[str],
+                 nested: Optional[Dict[str, Sequence[str]]] = None):
+        self.name = name
+        self.version = version
+        self.fields = tuple(fields)
+        self.nested = {
+            key: namedtuple(f'Cached{key.title().replace("_", "")}', attributes)
+            for key, attributes in (nested or {}).items()
+        }
+
+    def pack(self, records: Iterable[Dict]):
+        """Encode records as primitive tuples, as bytes when msgpack is installed."""
+        rows = [tuple(self._pack_value(key, record.get(key)) for key in self.fields) for record in records]
+        payload = [self.name, self.version, rows]
+        if MSGPACK_AVAILABLE:
+            return msgpack.packb(payload, default=_msgpack_default, use_bin_type=True)
+        return payload
+
+    def unpack(self, payload) -> Optional[List[Dict]]:
+        """Rehydrate records, or return None for entries of another schema version."""
+        if isinstance(payload, bytes):
+            if not MSGPACK_AVAILABLE:
+                return None
+            payload = msgpack.unpackb(payload, ext_hook=_msgpack_ext_hook, raw=False)
+
+        try:
+            name, version, rows = payload
+        except (TypeError, ValueError):
+            return None
+        if name != self.name or version != self.version:
+            return None
+
+        return [
+            {key: self._unpack_value(key, value) for key, value in zip(self.fields, row)}
+            for row in rows
+        ]
+
+    def _pack_value(self, key, value):
+        record_type = self.nested.get(key)
+        if record_type is None or value is None:
+            return value
+        if isinstance(value, dict):
+            return tuple(value.get(attribute) for attribute in record_type._fields)
+        return tuple(getattr(value, attribute, None) for attribute in record_type._fields)
+
+    def _unpack_value(self, key, value):
+        record_type = self.nested.get(key)
+        if record_type is None or value is None:
+            return value
+        return record_type(*value)
+
+    def rehydrate(self, records: Iterable[Dict]) -> List[Dict]:
+        """Reduce freshly computed records to what a cache hit would return."""
+        return [
+            {key: self._unpack_value(key, self._pack_value(key, record.get(key))) for key in self.fields}
+            for record in records
+        ]
+
+
+def get_cached_records(key: str, schema: CacheRecordSchema) -> Optional[List[Dict]]:
+    """Return the records cached under key, or None on a miss."""
+    payload = cache.get(key)
+    if payload is None:
+        return None
+
+    try:
+        return schema.unpack(payload)
+    except Exception as e:
+        logger.warning(f"Discarding unreadable {schema.name} cache entry {key}: {e}")
+        return None
+
+
+def set_cached_records(key: str, records: Iterable[Dict], schema: CacheRecordSchema, timeout: int):
+    """Cache records under key and record the encoded size."""
+    payload = schema.pack(records)
+    cache.set(key, payload, timeout)
+
+    size = len(payload) if isinstance(payload, bytes) else len(pickle.dumps(payload, pickle.HIGHEST_PROTOCOL))
+    record_payload_size(schema.name, key, size)
+
+
+def _get_redis():
+    from django_redis import get_redis_connection
+    return get_redis_connection('default')
+
+
+def _size_bucket(size: int) -> int:
+    """Smallest power-of-two exponent whose value is at least size."""
+    return max(size - 1, 0).bit_length()
+
+
+def record_payload_size(family: str, key: str, size: int):
+    """
+    Count an entry of ``size`` bytes in the family's histogram.
+
+    The largest keys across all families are kept in a bounded sorted set.
+    """
+    if not settings.CACHE_PAYLOAD_STATS_ENABLED:
+        return
+
+    try:
+        pipe = _get_redis().pipeline()
+        pipe.sadd(SIZE_FAMILIES_KEY, family)
+        pipe.hincrby(f'cache_sizes:{family}', _size_bucket(size), 1)
+        pipe.zadd(SIZE_LARGEST_KEY, {f'{family}|{key}': size})
+        pipe.zremrangebyrank(SIZE_LARGEST_KEY, 0, -settings.CACHE_PAYLOAD_LARGEST_KEYS - 1)
+        pipe.execute()
+    except Exception as e:
+        logger.debug(f"Could not record cache payload size for {key}: {e}")
+
+
+def payload_size_report() -> Dict:
+    """
+    Size histograms per family and the largest cached entries.
+
+    Buckets are labelled by their upper bound in bytes. Entries larger than
+    CACHE_PAYLOAD_WARN_BYTES are flagged as oversized.
+    """
+    client = _get_redis()
+    warn_bytes = settings.CACHE_PAYLOAD_WARN_BYTES
+
+    families = {}
+    for family in sorted(_decode(member) for member in client.smembers(SIZE_FAMILIES_KEY)):
+        counts = {int(_decode(bucket)): int(count) for bucket, count in client.hgetall(f'cache_sizes:{family}').items()}
+        families[family] = {
+            'entries': sum(counts.values()),
+            'histogram': {2 ** bucket: counts[bucket] for bucket in sorted(counts)},
+            'oversized': sum(count for bucket, count in counts.items() if bucket and 2 ** (bucket - 1) >= warn_bytes),
+        }
+
+    largest = []
+    for member, size in client.zrevrange(SIZE_LARGEST_KEY, 0, -1, withscores=True):
+        family, _sep, key = _decode(member).partition('|')
+        largest.append({
+            'family': family,
+            'key': key,
+            'bytes': int(size),
+            'oversized': size > warn_bytes,
+        })
+
+    return {
+        'families': families,
+        'largest': largest,
+        'oversized_count': sum(1 for entry in largest if entry['oversized']),
+        'warn_bytes': warn_bytes,
+    }
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
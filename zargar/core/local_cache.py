@@ -0,0 +1,126 @@
+"""
+Building blocks for two-level caches: a per-process LRU in front of Redis.
+
+LocalLRU is the per-process level: a bounded, thread-safe LRU whose entries
+expire after their own timeout and may carry a tag, such as the generation
+they were cached under. GenerationCounter is a global counter kept in Redis;
+bumping it invalidates every entry tagged with an older generation in every
+process at once. Each process re-reads the counter at most once per check
+interval, and bumps made in the same process take effect immediately.
+
+Used by the tenant resolution cache, the compiled RBAC permission cache and
+the barcode resolution index.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+class LocalLRU:
+    """
+    Per-process LRU of key -> value with per-entry expiry and an optional tag.
+
+    Args:
+        size_setting: Name of the setting holding the maximum number of entries
+    """
+
+    def __init__(self, size_setting):
+        self._size_setting = size_setting
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, tag=None):
+        """Return the value cached under key, or None if missing, expired or tagged differently."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            entry_tag, expires_at, value = entry
+            if entry_tag == tag and expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                return value
+
+            del self._entries[key]
+            return None
+
+    def set(self, key, value, timeout, tag=None):
+        """Cache value under key for timeout seconds, evicting the least recently used entries."""
+        expires_at = time.monotonic() + timeout
+
+        with self._lock:
+            self._entries[key] = (tag, expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > getattr(settings, self._size_setting):
+                self._entries.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __iter__(self):
+        """Iterate over the keys, least recently used first."""
+        with self._lock:
+            return iter(list(self._entries))
+
+
+class GenerationCounter:
+    """
+    Global generation number kept in Redis, re-read at most once per interval.
+
+    Args:
+        key: Redis key of the counter
+        check_interval_setting: Name of the setting holding the re-read interval in seconds
+        name: Name used in log messages
+    """
+
+    def __init__(self, key, check_interval_setting, name):
+        self.key = key
+        self._check_interval_setting = check_interval_setting
+        self._name = name
+        self._value = None
+        self._checked_at = 0.0
+
+    def get(self):
+        """Current generation; 0 until the first bump."""
+        now = time.monotonic()
+        if (self._value is not None and
+                now - self._checked_at < getattr(settings, self._check_interval_setting)):
+            return self._value
+
+        try:
+            self._value = cache.get(self.key, 0)
+        except Exception as e:
+            logger.warning(f"{self._name} unavailable: {e}")
+            self._value = self._value or 0
+
+        self._checked_at = now
+        return self._value
+
+    def bump(self):
+        """Move to a new generation in all processes."""
+        try:
+            if not cache.add(self.key, 1, timeout=None):
+                self._value = cache.incr(self.key)
+            else:
+                self._value = 1
+            self._checked_at = time.monotonic()
+        except Exception as e:
+            # Without Redis, other processes fall back to their local TTL
+            logger.error(f"Could not bump {self._name} generation: {e}")
+            self._value = None
+
+    def reset(self):
+        """Forget the locally known generation so the next get() re-reads it."""
+        self._value = None
+        self._checked_at = 0.0
@@ -0,0 +1,110 @@
+"""
+Django management command to benchmark authenticated API throughput.
+
+Replays a JWT-authenticated request against a lightweight API endpoint inside
+a tenant schema, with and without the principal cache, and reports requests
+per second and database queries per request.
+"""
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django_tenants.utils import get_tenant_model, tenant_context
+from rest_framework.test import APIRequestFactory
+
+from zargar.core.api_views import UserPermissionsAPIView
+from zargar.core.principal_cache import principal_cache
+from zargar.core.serializers import TenantAwareTokenObtainPairSerializer
+
+
+class Command(BaseCommand):
+    help = 'Benchmark JWT-authenticated API throughput with and without the principal cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--schema',
+            required=True,
+            help='Tenant schema to run the benchmark in',
+        )
+        parser.add_argument(
+            '--username',
+            help='User to authenticate as (default: first active user)',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=500,
+            help='Number of requests per mode (default: 500)',
+        )
+        parser.add_argument(
+            '--mode',
+            choices=['both', 'uncached', 'cached'],
+            default='both',
+            help='Authentication mode(s) to benchmark',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            tenant = get_tenant_model().objects.get(schema_name=options['schema'])
+        except get_tenant_model().DoesNotExist:
+            raise CommandError(f'Tenant schema "{options["schema"]}" does not exist')
+
+        modes = ['uncached', 'cached'] if options['mode'] == 'both' else [options['mode']]
+        results = {}
+
+        with tenant_context(tenant):
+            user = self._get_user(options['username'])
+            authorization = f'Bearer {self._issue_token(user)}'
+            view = UserPermissionsAPIView.as_view()
+            factory = APIRequestFactory()
+
+            for mode in modes:
+                with override_settings(JWT_PRINCIPAL_CACHE_ENABLED=mode == 'cached'):
+                    principal_cache.invalidate(connection.schema_name, user.pk)
+                    results[mode] = self._run(view, factory, authorization, options['requests'])
+
+        self.stdout.write('')
+        self.stdout.write(f'Authenticated requests as {user.username} ({options["requests"]} per mode):')
+        for mode, (rate, queries) in results.items():
+            self.stdout.write(f'  {mode:<9} {rate:8.1f} req/s  {queries:.2f} queries/request')
+
+        if len(results) == 2:
+            speedup = results['cached'][0] / results['uncached'][0]
+            self.stdout.write(self.style.SUCCESS(f'Principal cache is {speedup:.1f}x faster'))
+
+    def _get_user(self, username):
+        """Return the user to authenticate as."""
+        User = get_user_model()
+        users = User.objects.filter(is_active=True)
+        user = users.filter(username=username).first() if username else users.order_by('id').first()
+
+        if not user:
+            raise CommandError('No active user found to authenticate as')
+
+        return user
+
+    def _issue_token(self, user):
+        """Issue an access token carrying the tenant claims."""
+        refresh = TenantAwareTokenObtainPairSerializer.get_token(user)
+        refresh['user_id'] = user.id
+        refresh['schema'] = connection.schema_name
+        refresh['is_tenant_user'] = True
+        refresh['tenant_schema'] = connection.schema_name
+        return str(refresh.access_token)
+
+    def _run(self, view, factory, authorization, count):
+        """Send count requests, returning (requests per second, queries per request)."""
+        # Warm up so the cached mode measures hits
+        response = view(factory.get('/api/users/permissions/', HTTP_AUTHORIZATION=authorization))
+        if response.status_code != 200:
+            raise CommandError(f'Benchmark request failed with status {response.status_code}')
+
+        with CaptureQueriesContext(connection) as queries:
+            started_at = time.perf_counter()
+            for _ in range(count):
+                view(factory.get('/api/users/permissions/', HTTP_AUTHORIZATION=authorization))
+            elapsed = time.perf_counter() - started_at
+
+        return count / elapsed, len(queries) / count
@@ -0,0 +1,57 @@
+"""
+Management command to backfill and compact the mobile sync change log.
+
+Run with --backfill once after deploying delta sync so that rows created
+before change logging existed are included in initial syncs.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django_tenants.utils import get_tenant_model, tenant_context
+
+from zargar.core.sync_changes import backfill_change_log, compact_change_log
+from zargar.core.tenant_tasks import get_active_tenant_schemas
+
+
+class Command(BaseCommand):
+    help = 'Backfill and/or compact the sync change log of tenant schemas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--schema',
+            action='append',
+            dest='schemas',
+            help='Tenant schema to process (repeatable, default: all active tenants)',
+        )
+        parser.add_argument(
+            '--backfill',
+            action='store_true',
+            help='Add insert entries for existing rows without change log entries',
+        )
+        parser.add_argument(
+            '--compact',
+            action='store_true',
+            help='Collapse repeated changes to the same object',
+        )
+
+    def handle(self, *args, **options):
+        if not options['backfill'] and not options['compact']:
+            raise CommandError('Nothing to do: pass --backfill and/or --compact')
+
+        Tenant = get_tenant_model()
+        schemas = options['schemas'] or get_active_tenant_schemas()
+
+        for schema_name in schemas:
+            try:
+                tenant = Tenant.objects.get(schema_name=schema_name)
+            except Tenant.DoesNotExist:
+                raise CommandError(f'Tenant schema "{schema_name}" does not exist')
+
+            with tenant_context(tenant):
+                if options['backfill']:
+                    added = backfill_change_log()
+                    self.stdout.write(f'{schema_name}: backfilled {added}')
+
+                if options['compact']:
+                    removed = compact_change_log()
+                    self.stdout.write(f'{schema_name}: compacted {removed} entries')
+
+        self.stdout.write(self.style.SUCCESS(f'Processed {len(schemas)} tenant(s)'))
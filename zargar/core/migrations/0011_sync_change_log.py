@@ -0,0 +1,30 @@
+# Generated by Django 4.2.24 on 2026-10-18 21:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_notification_models'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncChangeLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity', models.CharField(choices=[('categories', 'Categories'), ('jewelry_items', 'Jewelry Items'), ('customers', 'Customers')], max_length=30, verbose_name='Entity')),
+                ('object_id', models.BigIntegerField(verbose_name='Object ID')),
+                ('action', models.CharField(choices=[('insert', 'Insert'), ('update', 'Update'), ('delete', 'Delete')], max_length=10, verbose_name='Action')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Created At')),
+            ],
+            options={
+                'verbose_name': 'Sync Change Log Entry',
+                'verbose_name_plural': 'Sync Change Log',
+                'db_table': 'core_sync_change_log',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['entity', 'object_id'], name='core_sync_c_entity_ab4bc6_idx'), models.Index(fields=['entity', 'id'], name='core_sync_c_entity_eaf2c0_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.24 on 2026-10-18 22:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+from zargar.core.partitioning import convert_to_partitioned
+
+
+def partition_log_tables(apps, schema_editor):
+    for model_name in ('AuditLog', 'SecurityEvent', 'SuspiciousActivity', 'Notification'):
+        convert_to_partitioned(schema_editor, apps.get_model('core', model_name), 'created_at')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_sync_change_log'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='notification_id',
+            field=models.UUIDField(db_index=True, default=uuid.uuid4, verbose_name='Notification ID'),
+        ),
+        migrations.AlterField(
+            model_name='notificationdeliverylog',
+            name='notification',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='delivery_logs', to='core.notification', verbose_name='Notification'),
+        ),
+        migrations.AlterField(
+            model_name='suspiciousactivity',
+            name='related_events',
+            field=models.ManyToManyField(blank=True, db_constraint=False, related_name='suspicious_activities', to='core.securityevent', verbose_name='Related Security Events'),
+        ),
+        migrations.RunPython(partition_log_tables, migrations.RunPython.noop),
+    ]
@@ -571,4 +571,7 @@ from .notification_models import (
     NotificationProvider
 )
 
-# Backup models are now in the system app (public schema)
\ No newline at end of file
+# Backup models are now in the system app (public schema)
+
+# Import sync change log models to make them available
+from .sync_models import SyncChangeLog
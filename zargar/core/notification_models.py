@@ -358,9 +358,11 @@ class Notification(TenantAwareModel):
     ]
     
     # Notification identification
+    # Indexed rather than unique: the table is partitioned by month
+    # (zargar.core.partitioning), so unique constraints must include created_at
     notification_id = models.UUIDField(
         default=uuid.uuid4,
-        unique=True,
+        db_index=True,
         verbose_name=_('Notification ID')
     )
     
@@ -612,6 +614,7 @@ class NotificationDeliveryLog(TenantAwareModel):
     notification = models.ForeignKey(
         Notification,
         on_delete=models.CASCADE,
+        db_constraint=False,  # Notifications are partitioned by month
         related_name='delivery_logs',
         verbose_name=_('Notification')
     )
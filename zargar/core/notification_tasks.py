@@ -11,9 +11,12 @@ from .notification_models import (
     NotificationTemplate, 
     NotificationSchedule, 
     Notification, 
+    NotificationDeliveryLog,
     NotificationProvider
 )
 from .notification_services import PushNotificationSystem, NotificationScheduler
+from .partitioning import purge_before, retention_cutoff
+from .tenant_tasks import map_over_tenants
 from zargar.customers.models import Customer
 from zargar.gold_installments.models import GoldInstallmentContract
 
@@ -163,26 +166,30 @@ def send_daily_payment_reminders():
     This task should run daily at 9:00 AM.
     """
     try:
-        # Get overdue contracts
-        overdue_contracts = GoldInstallmentContract.objects.filter(
+        from zargar.gold_installments.services import GoldPriceService
+        
+        # Get overdue contracts from the stored due dates
+        overdue_contracts = GoldInstallmentContract.objects.overdue().filter(
             status='active'
         ).select_related('customer')
         
-        # Filter contracts that are actually overdue
-        # (This would need proper implementation based on payment schedule logic)
-        
+        gold_prices = {}
         recipients = []
         for contract in overdue_contracts:
-            # Calculate overdue amount and days
-            # This is a simplified example - implement proper calculation
+            if contract.gold_karat not in gold_prices:
+                gold_prices[contract.gold_karat] = GoldPriceService.get_current_gold_price(
+                    contract.gold_karat
+                )['price_per_gram']
+            overdue_amount = contract.calculate_overdue_amount(gold_prices[contract.gold_karat])
+            
             recipients.append({
                 'type': 'customer',
                 'id': contract.customer.id,
                 'context': {
                     'customer_name': contract.customer.full_persian_name,
                     'contract_number': contract.contract_number,
-                    'overdue_days': '5',  # Calculate actual overdue days
-                    'amount': '2,500,000',  # Calculate actual overdue amount
+                    'overdue_days': str(contract.days_overdue),
+                    'amount': f'{overdue_amount:,.0f}',
                 }
             })
         
@@ -285,35 +292,41 @@ def cleanup_old_notifications():
     """
     Clean up old notification records to prevent database bloat.
     This task should run weekly.
+    
+    Notifications are partitioned by month, so expired months are dropped
+    as whole partitions in every tenant schema (see zargar.core.partitioning).
     """
     try:
-        # Delete notifications older than 90 days
-        cutoff_date = timezone.now() - timedelta(days=90)
-        
-        # Delete old notifications and their logs
-        old_notifications = Notification.objects.filter(created_at__lt=cutoff_date)
-        count = old_notifications.count()
-        
-        # Delete in batches to avoid memory issues
-        batch_size = 1000
-        deleted_total = 0
-        
-        while old_notifications.exists():
-            batch_ids = list(old_notifications.values_list('id', flat=True)[:batch_size])
-            Notification.objects.filter(id__in=batch_ids).delete()
-            deleted_total += len(batch_ids)
-        
-        logger.info(f"Cleaned up {deleted_total} old notifications")
-        return {
-            'deleted_notifications': deleted_total,
-            'cutoff_date': cutoff_date.isoformat()
-        }
+        return map_over_tenants(
+            'zargar.core.notification_tasks.cleanup_tenant_notifications',
+            job_name='notification_cleanup'
+        )
         
     except Exception as e:
         logger.error(f"Error cleaning up old notifications: {str(e)}")
         return {'error': str(e)}
 
 
+def cleanup_tenant_notifications(tenant):
+    """Drop one tenant's notifications and delivery logs past NOTIFICATION_RETENTION_DAYS."""
+    cutoff_date = retention_cutoff('core.Notification')
+    
+    result = purge_before(Notification, cutoff_date)
+    # Delivery logs no longer cascade from the dropped partitions
+    deleted_logs, _ = NotificationDeliveryLog.objects.filter(timestamp__lt=cutoff_date).delete()
+    
+    logger.info(
+        f"Cleaned up notifications for tenant {tenant.name}: "
+        f"{result['partitions_dropped'] + result['partitions_detached']} partitions, "
+        f"{result['rows_deleted']} rows, {deleted_logs} delivery logs"
+    )
+    return {
+        'expired_partitions': result['partitions_dropped'] + result['partitions_detached'],
+        'deleted_notifications': result['rows_deleted'],
+        'deleted_delivery_logs': deleted_logs
+    }
+
+
 @shared_task
 def update_notification_statistics():
     """
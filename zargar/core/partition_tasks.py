@@ -0,0 +1,50 @@
+"""
+Celery tasks for maintaining the monthly partitioned log tables.
+"""
+from celery import shared_task
+import logging
+
+from .partitioning import SHARED_PARTITIONED_TABLES, TENANT_PARTITIONED_TABLES, maintain_partitions
+from .tenant_tasks import map_over_tenants
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, max_retries=3)
+def maintain_log_partitions(self):
+    """
+    Daily task creating upcoming log table partitions and dropping expired ones,
+    for the public schema and then every tenant schema.
+    """
+    try:
+        result = maintain_partitions(SHARED_PARTITIONED_TABLES)
+        logger.info(
+            f"Maintained shared log partitions: {result['partitions_created']} created, "
+            f"{result['partitions_dropped'] + result['partitions_detached']} expired"
+        )
+
+        return {
+            'shared': result,
+            'tenants': map_over_tenants(
+                'zargar.core.partition_tasks.maintain_tenant_log_partitions',
+                job_name='log_partition_maintenance'
+            )
+        }
+
+    except Exception as exc:
+        logger.error(f"Log partition maintenance failed: {exc}")
+        raise self.retry(exc=exc, countdown=60 * 15)
+
+
+def maintain_tenant_log_partitions(tenant):
+    """Maintain the log table partitions of one tenant schema."""
+    result = maintain_partitions(TENANT_PARTITIONED_TABLES)
+
+    if result['partitions_created'] or result['partitions_dropped'] or result['partitions_detached']:
+        logger.info(
+            f"Maintained log partitions for tenant {tenant.name}: "
+            f"{result['partitions_created']} created, "
+            f"{result['partitions_dropped'] + result['partitions_detached']} expired"
+        )
+
+    return result
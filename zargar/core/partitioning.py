@@ -0,0 +1,416 @@
+"""
+Monthly range partitioning of the append-only log tables on PostgreSQL.
+
+The tables in PARTITIONED_TABLES are partitioned by month on their creation
+time: one partition per calendar month (UTC), named <table>_pYYYYMM, plus a
+<table>_default partition catching rows outside the created months. The
+tenant tables exist in every tenant schema, the shared ones in the public
+schema.
+
+- Migrations rebuild each table with convert_to_partitioned(). PostgreSQL
+  requires the partition key in every unique constraint, so the primary key
+  becomes (id, <column>) and foreign keys pointing at these tables are
+  declared with db_constraint=False.
+- maintain_partitions() (run daily by zargar.core.partition_tasks) creates
+  the partitions for the next LOG_PARTITION_MONTHS_AHEAD months and enforces
+  each table's retention with purge_before(): whole partitions older than
+  the cutoff are dropped, or detached for archiving when
+  LOG_PARTITION_DETACH_EXPIRED is set, instead of deleting rows. Expired
+  rows in the default partition are deleted.
+- Rows that landed in the default partition (future-dated, or written while
+  maintenance was not running) are moved into a month's partition when it
+  is created, since PostgreSQL refuses to create a partition whose range
+  the default partition already holds rows for.
+- Tenant schemas cloned from the template copy partitioned tables as plain
+  tables; repartition_clone() converts them again after the clone.
+- Queries prune partitions when they filter the partition column with plain
+  comparisons; date filters should go through date_range_filter() rather
+  than __date lookups, which the planner cannot prune on.
+
+On other databases, or before a table has been converted, purge_before()
+falls back to deleting the expired rows.
+"""
+import logging
+import re
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from typing import Dict, List, Optional, Tuple
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection as default_connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# model label: (partition column, retention setting in days)
+PARTITIONED_TABLES = {
+    'core.AuditLog': ('created_at', 'AUDIT_LOG_RETENTION_DAYS'),
+    'core.SecurityEvent': ('created_at', 'SECURITY_EVENT_RETENTION_DAYS'),
+    'core.SuspiciousActivity': ('created_at', 'SUSPICIOUS_ACTIVITY_RETENTION_DAYS'),
+    'core.Notification': ('created_at', 'NOTIFICATION_RETENTION_DAYS'),
+    'tenants.PublicAuditLog': ('created_at', 'PUBLIC_AUDIT_LOG_RETENTION_DAYS'),
+    'tenants.TenantAccessLog': ('timestamp', 'TENANT_ACCESS_LOG_RETENTION_DAYS'),
+    'admin_panel.SystemHealthMetric': ('timestamp', 'HEALTH_METRIC_RETENTION_DAYS'),
+}
+
+# Tables in every tenant schema; the others live in the public schema
+TENANT_PARTITIONED_TABLES = ('core.AuditLog', 'core.SecurityEvent', 'core.SuspiciousActivity', 'core.Notification')
+SHARED_PARTITIONED_TABLES = ('tenants.PublicAuditLog', 'tenants.TenantAccessLog', 'admin_panel.SystemHealthMetric')
+
+
+def month_start(moment) -> date:
+    """First day of the (UTC) month containing a date or datetime."""
+    if isinstance(moment, datetime):
+        if timezone.is_aware(moment):
+            moment = moment.astimezone(dt_timezone.utc)
+        moment = moment.date()
+    return moment.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_bounds(month: date) -> Tuple[datetime, datetime]:
+    """[start, end) of a partition month as aware UTC datetimes."""
+    start = datetime.combine(month, time.min, tzinfo=dt_timezone.utc)
+    end = datetime.combine(add_months(month, 1), time.min, tzinfo=dt_timezone.utc)
+    return start, end
+
+
+def partition_name(table: str, month: date) -> str:
+    return f'{table}_p{month:%Y%m}'
+
+
+def default_partition_name(table: str) -> str:
+    return f'{table}_default'
+
+
+def date_range_filter(column: str, date_from=None, date_to=None) -> Dict[str, datetime]:
+    """
+    Filter kwargs selecting whole local days on a datetime column.
+
+    Unlike column__date__gte/lte, the resulting plain comparisons let
+    PostgreSQL prune partitions and use indexes on the column.
+
+    Args:
+        column: Datetime field name
+        date_from: First day included (date or 'YYYY-MM-DD'), open if None
+        date_to: Last day included (date or 'YYYY-MM-DD'), open if None
+    """
+    bounds = {}
+    if date_from:
+        if isinstance(date_from, str):
+            date_from = datetime.strptime(date_from, '%Y-%m-%d').date()
+        bounds[f'{column}__gte'] = timezone.make_aware(datetime.combine(date_from, time.min))
+    if date_to:
+        if isinstance(date_to, str):
+            date_to = datetime.strptime(date_to, '%Y-%m-%d').date()
+        bounds[f'{column}__lt'] = timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min))
+    return bounds
+
+
+def _is_postgresql(connection) -> bool:
+    return connection.vendor == 'postgresql'
+
+
+def is_partitioned(table: str, connection=None) -> bool:
+    """Whether table is a partitioned table in the current schema."""
+    connection = connection or default_connection
+    if not _is_postgresql(connection):
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)',
+            [connection.ops.quote_name(table)]
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions(table: str, connection=None) -> List[Tuple[str, date]]:
+    """(name, month) of the monthly partitions of table, oldest first."""
+    connection = connection or default_connection
+    pattern = re.compile(rf'^{re.escape(table)}_p(\d{{4}})(\d{{2}})$')
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT child.relname FROM pg_inherits '
+            'JOIN pg_class child ON child.oid = pg_inherits.inhrelid '
+            'WHERE pg_inherits.inhparent = to_regclass(%s)',
+            [connection.ops.quote_name(table)]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = []
+    for name in names:
+        match = pattern.match(name)
+        if match:
+            partitions.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def has_default_partition(table: str, connection=None) -> bool:
+    """Whether table has its <table>_default partition attached."""
+    connection = connection or default_connection
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM pg_inherits WHERE inhparent = to_regclass(%s) AND inhrelid = to_regclass(%s)',
+            [connection.ops.quote_name(table), connection.ops.quote_name(default_partition_name(table))]
+        )
+        return cursor.fetchone() is not None
+
+
+def create_partition(table: str, month: date, connection=None, column: Optional[str] = None) -> str:
+    """
+    Create the partition of table for month if it does not exist yet.
+
+    When column is given and the default partition holds rows for the month,
+    the default partition is detached while the partition is created, the
+    rows are moved into it and the default partition is attached again, all
+    in one transaction.
+    """
+    connection = connection or default_connection
+    qn = connection.ops.quote_name
+    name = partition_name(table, month)
+    default_name = default_partition_name(table)
+    start, end = month_bounds(month)
+    create_sql = f'CREATE TABLE IF NOT EXISTS {qn(name)} PARTITION OF {qn(table)} FOR VALUES FROM (%s) TO (%s)'
+
+    stranded = False
+    if column and has_default_partition(table, connection):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT 1 FROM {qn(default_name)} WHERE {qn(column)} >= %s AND {qn(column)} < %s LIMIT 1',
+                [start, end]
+            )
+            stranded = cursor.fetchone() is not None
+
+    if not stranded:
+        with connection.cursor() as cursor:
+            cursor.execute(create_sql, [start, end])
+        return name
+
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE {qn(table)} DETACH PARTITION {qn(default_name)}')
+        cursor.execute(create_sql, [start, end])
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM {qn(default_name)} '
+            f'WHERE {qn(column)} >= %s AND {qn(column)} < %s RETURNING *) '
+            f'INSERT INTO {qn(table)} SELECT * FROM moved',
+            [start, end]
+        )
+        moved = cursor.rowcount
+        cursor.execute(f'ALTER TABLE {qn(table)} ATTACH PARTITION {qn(default_name)} DEFAULT')
+
+    logger.warning(f"Moved {moved} rows of {table} from the default partition into {name}")
+    return name
+
+
+def ensure_partitions(model, months_ahead: Optional[int] = None, now=None, connection=None) -> List[str]:
+    """
+    Create the partitions of model's table from the current month up to
+    months_ahead months later (LOG_PARTITION_MONTHS_AHEAD by default).
+
+    Returns:
+        Names of the partitions created
+    """
+    connection = connection or default_connection
+    table = model._meta.db_table
+    if not is_partitioned(table, connection):
+        return []
+
+    column, _ = PARTITIONED_TABLES[model._meta.label]
+    months_ahead = settings.LOG_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    current = month_start(now or timezone.now())
+    existing = {month for _, month in list_partitions(table, connection)}
+
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if month not in existing:
+            created.append(create_partition(table, month, connection, column=column))
+    return created
+
+
+def purge_before(model, cutoff: datetime, detach: Optional[bool] = None, connection=None) -> Dict[str, int]:
+    """
+    Remove the rows of model older than cutoff.
+
+    On a partitioned table, every monthly partition ending at or before the
+    cutoff is dropped (or detached, see LOG_PARTITION_DETACH_EXPIRED); rows
+    in the partition containing the cutoff stay until it expires as a whole.
+    Expired rows in the default partition are deleted. On an unpartitioned
+    table the expired rows are deleted.
+
+    Returns:
+        Dictionary with partitions_dropped, partitions_detached and rows_deleted
+    """
+    connection = connection or default_connection
+    table = model._meta.db_table
+    column, _ = PARTITIONED_TABLES[model._meta.label]
+    result = {'partitions_dropped': 0, 'partitions_detached': 0, 'rows_deleted': 0}
+
+    if not is_partitioned(table, connection):
+        result['rows_deleted'] = model._base_manager.filter(**{f'{column}__lt': cutoff}).delete()[0]
+        return result
+
+    detach = settings.LOG_PARTITION_DETACH_EXPIRED if detach is None else detach
+    qn = connection.ops.quote_name
+    last_expired = add_months(month_start(cutoff), -1)
+
+    with connection.cursor() as cursor:
+        for name, month in list_partitions(table, connection):
+            if month > last_expired:
+                break
+            if detach:
+                cursor.execute(f'ALTER TABLE {qn(table)} DETACH PARTITION {qn(name)}')
+                result['partitions_detached'] += 1
+            else:
+                cursor.execute(f'DROP TABLE {qn(name)}')
+                result['partitions_dropped'] += 1
+            logger.info(f"{'Detached' if detach else 'Dropped'} expired partition {name}")
+
+    if has_default_partition(table, connection):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {qn(default_partition_name(table))} WHERE {qn(column)} < %s', [cutoff]
+            )
+            result['rows_deleted'] += cursor.rowcount
+    return result
+
+
+def retention_cutoff(label: str, now=None) -> datetime:
+    _, retention_setting = PARTITIONED_TABLES[label]
+    return (now or timezone.now()) - timedelta(days=getattr(settings, retention_setting))
+
+
+def maintain_partitions(labels, now=None) -> Dict[str, int]:
+    """
+    Create upcoming partitions and enforce retention for tables in the
+    current schema.
+
+    Args:
+        labels: Model labels from PARTITIONED_TABLES
+
+    Returns:
+        Totals of partitions_created, partitions_dropped,
+        partitions_detached and rows_deleted
+    """
+    totals = {'partitions_created': 0, 'partitions_dropped': 0, 'partitions_detached': 0, 'rows_deleted': 0}
+
+    for label in labels:
+        model = apps.get_model(label)
+        totals['partitions_created'] += len(ensure_partitions(model, now=now))
+        for key, value in purge_before(model, retention_cutoff(label, now)).items():
+            totals[key] += value
+    return totals
+
+
+def convert_to_partitioned(schema_editor, model, column: str, months_ahead: int = 3):
+    """
+    Rebuild model's table as a monthly range-partitioned table.
+
+    For use in migrations (RunPython), with the historical model. The rows
+    are copied into monthly partitions covering them, up to months_ahead
+    months from now, plus a default partition. The primary key becomes
+    (pk, column); indexes and outgoing foreign keys are recreated from the
+    model. Foreign keys pointing at the table must be removed beforehand
+    (db_constraint=False). Does nothing on other databases, when the table
+    is missing from the current schema or already partitioned.
+    """
+    connection = schema_editor.connection
+    table = model._meta.db_table
+    if not _is_postgresql(connection) or is_partitioned(table, connection):
+        return
+    with connection.cursor() as cursor:
+        if table not in connection.introspection.table_names(cursor):
+            return
+
+    qn = schema_editor.quote_name
+    pk_column = model._meta.pk.column
+    old_table = f'{table}_unpartitioned'
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT min({qn(column)}) FROM {qn(table)}')
+        earliest = cursor.fetchone()[0]
+
+    schema_editor.execute(f'ALTER TABLE {qn(table)} RENAME TO {qn(old_table)}')
+    schema_editor.execute(
+        f'CREATE TABLE {qn(table)} (LIKE {qn(old_table)} INCLUDING DEFAULTS INCLUDING IDENTITY '
+        f'INCLUDING CONSTRAINTS) PARTITION BY RANGE ({qn(column)})'
+    )
+
+    current = month_start(timezone.now())
+    month = month_start(earliest) if earliest else current
+    while month <= add_months(current, months_ahead):
+        create_partition(table, month, connection)
+        month = add_months(month, 1)
+    schema_editor.execute(f'CREATE TABLE {qn(default_partition_name(table))} PARTITION OF {qn(table)} DEFAULT')
+
+    schema_editor.execute(f'INSERT INTO {qn(table)} SELECT * FROM {qn(old_table)}')
+    schema_editor.execute(
+        f'SELECT setval(pg_get_serial_sequence(%s, %s), coalesce(max({qn(pk_column)}), 0) + 1, false) '
+        f'FROM {qn(table)}',
+        [qn(table), pk_column]
+    )
+    schema_editor.execute(f'DROP TABLE {qn(old_table)}')
+
+    # The old table's index and constraint names are free again
+    schema_editor.execute(f'ALTER TABLE {qn(table)} ADD PRIMARY KEY ({qn(pk_column)}, {qn(column)})')
+    for statement in schema_editor._model_indexes_sql(model):
+        schema_editor.execute(statement)
+    if not any(index.fields and index.fields[0].lstrip('-') == column for index in model._meta.indexes):
+        # Lets unfiltered "newest first" listings read partitions in order
+        schema_editor.execute(f'CREATE INDEX {qn(f"{table}_{column}_part_idx")} ON {qn(table)} ({qn(column)})')
+    for field in model._meta.local_fields:
+        if field.remote_field and field.db_constraint:
+            schema_editor.execute(schema_editor._create_fk_sql(model, field, '_fk_%(to_table)s_%(to_column)s'))
+
+
+def repartition_clone(labels, connection=None) -> List[str]:
+    """
+    Partition again the tables of the current schema that a schema clone
+    copied as plain tables.
+
+    django-tenants' clone_schema() recreates every table with CREATE TABLE
+    ... (LIKE ...), which turns a partitioned table into a plain one holding
+    all its rows and each partition into a standalone copy of its rows. The
+    standalone copies are dropped and the plain table is converted with
+    convert_to_partitioned().
+
+    Args:
+        labels: Model labels from PARTITIONED_TABLES
+
+    Returns:
+        Tables converted
+    """
+    connection = connection or default_connection
+    if not _is_postgresql(connection):
+        return []
+
+    qn = connection.ops.quote_name
+    converted = []
+    for label in labels:
+        model = apps.get_model(label)
+        table = model._meta.db_table
+        column, _ = PARTITIONED_TABLES[label]
+        if is_partitioned(table, connection):
+            continue
+
+        pattern = re.compile(rf'^{re.escape(table)}_(p\d{{6}}|default)$')
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT relname FROM pg_class WHERE relnamespace = current_schema()::regnamespace "
+                "AND relkind = 'r' AND NOT relispartition AND starts_with(relname, %s)",
+                [f'{table}_']
+            )
+            copies = [row[0] for row in cursor.fetchall() if pattern.match(row[0])]
+            for name in copies:
+                cursor.execute(f'DROP TABLE {qn(name)}')
+
+        with connection.schema_editor() as schema_editor:
+            convert_to_partitioned(schema_editor, model, column, months_ahead=settings.LOG_PARTITION_MONTHS_AHEAD)
+        converted.append(table)
+        logger.info(f"Repartitioned cloned table {table}")
+    return converted
@@ -0,0 +1,347 @@
+"""
+Shared PDF rendering for invoices, installment contracts and reports.
+
+Loading and shaping the Persian fonts dominates PDF rendering time, so the
+expensive resources are built once per process and reused: the WeasyPrint
+FontConfiguration and compiled report stylesheet, the ReportLab font
+registration and paragraph styles, and the compiled Django templates. Celery
+workers consuming PDF_TASK_QUEUE preload them when the process starts, so a
+dedicated ``-Q pdf`` worker pool keeps them warm across tasks.
+
+Rendered PDFs are cached by a hash of the document type and the data they are
+rendered from, so a reprint of an unchanged invoice or contract is served
+from the cache without rendering. PDFs larger than PDF_CACHE_MAX_BYTES are
+kept as files under MEDIA_ROOT/pdf_cache instead, so everything a worker
+renders can be fetched by its content hash; files older than
+PDF_CACHE_TIMEOUT are ignored and removed by prune_pdf_files().
+
+Document types map to dotted paths of a loader (object id -> JSON-safe data)
+and a renderer (data -> PDF bytes) in PDF_DOCUMENTS, the same way tenant jobs
+name their per-tenant function.
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional, Sequence
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.template.loader import select_template
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+try:
+    from weasyprint import HTML, CSS
+    from weasyprint.text.fonts import FontConfiguration
+    WEASYPRINT_AVAILABLE = True
+except ImportError:
+    WEASYPRINT_AVAILABLE = False
+
+try:
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    REPORTLAB_AVAILABLE = True
+except ImportError:
+    REPORTLAB_AVAILABLE = False
+
+# Bump when a layout changes so PDFs cached by older code are not served
+PDF_RENDERER_VERSION = 1
+
+# document type -> (loader, renderer)
+PDF_DOCUMENTS = {
+    'invoice': ('zargar.pos.services.load_invoice_pdf_data', 'zargar.pos.services.render_invoice_pdf'),
+    'contract': (
+        'zargar.gold_installments.contract_templates.load_contract_pdf_data',
+        'zargar.gold_installments.contract_templates.render_contract_pdf',
+    ),
+    'report': ('zargar.reports.exporters.load_report_pdf_data', 'zargar.reports.exporters.render_report_pdf'),
+}
+
+# Templates compiled when a worker starts
+PRELOADED_TEMPLATES = (
+    ('reports/pdf/generic.html',),
+    ('gold_installments/pdf/contract.html',),
+)
+
+REPORTLAB_FONT_NAME = 'Vazirmatn'
+REPORTLAB_FALLBACK_FONT = 'Helvetica'
+
+PDF_STYLESHEET = """
+@font-face {
+    font-family: 'Vazirmatn';
+    src: url('%(font_url)s');
+}
+
+@page {
+    size: A4;
+    margin: 1.5cm;
+}
+
+body {
+    font-family: 'Vazirmatn', Tahoma, Arial, sans-serif;
+    direction: rtl;
+    text-align: right;
+    font-size: 12px;
+    line-height: 1.6;
+}
+
+.report-header {
+    text-align: center;
+    margin-bottom: 30px;
+    border-bottom: 2px solid #333;
+    padding-bottom: 15px;
+}
+
+.report-title {
+    font-size: 18px;
+    font-weight: bold;
+    margin-bottom: 10px;
+}
+
+.report-date {
+    font-size: 12px;
+    color: #666;
+}
+
+table {
+    width: 100%;
+    border-collapse: collapse;
+    margin: 20px 0;
+    direction: rtl;
+}
+
+th, td {
+    border: 1px solid #ddd;
+    padding: 8px;
+    text-align: right;
+}
+
+th {
+    background-color: #f5f5f5;
+    font-weight: bold;
+}
+
+.contract-text {
+    white-space: pre-wrap;
+}
+"""
+
+
+@lru_cache(maxsize=None)
+def get_font_config():
+    """WeasyPrint font configuration, shared by every render in this process."""
+    if not WEASYPRINT_AVAILABLE:
+        raise ImportError("WeasyPrint is required for PDF rendering")
+    return FontConfiguration()
+
+
+@lru_cache(maxsize=None)
+def get_stylesheet():
+    """The compiled PDF stylesheet with the Persian font face loaded."""
+    font_url = f'file://{settings.PDF_FONT_PATH}' if os.path.exists(settings.PDF_FONT_PATH) else ''
+    return CSS(string=PDF_STYLESHEET % {'font_url': font_url}, font_config=get_font_config())
+
+
+@lru_cache(maxsize=None)
+def get_reportlab_font() -> str:
+    """Register the Persian TrueType font with ReportLab once and return its name."""
+    if not REPORTLAB_AVAILABLE:
+        raise ImportError("ReportLab is required for PDF rendering")
+    if not os.path.exists(settings.PDF_FONT_PATH):
+        logger.warning(f"PDF font {settings.PDF_FONT_PATH} not found, using {REPORTLAB_FALLBACK_FONT}")
+        return REPORTLAB_FALLBACK_FONT
+
+    pdfmetrics.registerFont(TTFont(REPORTLAB_FONT_NAME, str(settings.PDF_FONT_PATH)))
+    return REPORTLAB_FONT_NAME
+
+
+@lru_cache(maxsize=None)
+def get_reportlab_styles() -> Dict[str, Any]:
+    """Right-aligned paragraph styles using the registered Persian font."""
+    font_name = get_reportlab_font()
+    styles = getSampleStyleSheet()
+    return {
+        'rtl': ParagraphStyle(
+            'RTL',
+            parent=styles['Normal'],
+            alignment=2,  # Right alignment for RTL
+            fontName=font_name,
+            fontSize=12,
+            leading=14
+        ),
+        'font_name': font_name,
+    }
+
+
+@lru_cache(maxsize=64)
+def get_pdf_template(template_names: Sequence[str]):
+    """Compiled template for the first of template_names that exists."""
+    return select_template(list(template_names))
+
+
+def render_html_pdf(template_names: Sequence[str], context: Dict[str, Any]) -> bytes:
+    """Render a Django template to PDF bytes with the preloaded fonts and stylesheet."""
+    html_content = get_pdf_template(tuple(template_names)).render(context)
+    return HTML(string=html_content, base_url=str(settings.BASE_DIR)).write_pdf(
+        stylesheets=[get_stylesheet()], font_config=get_font_config()
+    )
+
+
+def warm_up():
+    """Load fonts, stylesheets and templates so the first render in a process is fast."""
+    loaders = [get_font_config, get_stylesheet] if WEASYPRINT_AVAILABLE else []
+    if REPORTLAB_AVAILABLE:
+        loaders.append(get_reportlab_styles)
+
+    for loader in loaders:
+        try:
+            loader()
+        except Exception as e:
+            logger.warning(f"Could not preload PDF resource {loader.__name__}: {e}")
+
+    for template_names in PRELOADED_TEMPLATES:
+        try:
+            get_pdf_template(template_names)
+        except Exception as e:
+            logger.debug(f"Could not preload PDF template {template_names[0]}: {e}")
+
+
+def pdf_content_hash(document_type: str, data: Dict[str, Any]) -> str:
+    """Hash of everything a rendered PDF depends on."""
+    payload = json.dumps(
+        [document_type, PDF_RENDERER_VERSION, data],
+        sort_keys=True, ensure_ascii=False, default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _cache_key(content_hash: str) -> str:
+    return f'pdf:{connection.schema_name}:{content_hash}'
+
+
+def _pdf_cache_dir() -> str:
+    return os.path.join(settings.MEDIA_ROOT, 'pdf_cache')
+
+
+def _file_path(content_hash: str) -> str:
+    return os.path.join(_pdf_cache_dir(), connection.schema_name, f'{content_hash}.pdf')
+
+
+def store_pdf(content_hash: str, pdf_content: bytes):
+    """Keep a rendered PDF in the cache, or as a file when it is too large for it."""
+    if len(pdf_content) <= settings.PDF_CACHE_MAX_BYTES:
+        cache.set(_cache_key(content_hash), pdf_content, settings.PDF_CACHE_TIMEOUT)
+        return
+
+    file_path = _file_path(content_hash)
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    # Written aside and moved into place so readers never see a partial file
+    temp_path = f'{file_path}.{os.getpid()}.tmp'
+    with open(temp_path, 'wb') as pdf_file:
+        pdf_file.write(pdf_content)
+    os.replace(temp_path, file_path)
+
+
+def get_cached_pdf(content_hash: str) -> Optional[bytes]:
+    """Return a previously rendered PDF, or None."""
+    pdf_content = cache.get(_cache_key(content_hash))
+    if pdf_content is not None:
+        return pdf_content
+
+    file_path = _file_path(content_hash)
+    try:
+        if time.time() - os.path.getmtime(file_path) > settings.PDF_CACHE_TIMEOUT:
+            return None
+        with open(file_path, 'rb') as pdf_file:
+            return pdf_file.read()
+    except OSError:
+        return None
+
+
+def prune_pdf_files() -> int:
+    """Delete stored PDF files older than PDF_CACHE_TIMEOUT; returns the number deleted."""
+    cutoff = time.time() - settings.PDF_CACHE_TIMEOUT
+    deleted = 0
+
+    for directory, _dirs, files in os.walk(_pdf_cache_dir()):
+        for name in files:
+            file_path = os.path.join(directory, name)
+            try:
+                if os.path.getmtime(file_path) < cutoff:
+                    os.remove(file_path)
+                    deleted += 1
+            except OSError as e:
+                logger.warning(f"Could not prune PDF file {file_path}: {e}")
+
+    return deleted
+
+
+def render_pdf(document_type: str, data: Dict[str, Any]) -> bytes:
+    """
+    Render a document to PDF, serving identical re-renders from the cache.
+
+    Args:
+        document_type: Key of PDF_DOCUMENTS
+        data: JSON-safe data the document is rendered from
+
+    Returns:
+        PDF content as bytes
+    """
+    content_hash = pdf_content_hash(document_type, data)
+    pdf_content = get_cached_pdf(content_hash)
+    if pdf_content is not None:
+        return pdf_content
+
+    _loader, renderer = PDF_DOCUMENTS[document_type]
+    pdf_content = import_string(renderer)(data)
+
+    store_pdf(content_hash, pdf_content)
+
+    return pdf_content
+
+
+def render_document(document_type: str, object_id) -> Dict[str, Any]:
+    """
+    Load a document of the current tenant and render it to the PDF cache.
+
+    Returns:
+        Dictionary with the content hash and size of the rendered PDF
+    """
+    loader, _renderer = PDF_DOCUMENTS[document_type]
+    data = import_string(loader)(object_id)
+    pdf_content = render_pdf(document_type, data)
+
+    return {
+        'success': True,
+        'document_type': document_type,
+        'object_id': object_id,
+        'content_hash': pdf_content_hash(document_type, data),
+        'size_bytes': len(pdf_content),
+    }
+
+
+def enqueue_pdf(document_type: str, object_id) -> str:
+    """
+    Queue a document of the current tenant for rendering on the PDF workers.
+
+    The task result carries the content hash; fetch the PDF with
+    get_cached_pdf() once it has finished.
+
+    Returns:
+        Celery task id
+    """
+    if document_type not in PDF_DOCUMENTS:
+        raise ValueError(f"Unsupported PDF document type: {document_type}")
+
+    from .pdf_tasks import render_pdf_document
+    result = render_pdf_document.apply_async(
+        args=(document_type, object_id, connection.schema_name),
+        queue=settings.PDF_TASK_QUEUE
+    )
+    return result.id
@@ -0,0 +1,45 @@
+"""
+Celery tasks for the PDF rendering workers.
+
+Run a dedicated pool with ``celery -A zargar worker -Q pdf`` and set
+PDF_TASK_QUEUE=pdf to keep PDF rendering off the default workers; each
+worker process preloads the fonts and stylesheets when it starts.
+"""
+from celery import shared_task
+from celery.signals import worker_process_init
+from django.conf import settings
+from django_tenants.utils import schema_context
+import logging
+
+from .pdf_rendering import prune_pdf_files, render_document, warm_up
+
+logger = logging.getLogger(__name__)
+
+
+@worker_process_init.connect
+def preload_pdf_resources(**kwargs):
+    """Load PDF fonts, stylesheets and templates in every new worker process."""
+    if settings.PDF_PRELOAD_ON_WORKER_START:
+        warm_up()
+
+
+@shared_task(bind=True, max_retries=2)
+def render_pdf_document(self, document_type, object_id, schema_name):
+    """
+    Render an invoice, contract or report of a tenant into the PDF cache.
+    """
+    try:
+        with schema_context(schema_name):
+            return render_document(document_type, object_id)
+
+    except Exception as exc:
+        logger.error(f"Rendering {document_type} {object_id} for {schema_name} failed: {exc}")
+        raise self.retry(exc=exc, countdown=30)
+
+
+@shared_task
+def prune_pdf_cache():
+    """Daily task deleting stored PDF files past PDF_CACHE_TIMEOUT."""
+    deleted = prune_pdf_files()
+    logger.info(f"Pruned {deleted} stored PDF files")
+    return {'files_deleted': deleted}
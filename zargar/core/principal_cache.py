@@ -0,0 +1,100 @@
+"""
+Short-lived cache of authenticated principals for JWT authentication.
+
+Every API call used to load the token's user from Postgres. The principal
+cache keeps the user's field values in Redis under
+``principal:{schema}:{user_id}:{version}``, where ``version`` is a per-user
+counter bumped whenever the user is saved or deleted. Bumping the version
+rather than deleting the entry means a request that read the user just before
+a change can never re-populate the cache with stale values.
+
+The password hash is never cached; cached instances load it on demand.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+# Fields kept out of Redis; they are deferred on cached instances
+EXCLUDED_FIELDS = ('password',)
+
+
+class PrincipalCache:
+    """
+    Cache of (schema, user_id) -> user field values.
+    """
+
+    def get(self, model, schema_name, user_id):
+        """
+        Look up a cached user.
+        
+        Returns:
+            (user, version): the cached user instance, or None on a miss, and
+            the version read. On a miss, load the user from the database and
+            pass this version to set(); the version is read before the load so
+            a save in between makes the stored entry unreachable. The version
+            is None when the cache is unavailable.
+        """
+        try:
+            version = cache.get(self._version_key(schema_name, user_id), 0)
+            payload = cache.get(self._key(schema_name, user_id, version))
+        except Exception as e:
+            logger.warning(f"Principal cache unavailable: {e}")
+            return None, None
+
+        if payload is None:
+            return None, version
+
+        return model.from_db(connection.alias, payload['fields'], payload['values']), version
+
+    def set(self, schema_name, user, version):
+        """
+        Cache a user loaded from the database under the version read by get().
+        """
+        if version is None:
+            return
+
+        fields = [
+            field.attname for field in user._meta.concrete_fields
+            if field.attname not in EXCLUDED_FIELDS
+        ]
+        payload = {
+            'fields': fields,
+            'values': [getattr(user, attname) for attname in fields],
+        }
+
+        try:
+            cache.set(
+                self._key(schema_name, user.pk, version),
+                payload,
+                settings.JWT_PRINCIPAL_CACHE_TIMEOUT
+            )
+        except Exception as e:
+            logger.warning(f"Principal cache unavailable: {e}")
+
+    def invalidate(self, schema_name, user_id):
+        """
+        Invalidate the cached principal for one user.
+        """
+        version_key = self._version_key(schema_name, user_id)
+
+        try:
+            # The version must outlive any entry written under it
+            if not cache.add(version_key, 1, timeout=None):
+                cache.incr(version_key)
+        except Exception as e:
+            logger.error(f"Could not invalidate cached principal {schema_name}:{user_id}: {e}")
+
+    @staticmethod
+    def _version_key(schema_name, user_id):
+        return f'principal:version:{schema_name}:{user_id}'
+
+    @staticmethod
+    def _key(schema_name, user_id, version):
+        return f'principal:{schema_name}:{user_id}:{version}'
+
+
+principal_cache = PrincipalCache()
@@ -815,6 +815,7 @@ class SuspiciousActivity(TenantAwareModel):
     related_events = models.ManyToManyField(
         SecurityEvent,
         blank=True,
+        db_constraint=False,  # Both tables are partitioned by month
         related_name='suspicious_activities',
         verbose_name=_('Related Security Events')
     )
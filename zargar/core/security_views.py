@@ -15,6 +15,7 @@ import json
 
 from .models import User
 from .security_models import SecurityEvent, AuditLog, RateLimitAttempt, SuspiciousActivity
+from .partitioning import date_range_filter
 from .security_utils import SecurityMonitor
 
 
@@ -199,10 +200,10 @@ class SecurityEventsListView(SuperAdminRequiredMixin, ListView):
         # Date range filter
         date_from = self.request.GET.get('date_from')
         date_to = self.request.GET.get('date_to')
-        if date_from:
-            queryset = queryset.filter(created_at__date__gte=date_from)
-        if date_to:
-            queryset = queryset.filter(created_at__date__lte=date_to)
+        try:
+            queryset = queryset.filter(**date_range_filter('created_at', date_from, date_to))
+        except ValueError:
+            pass
         
         # Search
         search = self.request.GET.get('search')
@@ -307,10 +308,10 @@ class AuditLogsListView(SuperAdminRequiredMixin, ListView):
         # Date range filter
         date_from = self.request.GET.get('date_from')
         date_to = self.request.GET.get('date_to')
-        if date_from:
-            queryset = queryset.filter(created_at__date__gte=date_from)
-        if date_to:
-            queryset = queryset.filter(created_at__date__lte=date_to)
+        try:
+            queryset = queryset.filter(**date_range_filter('created_at', date_from, date_to))
+        except ValueError:
+            pass
         
         # Search
         search = self.request.GET.get('search')
@@ -0,0 +1,56 @@
+"""
+Signals for core user management.
+"""
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django_tenants.utils import get_public_schema_name
+
+from .principal_cache import principal_cache
+from .sync_changes import TRACKED_MODELS, record_changes
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_user_principal(sender, instance, **kwargs):
+    """
+    Invalidate the cached JWT principal when a tenant user is saved
+    (including deactivation and role changes) or deleted.
+    
+    The version is bumped once the change commits; bumped earlier, a
+    concurrent request could cache the old row under the new version.
+    """
+    schema_name, user_id = connection.schema_name, instance.pk
+    transaction.on_commit(lambda: principal_cache.invalidate(schema_name, user_id))
+
+
+@receiver(post_save, sender='tenants.SuperAdmin')
+@receiver(post_delete, sender='tenants.SuperAdmin')
+def invalidate_superadmin_principal(sender, instance, **kwargs):
+    """
+    Invalidate the cached JWT principal of a SuperAdmin, who always
+    authenticates in the public schema.
+    """
+    user_id = instance.pk
+    transaction.on_commit(lambda: principal_cache.invalidate(get_public_schema_name(), user_id))
+
+
+def record_sync_change(sender, instance, created=False, **kwargs):
+    """
+    Append a change log entry when a synced entity is saved or deleted.
+    """
+    if kwargs.get('raw'):
+        return
+
+    if kwargs['signal'] is post_delete:
+        action = 'delete'
+    else:
+        action = 'insert' if created else 'update'
+
+    record_changes(TRACKED_MODELS[sender._meta.label], [instance.pk], action)
+
+
+for model_label in TRACKED_MODELS:
+    post_save.connect(record_sync_change, sender=model_label, dispatch_uid=f'sync_change_save_{model_label}')
+    post_delete.connect(record_sync_change, sender=model_label, dispatch_uid=f'sync_change_delete_{model_label}')
@@ -0,0 +1,211 @@
+"""
+Per-tenant change log backing the delta sync protocol for mobile/offline POS.
+
+Model signals append an entry for every insert, update and delete of a synced
+entity. Entries are written after the surrounding transaction commits, so
+rolled-back changes never reach devices and ids are handed out close to commit
+order. Readers only see entries older than SYNC_CHANGE_LOG_SETTLE_SECONDS, which
+keeps a concurrent writer from committing behind a cursor a client has
+already moved past.
+
+Each tenant also has a sync epoch. If the entries of a committed change
+cannot be written, the epoch is bumped instead of losing the change
+silently; clients holding an older epoch are told to resync in full rather
+than continue from their cursor.
+"""
+import logging
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Exists, Max, Min, OuterRef
+from django.utils import timezone
+
+from .sync_models import SyncChangeLog
+
+logger = logging.getLogger(__name__)
+
+# Model label -> change log entity
+TRACKED_MODELS = {
+    'jewelry.Category': 'categories',
+    'jewelry.JewelryItem': 'jewelry_items',
+    'customers.Customer': 'customers',
+}
+
+SYNC_ENTITIES = tuple(TRACKED_MODELS.values())
+
+
+def get_entity_model(entity: str):
+    """Return the model class behind a change log entity."""
+    for label, tracked_entity in TRACKED_MODELS.items():
+        if tracked_entity == entity:
+            return apps.get_model(label)
+    raise KeyError(entity)
+
+
+def record_changes(entity: str, object_ids: Iterable[int], action: str):
+    """
+    Append change log entries once the current transaction commits.
+
+    Use this from bulk code paths (queryset.update(), bulk_create) that
+    bypass model signals.
+    """
+    entries = [
+        SyncChangeLog(entity=entity, object_id=object_id, action=action)
+        for object_id in object_ids
+    ]
+    if not entries:
+        return
+
+    schema_name = connection.schema_name
+
+    def write_entries():
+        try:
+            SyncChangeLog.objects.bulk_create(entries, batch_size=1000)
+        except Exception as e:
+            # The change is committed but clients cannot see it: force a full resync
+            logger.error(f"Failed to record {len(entries)} {entity} sync changes, bumping sync epoch: {e}")
+            bump_sync_epoch(schema_name)
+
+    transaction.on_commit(write_entries)
+
+
+def _epoch_key(schema_name: Optional[str] = None) -> str:
+    return f'sync_epoch:{schema_name or connection.schema_name}'
+
+
+def get_sync_epoch() -> int:
+    """Return the current tenant's sync epoch."""
+    try:
+        return cache.get(_epoch_key(), 0)
+    except Exception as e:
+        logger.warning(f"Sync epoch unavailable: {e}")
+        return 0
+
+
+def bump_sync_epoch(schema_name: Optional[str] = None):
+    """Make every client of a tenant resync in full."""
+    key = _epoch_key(schema_name)
+    try:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+    except Exception as e:
+        logger.critical(f"Could not bump sync epoch {key}; clients may miss changes: {e}")
+
+
+def get_latest_cursor() -> int:
+    """Return the highest cursor currently visible to clients."""
+    return _settled_entries().aggregate(cursor=Max('id'))['cursor'] or 0
+
+
+def get_changes(since_cursor: int = 0, limit: Optional[int] = None,
+                entities: Optional[Iterable[str]] = None) -> Tuple[Dict[str, List[Tuple[int, str]]], int, bool]:
+    """
+    Read one page of changes after a cursor.
+
+    Repeated changes to the same object within the page are collapsed into
+    the last one.
+
+    Args:
+        since_cursor: Last cursor the client has applied
+        limit: Maximum number of log entries in the page
+        entities: Entities to include; defaults to all synced entities
+
+    Returns:
+        Tuple of ({entity: [(object_id, action), ...]}, next_cursor, has_more)
+    """
+    limit = limit or settings.SYNC_CHANGES_PAGE_SIZE
+
+    entries = _settled_entries().filter(id__gt=since_cursor)
+    if entities is not None:
+        entries = entries.filter(entity__in=list(entities))
+
+    page = list(entries.order_by('id').values_list('id', 'entity', 'object_id', 'action')[:limit + 1])
+    has_more = len(page) > limit
+    page = page[:limit]
+
+    latest = {}
+    for cursor, entity, object_id, action in page:
+        latest[(entity, object_id)] = action
+
+    changes = {}
+    for (entity, object_id), action in latest.items():
+        changes.setdefault(entity, []).append((object_id, action))
+
+    next_cursor = page[-1][0] if page else since_cursor
+    return changes, next_cursor, has_more
+
+
+def compact_change_log() -> int:
+    """
+    Collapse repeated changes, keeping only the newest entry per object.
+
+    Clients behind any removed entry still receive the newer entry that
+    superseded it, so compaction never loses a change.
+
+    Returns:
+        Number of entries removed
+    """
+    newer = SyncChangeLog.objects.filter(
+        entity=OuterRef('entity'),
+        object_id=OuterRef('object_id'),
+        id__gt=OuterRef('id')
+    )
+    deleted, _ = SyncChangeLog.objects.filter(Exists(newer)).delete()
+    return deleted
+
+
+def backfill_change_log(batch_size: int = 5000) -> Dict[str, int]:
+    """
+    Add insert entries for existing objects that have no change log entry.
+
+    Needed once per tenant for rows created before change logging existed,
+    so an initial sync from cursor 0 covers the whole catalogue.
+
+    Returns:
+        Number of entries added per entity
+    """
+    added = {}
+
+    for entity in SYNC_ENTITIES:
+        model = get_entity_model(entity)
+        logged = SyncChangeLog.objects.filter(entity=entity, object_id=OuterRef('pk'))
+        missing_ids = (
+            model.objects.filter(~Exists(logged))
+            .order_by('pk')
+            .values_list('pk', flat=True)
+            .iterator(chunk_size=batch_size)
+        )
+
+        count = 0
+        batch = []
+        for object_id in missing_ids:
+            batch.append(SyncChangeLog(entity=entity, object_id=object_id, action='insert'))
+            if len(batch) >= batch_size:
+                SyncChangeLog.objects.bulk_create(batch)
+                count += len(batch)
+                batch = []
+
+        if batch:
+            SyncChangeLog.objects.bulk_create(batch)
+            count += len(batch)
+
+        added[entity] = count
+
+    return added
+
+
+def _settled_entries():
+    """Entries below the first one that is still settling."""
+    settled_before = timezone.now() - timedelta(seconds=settings.SYNC_CHANGE_LOG_SETTLE_SECONDS)
+    first_unsettled = SyncChangeLog.objects.filter(
+        created_at__gt=settled_before
+    ).aggregate(cursor=Min('id'))['cursor']
+
+    entries = SyncChangeLog.objects.all()
+    if first_unsettled is not None:
+        entries = entries.filter(id__lt=first_unsettled)
+    return entries
@@ -0,0 +1,62 @@
+"""
+Change log models for delta synchronization of mobile/offline POS clients.
+"""
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class SyncChangeLog(models.Model):
+    """
+    Append-only, per-tenant log of changes to entities synced to mobile devices.
+
+    The auto-incrementing id is the sync cursor: clients remember the last id
+    they received and ask for everything after it. Compaction removes entries
+    superseded by a later entry for the same object, so the log never holds
+    more than one entry per object once compacted.
+    """
+    ENTITY_CHOICES = [
+        ('categories', _('Categories')),
+        ('jewelry_items', _('Jewelry Items')),
+        ('customers', _('Customers')),
+    ]
+
+    ACTION_CHOICES = [
+        ('insert', _('Insert')),
+        ('update', _('Update')),
+        ('delete', _('Delete')),
+    ]
+
+    entity = models.CharField(
+        max_length=30,
+        choices=ENTITY_CHOICES,
+        verbose_name=_('Entity')
+    )
+
+    object_id = models.BigIntegerField(
+        verbose_name=_('Object ID')
+    )
+
+    action = models.CharField(
+        max_length=10,
+        choices=ACTION_CHOICES,
+        verbose_name=_('Action')
+    )
+
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name=_('Created At')
+    )
+
+    class Meta:
+        verbose_name = _('Sync Change Log Entry')
+        verbose_name_plural = _('Sync Change Log')
+        db_table = 'core_sync_change_log'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['entity', 'object_id']),
+            models.Index(fields=['entity', 'id']),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.action} {self.entity}:{self.object_id}"
@@ -0,0 +1,38 @@
+"""
+Celery tasks for maintaining the delta sync change log.
+"""
+from celery import shared_task
+import logging
+
+from .sync_changes import compact_change_log
+from .tenant_tasks import map_over_tenants
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, max_retries=3)
+def compact_sync_change_logs(self):
+    """
+    Nightly task collapsing repeated changes in every tenant's sync change log.
+    """
+    try:
+        return map_over_tenants(
+            'zargar.core.sync_tasks.compact_tenant_sync_change_log',
+            job_name='sync_change_log_compaction'
+        )
+        
+    except Exception as exc:
+        logger.error(f"Sync change log compaction failed: {exc}")
+        raise self.retry(exc=exc, countdown=60 * 10)
+
+
+def compact_tenant_sync_change_log(tenant):
+    """Compact one tenant's sync change log."""
+    removed = compact_change_log()
+    
+    if removed:
+        logger.info(f"Compacted sync change log for tenant {tenant.name}: {removed} entries removed")
+    
+    return {
+        'removed_entries': removed
+    }
@@ -0,0 +1,225 @@
+"""
+Cross-tenant fan-out primitive for Celery jobs.
+
+Jobs that used to loop over every active tenant inside one task call
+map_over_tenants() instead. Each tenant runs as its own Celery subtask inside
+its schema, with a per-tenant time limit and retries, so one slow or broken
+shop no longer delays or fails the others. Subtasks are spread over a bounded
+number of parallel lanes and their results are aggregated by a chord callback.
+
+The per-tenant soft time limit is the real budget: a subtask exceeding it
+records a timeout outcome and its lane moves on. The hard limit is only a
+backstop for code that ignores the soft limit, and should stay well above
+it. A subtask killed by the hard limit fails its lane's chain, so the
+chord callback never runs; report_tenant_job_failure is attached as the
+callback's errback and logs the job as failed instead.
+"""
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+from celery import chain, chord, shared_task
+from celery.exceptions import SoftTimeLimitExceeded
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from django_tenants.utils import get_public_schema_name, get_tenant_model, tenant_context
+
+logger = logging.getLogger(__name__)
+
+
+def get_active_tenant_schemas() -> List[str]:
+    """Return schema names of all active tenants, excluding the public schema."""
+    Tenant = get_tenant_model()
+    return list(
+        Tenant.objects.filter(is_active=True)
+        .exclude(schema_name=get_public_schema_name())
+        .order_by('schema_name')
+        .values_list('schema_name', flat=True)
+    )
+
+
+@shared_task(bind=True, max_retries=2, acks_late=True)
+def run_tenant_subtask(self, previous_results: List[Dict], schema_name: str, func_path: str,
+                       args: Optional[List] = None, kwargs: Optional[Dict] = None,
+                       job_name: Optional[str] = None):
+    """
+    Run one tenant's share of a fan-out job inside the tenant schema.
+
+    Subtasks in the same lane are chained, so each receives the outcomes of the
+    tenants before it and appends its own. Failures are retried and then
+    recorded instead of raised, so the rest of the lane keeps running.
+
+    Args:
+        previous_results: Outcomes of earlier tenants in this lane
+        schema_name: Tenant schema to run in
+        func_path: Dotted path of a callable taking the tenant as first argument
+        args: Extra positional arguments for the callable
+        kwargs: Extra keyword arguments for the callable
+        job_name: Name used in logs and the aggregated summary
+
+    Returns:
+        previous_results with this tenant's outcome appended
+    """
+    job_name = job_name or func_path
+    started_at = timezone.now()
+    outcome = {'schema_name': schema_name, 'job': job_name}
+
+    try:
+        Tenant = get_tenant_model()
+        tenant = Tenant.objects.get(schema_name=schema_name)
+        func = import_string(func_path)
+
+        with tenant_context(tenant):
+            result = func(tenant, *(args or []), **(kwargs or {}))
+
+        outcome.update(status='success', result=result or {})
+
+    except SoftTimeLimitExceeded:
+        logger.error(f"{job_name}: tenant {schema_name} exceeded its time limit")
+        outcome.update(status='timeout', error='Per-tenant time limit exceeded')
+
+    except Exception as exc:
+        if self.request.retries < self.max_retries:
+            logger.warning(
+                f"{job_name}: tenant {schema_name} failed, retrying "
+                f"({self.request.retries + 1}/{self.max_retries}): {exc}"
+            )
+            raise self.retry(exc=exc, countdown=settings.TENANT_TASK_RETRY_DELAY)
+
+        logger.error(f"{job_name}: tenant {schema_name} failed after retries: {exc}")
+        outcome.update(status='failed', error=str(exc))
+
+    outcome['duration_seconds'] = round((timezone.now() - started_at).total_seconds(), 3)
+    return list(previous_results or []) + [outcome]
+
+
+@shared_task
+def aggregate_tenant_results(lane_results: List[List[Dict]], job_name: str) -> Dict[str, Any]:
+    """
+    Chord callback combining the per-tenant outcomes of a fan-out job.
+
+    Numeric values returned by the per-tenant callables are summed into the
+    summary under their own keys.
+    """
+    outcomes = [outcome for lane in lane_results if lane for outcome in lane]
+
+    totals = {}
+    failed_tenants = []
+
+    for outcome in outcomes:
+        if outcome['status'] != 'success':
+            failed_tenants.append({
+                'schema_name': outcome['schema_name'],
+                'status': outcome['status'],
+                'error': outcome.get('error', ''),
+            })
+            continue
+
+        for key, value in outcome['result'].items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                totals[key] = totals.get(key, 0) + value
+
+    slowest = max(outcomes, key=lambda o: o.get('duration_seconds', 0), default=None)
+
+    summary = {
+        'status': 'success' if not failed_tenants else 'partial',
+        'job': job_name,
+        'tenants_processed': len(outcomes) - len(failed_tenants),
+        'tenants_failed': len(failed_tenants),
+        'failed_tenants': failed_tenants,
+        'slowest_tenant': slowest['schema_name'] if slowest else None,
+        'slowest_duration_seconds': slowest.get('duration_seconds', 0) if slowest else 0,
+        **totals,
+    }
+
+    logger.info(
+        f"{job_name} completed: {summary['tenants_processed']} tenants processed, "
+        f"{summary['tenants_failed']} failed, totals {totals}"
+    )
+
+    return summary
+
+
+@shared_task
+def report_tenant_job_failure(request, exc, traceback, job_name: str) -> Dict[str, Any]:
+    """
+    Errback of the chord callback, run when a lane failed outright (a subtask
+    killed by its hard time limit or its worker) and no summary was built.
+    """
+    logger.error(f"{job_name} failed before all tenants were processed: {exc}")
+
+    return {
+        'status': 'failed',
+        'job': job_name,
+        'error': str(exc),
+    }
+
+
+def map_over_tenants(func_path: str, job_name: Optional[str] = None,
+                     args: Optional[Iterable] = None, kwargs: Optional[Dict] = None,
+                     schemas: Optional[Iterable[str]] = None,
+                     concurrency: Optional[int] = None,
+                     soft_time_limit: Optional[int] = None,
+                     time_limit: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Dispatch a per-tenant callable over tenants as a Celery chord.
+
+    Args:
+        func_path: Dotted path of a callable ``func(tenant, *args, **kwargs)``
+            returning a dict; numeric values are summed across tenants
+        job_name: Name used in logs and the aggregated summary
+        args: Extra positional arguments (must be JSON serialisable)
+        kwargs: Extra keyword arguments (must be JSON serialisable)
+        schemas: Tenant schemas to run for; defaults to all active tenants
+        concurrency: Maximum number of tenants processed in parallel
+        soft_time_limit: Per-tenant soft time limit in seconds
+        time_limit: Per-tenant hard time limit in seconds; a backstop only,
+            keep it well above soft_time_limit
+
+    Returns:
+        Dict describing the dispatched job
+    """
+    job_name = job_name or func_path
+    schemas = list(schemas) if schemas is not None else get_active_tenant_schemas()
+
+    if not schemas:
+        logger.info(f"{job_name}: no tenants to process")
+        return {
+            'status': 'skipped',
+            'job': job_name,
+            'tenant_count': 0,
+        }
+
+    concurrency = concurrency or settings.TENANT_TASK_CONCURRENCY
+    lane_count = max(1, min(concurrency, len(schemas)))
+
+    options = {
+        'soft_time_limit': soft_time_limit or settings.TENANT_TASK_SOFT_TIME_LIMIT,
+        'time_limit': time_limit or settings.TENANT_TASK_TIME_LIMIT,
+    }
+    subtask_args = (func_path, list(args or []), dict(kwargs or {}), job_name)
+
+    # Round-robin tenants over lanes; each lane is a chain so at most
+    # lane_count tenants run at the same time
+    lanes = []
+    for lane_schemas in (schemas[index::lane_count] for index in range(lane_count)):
+        steps = [
+            run_tenant_subtask.s([], lane_schemas[0], *subtask_args).set(**options)
+        ] + [
+            run_tenant_subtask.s(schema_name, *subtask_args).set(**options)
+            for schema_name in lane_schemas[1:]
+        ]
+        lanes.append(chain(*steps))
+
+    callback = aggregate_tenant_results.s(job_name).on_error(report_tenant_job_failure.s(job_name))
+    async_result = chord(lanes)(callback)
+
+    logger.info(f"{job_name}: dispatched {len(schemas)} tenants over {lane_count} lanes")
+
+    return {
+        'status': 'dispatched',
+        'job': job_name,
+        'tenant_count': len(schemas),
+        'lanes': lane_count,
+        'aggregate_task_id': async_result.id,
+    }
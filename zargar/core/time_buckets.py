@@ -0,0 +1,33 @@
+"""
+Time bucket boundaries shared by the downsampled time series.
+
+Buckets are minutes, hours or days in local time, so daily buckets line up
+with the business day rather than UTC midnight.
+"""
+from datetime import datetime, timedelta
+
+from django.utils import timezone
+
+BUCKET_LENGTH = {
+    'minute': timedelta(minutes=1),
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1),
+}
+
+
+def bucket_start(moment: datetime, resolution: str) -> datetime:
+    """Start of the bucket containing moment, in local time."""
+    local = timezone.localtime(moment).replace(second=0, microsecond=0)
+    if resolution in ('hour', 'day'):
+        local = local.replace(minute=0)
+    if resolution == 'day':
+        local = local.replace(hour=0)
+    return local
+
+
+def bucket_end(start: datetime, resolution: str) -> datetime:
+    """Start of the bucket following the one starting at start."""
+    if resolution == 'day':
+        # Local days are not always 24 hours long
+        return timezone.localtime(start + timedelta(hours=36)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return start + BUCKET_LENGTH[resolution]
@@ -2,15 +2,20 @@
 Customer engagement and loyalty services for zargar project.
 """
 from django.utils import timezone
-from django.db.models import Q, Sum, Count
+from django.db import transaction
+from django.db.models import Q, Sum, Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.template.loader import render_to_string
 from django.conf import settings
+from itertools import islice
 from typing import List, Dict, Optional
 import jdatetime
 from datetime import datetime, timedelta
 import logging
 
-from .models import Customer
+from zargar.core.sync_changes import record_changes
+from zargar.reports.result_store import invalidate_report_results
+from .models import Customer, CustomerLoyaltyPointLot, CustomerLoyaltyTransaction
 from .loyalty_models import (
     CustomerLoyaltyProgram,
     CustomerEngagementEvent,
@@ -437,8 +442,8 @@ class CustomerLoyaltyService:
     
     def get_active_loyalty_program(self) -> Optional[CustomerLoyaltyProgram]:
         """Get the active loyalty program for the tenant."""
+        # Programs live in the tenant schema, so no tenant filter is needed
         return CustomerLoyaltyProgram.objects.filter(
-            tenant=self.tenant,
             is_active=True
         ).first()
     
@@ -467,7 +472,7 @@ class CustomerLoyaltyService:
         current_tier = current_tier_record.tier if current_tier_record else 'regular'
         
         # Check if upgrade is needed
-        tier_hierarchy = ['regular', 'bronze', 'silver', 'gold', 'platinum']
+        tier_hierarchy = CustomerLoyaltyProgram.TIER_ORDER
         if tier_hierarchy.index(new_tier) > tier_hierarchy.index(current_tier):
             # Upgrade needed
             
@@ -503,6 +508,176 @@ class CustomerLoyaltyService:
         
         return None
     
+    def update_customer_tiers(self, customers) -> List[Dict]:
+        """
+        Set-based update_customer_tier() for a queryset of customers.
+        
+        The tier every customer qualifies for is computed in the query with
+        one CASE over total_purchases, and only customers whose tier goes up
+        are loaded. Upgrades are written in batches of LOYALTY_BATCH_SIZE:
+        one update retiring the current tier records, bulk inserts of the
+        new tier records and upgrade events, and one update of the customers.
+        
+        Args:
+            customers: Customer queryset to recalculate
+            
+        Returns:
+            List of upgrades with customer_id, old_tier and new_tier
+        """
+        program = self.get_active_loyalty_program()
+        if not program:
+            return []
+        
+        current_tier = CustomerVIPTier.objects.filter(
+            customer=OuterRef('pk'),
+            is_current=True
+        ).order_by('-effective_date', '-pk')
+        
+        upgrades_query = customers.annotate(
+            new_tier=program.vip_tier_case(),
+            new_rank=program.vip_tier_rank_case(),
+            current_tier_record_id=Subquery(current_tier.values('pk')[:1]),
+            current_tier=Coalesce(Subquery(current_tier.values('tier')[:1]), Value('regular')),
+        ).annotate(
+            current_rank=CustomerLoyaltyProgram.tier_rank_case('current_tier'),
+        ).filter(
+            new_rank__gt=F('current_rank')
+        ).only(
+            'pk', 'first_name', 'last_name', 'persian_first_name', 'persian_last_name',
+            'total_purchases', 'loyalty_points'
+        ).order_by('pk')
+        
+        upgrades = []
+        rows = upgrades_query.iterator(chunk_size=settings.LOYALTY_BATCH_SIZE)
+        while True:
+            batch = list(islice(rows, settings.LOYALTY_BATCH_SIZE))
+            if not batch:
+                break
+            self._apply_tier_upgrades(program, batch)
+            upgrades.extend(
+                {'customer_id': customer.pk, 'old_tier': customer.current_tier, 'new_tier': customer.new_tier}
+                for customer in batch
+            )
+        
+        logger.info(f"Upgraded {len(upgrades)} customer tiers")
+        return upgrades
+    
+    def _apply_tier_upgrades(self, program: CustomerLoyaltyProgram, customers: List[Customer]):
+        """Write one batch of tier upgrades annotated by update_customer_tiers()."""
+        now = timezone.now()
+        
+        with transaction.atomic():
+            CustomerVIPTier.objects.filter(
+                pk__in=[c.current_tier_record_id for c in customers if c.current_tier_record_id]
+            ).update(is_current=False, updated_at=now)
+            
+            tier_records = []
+            for customer in customers:
+                benefits = program.get_tier_benefits(customer.new_tier)
+                tier_records.append(CustomerVIPTier(
+                    customer=customer,
+                    loyalty_program=program,
+                    tier=customer.new_tier,
+                    previous_tier=customer.current_tier,
+                    total_purchases_at_upgrade=customer.total_purchases,
+                    points_balance_at_upgrade=customer.loyalty_points,
+                    effective_date=now.date(),
+                    discount_percentage=benefits['discount_percentage'],
+                    bonus_points_multiplier=benefits['bonus_points_multiplier']
+                ))
+            CustomerVIPTier.objects.bulk_create(tier_records)
+            
+            # Upgrades always reach a VIP tier, since regular is the lowest
+            customer_ids = [c.pk for c in customers]
+            Customer.objects.filter(pk__in=customer_ids).update(
+                is_vip=True, customer_type='vip', updated_at=now
+            )
+            # update() skips post_save
+            record_changes('customers', customer_ids, 'update')
+            invalidate_report_results('installments')
+            
+            CustomerEngagementEvent.objects.bulk_create([
+                self._build_vip_upgrade_event(customer, customer.new_tier, customer.current_tier)
+                for customer in customers
+            ])
+    
+    def expire_points(self, now=None) -> Dict:
+        """
+        Expire the points left in lots whose expiry has passed, set-based.
+        
+        Candidates come from one range scan of the open-lot expiry index.
+        Per batch of LOYALTY_BATCH_SIZE customers, in one transaction, the
+        customer rows are locked (as redemptions lock them), the expiring
+        points are summed, the lots are emptied with one update, balances
+        are written with bulk_update and the expiry ledger rows with
+        bulk_create. Redeemed points are never in an open lot, so they
+        cannot expire.
+        
+        Args:
+            now: Lots expiring before this moment expire (now by default)
+            
+        Returns:
+            Dictionary with expired_points and customers_affected
+        """
+        now = now or timezone.now()
+        customer_ids = CustomerLoyaltyPointLot.objects.expired(now).values_list(
+            'customer_id', flat=True
+        ).order_by('customer_id').distinct()
+        
+        expired_points = 0
+        customers_affected = 0
+        
+        ids = iter(customer_ids)
+        while True:
+            batch = list(islice(ids, settings.LOYALTY_BATCH_SIZE))
+            if not batch:
+                break
+            
+            with transaction.atomic():
+                customers = {
+                    customer.pk: customer
+                    for customer in Customer.objects.select_for_update().filter(
+                        pk__in=batch
+                    ).only('pk', 'loyalty_points')
+                }
+                lots = CustomerLoyaltyPointLot.objects.expired(now).filter(customer_id__in=batch)
+                expiring = dict(
+                    lots.values('customer_id').annotate(
+                        points=Sum('points_remaining')
+                    ).order_by().values_list('customer_id', 'points')
+                )
+                lots.update(points_remaining=0, updated_at=now)
+                
+                expiry_rows = []
+                for customer_id, points in expiring.items():
+                    customer = customers[customer_id]
+                    points = min(points, customer.loyalty_points)
+                    if points <= 0:
+                        continue
+                    customer.loyalty_points -= points
+                    customer.updated_at = now
+                    expiry_rows.append(CustomerLoyaltyTransaction(
+                        customer=customer,
+                        points=-points,
+                        transaction_type='expired',
+                        reason="Loyalty points expired"
+                    ))
+                    expired_points += points
+                
+                changed = [row.customer for row in expiry_rows]
+                Customer.objects.bulk_update(changed, ['loyalty_points', 'updated_at'])
+                CustomerLoyaltyTransaction.objects.bulk_create(expiry_rows)
+                if changed:
+                    # bulk_update() skips post_save
+                    record_changes('customers', [customer.pk for customer in changed], 'update')
+                    invalidate_report_results('installments')
+                customers_affected += len(changed)
+        
+        return {
+            'expired_points': expired_points,
+            'customers_affected': customers_affected
+        }
+    
     def process_purchase_loyalty(self, customer: Customer, purchase_amount: float) -> Dict:
         """
         Process loyalty points and tier updates for a purchase.
@@ -535,7 +710,11 @@ class CustomerLoyaltyService:
             discount_amount = 0
         
         # Award points to customer
-        customer.add_loyalty_points(final_points, f"Purchase reward - {purchase_amount:,.0f} Toman")
+        customer.add_loyalty_points(
+            final_points,
+            f"Purchase reward - {purchase_amount:,.0f} Toman",
+            expires_at=program.calculate_points_expiry(timezone.now())
+        )
         
         # Update purchase statistics
         customer.update_purchase_stats(purchase_amount)
@@ -625,6 +804,13 @@ class CustomerLoyaltyService:
     
     def _create_vip_upgrade_event(self, customer: Customer, new_tier: str, old_tier: str):
         """Create engagement event for VIP tier upgrade."""
+        event = self._build_vip_upgrade_event(customer, new_tier, old_tier)
+        event.save()
+        return event
+    
+    def _build_vip_upgrade_event(self, customer: Customer, new_tier: str,
+                                 old_tier: str) -> CustomerEngagementEvent:
+        """Unsaved engagement event for a VIP tier upgrade."""
         
         tier_names_persian = {
             'bronze': 'برنز',
@@ -635,7 +821,7 @@ class CustomerLoyaltyService:
         
         new_tier_persian = tier_names_persian.get(new_tier, new_tier)
         
-        CustomerEngagementEvent.objects.create(
+        return CustomerEngagementEvent(
             customer=customer,
             event_type='vip_upgrade',
             title=f"VIP Tier Upgrade - {customer.full_persian_name}",
@@ -8,6 +8,7 @@ from django.utils import timezone
 from zargar.core.models import TenantAwareModel
 from .models import Customer
 import jdatetime
+from datetime import timedelta
 
 
 class CustomerLoyaltyProgram(TenantAwareModel):
@@ -162,6 +163,49 @@ class CustomerLoyaltyProgram(TenantAwareModel):
     def __str__(self):
         return self.name_persian or self.name
     
+    # VIP tiers from lowest to highest
+    TIER_ORDER = ('regular', 'bronze', 'silver', 'gold', 'platinum')
+    
+    def get_tier_thresholds(self):
+        """(tier, threshold) pairs from the highest tier down."""
+        return [
+            ('platinum', self.vip_threshold_platinum),
+            ('gold', self.vip_threshold_gold),
+            ('silver', self.vip_threshold_silver),
+            ('bronze', self.vip_threshold_bronze),
+        ]
+    
+    def vip_tier_case(self, field='total_purchases'):
+        """SQL expression of get_vip_tier() over a purchases field."""
+        return models.Case(
+            *[
+                models.When(**{f'{field}__gte': threshold}, then=models.Value(tier))
+                for tier, threshold in self.get_tier_thresholds()
+            ],
+            default=models.Value('regular'),
+            output_field=models.CharField(),
+        )
+    
+    def vip_tier_rank_case(self, field='total_purchases'):
+        """Position in TIER_ORDER of the tier a purchases field qualifies for."""
+        return models.Case(
+            *[
+                models.When(**{f'{field}__gte': threshold}, then=models.Value(self.TIER_ORDER.index(tier)))
+                for tier, threshold in self.get_tier_thresholds()
+            ],
+            default=models.Value(0),
+            output_field=models.IntegerField(),
+        )
+    
+    @classmethod
+    def tier_rank_case(cls, field):
+        """Position in TIER_ORDER of a tier name field."""
+        return models.Case(
+            *[models.When(**{field: tier}, then=models.Value(rank)) for rank, tier in enumerate(cls.TIER_ORDER)],
+            default=models.Value(0),
+            output_field=models.IntegerField(),
+        )
+    
     def get_vip_tier(self, total_purchases):
         """Determine VIP tier based on total purchases."""
         if total_purchases >= self.vip_threshold_platinum:
@@ -183,6 +227,10 @@ class CustomerLoyaltyProgram(TenantAwareModel):
         """Calculate Toman value of points."""
         return points * self.toman_per_point
     
+    def calculate_points_expiry(self, earned_at):
+        """Expiry of points earned at earned_at, points_expire_months later."""
+        return earned_at + timedelta(days=self.points_expire_months * 30)
+    
     def get_tier_benefits(self, tier):
         """Get benefits for a specific VIP tier."""
         benefits = {
@@ -0,0 +1,212 @@
+"""
+Django management command to benchmark the loyalty tier and points expiry jobs.
+
+Seeds a tenant schema with synthetic customers (100,000 by default) spread
+over all VIP tiers, each with an earned points transaction and points lot
+older than the expiry window, and times the per-customer implementations
+against the set-based ones in CustomerLoyaltyService (expiry over the
+points lots). Both run on the same data: the
+per-customer run is rolled back to a savepoint before the set-based run, and
+all seeded data is rolled back at the end unless --keep is given.
+"""
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from django_tenants.utils import get_tenant_model, tenant_context
+
+from zargar.customers.engagement_services import CustomerLoyaltyService
+from zargar.customers.loyalty_models import CustomerLoyaltyProgram
+from zargar.customers.models import Customer, CustomerLoyaltyPointLot, CustomerLoyaltyTransaction
+
+SEED_BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = 'Benchmark per-customer and set-based loyalty tier and points expiry jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--schema',
+            required=True,
+            help='Tenant schema to run the benchmark in',
+        )
+        parser.add_argument(
+            '--customers',
+            type=int,
+            default=100000,
+            help='Number of synthetic customers (default: 100000)',
+        )
+        parser.add_argument(
+            '--mode',
+            choices=['both', 'row_by_row', 'set_based'],
+            default='both',
+            help='Implementation(s) to benchmark',
+        )
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Keep the seeded customers instead of rolling them back',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            tenant = get_tenant_model().objects.get(schema_name=options['schema'])
+        except get_tenant_model().DoesNotExist:
+            raise CommandError(f'Tenant schema "{options["schema"]}" does not exist')
+
+        modes = ['row_by_row', 'set_based'] if options['mode'] == 'both' else [options['mode']]
+        results = {}
+
+        with tenant_context(tenant), transaction.atomic():
+            service = CustomerLoyaltyService(tenant)
+            program = self._get_program(service)
+
+            started_at = time.perf_counter()
+            self._seed(program, options['customers'])
+            self.stdout.write(
+                f'Seeded {options["customers"]} customers in {time.perf_counter() - started_at:.1f}s'
+            )
+
+            customers = Customer.objects.filter(first_name='Benchmark')
+            expiration_date = timezone.now() - timedelta(days=program.points_expire_months * 30)
+
+            for mode in modes:
+                savepoint = transaction.savepoint()
+                if mode == 'row_by_row':
+                    results[mode] = {
+                        'tiers': self._measure(lambda: self._tiers_row_by_row(service, customers)),
+                        'expiry': self._measure(lambda: self._expire_row_by_row(program, expiration_date)),
+                    }
+                else:
+                    results[mode] = {
+                        'tiers': self._measure(lambda: len(service.update_customer_tiers(customers))),
+                        'expiry': self._measure(lambda: service.expire_points()['customers_affected']),
+                    }
+                transaction.savepoint_rollback(savepoint)
+
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+        self.stdout.write('')
+        self.stdout.write(f'Loyalty jobs over {options["customers"]} customers:')
+        for mode, jobs in results.items():
+            for job, (seconds, queries, affected) in jobs.items():
+                self.stdout.write(
+                    f'  {mode:<10} {job:<6} {seconds:8.2f}s  {queries:>8} queries  {affected:>8} customers changed'
+                )
+
+        if len(results) == 2:
+            for job in ('tiers', 'expiry'):
+                speedup = results['row_by_row'][job][0] / results['set_based'][job][0]
+                self.stdout.write(self.style.SUCCESS(f'Set-based {job} job is {speedup:.1f}x faster'))
+
+    def _get_program(self, service):
+        """Return the active loyalty program, creating one inside the benchmark transaction."""
+        program = service.get_active_loyalty_program()
+        if program is None:
+            program = CustomerLoyaltyProgram.objects.create(
+                name='Benchmark Program',
+                name_persian='برنامه آزمایشی',
+                program_type='hybrid',
+                start_date=timezone.now().date(),
+            )
+        return program
+
+    def _seed(self, program, count):
+        """Create customers spread over every tier, each with an old, expired points lot."""
+        thresholds = [Decimal('0')] + [threshold for _, threshold in reversed(program.get_tier_thresholds())]
+        now = timezone.now()
+        earned_at = now - timedelta(days=program.points_expire_months * 30 + 1)
+
+        for offset in range(0, count, SEED_BATCH_SIZE):
+            customers = Customer.objects.bulk_create([
+                Customer(
+                    first_name='Benchmark',
+                    last_name=str(index),
+                    phone_number=f'09{index:09d}',
+                    total_purchases=thresholds[index % len(thresholds)] + index % 1000,
+                    loyalty_points=500 + index % 500,
+                    last_purchase_date=now,
+                )
+                for index in range(offset, min(offset + SEED_BATCH_SIZE, count))
+            ])
+            transactions = CustomerLoyaltyTransaction.objects.bulk_create([
+                CustomerLoyaltyTransaction(
+                    customer=customer,
+                    points=customer.loyalty_points,
+                    transaction_type='earned',
+                    reason='Benchmark purchase',
+                )
+                for customer in customers
+            ])
+            # created_at is auto_now_add, so move the rows past the expiry window
+            CustomerLoyaltyTransaction.objects.filter(
+                pk__in=[row.pk for row in transactions]
+            ).update(created_at=earned_at)
+            CustomerLoyaltyPointLot.objects.bulk_create([
+                CustomerLoyaltyPointLot(
+                    customer=row.customer,
+                    earned_transaction=row,
+                    points_earned=row.points,
+                    points_remaining=row.points,
+                    earned_at=earned_at,
+                    expires_at=program.calculate_points_expiry(earned_at),
+                )
+                for row in transactions
+            ])
+
+    @contextmanager
+    def _count_queries(self, counter):
+        def wrapper(execute, sql, params, many, context):
+            counter[0] += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(wrapper):
+            yield
+
+    def _measure(self, job):
+        """Run job, returning (seconds, queries, value returned by job)."""
+        counter = [0]
+        with self._count_queries(counter):
+            started_at = time.perf_counter()
+            affected = job()
+            elapsed = time.perf_counter() - started_at
+        return elapsed, counter[0], affected
+
+    def _tiers_row_by_row(self, service, customers):
+        """Previous tier job: update_customer_tier() per customer."""
+        return sum(1 for customer in customers if service.update_customer_tier(customer))
+
+    def _expire_row_by_row(self, program, expiration_date):
+        """Previous expiry job: sum and write each customer's old points separately."""
+        affected = 0
+        candidates = Customer.objects.filter(
+            is_active=True,
+            loyalty_points__gt=0,
+            loyalty_transactions__created_at__lt=expiration_date,
+            loyalty_transactions__transaction_type='earned'
+        ).distinct()
+
+        for customer in candidates:
+            old_transactions = CustomerLoyaltyTransaction.objects.filter(
+                customer=customer,
+                transaction_type='earned',
+                created_at__lt=expiration_date
+            )
+            points = min(sum(t.points for t in old_transactions if t.points > 0), customer.loyalty_points)
+            if points > 0:
+                customer.loyalty_points -= points
+                customer.save(update_fields=['loyalty_points', 'updated_at'])
+                CustomerLoyaltyTransaction.objects.create(
+                    customer=customer,
+                    points=-points,
+                    transaction_type='expired',
+                    reason=f"Points expired after {program.points_expire_months} months"
+                )
+                affected += 1
+        return affected
@@ -0,0 +1,80 @@
+# Generated by Django 4.2.24 on 2026-10-18 22:13
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery
+from django.utils import timezone
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def backfill_point_lots(apps, schema_editor):
+    """
+    One lot per customer holding their current balance.
+
+    The earns behind an existing balance are not known, so the lot is dated
+    at the customer's latest earn (now without one) and expires one program
+    window after it; without an active program it never expires.
+    """
+    Customer = apps.get_model('customers', 'Customer')
+    CustomerLoyaltyTransaction = apps.get_model('customers', 'CustomerLoyaltyTransaction')
+    CustomerLoyaltyPointLot = apps.get_model('customers', 'CustomerLoyaltyPointLot')
+    CustomerLoyaltyProgram = apps.get_model('customers', 'CustomerLoyaltyProgram')
+
+    now = timezone.now()
+    program = CustomerLoyaltyProgram.objects.filter(is_active=True).order_by('-created_at').first()
+    last_earned = CustomerLoyaltyTransaction.objects.filter(
+        customer=OuterRef('pk'), transaction_type='earned'
+    ).values('customer').annotate(last=Max('created_at')).values('last')
+
+    customers = Customer.objects.filter(loyalty_points__gt=0).annotate(
+        last_earned_at=Subquery(last_earned)
+    ).values_list('pk', 'loyalty_points', 'last_earned_at')
+
+    lots = []
+    for customer_id, points, last_earned_at in customers.iterator(chunk_size=1000):
+        earned_at = last_earned_at or now
+        lots.append(CustomerLoyaltyPointLot(
+            customer_id=customer_id,
+            points_earned=points,
+            points_remaining=points,
+            earned_at=earned_at,
+            expires_at=earned_at + timedelta(days=program.points_expire_months * 30) if program else None,
+        ))
+    CustomerLoyaltyPointLot.objects.bulk_create(lots, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('customers', '0004_supplierperformancemetrics_supplierpayment_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerLoyaltyPointLot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Timestamp when the record was created', verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Timestamp when the record was last updated', verbose_name='Updated At')),
+                ('points_earned', models.PositiveIntegerField(verbose_name='Points Earned')),
+                ('points_remaining', models.PositiveIntegerField(help_text='Points not yet redeemed or expired', verbose_name='Points Remaining')),
+                ('earned_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Earned At')),
+                ('expires_at', models.DateTimeField(blank=True, help_text='Leave empty for points that never expire', null=True, verbose_name='Expires At')),
+                ('created_by', models.ForeignKey(blank=True, help_text='User who created this record', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created', to=settings.AUTH_USER_MODEL, verbose_name='Created By')),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='loyalty_point_lots', to='customers.customer', verbose_name='Customer')),
+                ('earned_transaction', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='point_lots', to='customers.customerloyaltytransaction', verbose_name='Earned Transaction')),
+                ('updated_by', models.ForeignKey(blank=True, help_text='User who last updated this record', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated', to=settings.AUTH_USER_MODEL, verbose_name='Updated By')),
+            ],
+            options={
+                'verbose_name': 'Loyalty Point Lot',
+                'verbose_name_plural': 'Loyalty Point Lots',
+                'ordering': ['expires_at', 'earned_at'],
+                'indexes': [models.Index(condition=models.Q(('points_remaining__gt', 0)), fields=['customer', 'expires_at', 'earned_at'], name='customer_open_lot_fifo_idx'), models.Index(condition=models.Q(('points_remaining__gt', 0)), fields=['expires_at'], name='customer_open_lot_expiry_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_point_lots, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,12 @@
 """
 Customer management models for zargar project.
 """
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Q
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import RegexValidator
-from zargar.core.models import TenantAwareModel
+from zargar.core.models import TenantAwareManager, TenantAwareModel, TenantAwareQuerySet
 import jdatetime
 
 
@@ -172,24 +174,65 @@ class Customer(TenantAwareModel):
         return (today.month == birth_shamsi.month and 
                 today.day == birth_shamsi.day)
     
-    def add_loyalty_points(self, points, reason=""):
-        """Add loyalty points to customer."""
-        self.loyalty_points += points
-        self.save(update_fields=['loyalty_points', 'updated_at'])
+    def add_loyalty_points(self, points, reason="", expires_at=None):
+        """
+        Add loyalty points to customer.
         
-        # Create loyalty transaction record
-        CustomerLoyaltyTransaction.objects.create(
-            customer=self,
-            points=points,
-            transaction_type='earned',
-            reason=reason
-        )
+        The points are kept as a lot expiring at expires_at, by default
+        after the active loyalty program's expiry window (never without one).
+        """
+        from .loyalty_models import CustomerLoyaltyProgram
+        
+        now = timezone.now()
+        if expires_at is None:
+            program = CustomerLoyaltyProgram.objects.filter(is_active=True).first()
+            if program:
+                expires_at = program.calculate_points_expiry(now)
+        
+        with transaction.atomic():
+            Customer.objects.filter(pk=self.pk).update(
+                loyalty_points=F('loyalty_points') + points,
+                updated_at=now
+            )
+            
+            # Create loyalty transaction record
+            earned = CustomerLoyaltyTransaction.objects.create(
+                customer=self,
+                points=points,
+                transaction_type='earned',
+                reason=reason
+            )
+            CustomerLoyaltyPointLot.objects.create(
+                customer=self,
+                earned_transaction=earned,
+                points_earned=points,
+                points_remaining=points,
+                earned_at=now,
+                expires_at=expires_at
+            )
+            self.refresh_from_db(fields=['loyalty_points', 'updated_at'])
+            self._record_balance_change()
     
     def redeem_loyalty_points(self, points, reason=""):
-        """Redeem loyalty points."""
-        if self.loyalty_points >= points:
-            self.loyalty_points -= points
-            self.save(update_fields=['loyalty_points', 'updated_at'])
+        """
+        Redeem loyalty points, consuming the lots that expire first.
+        
+        One short transaction: a conditional decrement of the balance, which
+        also locks the customer row, followed by the update of the lots it
+        consumes.
+        """
+        with transaction.atomic():
+            redeemed = Customer.objects.filter(
+                pk=self.pk,
+                loyalty_points__gte=points
+            ).update(
+                loyalty_points=F('loyalty_points') - points,
+                updated_at=timezone.now()
+            )
+            if not redeemed:
+                return False
+            
+            CustomerLoyaltyPointLot.consume(self, points)
             
             # Create loyalty transaction record
             CustomerLoyaltyTransaction.objects.create(
@@ -198,8 +241,20 @@ class Customer(TenantAwareModel):
                 transaction_type='redeemed',
                 reason=reason
             )
-            return True
-        return False
+            self.refresh_from_db(fields=['loyalty_points', 'updated_at'])
+            self._record_balance_change()
+        return True
+    
+    def _record_balance_change(self):
+        """
+        Record a balance written with update(), which skips post_save, in the
+        delta sync change log and the report result versions.
+        """
+        from zargar.core.sync_changes import record_changes
+        from zargar.reports.result_store import invalidate_report_results
+        
+        record_changes('customers', [self.pk], 'update')
+        invalidate_report_results('installments')
     
     def update_purchase_stats(self, amount):
         """Update customer purchase statistics."""
@@ -269,6 +324,130 @@ class CustomerLoyaltyTransaction(TenantAwareModel):
         return f"{self.customer} - {self.points} points ({self.transaction_type})"
 
 
+class CustomerLoyaltyPointLotQuerySet(TenantAwareQuerySet):
+    """
+    Point lot queries in redemption and expiry order.
+    """
+    
+    def open(self):
+        """Lots with points left to redeem or expire."""
+        return self.filter(points_remaining__gt=0)
+    
+    def expired(self, now=None):
+        """Open lots whose expiry has passed."""
+        return self.open().filter(expires_at__lt=now or timezone.now())
+    
+    def fifo(self):
+        """Soonest expiry first; lots that never expire last."""
+        return self.order_by(F('expires_at').asc(nulls_last=True), 'earned_at', 'pk')
+
+
+class CustomerLoyaltyPointLotManager(TenantAwareManager):
+    """
+    Tenant-aware manager exposing the point lot queryset methods.
+    """
+    
+    def get_queryset(self):
+        return CustomerLoyaltyPointLotQuerySet(self.model, using=self._db)
+    
+    def open(self):
+        return self.get_queryset().open()
+    
+    def expired(self, now=None):
+        return self.get_queryset().expired(now)
+
+
+class CustomerLoyaltyPointLot(TenantAwareModel):
+    """
+    Points from one earn, redeemed first-in first-out until they expire.
+    
+    The customer's balance (Customer.loyalty_points) is the sum of
+    points_remaining over their lots and is kept up to date alongside them.
+    """
+    customer = models.ForeignKey(
+        Customer,
+        on_delete=models.CASCADE,
+        related_name='loyalty_point_lots',
+        verbose_name=_('Customer')
+    )
+    earned_transaction = models.ForeignKey(
+        CustomerLoyaltyTransaction,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='point_lots',
+        verbose_name=_('Earned Transaction')
+    )
+    points_earned = models.PositiveIntegerField(
+        verbose_name=_('Points Earned')
+    )
+    points_remaining = models.PositiveIntegerField(
+        verbose_name=_('Points Remaining'),
+        help_text=_('Points not yet redeemed or expired')
+    )
+    earned_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name=_('Earned At')
+    )
+    expires_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name=_('Expires At'),
+        help_text=_('Leave empty for points that never expire')
+    )
+    
+    objects = CustomerLoyaltyPointLotManager()
+    
+    class Meta:
+        verbose_name = _('Loyalty Point Lot')
+        verbose_name_plural = _('Loyalty Point Lots')
+        ordering = ['expires_at', 'earned_at']
+        indexes = [
+            # Redemption order of a customer's open lots
+            models.Index(
+                fields=['customer', 'expires_at', 'earned_at'],
+                name='customer_open_lot_fifo_idx',
+                condition=Q(points_remaining__gt=0)
+            ),
+            # Range scan of the expiry job
+            models.Index(
+                fields=['expires_at'],
+                name='customer_open_lot_expiry_idx',
+                condition=Q(points_remaining__gt=0)
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.customer} - {self.points_remaining}/{self.points_earned} points"
+    
+    @classmethod
+    def consume(cls, customer, points):
+        """
+        Take points from the customer's open lots in FIFO order.
+        
+        Must run inside the redeeming transaction: the lots are locked and
+        written with one bulk update.
+        
+        Returns:
+            List of the lots points were taken from
+        """
+        now = timezone.now()
+        consumed = []
+        
+        for lot in cls.objects.filter(customer=customer).open().fifo().select_for_update():
+            if points <= 0:
+                break
+            taken = min(points, lot.points_remaining)
+            lot.points_remaining -= taken
+            lot.updated_at = now
+            points -= taken
+            consumed.append(lot)
+        
+        if consumed:
+            cls.objects.bulk_update(consumed, ['points_remaining', 'updated_at'])
+        return consumed
+
+
 class CustomerNote(TenantAwareModel):
     """
     Notes and interactions with customers.
@@ -805,8 +984,16 @@ class PurchaseOrderItem(TenantAwareModel):
         """Check if item is fully received."""
         return self.quantity_received >= self.quantity_ordered
     
-    def receive_quantity(self, quantity):
-        """Receive a specific quantity of this item."""
+    def receive_quantity(self, quantity, update_stock=False):
+        """
+        Receive a specific quantity of this item.
+        
+        Args:
+            quantity: Pieces received
+            update_stock: Also add the pieces to the jewelry item with this
+                SKU and record a purchase receipt stock movement; off by
+                default for shops that adjust stock by hand
+        """
         if quantity <= 0:
             return False
         
@@ -814,10 +1001,39 @@ class PurchaseOrderItem(TenantAwareModel):
         if quantity > max_receivable:
             quantity = max_receivable
         
-        self.quantity_received += quantity
-        self.save()
+        with transaction.atomic():
+            self.quantity_received += quantity
+            self.save()
+            
+            if update_stock:
+                self.receive_into_stock(quantity)
         
         return True
+    
+    def receive_into_stock(self, quantity):
+        """Add received pieces to the jewelry item with this SKU and record the movement."""
+        if not self.sku:
+            return
+        
+        from zargar.jewelry.models import JewelryItem
+        from zargar.jewelry.stock_models import StockMovementType
+        from zargar.jewelry.stock_services import record_stock_movements, stock_movement
+        
+        with transaction.atomic():
+            jewelry_item = JewelryItem.objects.select_for_update().filter(sku=self.sku).first()
+            if not jewelry_item:
+                return
+            
+            quantity_before = jewelry_item.quantity
+            jewelry_item.quantity = quantity_before + quantity
+            jewelry_item.save(update_fields=['quantity', 'updated_at'])
+            
+            record_stock_movements([stock_movement(
+                jewelry_item, quantity_before, jewelry_item.quantity,
+                StockMovementType.PURCHASE_RECEIPT,
+                reason=self.item_name,
+                reference=self.purchase_order.order_number
+            )])
 
 
 # Import loyalty models to make them available
@@ -683,6 +683,7 @@ class SupplierAjaxView(LoginRequiredMixin, TenantContextMixin, TemplateView):
         try:
             order_id = request.POST.get('order_id')
             item_quantities = json.loads(request.POST.get('item_quantities', '{}'))
+            update_stock = request.POST.get('update_stock') == 'true'
             
             purchase_order = get_object_or_404(
                 PurchaseOrder, 
@@ -697,7 +698,7 @@ class SupplierAjaxView(LoginRequiredMixin, TenantContextMixin, TemplateView):
                         id=item_id, 
                         purchase_order=purchase_order
                     )
-                    if item.receive_quantity(int(quantity)):
+                    if item.receive_quantity(int(quantity), update_stock=update_stock):
                         received_items += 1
                 except (PurchaseOrderItem.DoesNotExist, ValueError):
                     continue
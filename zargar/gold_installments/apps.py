@@ -5,3 +5,7 @@ class GoldInstallmentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'zargar.gold_installments'
     verbose_name = 'Gold Installments'
+    
+    def ready(self):
+        """Import signals when app is ready."""
+        import zargar.gold_installments.signals
@@ -7,6 +7,7 @@ from decimal import Decimal
 from datetime import date, timedelta
 from zargar.core.persian_number_formatter import PersianNumberFormatter
 from zargar.core.calendar_utils import PersianCalendarUtils
+from zargar.core.pdf_rendering import render_html_pdf
 
 
 class GoldInstallmentContractTemplates:
@@ -509,4 +510,33 @@ class ContractDocumentGenerator:
                 PersianCalendarUtils.gregorian_to_shamsi(adjustment.adjustment_date)
             ),
             'authorization_notes': adjustment.authorization_notes or 'ندارد'
-        }
\ No newline at end of file
+        }
+
+def contract_pdf_data(contract) -> Dict[str, str]:
+    """
+    The text a contract PDF is rendered from.
+
+    Args:
+        contract: GoldInstallmentContract instance
+
+    Returns:
+        Dictionary of strings, also hashed to cache the rendered PDF
+    """
+    return {
+        'contract_number': contract.contract_number,
+        'customer_name': str(contract.customer),
+        'contract_text': GoldInstallmentContractTemplates.generate_complete_contract(
+            ContractDocumentGenerator.format_contract_data(contract)
+        ),
+    }
+
+
+def load_contract_pdf_data(contract_id) -> Dict[str, str]:
+    """Contract data for the PDF workers."""
+    from .models import GoldInstallmentContract
+    return contract_pdf_data(GoldInstallmentContract.objects.select_related('customer').get(id=contract_id))
+
+
+def render_contract_pdf(contract_data: Dict[str, str]) -> bytes:
+    """Render a contract with the preloaded Persian fonts and stylesheet."""
+    return render_html_pdf(('gold_installments/pdf/contract.html',), {'contract': contract_data})
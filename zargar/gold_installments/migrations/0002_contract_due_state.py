@@ -0,0 +1,55 @@
+# Generated by Django 4.2.24 on 2026-10-18 22:06
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery
+
+PERIOD_DAYS = {'weekly': 7, 'bi_weekly': 14}
+
+
+def backfill_due_state(apps, schema_editor):
+    GoldInstallmentContract = apps.get_model('gold_installments', 'GoldInstallmentContract')
+    GoldInstallmentPayment = apps.get_model('gold_installments', 'GoldInstallmentPayment')
+
+    last_payment = GoldInstallmentPayment.objects.filter(
+        contract=OuterRef('pk')
+    ).values('contract').annotate(last=Max('payment_date')).values('last')
+    GoldInstallmentContract.objects.update(last_payment_date=Subquery(last_payment))
+
+    contracts = list(GoldInstallmentContract.objects.only(
+        'pk', 'contract_date', 'payment_schedule', 'last_payment_date'
+    ))
+    for contract in contracts:
+        if contract.last_payment_date is None:
+            contract.next_due_date = contract.contract_date + timedelta(days=30)
+        else:
+            contract.next_due_date = contract.last_payment_date + timedelta(
+                days=PERIOD_DAYS.get(contract.payment_schedule, 30)
+            )
+    GoldInstallmentContract.objects.bulk_update(contracts, ['next_due_date'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gold_installments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='goldinstallmentcontract',
+            name='last_payment_date',
+            field=models.DateField(blank=True, null=True, verbose_name='Last Payment Date'),
+        ),
+        migrations.AddField(
+            model_name='goldinstallmentcontract',
+            name='next_due_date',
+            field=models.DateField(blank=True, help_text='Date the next payment is expected', null=True, verbose_name='Next Due Date'),
+        ),
+        migrations.AddIndex(
+            model_name='goldinstallmentcontract',
+            index=models.Index(fields=['status', 'next_due_date'], name='gold_instal_status_b19a7f_idx'),
+        ),
+        migrations.RunPython(backfill_due_state, migrations.RunPython.noop),
+    ]
@@ -8,13 +8,43 @@ from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from decimal import Decimal, ROUND_HALF_UP
-from zargar.core.models import TenantAwareModel
+from zargar.core.models import TenantAwareManager, TenantAwareModel, TenantAwareQuerySet
 from zargar.core.persian_number_formatter import PersianNumberFormatter
 from zargar.core.calendar_utils import PersianCalendarUtils
 import jdatetime
+from datetime import timedelta
 from typing import Dict, Optional, Tuple
 
 
+class GoldInstallmentContractQuerySet(TenantAwareQuerySet):
+    """
+    Contract queries over the stored due-date state.
+    """
+    
+    def open(self):
+        """Contracts the customer still owes gold on."""
+        return self.filter(status__in=GoldInstallmentContract.OPEN_STATUSES, balance_type='debt')
+    
+    def overdue(self, on_date=None):
+        """Open contracts whose next payment was due before on_date (today by default)."""
+        return self.open().filter(next_due_date__lt=on_date or timezone.now().date())
+
+
+class GoldInstallmentContractManager(TenantAwareManager):
+    """
+    Tenant-aware manager exposing the contract queryset methods.
+    """
+    
+    def get_queryset(self):
+        return GoldInstallmentContractQuerySet(self.model, using=self._db)
+    
+    def open(self):
+        return self.get_queryset().open()
+    
+    def overdue(self, on_date=None):
+        return self.get_queryset().overdue(on_date)
+
+
 class GoldInstallmentContract(TenantAwareModel):
     """
     Gold installment contract model with weight-based calculations.
@@ -41,6 +71,12 @@ class GoldInstallmentContract(TenantAwareModel):
         ('credit', _('Shop Owes Customer')),
     ]
     
+    # Statuses in which payments can fall due
+    OPEN_STATUSES = ('active', 'defaulted', 'suspended')
+    
+    # Days after the contract date until the first payment is due
+    FIRST_PAYMENT_DUE_DAYS = 30
+    
     # Contract identification
     contract_number = models.CharField(
         max_length=50,
@@ -183,12 +219,27 @@ class GoldInstallmentContract(TenantAwareModel):
         verbose_name=_('Total Gold Weight Paid (Grams)')
     )
     
+    # Payment due state, maintained by refresh_due_state()
+    last_payment_date = models.DateField(
+        null=True,
+        blank=True,
+        verbose_name=_('Last Payment Date')
+    )
+    next_due_date = models.DateField(
+        null=True,
+        blank=True,
+        verbose_name=_('Next Due Date'),
+        help_text=_('Date the next payment is expected')
+    )
+    
     # Audit and notes
     internal_notes = models.TextField(
         blank=True,
         verbose_name=_('Internal Notes')
     )
     
+    objects = GoldInstallmentContractManager()
+    
     class Meta:
         verbose_name = _('Gold Installment Contract')
         verbose_name_plural = _('Gold Installment Contracts')
@@ -199,6 +250,7 @@ class GoldInstallmentContract(TenantAwareModel):
             models.Index(fields=['status']),
             models.Index(fields=['contract_date']),
             models.Index(fields=['balance_type']),
+            models.Index(fields=['status', 'next_due_date']),
         ]
     
     def __str__(self):
@@ -218,6 +270,10 @@ class GoldInstallmentContract(TenantAwareModel):
         if not self.pk and self.remaining_gold_weight_grams is None:
             self.remaining_gold_weight_grams = self.initial_gold_weight_grams
         
+        # New contracts are first due FIRST_PAYMENT_DUE_DAYS after the contract date
+        if not self.pk and self.next_due_date is None and self.last_payment_date is None:
+            self.next_due_date = self.calculate_next_due_date()
+        
         super().save(*args, **kwargs)
     
     def clean(self):
@@ -263,19 +319,95 @@ class GoldInstallmentContract(TenantAwareModel):
     @property
     def is_overdue(self) -> bool:
         """Check if contract has overdue payments."""
-        if self.status in ['completed', 'cancelled']:
+        return self.days_overdue > 0
+    
+    @property
+    def days_overdue(self) -> int:
+        """Days since the next payment fell due, 0 when not overdue."""
+        if (self.status not in self.OPEN_STATUSES or self.balance_type != 'debt'
+                or self.next_due_date is None):
+            return 0
+        return max((timezone.now().date() - self.next_due_date).days, 0)
+    
+    @property
+    def payment_period_days(self) -> int:
+        """Length of one payment period in days."""
+        return (self.calculate_next_payment_date(self.contract_date) - self.contract_date).days
+    
+    def calculate_next_due_date(self, last_payment_date=None):
+        """
+        Date the next payment is due after the given last payment.
+        
+        Args:
+            last_payment_date: Date of the latest payment, if any
+        """
+        if last_payment_date is None and self.contract_date is None:
+            return None
+        if last_payment_date is None:
+            return self.contract_date + timedelta(days=self.FIRST_PAYMENT_DUE_DAYS)
+        return self.calculate_next_payment_date(last_payment_date)
+    
+    def record_payment_date(self, payment_date):
+        """Advance the due state for a new payment, without querying the payments."""
+        if self.last_payment_date is None or payment_date > self.last_payment_date:
+            self.last_payment_date = payment_date
+        self.next_due_date = self.calculate_next_due_date(self.last_payment_date)
+    
+    def refresh_due_state(self, save: bool = True) -> bool:
+        """
+        Recompute last_payment_date and next_due_date from the payments.
+        
+        Nothing changes while the latest payment date stays the same, so
+        editing a payment's other fields or deleting an older payment keeps a
+        due date restarted when a credit balance turned into a debt.
+        
+        Args:
+            save: Whether to save the two fields
+            
+        Returns:
+            Whether the due state changed
+        """
+        last_payment_date = self.payments.aggregate(
+            last=models.Max('payment_date')
+        )['last']
+        if last_payment_date == self.last_payment_date and self.next_due_date is not None:
             return False
         
-        # Get last payment date
-        last_payment = self.payments.order_by('-payment_date').first()
-        if not last_payment:
-            # No payments made, check if contract is old
-            days_since_contract = (timezone.now().date() - self.contract_date).days
-            return days_since_contract > 30  # Consider overdue after 30 days
+        self.last_payment_date = last_payment_date
+        self.next_due_date = self.calculate_next_due_date(last_payment_date)
         
-        # Check based on payment schedule
-        expected_next_payment_date = self.calculate_next_payment_date(last_payment.payment_date)
-        return timezone.now().date() > expected_next_payment_date
+        if save:
+            self.save(update_fields=['last_payment_date', 'next_due_date', 'updated_at'])
+        return True
+    
+    def calculate_overdue_amount(self, gold_price_per_gram: Optional[Decimal] = None) -> Decimal:
+        """
+        Amount in Toman the customer is behind on.
+        
+        Missed periods times payment_amount_per_period for contracts with a
+        fixed payment, otherwise the value of the remaining gold. Never more
+        than the value of the remaining gold when a price is given.
+        
+        Args:
+            gold_price_per_gram: Current gold price, needed for contracts
+                without a fixed payment amount
+        """
+        if not self.is_overdue:
+            return Decimal('0.00')
+        
+        remaining_value = None
+        if gold_price_per_gram is not None:
+            remaining_value = self.calculate_current_gold_value(gold_price_per_gram)['total_value_toman']
+        
+        if self.payment_amount_per_period:
+            missed_periods = self.days_overdue // self.payment_period_days + 1
+            amount = self.payment_amount_per_period * missed_periods
+            if remaining_value is not None:
+                amount = min(amount, remaining_value)
+        else:
+            amount = remaining_value or Decimal('0.00')
+        
+        return amount.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
     
     @property
     def completion_percentage(self) -> Decimal:
@@ -289,8 +421,6 @@ class GoldInstallmentContract(TenantAwareModel):
     
     def calculate_next_payment_date(self, last_payment_date: models.DateField) -> models.DateField:
         """Calculate next expected payment date based on schedule."""
-        from datetime import timedelta
-        
         if self.payment_schedule == 'weekly':
             return last_payment_date + timedelta(weeks=1)
         elif self.payment_schedule == 'bi_weekly':
@@ -410,12 +540,15 @@ class GoldInstallmentContract(TenantAwareModel):
             self.completion_date = payment_date
             self.remaining_gold_weight_grams = Decimal('0.000')
         
+        self.record_payment_date(payment_date)
         self.save(update_fields=[
             'remaining_gold_weight_grams',
             'total_payments_received', 
             'total_gold_weight_paid',
             'status',
             'completion_date',
+            'last_payment_date',
+            'next_due_date',
             'updated_at'
         ])
         
@@ -78,6 +78,11 @@ class GoldPriceService:
             karat: Specific karat to invalidate, or None for all
         """
         IranianGoldPriceAPI.invalidate_cache(karat)
+    
+    @classmethod
+    def get_price_generation(cls) -> int:
+        """Generation of the cached gold prices, bumped on every refresh."""
+        return IranianGoldPriceAPI.get_price_generation()
 
 
 class PaymentProcessingService:
@@ -144,7 +149,8 @@ class PaymentProcessingService:
                     payment_notes=notes
                 )
                 
-                # Update contract balance
+                # Update contract balance and due state
+                contract.record_payment_date(payment_date)
                 cls._update_contract_balance(contract, payment_details)
                 
                 # Log the transaction
@@ -283,6 +289,8 @@ class PaymentProcessingService:
             'total_gold_weight_paid',
             'status',
             'completion_date',
+            'last_payment_date',
+            'next_due_date',
             'updated_at'
         ])
     
@@ -333,8 +341,10 @@ class PaymentProcessingService:
                     if contract.remaining_gold_weight_grams <= amount:
                         contract.balance_type = 'debt'
                         contract.remaining_gold_weight_grams = amount - contract.remaining_gold_weight_grams
+                        # The new debt falls due one payment period from now
+                        contract.next_due_date = contract.calculate_next_payment_date(timezone.now().date())
                 
-                contract.save(update_fields=['balance_type', 'updated_at'])
+                contract.save(update_fields=['balance_type', 'next_due_date', 'updated_at'])
                 
                 logger.info(f"Processed {transaction_type} transaction for contract "
                            f"{contract.contract_number}: {amount} grams")
@@ -0,0 +1,20 @@
+"""
+Signals keeping the stored due state of gold installment contracts current.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import GoldInstallmentContract, GoldInstallmentPayment
+
+
+@receiver(post_save, sender=GoldInstallmentPayment)
+@receiver(post_delete, sender=GoldInstallmentPayment)
+def refresh_contract_due_state(sender, instance, raw=False, **kwargs):
+    """Recompute last_payment_date and next_due_date when a payment changes."""
+    if raw:
+        return
+
+    # Re-read the contract: it is gone when the payment is deleted with it
+    contract = GoldInstallmentContract.objects.filter(pk=instance.contract_id).first()
+    if contract is not None:
+        contract.refresh_due_state()
@@ -6,6 +6,7 @@ from celery import shared_task
 from django.utils import timezone
 from django.core.mail import send_mail
 from django.conf import settings
+from django.db.models import Count, F, Q, Sum
 from decimal import Decimal
 import logging
 from typing import Dict, List
@@ -124,12 +125,9 @@ def send_payment_reminders():
     """
     try:
         # Find overdue contracts
-        overdue_contracts = []
-        active_contracts = GoldInstallmentContract.objects.filter(status='active')
-        
-        for contract in active_contracts:
-            if contract.is_overdue:
-                overdue_contracts.append(contract)
+        overdue_contracts = list(
+            GoldInstallmentContract.objects.overdue().filter(status='active').select_related('customer')
+        )
         
         reminder_count = 0
         
@@ -168,15 +166,20 @@ def calculate_daily_contract_metrics():
     """
     try:
         active_contracts = GoldInstallmentContract.objects.filter(status='active')
+        today = timezone.now().date()
         
-        metrics = {
-            'total_active_contracts': active_contracts.count(),
-            'total_remaining_gold_weight': Decimal('0.000'),
-            'total_remaining_value': Decimal('0.00'),
-            'overdue_contracts': 0,
-            'contracts_near_completion': 0,
-            'price_protection_active': 0
-        }
+        # Counts in one aggregate query over the stored due state
+        metrics = active_contracts.aggregate(
+            total_active_contracts=Count('id'),
+            overdue_contracts=Count('id', filter=Q(balance_type='debt', next_due_date__lt=today)),
+            # Near completion: more than 90% of the initial weight paid
+            contracts_near_completion=Count(
+                'id', filter=Q(remaining_gold_weight_grams__lte=F('initial_gold_weight_grams') * Decimal('0.1'))
+            ),
+            price_protection_active=Count('id', filter=Q(has_price_protection=True)),
+        )
+        metrics['total_remaining_gold_weight'] = Decimal('0.000')
+        metrics['total_remaining_value'] = Decimal('0.00')
         
         # Get current gold prices for calculations
         gold_prices = {}
@@ -184,26 +187,14 @@ def calculate_daily_contract_metrics():
             price_data = GoldPriceService.get_current_gold_price(karat)
             gold_prices[karat] = price_data['price_per_gram']
         
-        for contract in active_contracts:
-            # Add to total remaining weight
-            metrics['total_remaining_gold_weight'] += contract.remaining_gold_weight_grams
-            
-            # Calculate remaining value
-            gold_price = gold_prices.get(contract.gold_karat, gold_prices[18])
-            remaining_value = contract.remaining_gold_weight_grams * gold_price
-            metrics['total_remaining_value'] += remaining_value
-            
-            # Check if overdue
-            if contract.is_overdue:
-                metrics['overdue_contracts'] += 1
-            
-            # Check if near completion (>90%)
-            if contract.completion_percentage >= 90:
-                metrics['contracts_near_completion'] += 1
-            
-            # Check price protection
-            if contract.has_price_protection:
-                metrics['price_protection_active'] += 1
+        # Remaining weight per karat, valued at that karat's price
+        weights_by_karat = active_contracts.order_by().values('gold_karat').annotate(
+            weight=Sum('remaining_gold_weight_grams')
+        )
+        for row in weights_by_karat:
+            weight = row['weight'] or Decimal('0.000')
+            metrics['total_remaining_gold_weight'] += weight
+            metrics['total_remaining_value'] += weight * gold_prices.get(row['gold_karat'], gold_prices[18])
         
         # Convert Decimal to string for JSON serialization
         for key, value in metrics.items():
@@ -305,6 +296,7 @@ def send_contract_payment_reminder(contract: GoldInstallmentContract):
     # Calculate overdue amount
     gold_price_data = GoldPriceService.get_current_gold_price(contract.gold_karat)
     remaining_value = contract.remaining_gold_weight_grams * gold_price_data['price_per_gram']
+    overdue_amount = contract.calculate_overdue_amount(gold_price_data['price_per_gram'])
     
     # Prepare reminder message
     message = f"""
@@ -314,6 +306,7 @@ def send_contract_payment_reminder(contract: GoldInstallmentContract):
     
     مانده طلا: {contract.remaining_gold_weight_grams} گرم
     ارزش تقریبی: {remaining_value:,.0f} تومان
+    مبلغ معوق: {overdue_amount:,.0f} تومان ({contract.days_overdue} روز تاخیر)
     
     لطفاً در اسرع وقت برای پرداخت اقدام فرمایید.
     
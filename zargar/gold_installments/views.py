@@ -20,8 +20,10 @@ from datetime import datetime, timedelta
 from zargar.core.mixins import TenantContextMixin
 from zargar.core.persian_number_formatter import PersianNumberFormatter
 from zargar.core.calendar_utils import PersianCalendarUtils
+from zargar.core.pdf_rendering import render_pdf
 from zargar.customers.models import Customer
 from .models import GoldInstallmentContract, GoldInstallmentPayment, GoldWeightAdjustment
+from .contract_templates import contract_pdf_data
 from .forms import (
     GoldInstallmentContractForm, 
     GoldInstallmentPaymentForm,
@@ -74,7 +76,7 @@ class GoldInstallmentDashboardView(LoginRequiredMixin, TenantContextMixin, ListV
             'total_contracts': all_contracts.count(),
             'active_contracts': all_contracts.filter(status='active').count(),
             'completed_contracts': all_contracts.filter(status='completed').count(),
-            'overdue_contracts': sum(1 for c in all_contracts if c.is_overdue),
+            'overdue_contracts': all_contracts.overdue().count(),
             'total_gold_weight': sum(c.initial_gold_weight_grams for c in all_contracts),
             'remaining_gold_weight': sum(c.remaining_gold_weight_grams for c in all_contracts.filter(status='active')),
         }
@@ -747,10 +749,10 @@ class InstallmentTrackingDashboardView(LoginRequiredMixin, TenantContextMixin, L
         tracking_filter = self.request.GET.get('tracking_filter', 'all')
         if tracking_filter == 'overdue':
             # Filter overdue contracts
-            queryset = [c for c in queryset if c.is_overdue]
+            queryset = queryset.overdue()
         elif tracking_filter == 'due_soon':
             # Contracts with payments due in next 7 days
-            queryset = [c for c in queryset if self._is_due_soon(c)]
+            queryset = self._due_soon(queryset)
         elif tracking_filter == 'active':
             queryset = queryset.filter(status='active')
         elif tracking_filter == 'defaulted':
@@ -758,18 +760,15 @@ class InstallmentTrackingDashboardView(LoginRequiredMixin, TenantContextMixin, L
         
         return queryset
     
-    def _is_due_soon(self, contract):
-        """Check if contract has payment due in next 7 days."""
-        if contract.status != 'active':
-            return False
-        
-        last_payment = contract.payments.order_by('-payment_date').first()
-        if not last_payment:
-            return True  # No payments made, consider due soon
-        
-        next_payment_date = contract.calculate_next_payment_date(last_payment.payment_date)
-        days_until_due = (next_payment_date - timezone.now().date()).days
-        return 0 <= days_until_due <= 7
+    def _due_soon(self, queryset):
+        """Active contracts with a payment due in the next 7 days."""
+        today = timezone.now().date()
+        return queryset.filter(
+            status='active',
+            balance_type='debt',
+            next_due_date__gte=today,
+            next_due_date__lte=today + timedelta(days=7)
+        )
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -778,8 +777,8 @@ class InstallmentTrackingDashboardView(LoginRequiredMixin, TenantContextMixin, L
         all_contracts = GoldInstallmentContract.objects.filter(tenant=self.request.tenant)
         context['tracking_stats'] = {
             'total_active': all_contracts.filter(status='active').count(),
-            'overdue_count': sum(1 for c in all_contracts if c.is_overdue),
-            'due_soon_count': sum(1 for c in all_contracts if self._is_due_soon(c)),
+            'overdue_count': all_contracts.overdue().count(),
+            'due_soon_count': self._due_soon(all_contracts).count(),
             'defaulted_count': all_contracts.filter(status='defaulted').count(),
             'total_overdue_value': self._calculate_overdue_value(all_contracts),
         }
@@ -798,10 +797,9 @@ class InstallmentTrackingDashboardView(LoginRequiredMixin, TenantContextMixin, L
         total_value = Decimal('0')
         current_gold_price = Decimal('3500000')  # Mock price
         
-        for contract in contracts:
-            if contract.is_overdue:
-                value_data = contract.calculate_current_gold_value(current_gold_price)
-                total_value += value_data['total_value_toman']
+        for contract in contracts.overdue():
+            value_data = contract.calculate_current_gold_value(current_gold_price)
+            total_value += value_data['total_value_toman']
         
         return total_value
 
@@ -982,22 +980,12 @@ class NotificationManagementView(LoginRequiredMixin, TenantContextMixin, ListVie
         return context
     
     def _count_pending_reminders(self):
-        """Count contracts needing payment reminders."""
-        count = 0
-        for contract in self.get_queryset():
-            if self._needs_reminder(contract):
-                count += 1
-        return count
-    
-    def _needs_reminder(self, contract):
-        """Check if contract needs payment reminder."""
-        last_payment = contract.payments.order_by('-payment_date').first()
-        if not last_payment:
-            return True
-        
-        next_due_date = contract.calculate_next_payment_date(last_payment.payment_date)
-        days_until_due = (next_due_date - timezone.now().date()).days
-        return 0 <= days_until_due <= 7
+        """Count contracts needing payment reminders (due in the next 7 days)."""
+        today = timezone.now().date()
+        return self.get_queryset().open().filter(
+            next_due_date__gte=today,
+            next_due_date__lte=today + timedelta(days=7)
+        ).count()
     
     def _count_sent_today(self):
         """Count notifications sent today."""
@@ -1011,11 +999,7 @@ class NotificationManagementView(LoginRequiredMixin, TenantContextMixin, ListVie
     
     def _count_overdue_notifications(self):
         """Count overdue notification requirements."""
-        count = 0
-        for contract in self.get_queryset():
-            if contract.is_overdue:
-                count += 1
-        return count
+        return self.get_queryset().overdue().count()
 
 
 class ContractGenerationView(LoginRequiredMixin, TenantContextMixin, DetailView):
@@ -1134,10 +1118,8 @@ def schedule_notification(request, contract_id):
             message_template = request.POST.get('message_template', '')
             
             # Calculate schedule date
-            last_payment = contract.payments.order_by('-payment_date').first()
-            if last_payment:
-                next_due_date = contract.calculate_next_payment_date(last_payment.payment_date)
-                schedule_date = next_due_date + timedelta(days=schedule_days)
+            if contract.next_due_date:
+                schedule_date = contract.next_due_date + timedelta(days=schedule_days)
             else:
                 schedule_date = timezone.now().date() + timedelta(days=schedule_days)
             
@@ -1309,12 +1291,14 @@ def contract_export_pdf(request, contract_id):
         tenant=request.tenant
     )
     
-    # This would integrate with a PDF generation library
-    # For now, return a simple response
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="contract_{contract.contract_number}.pdf"'
+    try:
+        # Reprints of an unchanged contract are served from the PDF cache
+        pdf_content = render_pdf('contract', contract_pdf_data(contract))
+    except Exception as e:
+        messages.error(request, f'خطا در تولید PDF قرارداد: {str(e)}')
+        return redirect('gold_installments:contract_detail', pk=contract.id)
     
-    # TODO: Implement PDF generation with Persian support
-    response.write(b'PDF generation not implemented yet')
+    response = HttpResponse(pdf_content, content_type='application/pdf')
+    response['Content-Disposition'] = f'attachment; filename="contract_{contract.contract_number}.pdf"'
     
     return response
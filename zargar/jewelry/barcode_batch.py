@@ -0,0 +1,304 @@
+"""
+Batched barcode and QR code generation.
+
+Items are processed in chunks. For each chunk the QR images are rendered in a
+process pool, uploaded to storage from a thread pool, and the database is
+updated with one deactivation UPDATE, one bulk_create and one bulk_update.
+Optionally every label is also laid out on a printable multi-page PDF sheet.
+"""
+import io
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+from typing import Callable, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+
+from zargar.core.sync_changes import record_changes
+from .barcode_models import BarcodeGeneration, BarcodeType
+from .barcode_services import BarcodeGenerationService
+from .models import JewelryItem
+
+logger = logging.getLogger(__name__)
+
+# Try to import QR code and imaging libraries
+try:
+    import qrcode
+    QR_AVAILABLE = True
+except ImportError:
+    QR_AVAILABLE = False
+
+try:
+    from PIL import Image, ImageDraw, ImageFont
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+
+# A4 label sheet at 150 DPI, 4 x 8 labels per page
+LABEL_SHEET_DPI = 150
+LABEL_PAGE_SIZE = (1240, 1754)
+LABEL_PAGE_MARGIN = 45
+LABEL_COLUMNS = 4
+LABEL_ROWS = 8
+
+# Smaller chunks render faster in-process than a pool can start
+MIN_POOL_BATCH = 64
+
+
+def render_qr_png(payload: str) -> Optional[bytes]:
+    """
+    Render a QR code as PNG bytes.
+
+    Module-level so it can be sent to worker processes.
+    """
+    try:
+        qr = qrcode.QRCode(version=1, box_size=10, border=4)
+        qr.add_data(payload)
+        qr.make(fit=True)
+
+        img = qr.make_image(fill_color="black", back_color="white")
+
+        img_io = io.BytesIO()
+        img.save(img_io, format='PNG')
+        return img_io.getvalue()
+    except Exception:
+        return None
+
+
+def render_label_page(labels: List[Dict]):
+    """
+    Lay out up to LABEL_COLUMNS * LABEL_ROWS labels on one bilevel A4 page.
+
+    Each label is a dict with optional ``image`` (PNG bytes) and ``lines``.
+    """
+    page = Image.new('1', LABEL_PAGE_SIZE, 1)
+    draw = ImageDraw.Draw(page)
+    font = ImageFont.load_default()
+
+    label_width = (LABEL_PAGE_SIZE[0] - 2 * LABEL_PAGE_MARGIN) // LABEL_COLUMNS
+    label_height = (LABEL_PAGE_SIZE[1] - 2 * LABEL_PAGE_MARGIN) // LABEL_ROWS
+    text_height = 34
+    qr_size = min(label_width, label_height - text_height) - 10
+
+    for index, label in enumerate(labels):
+        column = index % LABEL_COLUMNS
+        row = index // LABEL_COLUMNS
+        left = LABEL_PAGE_MARGIN + column * label_width
+        top = LABEL_PAGE_MARGIN + row * label_height
+
+        if label.get('image'):
+            qr_image = Image.open(io.BytesIO(label['image'])).convert('1')
+            qr_image = qr_image.resize((qr_size, qr_size), Image.NEAREST)
+            page.paste(qr_image, (left + (label_width - qr_size) // 2, top + 5))
+
+        for line_number, line in enumerate(label.get('lines', [])[:2]):
+            draw.text(
+                (left + 8, top + label_height - text_height + line_number * 15),
+                line[:40],
+                fill=0,
+                font=font
+            )
+
+    return page
+
+
+def render_label_sheet(pages) -> bytes:
+    """Combine rendered label pages into one PDF document."""
+    pdf_io = io.BytesIO()
+    pages[0].save(
+        pdf_io,
+        format='PDF',
+        save_all=True,
+        append_images=pages[1:],
+        resolution=LABEL_SHEET_DPI
+    )
+    return pdf_io.getvalue()
+
+
+class BarcodeBatchGenerator:
+    """
+    Generate barcodes for many jewelry items in chunks.
+
+    The deactivation of old barcodes, the new BarcodeGeneration rows and the
+    item barcode fields are written in one transaction per chunk; images are
+    rendered and uploaded before it starts so it stays short.
+    """
+
+    def __init__(self, barcode_type=None, label_sheet=False, chunk_size=None,
+                 render_workers=None, upload_workers=None):
+        self.barcode_type = barcode_type or BarcodeType.QR_CODE
+        self.label_sheet = label_sheet and PIL_AVAILABLE
+        self.chunk_size = chunk_size or settings.BARCODE_BATCH_CHUNK_SIZE
+        self.render_workers = render_workers if render_workers is not None else settings.BARCODE_RENDER_WORKERS
+        self.upload_workers = upload_workers or settings.BARCODE_UPLOAD_WORKERS
+        self.service = BarcodeGenerationService()
+        self._render_pool = None
+
+    def generate(self, jewelry_items: Iterable[JewelryItem],
+                 progress: Optional[Callable] = None) -> Dict:
+        """
+        Generate barcodes for the given items.
+
+        Args:
+            jewelry_items: Items with their category loaded; may be an iterator
+            progress: Called after each chunk with processed, generated and
+                failed counts and the chunk's errors
+
+        Returns:
+            Dictionary with generated BarcodeGeneration rows, per-item errors
+            and the label sheet PDF bytes (or None)
+        """
+        generated = []
+        errors = []
+        pages = []
+        pending_labels = []
+        processed = 0
+        items = iter(jewelry_items)
+
+        try:
+            while True:
+                chunk = list(islice(items, self.chunk_size))
+                if not chunk:
+                    break
+
+                chunk_generated, chunk_errors, labels = self._process_chunk(chunk)
+                generated.extend(chunk_generated)
+                errors.extend(chunk_errors)
+                processed += len(chunk)
+
+                if self.label_sheet:
+                    pending_labels.extend(labels)
+                    per_page = LABEL_COLUMNS * LABEL_ROWS
+                    while len(pending_labels) >= per_page:
+                        pages.append(render_label_page(pending_labels[:per_page]))
+                        del pending_labels[:per_page]
+
+                if progress:
+                    progress(processed, len(generated), len(errors), chunk_errors)
+        finally:
+            if self._render_pool is not None:
+                self._render_pool.shutdown()
+                self._render_pool = None
+
+        if pending_labels:
+            pages.append(render_label_page(pending_labels))
+
+        return {
+            'generated': generated,
+            'errors': errors,
+            'label_sheet': render_label_sheet(pages) if pages else None,
+        }
+
+    def _process_chunk(self, chunk: List[JewelryItem]):
+        """Render, upload and save one chunk of items."""
+        now = timezone.now()
+        barcodes = [self.service.generate_barcode_data(item) for item in chunk]
+
+        if self.barcode_type == BarcodeType.QR_CODE:
+            barcode_data = [
+                json.dumps({
+                    'type': 'jewelry_item',
+                    'sku': item.sku,
+                    'name': item.name,
+                    'item_id': item.id,
+                    'barcode': barcode,
+                    'generated_at': now.isoformat()
+                })
+                for item, barcode in zip(chunk, barcodes)
+            ]
+            images = self._render(barcode_data) if QR_AVAILABLE else [None] * len(chunk)
+        else:
+            barcode_data = barcodes
+            images = [None] * len(chunk)
+
+        image_names = self._upload(chunk, images, now)
+
+        try:
+            with transaction.atomic():
+                item_ids = [item.id for item in chunk]
+                BarcodeGeneration.objects.filter(
+                    jewelry_item_id__in=item_ids,
+                    is_active=True
+                ).update(is_active=False)
+
+                generations = BarcodeGeneration.objects.bulk_create([
+                    BarcodeGeneration(
+                        jewelry_item=item,
+                        barcode_type=self.barcode_type,
+                        barcode_data=data,
+                        barcode_image=image_name,
+                        is_active=True
+                    )
+                    for item, data, image_name in zip(chunk, barcode_data, image_names)
+                ])
+
+                for item, barcode in zip(chunk, barcodes):
+                    item.barcode = barcode
+                    item.updated_at = now
+                JewelryItem.objects.bulk_update(chunk, ['barcode', 'updated_at'])
+                # bulk_update bypasses model signals
+                record_changes('jewelry_items', item_ids, 'update')
+
+        except Exception as e:
+            logger.error(f"Barcode batch chunk of {len(chunk)} items failed: {e}")
+            self._delete_uploads(image_names)
+            chunk_errors = [{'item_id': item.id, 'sku': item.sku, 'error': str(e)} for item in chunk]
+            return [], chunk_errors, []
+
+        labels = [
+            {'image': image, 'lines': [item.sku, barcode]}
+            for item, barcode, image in zip(chunk, barcodes, images)
+        ]
+        return generations, [], labels
+
+    def _render(self, payloads: List[str]) -> List[Optional[bytes]]:
+        """Render QR images, in worker processes when possible."""
+        if self.render_workers > 1 and len(payloads) >= MIN_POOL_BATCH:
+            try:
+                if self._render_pool is None:
+                    self._render_pool = ProcessPoolExecutor(max_workers=self.render_workers)
+                chunksize = max(1, len(payloads) // (self.render_workers * 4))
+                return list(self._render_pool.map(render_qr_png, payloads, chunksize=chunksize))
+            except (AssertionError, OSError, BrokenProcessPool) as e:
+                # Daemonic worker processes (e.g. Celery prefork) cannot start children
+                logger.warning(f"Barcode render pool unavailable, rendering in-process: {e}")
+                if self._render_pool is not None:
+                    self._render_pool.shutdown(wait=False)
+                    self._render_pool = None
+                self.render_workers = 1
+
+        return [render_qr_png(payload) for payload in payloads]
+
+    def _upload(self, chunk: List[JewelryItem], images: List[Optional[bytes]], now) -> List[Optional[str]]:
+        """Save rendered images to storage concurrently."""
+        image_field = BarcodeGeneration._meta.get_field('barcode_image')
+        timestamp = now.strftime('%Y%m%d_%H%M%S')
+
+        def save(item_and_image):
+            item, image = item_and_image
+            if not image:
+                return None
+            try:
+                name = image_field.generate_filename(None, f"qr_{item.sku}_{timestamp}.png")
+                return image_field.storage.save(name, ContentFile(image))
+            except Exception as e:
+                logger.error(f"Failed to store barcode image for item {item.id}: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=self.upload_workers) as executor:
+            return list(executor.map(save, zip(chunk, images)))
+
+    def _delete_uploads(self, image_names: List[Optional[str]]):
+        storage = BarcodeGeneration._meta.get_field('barcode_image').storage
+        for name in image_names:
+            if name:
+                try:
+                    storage.delete(name)
+                except Exception:
+                    pass
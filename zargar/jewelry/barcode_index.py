@@ -0,0 +1,108 @@
+"""
+Per-tenant barcode/SKU -> jewelry item resolution index.
+
+Scanning used to try the id, barcode and SKU columns one query after another.
+The index maps every barcode and SKU to its item id in Redis under
+``barcode_index:{schema}:{code}``, with a per-process LRU in front, so a scan
+resolves with at most one network round trip before the item is loaded by
+primary key.
+
+Entries are maintained by the jewelry item signals. Callers verify that the
+loaded item still carries the scanned code, so an entry left stale by a bulk
+update that skipped signals is detected, dropped and re-resolved from the
+database.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+from zargar.core.local_cache import LocalLRU
+
+logger = logging.getLogger(__name__)
+
+# Marker stored for codes that match no item
+MISSING = 'missing'
+
+
+class BarcodeResolutionIndex:
+    """
+    Cache of (schema, barcode or SKU) -> item id.
+    """
+
+    def __init__(self):
+        self._local = LocalLRU('BARCODE_INDEX_LOCAL_CACHE_SIZE')
+
+    def resolve(self, schema_name, code):
+        """
+        Look up a scanned code.
+
+        Returns:
+            An item id, MISSING for a known-unknown code, or None on a miss
+        """
+        local_key = (schema_name, code)
+
+        item_id = self._local.get(local_key)
+        if item_id is not None:
+            return item_id
+
+        try:
+            item_id = cache.get(self._redis_key(schema_name, code))
+        except Exception as e:
+            logger.warning(f"Barcode index unavailable: {e}")
+            return None
+
+        if item_id is not None:
+            self._local.set(local_key, item_id, settings.BARCODE_INDEX_LOCAL_TIMEOUT)
+        return item_id
+
+    def add_item(self, schema_name, item):
+        """Index an item under its barcode and SKU."""
+        codes = {code: item.pk for code in (item.barcode, item.sku) if code}
+        if not codes:
+            return
+
+        try:
+            cache.set_many(
+                {self._redis_key(schema_name, code): item_id for code, item_id in codes.items()},
+                settings.BARCODE_INDEX_TIMEOUT
+            )
+        except Exception as e:
+            logger.warning(f"Barcode index unavailable: {e}")
+
+        for code, item_id in codes.items():
+            self._local.set((schema_name, code), item_id, settings.BARCODE_INDEX_LOCAL_TIMEOUT)
+
+    def set_missing(self, schema_name, code):
+        """Remember briefly that a code matches no item."""
+        try:
+            cache.set(self._redis_key(schema_name, code), MISSING, settings.BARCODE_INDEX_NEGATIVE_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"Barcode index unavailable: {e}")
+
+        self._local.set((schema_name, code), MISSING, settings.BARCODE_INDEX_NEGATIVE_TIMEOUT)
+
+    def forget(self, schema_name, codes):
+        """Drop index entries for codes that no longer belong to an item."""
+        codes = [code for code in codes if code]
+        if not codes:
+            return
+
+        for code in codes:
+            self._local.pop((schema_name, code))
+
+        try:
+            cache.delete_many([self._redis_key(schema_name, code) for code in codes])
+        except Exception as e:
+            logger.error(f"Could not drop barcode index entries for {schema_name}: {e}")
+
+    def clear_local(self):
+        """Drop this process's LRU entries."""
+        self._local.clear()
+
+    @staticmethod
+    def _redis_key(schema_name, code):
+        return f'barcode_index:{schema_name}:{code}'
+
+
+barcode_index = BarcodeResolutionIndex()
@@ -5,6 +5,7 @@ import uuid
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import RegexValidator
+from django.utils import timezone
 from zargar.core.models import TenantAwareModel
 from .models import JewelryItem
 
@@ -105,7 +106,7 @@ class BarcodeScanHistory(TenantAwareModel):
         verbose_name=_('Scan Action')
     )
     scan_timestamp = models.DateTimeField(
-        auto_now_add=True,
+        default=timezone.now,
         verbose_name=_('Scan Timestamp')
     )
     scanner_device = models.CharField(
@@ -251,4 +252,119 @@ class BarcodeSettings(TenantAwareModel):
         verbose_name_plural = _('Barcode Settings')
     
     def __str__(self):
-        return f"Barcode Settings"
\ No newline at end of file
+        return f"Barcode Settings"
+
+
+class BarcodeBatchJob(TenantAwareModel):
+    """
+    Model to track a background barcode generation batch and its label sheet.
+    """
+    STATUS_CHOICES = [
+        ('pending', _('Pending')),
+        ('running', _('Running')),
+        ('completed', _('Completed')),
+        ('failed', _('Failed')),
+    ]
+    
+    barcode_type = models.CharField(
+        max_length=20,
+        choices=BarcodeType.choices,
+        default=BarcodeType.QR_CODE,
+        verbose_name=_('Barcode Type')
+    )
+    item_ids = models.JSONField(
+        default=list,
+        verbose_name=_('Item IDs')
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pending',
+        verbose_name=_('Status')
+    )
+    task_id = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name=_('Task ID')
+    )
+    total_items = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_('Total Items')
+    )
+    processed_items = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_('Processed Items')
+    )
+    generated_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_('Generated Count')
+    )
+    failed_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_('Failed Count')
+    )
+    errors = models.JSONField(
+        default=list,
+        blank=True,
+        verbose_name=_('Errors')
+    )
+    label_sheet = models.FileField(
+        upload_to='barcode_sheets/%Y/%m/',
+        blank=True,
+        null=True,
+        verbose_name=_('Label Sheet (PDF)')
+    )
+    started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name=_('Started At')
+    )
+    completed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name=_('Completed At')
+    )
+    
+    class Meta:
+        verbose_name = _('Barcode Batch Job')
+        verbose_name_plural = _('Barcode Batch Jobs')
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"Barcode batch {self.pk} ({self.get_status_display()})"
+    
+    @property
+    def progress_percentage(self):
+        """Share of items processed so far."""
+        if not self.total_items:
+            return 100 if self.status == 'completed' else 0
+        return int(self.processed_items * 100 / self.total_items)
+    
+    def update_progress(self, processed, generated, failed, errors=None):
+        """Record progress after a chunk has been processed."""
+        self.processed_items = processed
+        self.generated_count = generated
+        self.failed_count = failed
+        if errors:
+            self.errors = (self.errors or []) + errors
+        self.save(update_fields=['processed_items', 'generated_count', 'failed_count', 'errors', 'updated_at'])
+    
+    def mark_as_running(self, task_id=''):
+        """Mark batch as running."""
+        self.status = 'running'
+        self.task_id = task_id or self.task_id
+        self.started_at = timezone.now()
+        self.save(update_fields=['status', 'task_id', 'started_at', 'updated_at'])
+    
+    def mark_as_completed(self):
+        """Mark batch as completed."""
+        self.status = 'completed'
+        self.completed_at = timezone.now()
+        self.save(update_fields=['status', 'completed_at', 'updated_at'])
+    
+    def mark_as_failed(self, error):
+        """Mark batch as failed."""
+        self.status = 'failed'
+        self.completed_at = timezone.now()
+        self.errors = (self.errors or []) + [{'error': str(error)}]
+        self.save(update_fields=['status', 'completed_at', 'errors', 'updated_at'])
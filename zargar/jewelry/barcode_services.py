@@ -3,13 +3,21 @@ Barcode and QR code generation and scanning services.
 """
 import io
 import json
+import logging
 from datetime import datetime
 
 from django.core.files.base import ContentFile
 from django.utils import timezone
-from django.db import transaction
+from django.db import connection, transaction
+from django.db.models import Q
 from django.apps import apps
 
+from zargar.core.models import _thread_locals
+from .barcode_index import MISSING, barcode_index
+from .scan_sink import scan_history_sink
+
+logger = logging.getLogger(__name__)
+
 # Try to import QR code libraries
 try:
     import qrcode
@@ -108,36 +116,31 @@ class BarcodeGenerationService:
             return barcode_gen
     
     def bulk_generate_barcodes(self, jewelry_items, barcode_type=None, template=None):
-        """Generate barcodes for multiple jewelry items."""
-        if not barcode_type:
-            barcode_type = 'qr_code'
+        """
+        Generate barcodes for multiple jewelry items.
         
-        generated_barcodes = []
+        Items are processed in chunks by BarcodeBatchGenerator; failed items
+        are logged and skipped.
+        """
+        from .barcode_batch import BarcodeBatchGenerator
         
-        for jewelry_item in jewelry_items:
-            try:
-                barcode_gen = self.generate_barcode_for_item(
-                    jewelry_item, barcode_type, template
-                )
-                generated_barcodes.append(barcode_gen)
-            except Exception as e:
-                # Log error but continue with other items
-                print(f"Error generating barcode for item {jewelry_item.id}: {e}")
-                continue
+        results = BarcodeBatchGenerator(barcode_type or 'qr_code').generate(jewelry_items)
+        for error in results['errors']:
+            logger.error(f"Error generating barcode for item {error['item_id']}: {error['error']}")
         
-        return generated_barcodes
+        return results['generated']
 
 
 class BarcodeScanningService:
     """Service for handling barcode scanning and tracking."""
     
     def scan_barcode(self, scanned_data, scan_action='lookup', scanner_device='', location='', notes=''):
-        """Process scanned barcode data and record scan history."""
-        # Get models using lazy import
-        JewelryItem = apps.get_model('jewelry', 'JewelryItem')
-        BarcodeGeneration = apps.get_model('jewelry', 'BarcodeGeneration')
-        BarcodeScanHistory = apps.get_model('jewelry', 'BarcodeScanHistory')
+        """
+        Process scanned barcode data and record scan history.
         
+        Items are resolved through the barcode index and the history row is
+        written by the batched scan sink, so ``scan_history`` is always None.
+        """
         result = {
             'success': False,
             'jewelry_item': None,
@@ -147,42 +150,34 @@ class BarcodeScanningService:
         }
         
         try:
-            # Try to parse as JSON (QR code data)
-            if scanned_data.startswith('{'):
-                qr_data = json.loads(scanned_data)
-                if qr_data.get('type') == 'jewelry_item':
-                    jewelry_item = self._find_item_by_qr_data(qr_data)
-                else:
-                    jewelry_item = None
-            else:
-                jewelry_item = self._find_item_by_barcode(scanned_data)
+            schema_name = connection.schema_name
+            jewelry_item, barcode_generation = self._resolve_item(schema_name, scanned_data)
             
             if not jewelry_item:
                 result['error'] = 'Jewelry item not found for scanned barcode'
                 return result
             
-            # Find associated barcode generation
-            barcode_generation = BarcodeGeneration.objects.filter(
-                jewelry_item=jewelry_item,
-                is_active=True
-            ).first()
+            current_user = getattr(_thread_locals, 'user', None)
+            user_id = current_user.pk if current_user and current_user.is_authenticated else None
             
             # Record scan history
-            scan_history = BarcodeScanHistory.objects.create(
-                jewelry_item=jewelry_item,
-                barcode_generation=barcode_generation,
-                scanned_data=scanned_data,
+            scan_history_sink.record(
+                schema_name,
+                jewelry_item_id=jewelry_item.id,
+                barcode_generation_id=barcode_generation.id if barcode_generation else None,
+                scanned_data=scanned_data[:500],
                 scan_action=scan_action,
                 scanner_device=scanner_device,
                 location=location,
-                notes=notes
+                notes=notes,
+                created_by_id=user_id,
+                updated_by_id=user_id
             )
             
             result.update({
                 'success': True,
                 'jewelry_item': jewelry_item,
-                'barcode_generation': barcode_generation,
-                'scan_history': scan_history
+                'barcode_generation': barcode_generation
             })
             
         except Exception as e:
@@ -190,33 +185,73 @@ class BarcodeScanningService:
         
         return result
     
-    def _find_item_by_qr_data(self, qr_data):
-        """Find jewelry item by QR code data."""
+    def _resolve_item(self, schema_name, scanned_data):
+        """
+        Find the item and its active barcode for scanned data.
+        
+        Returns:
+            (jewelry item, barcode generation) with either possibly None
+        """
+        if scanned_data.startswith('{'):
+            # QR code data
+            try:
+                qr_data = json.loads(scanned_data)
+            except ValueError:
+                return None, None
+            if not isinstance(qr_data, dict) or qr_data.get('type') != 'jewelry_item':
+                return None, None
+            if qr_data.get('item_id'):
+                jewelry_item, barcode_generation = self._load_item(qr_data['item_id'])
+                if jewelry_item:
+                    return jewelry_item, barcode_generation
+            code = qr_data.get('sku')
+            if not code:
+                return None, None
+        else:
+            code = scanned_data
+        
+        item_id = barcode_index.resolve(schema_name, code)
+        if item_id == MISSING:
+            return None, None
+        
+        if item_id is not None:
+            jewelry_item, barcode_generation = self._load_item(item_id)
+            if jewelry_item and code in (jewelry_item.barcode, jewelry_item.sku):
+                return jewelry_item, barcode_generation
+            # Stale entry, e.g. after a bulk update that skipped signals
+            barcode_index.forget(schema_name, [code])
+        
+        jewelry_item = self._find_item_by_code(code)
+        if not jewelry_item:
+            barcode_index.set_missing(schema_name, code)
+            return None, None
+        
+        barcode_index.add_item(schema_name, jewelry_item)
+        return self._load_item(jewelry_item.id)
+    
+    def _load_item(self, item_id):
+        """Load an item and its active barcode, in one query when it has one."""
         JewelryItem = apps.get_model('jewelry', 'JewelryItem')
+        BarcodeGeneration = apps.get_model('jewelry', 'BarcodeGeneration')
         
-        try:
-            if 'item_id' in qr_data:
-                return JewelryItem.objects.get(id=qr_data['item_id'])
-            if 'sku' in qr_data:
-                return JewelryItem.objects.get(sku=qr_data['sku'])
-        except JewelryItem.DoesNotExist:
-            pass
+        barcode_generation = BarcodeGeneration.objects.select_related(
+            'jewelry_item__category'
+        ).filter(jewelry_item_id=item_id, is_active=True).first()
+        if barcode_generation:
+            return barcode_generation.jewelry_item, barcode_generation
         
-        return None
+        return JewelryItem.objects.select_related('category').filter(pk=item_id).first(), None
     
-    def _find_item_by_barcode(self, barcode_data):
-        """Find jewelry item by simple barcode data."""
+    def _find_item_by_code(self, code):
+        """Find jewelry item by barcode, falling back to SKU."""
         JewelryItem = apps.get_model('jewelry', 'JewelryItem')
         
-        try:
-            return JewelryItem.objects.get(barcode=barcode_data)
-        except JewelryItem.DoesNotExist:
-            try:
-                return JewelryItem.objects.get(sku=barcode_data)
-            except JewelryItem.DoesNotExist:
-                pass
+        matches = list(JewelryItem.objects.filter(Q(barcode=code) | Q(sku=code))[:2])
+        for item in matches:
+            if item.barcode == code:
+                return item
         
-        return None
+        return matches[0] if matches else None
     
     def get_scan_history(self, jewelry_item, limit=50):
         """Get scan history for a jewelry item."""
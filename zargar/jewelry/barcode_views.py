@@ -5,6 +5,8 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.conf import settings
+from django.db import connection
 from django.shortcuts import get_object_or_404
 from django.http import JsonResponse, HttpResponse
 from django.views.generic import View
@@ -16,12 +18,13 @@ from zargar.core.permissions import TenantPermission
 from .models import JewelryItem
 from .barcode_models import (
     BarcodeGeneration, BarcodeScanHistory, BarcodeTemplate, 
-    BarcodeSettings, BarcodeType
+    BarcodeSettings, BarcodeType, BarcodeBatchJob
 )
 from .barcode_services import (
     BarcodeGenerationService, BarcodeScanningService,
     BarcodeTemplateService, BarcodeSettingsService
 )
+from .tasks import generate_barcode_batch
 # from .serializers import JewelryItemSerializer  # Will be created later
 
 
@@ -113,11 +116,30 @@ class BarcodeGenerationViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
         
+        # Large batches and label sheets are generated in the background
+        if len(item_ids) > settings.BARCODE_SYNC_LIMIT or request.data.get('label_sheet'):
+            job_item_ids = list(jewelry_items.values_list('id', flat=True))
+            job = BarcodeBatchJob.objects.create(
+                barcode_type=barcode_type,
+                item_ids=job_item_ids,
+                total_items=len(job_item_ids)
+            )
+            task = generate_barcode_batch.delay(connection.schema_name, job.pk)
+            job.task_id = task.id
+            job.save(update_fields=['task_id'])
+            
+            return Response({
+                'success': True,
+                'job_id': job.pk,
+                'status': job.status,
+                'total_items': job.total_items
+            }, status=status.HTTP_202_ACCEPTED)
+        
         # Generate barcodes
         service = BarcodeGenerationService()
         try:
             generated_barcodes = service.bulk_generate_barcodes(
-                list(jewelry_items), barcode_type
+                list(jewelry_items.select_related('category')), barcode_type
             )
             
             results = []
@@ -142,6 +164,24 @@ class BarcodeGenerationViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    @action(detail=False, methods=['get'], url_path=r'batch-status/(?P<job_id>\d+)')
+    def batch_status(self, request, job_id=None):
+        """Report progress of a background barcode batch."""
+        job = get_object_or_404(BarcodeBatchJob, pk=job_id)
+        
+        return Response({
+            'success': True,
+            'job_id': job.pk,
+            'status': job.status,
+            'total_items': job.total_items,
+            'processed_items': job.processed_items,
+            'generated_count': job.generated_count,
+            'failed_count': job.failed_count,
+            'progress_percentage': job.progress_percentage,
+            'errors': job.errors[:50],
+            'label_sheet_url': job.label_sheet.url if job.label_sheet else None
+        })
+    
     @action(detail=True, methods=['get'])
     def download_image(self, request, pk=None):
         """Download barcode image."""
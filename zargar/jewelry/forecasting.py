@@ -0,0 +1,276 @@
+"""
+Demand forecasting for jewelry items from the stock movement ledger.
+
+The nightly job loads every item's daily sales for the last
+STOCK_FORECAST_HISTORY_DAYS into one items x days matrix and computes, in a
+single NumPy pass for all items:
+
+- a seasonal factor: how much faster the item sells in the run-up to Nowruz
+  and Yalda than the rest of the year, shrunk towards 1 for thin histories
+- a deseasonalised daily demand rate, exponentially weighted towards recent
+  sales
+- a 30-day forecast that applies the seasonal factor to the peak days falling
+  inside the horizon, with a safety stock from the demand variance
+- the suggested reorder quantity and days of cover
+
+Results are stored in StockForecast so the low stock and reorder pages read
+them instead of estimating per request.
+"""
+import logging
+import math
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Optional
+
+import jdatetime
+from django.conf import settings
+from django.db.models import F, Max, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import JewelryItem
+from .stock_models import StockForecast, StockMovement, StockMovementType
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Persian calendar (month, day) of the dates whose run-up drives jewelry sales
+SEASONAL_PEAKS = (
+    (1, 1),   # Nowruz
+    (9, 30),  # Shab-e Yalda
+)
+
+# Units of pseudo-demand pulling the seasonal factor towards 1
+SEASONAL_PRIOR_UNITS = 5.0
+SEASONAL_FACTOR_BOUNDS = (0.5, 3.0)
+
+
+def seasonal_peak_mask(start: date, days: int, run_up_days: Optional[int] = None):
+    """
+    Boolean array marking the days in the run-up to Nowruz and Yalda.
+
+    Args:
+        start: Gregorian date of the first day
+        days: Number of days covered
+        run_up_days: Days before each peak counted as peak demand (inclusive)
+    """
+    run_up_days = run_up_days or settings.STOCK_FORECAST_PEAK_RUN_UP_DAYS
+    mask = np.zeros(days, dtype=bool)
+    end = start + timedelta(days=days - 1)
+
+    first_year = jdatetime.date.fromgregorian(date=start).year
+    last_year = jdatetime.date.fromgregorian(date=end).year + 1
+    for year in range(first_year, last_year + 1):
+        for month, day in SEASONAL_PEAKS:
+            peak = jdatetime.date(year, month, day).togregorian()
+            first = (peak - start).days - run_up_days + 1
+            last = (peak - start).days
+            if last < 0 or first >= days:
+                continue
+            mask[max(first, 0):min(last, days - 1) + 1] = True
+
+    return mask
+
+
+def forecast_demand(sales, valid, peak_mask, horizon_peak_mask, quantity, minimum_stock,
+                    halflife_days: Optional[float] = None,
+                    service_z: Optional[float] = None) -> Dict:
+    """
+    Vectorised demand forecast for many items.
+
+    Args:
+        sales: (items, days) units sold per day, oldest day first
+        valid: (items, days) mask of days the item existed
+        peak_mask: (days,) seasonal peak days of the history
+        horizon_peak_mask: (horizon,) seasonal peak days of the forecast horizon
+        quantity: (items,) current quantities
+        minimum_stock: (items,) reorder thresholds
+        halflife_days: Age in days at which a sale weighs half as much
+        service_z: Normal quantile of the safety stock service level
+
+    Returns:
+        Dictionary of (items,) arrays: daily_demand, seasonal_factor,
+        forecast, safety_stock, days_of_cover (NaN without demand) and
+        suggested_reorder_quantity
+    """
+    halflife_days = halflife_days or settings.STOCK_FORECAST_HALFLIFE_DAYS
+    service_z = service_z if service_z is not None else settings.STOCK_FORECAST_SERVICE_Z
+
+    sales = np.asarray(sales, dtype=float)
+    valid = np.asarray(valid, dtype=bool)
+    peak = np.asarray(peak_mask, dtype=bool)[None, :] & valid
+    off_peak = ~np.asarray(peak_mask, dtype=bool)[None, :] & valid
+    quantity = np.asarray(quantity, dtype=float)
+    minimum_stock = np.asarray(minimum_stock, dtype=float)
+    horizon = len(horizon_peak_mask)
+
+    # Peak demand relative to what the off-peak rate predicts for those days
+    peak_days = peak.sum(axis=1)
+    off_peak_days = off_peak.sum(axis=1)
+    peak_units = np.where(peak, sales, 0).sum(axis=1)
+    off_peak_rate = np.where(off_peak, sales, 0).sum(axis=1) / np.maximum(off_peak_days, 1)
+    expected_peak_units = off_peak_rate * peak_days
+    seasonal_factor = (peak_units + SEASONAL_PRIOR_UNITS) / (expected_peak_units + SEASONAL_PRIOR_UNITS)
+    seasonal_factor = np.where((peak_days > 0) & (off_peak_days > 0), seasonal_factor, 1.0)
+    seasonal_factor = np.clip(seasonal_factor, *SEASONAL_FACTOR_BOUNDS)
+
+    # Exponentially weighted rate and variance of the deseasonalised series
+    deseasonalised = sales / np.where(peak, seasonal_factor[:, None], 1.0)
+    age = np.arange(sales.shape[1] - 1, -1, -1)
+    weights = np.where(valid, 0.5 ** (age / halflife_days)[None, :], 0.0)
+    weight_sums = weights.sum(axis=1)
+    safe_weight_sums = np.where(weight_sums > 0, weight_sums, 1.0)
+    daily_demand = (weights * deseasonalised).sum(axis=1) / safe_weight_sums
+    variance = (weights * (deseasonalised - daily_demand[:, None]) ** 2).sum(axis=1) / safe_weight_sums
+
+    horizon_peak_days = int(np.count_nonzero(horizon_peak_mask))
+    forecast = daily_demand * ((horizon - horizon_peak_days) + horizon_peak_days * seasonal_factor)
+    safety_stock = service_z * np.sqrt(variance * horizon)
+
+    forecast_rate = forecast / horizon
+    with np.errstate(divide='ignore', invalid='ignore'):
+        days_of_cover = np.where(forecast_rate > 0, quantity / forecast_rate, np.nan)
+
+    suggested = np.ceil(minimum_stock + forecast + safety_stock - quantity - 1e-9)
+    suggested_reorder_quantity = np.maximum(suggested, 0).astype(int)
+
+    return {
+        'daily_demand': daily_demand,
+        'seasonal_factor': seasonal_factor,
+        'forecast': forecast,
+        'safety_stock': safety_stock,
+        'days_of_cover': days_of_cover,
+        'suggested_reorder_quantity': suggested_reorder_quantity,
+    }
+
+
+class StockForecastService:
+    """
+    Compute and store demand forecasts for every jewelry item of a tenant.
+    """
+
+    UPDATE_FIELDS = [
+        'daily_demand', 'seasonal_factor', 'forecast_30d', 'safety_stock',
+        'days_of_cover', 'low_stock_since', 'suggested_reorder_quantity',
+        'computed_at', 'updated_at',
+    ]
+
+    @classmethod
+    def compute_forecasts(cls, today: Optional[date] = None) -> Dict:
+        """
+        Forecast demand for all items of the current tenant and store the results.
+
+        Returns:
+            Dictionary with the number of items forecast
+        """
+        if not NUMPY_AVAILABLE:
+            logger.warning("NumPy is not installed, skipping stock forecasts")
+            return {'success': False, 'error': 'numpy not installed', 'items': 0}
+
+        today = today or timezone.localdate()
+        history_days = settings.STOCK_FORECAST_HISTORY_DAYS
+        horizon = settings.STOCK_FORECAST_HORIZON_DAYS
+        start = today - timedelta(days=history_days - 1)
+
+        items = list(JewelryItem.objects.values_list('id', 'quantity', 'minimum_stock', 'created_at'))
+        if not items:
+            return {'success': True, 'items': 0}
+
+        item_ids = np.array([row[0] for row in items])
+        quantity = np.array([row[1] for row in items])
+        minimum_stock = np.array([row[2] for row in items])
+
+        sales = cls._load_sales(item_ids, start, history_days)
+
+        first_day = np.array([
+            (timezone.localtime(created_at).date() - start).days for *_rest, created_at in items
+        ])
+        valid = np.arange(history_days)[None, :] >= np.clip(first_day, 0, None)[:, None]
+
+        results = forecast_demand(
+            sales, valid,
+            seasonal_peak_mask(start, history_days),
+            seasonal_peak_mask(today + timedelta(days=1), horizon),
+            quantity, minimum_stock
+        )
+
+        low_stock_since = cls._load_low_stock_since()
+        now = timezone.now()
+
+        forecasts = []
+        for index, item_id in enumerate(item_ids.tolist()):
+            days_of_cover = results['days_of_cover'][index]
+            forecasts.append(StockForecast(
+                jewelry_item_id=item_id,
+                daily_demand=float(results['daily_demand'][index]),
+                seasonal_factor=float(results['seasonal_factor'][index]),
+                forecast_30d=float(results['forecast'][index]),
+                safety_stock=float(results['safety_stock'][index]),
+                days_of_cover=None if math.isnan(days_of_cover) else float(days_of_cover),
+                low_stock_since=(
+                    low_stock_since.get(item_id) if quantity[index] <= minimum_stock[index] else None
+                ),
+                suggested_reorder_quantity=int(results['suggested_reorder_quantity'][index]),
+                computed_at=now,
+            ))
+
+        StockForecast.objects.bulk_create(
+            forecasts,
+            batch_size=settings.STOCK_UPDATE_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['jewelry_item'],
+            update_fields=cls.UPDATE_FIELDS,
+        )
+
+        from .services import StockAlertService
+        StockAlertService.invalidate_cache()
+
+        logger.info(f"Computed stock forecasts for {len(forecasts)} items")
+        return {'success': True, 'items': len(forecasts)}
+
+    @staticmethod
+    def _load_sales(item_ids, start: date, days: int):
+        """Daily units sold per item as an (items, days) matrix."""
+        rows = StockMovement.objects.filter(
+            movement_type=StockMovementType.SALE,
+            created_at__gte=timezone.make_aware(datetime.combine(start, time.min)),
+        ).annotate(
+            day=TruncDate('created_at')
+        ).values('jewelry_item_id', 'day').annotate(
+            units=Sum('quantity_change')
+        ).values_list('jewelry_item_id', 'day', 'units')
+
+        sales = np.zeros((len(item_ids), days))
+        rows = list(rows)
+        if not rows:
+            return sales
+
+        row_items = np.array([row[0] for row in rows])
+        row_days = np.array([(row[1] - start).days for row in rows])
+        # Sales are recorded as negative quantity changes
+        row_units = -np.array([row[2] for row in rows], dtype=float)
+
+        order = np.argsort(item_ids)
+        positions = np.searchsorted(item_ids, row_items, sorter=order)
+        positions = np.clip(positions, 0, len(item_ids) - 1)
+        rows_index = order[positions]
+        known = (item_ids[rows_index] == row_items) & (row_days >= 0) & (row_days < days)
+
+        np.add.at(sales, (rows_index[known], row_days[known]), row_units[known])
+        return sales
+
+    @staticmethod
+    def _load_low_stock_since() -> Dict[int, object]:
+        """When each item last crossed from above to at-or-below its minimum stock."""
+        crossings = StockMovement.objects.filter(
+            quantity_before__gt=F('jewelry_item__minimum_stock'),
+            quantity_after__lte=F('jewelry_item__minimum_stock'),
+        ).values('jewelry_item_id').annotate(
+            since=Max('created_at')
+        ).values_list('jewelry_item_id', 'since')
+
+        return dict(crossings)
@@ -2,13 +2,12 @@
 Management command to generate barcodes for jewelry items.
 """
 from django.core.management.base import BaseCommand, CommandError
-from django.db import transaction
 from django_tenants.utils import schema_context
 
 from zargar.tenants.models import Tenant
 from zargar.jewelry.models import JewelryItem
 from zargar.jewelry.barcode_models import BarcodeType
-from zargar.jewelry.barcode_services import BarcodeGenerationService
+from zargar.jewelry.barcode_batch import BarcodeBatchGenerator
 
 
 class Command(BaseCommand):
@@ -127,25 +126,16 @@ class Command(BaseCommand):
                 self.stdout.write(f'  ... and {len(items) - 10} more items')
             return 0
         
-        # Generate barcodes
-        service = BarcodeGenerationService()
-        generated_count = 0
-        
-        with transaction.atomic():
-            for item in items:
-                try:
-                    barcode_gen = service.generate_barcode_for_item(item, barcode_type)
-                    generated_count += 1
-                    
-                    self.stdout.write(
-                        f'Generated {barcode_type} for {item.name} ({item.sku}): {barcode_gen.barcode_data}'
-                    )
-                    
-                except Exception as e:
-                    self.stdout.write(
-                        self.style.ERROR(
-                            f'Error generating barcode for {item.name} ({item.sku}): {e}'
-                        )
+        # Generate barcodes in chunks
+        def report(processed, generated, failed, errors):
+            for error in errors:
+                self.stdout.write(
+                    self.style.ERROR(
+                        f"Error generating barcode for item {error['item_id']} ({error['sku']}): {error['error']}"
                     )
+                )
+            self.stdout.write(f'Processed {processed}/{len(items)} items')
+        
+        results = BarcodeBatchGenerator(barcode_type).generate(items, progress=report)
         
-        return generated_count
\ No newline at end of file
+        return len(results['generated'])
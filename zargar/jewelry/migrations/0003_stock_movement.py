@@ -0,0 +1,39 @@
+# Generated by Django 4.2.24 on 2026-10-18 21:31
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('jewelry', '0002_add_barcode_models'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Timestamp when the record was created', verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Timestamp when the record was last updated', verbose_name='Updated At')),
+                ('movement_type', models.CharField(choices=[('sale', 'Sale'), ('purchase_receipt', 'Purchase Receipt'), ('adjustment', 'Adjustment'), ('stock_take', 'Stock Take'), ('return', 'Return')], default='adjustment', max_length=20, verbose_name='Movement Type')),
+                ('quantity_change', models.IntegerField(verbose_name='Quantity Change')),
+                ('quantity_before', models.PositiveIntegerField(verbose_name='Quantity Before')),
+                ('quantity_after', models.PositiveIntegerField(verbose_name='Quantity After')),
+                ('reason', models.CharField(blank=True, max_length=200, verbose_name='Reason')),
+                ('reference', models.CharField(blank=True, help_text='Source document, e.g. transaction number or upload batch', max_length=100, verbose_name='Reference')),
+                ('created_by', models.ForeignKey(blank=True, help_text='User who created this record', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created', to=settings.AUTH_USER_MODEL, verbose_name='Created By')),
+                ('jewelry_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='jewelry.jewelryitem', verbose_name='Jewelry Item')),
+                ('updated_by', models.ForeignKey(blank=True, help_text='User who last updated this record', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated', to=settings.AUTH_USER_MODEL, verbose_name='Updated By')),
+            ],
+            options={
+                'verbose_name': 'Stock Movement',
+                'verbose_name_plural': 'Stock Movements',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['jewelry_item', 'created_at'], name='jewelry_sto_jewelry_d88b34_idx'), models.Index(fields=['movement_type', 'created_at'], name='jewelry_sto_movemen_d800d7_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.24 on 2026-10-18 21:33
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('jewelry', '0003_stock_movement'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BarcodeBatchJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Timestamp when the record was created', verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Timestamp when the record was last updated', verbose_name='Updated At')),
+                ('barcode_type', models.CharField(choices=[('ean13', 'EAN-13'), ('code128', 'Code 128'), ('qr_code', 'QR Code'), ('custom', 'Custom')], default='qr_code', max_length=20, verbose_name='Barcode Type')),
+                ('item_ids', models.JSONField(default=list, verbose_name='Item IDs')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20, verbose_name='Status')),
+                ('task_id', models.CharField(blank=True, max_length=255, verbose_name='Task ID')),
+                ('total_items', models.PositiveIntegerField(default=0, verbose_name='Total Items')),
+                ('processed_items', models.PositiveIntegerField(default=0, verbose_name='Processed Items')),
+                ('generated_count', models.PositiveIntegerField(default=0, verbose_name='Generated Count')),
+                ('failed_count', models.PositiveIntegerField(default=0, verbose_name='Failed Count')),
+                ('errors', models.JSONField(blank=True, default=list, verbose_name='Errors')),
+                ('label_sheet', models.FileField(blank=True, null=True, upload_to='barcode_sheets/%Y/%m/', verbose_name='Label Sheet (PDF)')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Started At')),
+                ('completed_at', models.DateTimeField(blank=True, null=True, verbose_name='Completed At')),
+                ('created_by', models.ForeignKey(blank=True, help_text='User who created this record', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created', to=settings.AUTH_USER_MODEL, verbose_name='Created By')),
+                ('updated_by', models.ForeignKey(blank=True, help_text='User who last updated this record', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated', to=settings.AUTH_USER_MODEL, verbose_name='Updated By')),
+            ],
+            options={
+                'verbose_name': 'Barcode Batch Job',
+                'verbose_name_plural': 'Barcode Batch Jobs',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.24 on 2026-10-18 21:36
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jewelry', '0004_barcode_batch_job'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='barcodescanhistory',
+            name='scan_timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Scan Timestamp'),
+        ),
+    ]
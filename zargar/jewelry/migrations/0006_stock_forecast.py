@@ -0,0 +1,39 @@
+# Generated by Django 4.2.24 on 2026-10-18 21:40
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('jewelry', '0005_scan_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Timestamp when the record was created', verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Timestamp when the record was last updated', verbose_name='Updated At')),
+                ('daily_demand', models.FloatField(default=0, help_text='Deseasonalised average units sold per day', verbose_name='Daily Demand')),
+                ('seasonal_factor', models.FloatField(default=1, help_text='Demand multiplier during the Nowruz and Yalda run-ups', verbose_name='Seasonal Factor')),
+                ('forecast_30d', models.FloatField(default=0, verbose_name='30-Day Forecast')),
+                ('safety_stock', models.FloatField(default=0, verbose_name='Safety Stock')),
+                ('days_of_cover', models.FloatField(blank=True, help_text='Days the current quantity lasts at the forecast rate; empty without demand', null=True, verbose_name='Days of Cover')),
+                ('low_stock_since', models.DateTimeField(blank=True, null=True, verbose_name='Low Stock Since')),
+                ('suggested_reorder_quantity', models.PositiveIntegerField(default=0, verbose_name='Suggested Reorder Quantity')),
+                ('computed_at', models.DateTimeField(verbose_name='Computed At')),
+                ('created_by', models.ForeignKey(blank=True, help_text='User who created this record', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created', to=settings.AUTH_USER_MODEL, verbose_name='Created By')),
+                ('jewelry_item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stock_forecast', to='jewelry.jewelryitem', verbose_name='Jewelry Item')),
+                ('updated_by', models.ForeignKey(blank=True, help_text='User who last updated this record', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated', to=settings.AUTH_USER_MODEL, verbose_name='Updated By')),
+            ],
+            options={
+                'verbose_name': 'Stock Forecast',
+                'verbose_name_plural': 'Stock Forecasts',
+            },
+        ),
+    ]
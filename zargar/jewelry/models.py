@@ -313,5 +313,8 @@ class JewelryItemPhoto(TenantAwareModel):
 # Import barcode models to make them available
 from .barcode_models import (
     BarcodeGeneration, BarcodeScanHistory, BarcodeTemplate, 
-    BarcodeSettings, BarcodeType
-)
\ No newline at end of file
+    BarcodeSettings, BarcodeType, BarcodeBatchJob
+)
+
+# Import stock movement models to make them available
+from .stock_models import StockForecast, StockMovement, StockMovementType
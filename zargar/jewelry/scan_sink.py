@@ -0,0 +1,178 @@
+"""
+Batched, asynchronous sink for barcode scan history.
+
+Writing a BarcodeScanHistory row on every scan put an INSERT on the scanner's
+critical path. Scans are instead appended to a per-tenant Redis list
+(``barcode_scans:{schema}``) and written with bulk_create by a Celery task,
+either once a list reaches BARCODE_SCAN_FLUSH_SIZE entries or by the
+periodic flush. Without Redis, scans are written synchronously.
+
+A list holds at most BARCODE_SCAN_QUEUE_MAX_LENGTH scans; the oldest are
+dropped beyond that. When a batch fails to insert, its rows are retried one
+by one and rows that still fail (e.g. a scan of a since-deleted item) are
+moved to a capped dead-letter list (``barcode_scans:dead:{schema}``), so one
+bad row cannot hold back the rest of the tenant's history.
+"""
+import json
+import logging
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import DataError, IntegrityError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .barcode_models import BarcodeScanHistory
+
+logger = logging.getLogger(__name__)
+
+# Set of schemas with buffered scans
+PENDING_SCHEMAS_KEY = 'barcode_scans:pending'
+
+# Errors caused by the row itself rather than the database being unavailable
+ROW_ERRORS = (IntegrityError, DataError, ValidationError, ValueError, TypeError)
+
+
+def _get_redis():
+    from django_redis import get_redis_connection
+    return get_redis_connection('default')
+
+
+class ScanHistorySink:
+    """
+    Buffer scan history rows and write them in batches.
+    """
+
+    def record(self, schema_name, **fields):
+        """
+        Record one scan.
+
+        Args:
+            schema_name: Tenant schema the scan belongs to
+            **fields: BarcodeScanHistory field values (ids for relations)
+        """
+        fields.setdefault('scan_timestamp', timezone.now().isoformat())
+
+        if not settings.BARCODE_SCAN_HISTORY_ASYNC:
+            self._write([fields])
+            return
+
+        try:
+            queue_key = self._queue_key(schema_name)
+            pipe = _get_redis().pipeline()
+            pipe.rpush(queue_key, json.dumps(fields))
+            pipe.ltrim(queue_key, -settings.BARCODE_SCAN_QUEUE_MAX_LENGTH, -1)
+            pipe.sadd(PENDING_SCHEMAS_KEY, schema_name)
+            length, _trimmed, _added = pipe.execute()
+        except Exception as e:
+            logger.warning(f"Scan history buffer unavailable, writing directly: {e}")
+            self._write([fields])
+            return
+
+        if length > settings.BARCODE_SCAN_QUEUE_MAX_LENGTH:
+            logger.warning(f"Scan history buffer for {schema_name} is full, dropping the oldest scan")
+
+        if length % settings.BARCODE_SCAN_FLUSH_SIZE == 0:
+            from .tasks import flush_barcode_scans
+            flush_barcode_scans.delay(schema_name)
+
+    def flush(self, schema_name):
+        """
+        Write every buffered scan of the current tenant.
+
+        Must run inside the tenant's schema. Returns the number of rows written.
+        """
+        client = _get_redis()
+        queue_key = self._queue_key(schema_name)
+        batch_size = settings.BARCODE_SCAN_FLUSH_SIZE
+        written = 0
+
+        # Removed first so a scan pushed while flushing re-registers the schema
+        client.srem(PENDING_SCHEMAS_KEY, schema_name)
+
+        while True:
+            pipe = client.pipeline()
+            pipe.lrange(queue_key, 0, batch_size - 1)
+            pipe.ltrim(queue_key, batch_size, -1)
+            entries, _trimmed = pipe.execute()
+            if not entries:
+                break
+
+            rows = [json.loads(entry) for entry in entries]
+            try:
+                self._write(rows)
+                written += len(rows)
+            except Exception as e:
+                logger.warning(f"Bulk write of {len(rows)} buffered scans for {schema_name} failed, "
+                               f"retrying row by row: {e}")
+                written += self._write_each(client, schema_name, entries, rows)
+
+            if len(entries) < batch_size:
+                break
+
+        return written
+
+    def _write_each(self, client, schema_name, entries, rows):
+        """
+        Write rows one at a time after a failed batch.
+
+        Rows rejected by the database are dead-lettered. Any other error
+        (database unavailable) puts the unwritten rows back and is re-raised.
+        Returns the number of rows written.
+        """
+        written = 0
+        dead = []
+
+        for index, (entry, row) in enumerate(zip(entries, rows)):
+            try:
+                self._write([row])
+                written += 1
+            except ROW_ERRORS as e:
+                logger.error(f"Moving a buffered scan for {schema_name} to the dead-letter list: {e}")
+                dead.append(entry)
+            except Exception:
+                queue_key = self._queue_key(schema_name)
+                pipe = client.pipeline()
+                pipe.lpush(queue_key, *reversed(entries[index:]))
+                pipe.ltrim(queue_key, -settings.BARCODE_SCAN_QUEUE_MAX_LENGTH, -1)
+                pipe.sadd(PENDING_SCHEMAS_KEY, schema_name)
+                pipe.execute()
+                self._dead_letter(client, schema_name, dead)
+                raise
+
+        self._dead_letter(client, schema_name, dead)
+        return written
+
+    def _dead_letter(self, client, schema_name, entries):
+        if not entries:
+            return
+        dead_key = f'barcode_scans:dead:{schema_name}'
+        pipe = client.pipeline()
+        pipe.rpush(dead_key, *entries)
+        pipe.ltrim(dead_key, -settings.BARCODE_SCAN_DEAD_LETTER_MAX_LENGTH, -1)
+        pipe.execute()
+
+    def pending_schemas(self):
+        """Schemas that have buffered scans."""
+        return sorted(
+            member.decode() if isinstance(member, bytes) else member
+            for member in _get_redis().smembers(PENDING_SCHEMAS_KEY)
+        )
+
+    @staticmethod
+    def _write(rows):
+        scans = []
+        for row in rows:
+            row = dict(row)
+            if isinstance(row.get('scan_timestamp'), str):
+                row['scan_timestamp'] = parse_datetime(row['scan_timestamp'])
+            scans.append(BarcodeScanHistory(**row))
+
+        BarcodeScanHistory.objects.bulk_create(scans, batch_size=settings.BARCODE_SCAN_FLUSH_SIZE)
+
+    @staticmethod
+    def _queue_key(schema_name):
+        return f'barcode_scans:{schema_name}'
+
+
+scan_history_sink = ScanHistorySink()
@@ -3,22 +3,47 @@ Comprehensive inventory tracking services for ZARGAR jewelry SaaS platform.
 Provides serial number tracking, stock alerts, and real-time inventory valuation.
 """
 import logging
+import math
 from typing import Dict, List, Optional, Tuple
 from decimal import Decimal, ROUND_HALF_UP
 from datetime import datetime, timedelta
 from django.utils import timezone
-from django.db import transaction
+from django.db import connection, transaction
 from django.db.models import Q, Sum, Count, Avg, F
 from django.core.cache import cache
-from django.core.exceptions import ValidationError
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
 from django.contrib.auth import get_user_model
 
 from .models import JewelryItem, Category, Gemstone
+from zargar.core.lean_cache import CacheRecordSchema, get_cached_records, set_cached_records
 from zargar.gold_installments.services import GoldPriceService
+from zargar.reports.result_store import data_version, invalidate_report_results
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
+# Cached item rows keep only the item fields the pages link and display
+CACHED_ITEM_FIELDS = ('id', 'sku', 'name', 'barcode')
+
+LOW_STOCK_CACHE_SCHEMA = CacheRecordSchema(
+    'stock_alerts.low_stock', 1,
+    fields=(
+        'item', 'current_quantity', 'minimum_stock', 'threshold_used', 'shortage',
+        'category', 'unit_value', 'value_at_risk', 'days_since_low',
+        'estimated_monthly_demand', 'forecast_reorder_quantity', 'days_of_cover',
+    ),
+    nested={'item': CACHED_ITEM_FIELDS}
+)
+
+TOP_VALUE_CACHE_SCHEMA = CacheRecordSchema(
+    'inventory_valuation.top_value', 1,
+    fields=(
+        'item', 'current_total_value', 'current_gold_value', 'value_per_unit',
+        'category', 'has_serial',
+    ),
+    nested={'item': CACHED_ITEM_FIELDS}
+)
+
 
 class SerialNumberTrackingService:
     """
@@ -279,12 +304,12 @@ class StockAlertService:
         Returns:
             List of low stock item dictionaries
         """
-        cache_key = f"{cls.CACHE_KEY_PREFIX}_low_stock"
+        cache_key = cls._cache_key('low_stock')
         if threshold_override:
             cache_key += f"_{threshold_override}"
         
-        cached_result = cache.get(cache_key)
-        if cached_result:
+        cached_result = get_cached_records(cache_key, LOW_STOCK_CACHE_SCHEMA)
+        if cached_result is not None:
             return cached_result
         
         # Build query
@@ -297,8 +322,9 @@ class StockAlertService:
         
         low_stock_items = []
         
-        for item in JewelryItem.objects.filter(query).select_related('category'):
+        for item in JewelryItem.objects.filter(query).select_related('category', 'stock_forecast'):
             threshold = threshold_override or item.minimum_stock
+            forecast = cls._get_forecast(item)
             
             low_stock_items.append({
                 'item': item,
@@ -307,18 +333,22 @@ class StockAlertService:
                 'threshold_used': threshold,
                 'shortage': threshold - item.quantity,
                 'category': item.category.name_persian or item.category.name,
+                'unit_value': item.total_value,
                 'value_at_risk': item.total_value * item.quantity,
-                'days_since_low': cls._calculate_days_since_low_stock(item)
+                'days_since_low': cls._calculate_days_since_low_stock(item),
+                'estimated_monthly_demand': cls._estimate_monthly_demand(item),
+                'forecast_reorder_quantity': forecast.suggested_reorder_quantity if forecast else None,
+                'days_of_cover': forecast.days_of_cover if forecast else None
             })
         
         # Sort by severity (shortage amount, then value)
         low_stock_items.sort(key=lambda x: (-x['shortage'], -x['value_at_risk']))
         
         # Cache result
-        cache.set(cache_key, low_stock_items, cls.CACHE_TIMEOUT)
+        set_cached_records(cache_key, low_stock_items, LOW_STOCK_CACHE_SCHEMA, cls.CACHE_TIMEOUT)
         
         logger.info(f"Found {len(low_stock_items)} low stock items")
-        return low_stock_items
+        return LOW_STOCK_CACHE_SCHEMA.rehydrate(low_stock_items)
     
     @classmethod
     def _calculate_days_since_low_stock(cls, item: JewelryItem) -> int:
@@ -331,12 +361,17 @@ class StockAlertService:
         Returns:
             Number of days since low stock
         """
-        # This would require stock movement history
-        # For now, return estimated based on update time
-        if item.quantity <= item.minimum_stock:
-            days_diff = (timezone.now().date() - item.updated_at.date()).days
-            return max(0, days_diff)
-        return 0
+        if item.quantity > item.minimum_stock:
+            return 0
+        
+        # Threshold crossing from the stock movement ledger, stored nightly
+        forecast = cls._get_forecast(item)
+        low_since = forecast.low_stock_since if forecast else None
+        if low_since is None:
+            # No recorded crossing yet, estimate from the last update
+            low_since = item.updated_at
+        
+        return max(0, (timezone.now().date() - low_since.date()).days)
     
     @classmethod
     def get_stock_alerts_summary(cls) -> Dict:
@@ -346,14 +381,15 @@ class StockAlertService:
         Returns:
             Dictionary with stock alert statistics
         """
-        cache_key = f"{cls.CACHE_KEY_PREFIX}_summary"
-        cached_result = cache.get(cache_key)
-        if cached_result:
-            return cached_result
+        cache_key = cls._cache_key('summary')
         
         # Get low stock items
         low_stock_items = cls.get_low_stock_items()
         
+        cached_result = cache.get(cache_key)
+        if cached_result:
+            return dict(cached_result, most_critical_items=low_stock_items[:5])
+        
         # Calculate statistics
         total_low_stock = len(low_stock_items)
         critical_items = [item for item in low_stock_items if item['shortage'] >= 3]
@@ -380,13 +416,13 @@ class StockAlertService:
             'out_of_stock_items': len(out_of_stock),
             'total_value_at_risk': total_value_at_risk,
             'category_breakdown': category_breakdown,
-            'most_critical_items': low_stock_items[:5],  # Top 5 most critical
             'last_updated': timezone.now()
         }
         
-        # Cache result
+        # Cache primitives only; the items come from the low stock cache
         cache.set(cache_key, summary, cls.CACHE_TIMEOUT)
         
+        summary['most_critical_items'] = low_stock_items[:5]  # Top 5 most critical
         return summary
     
     @classmethod
@@ -472,25 +508,27 @@ class StockAlertService:
         suggestions = []
         
         for item_data in low_stock_items:
-            item = item_data['item']
-            
-            # Calculate suggested reorder quantity
-            # Base on minimum stock + safety buffer + estimated demand
-            safety_buffer = max(2, item.minimum_stock // 2)
-            estimated_demand = cls._estimate_monthly_demand(item)
+            estimated_demand = item_data['estimated_monthly_demand']
             
-            suggested_quantity = item.minimum_stock + safety_buffer + estimated_demand
-            current_shortage = max(0, item.minimum_stock - item.quantity)
+            if item_data['forecast_reorder_quantity'] is not None:
+                # Covers minimum stock, forecast demand and safety stock
+                suggested_quantity = item_data['forecast_reorder_quantity']
+            else:
+                # Not forecast yet: minimum stock + safety buffer + estimated demand
+                safety_buffer = max(2, item_data['minimum_stock'] // 2)
+                suggested_quantity = item_data['minimum_stock'] + safety_buffer + estimated_demand
+            current_shortage = max(0, item_data['minimum_stock'] - item_data['current_quantity'])
             
             suggestions.append({
-                'item': item,
-                'current_quantity': item.quantity,
-                'minimum_stock': item.minimum_stock,
+                'item': item_data['item'],
+                'current_quantity': item_data['current_quantity'],
+                'minimum_stock': item_data['minimum_stock'],
                 'current_shortage': current_shortage,
                 'suggested_reorder_quantity': suggested_quantity,
                 'estimated_monthly_demand': estimated_demand,
+                'days_of_cover': item_data['days_of_cover'],
                 'priority': cls._calculate_reorder_priority(item_data),
-                'estimated_cost': item.total_value * suggested_quantity
+                'estimated_cost': item_data['unit_value'] * suggested_quantity
             })
         
         # Sort by priority (high to low)
@@ -509,8 +547,11 @@ class StockAlertService:
         Returns:
             Estimated monthly demand
         """
-        # This would require sales history data
-        # For now, return conservative estimate based on category
+        forecast = cls._get_forecast(item)
+        if forecast:
+            return math.ceil(forecast.forecast_30d)
+        
+        # Not forecast yet, return conservative estimate based on category
         category_demand_map = {
             'earrings': 4,  # Check earrings first to avoid matching 'rings'
             'rings': 3,
@@ -526,6 +567,14 @@ class StockAlertService:
         
         return 1  # Default conservative estimate
     
+    @staticmethod
+    def _get_forecast(item: JewelryItem):
+        """Return the item's stored StockForecast, or None before the first nightly run."""
+        try:
+            return item.stock_forecast
+        except ObjectDoesNotExist:
+            return None
+    
     @classmethod
     def _calculate_reorder_priority(cls, item_data: Dict) -> int:
         """
@@ -558,12 +607,17 @@ class StockAlertService:
         
         return priority
     
+    @classmethod
+    def _cache_key(cls, name: str) -> str:
+        """Cache key of the current tenant."""
+        return f"{cls.CACHE_KEY_PREFIX}:{connection.schema_name}:{name}"
+    
     @classmethod
     def invalidate_cache(cls):
         """Invalidate all stock alert caches."""
         cache_keys = [
-            f"{cls.CACHE_KEY_PREFIX}_low_stock",
-            f"{cls.CACHE_KEY_PREFIX}_summary"
+            cls._cache_key('low_stock'),
+            cls._cache_key('summary')
         ]
         
         for key in cache_keys:
@@ -580,6 +634,7 @@ class InventoryValuationService:
     
     CACHE_KEY_PREFIX = 'inventory_valuation'
     CACHE_TIMEOUT = 1800  # 30 minutes
+    TOP_VALUE_CACHE_SIZE = 50
     
     @classmethod
     def calculate_total_inventory_value(cls, 
@@ -857,6 +912,14 @@ class InventoryValuationService:
         Returns:
             List of top value item dictionaries
         """
+        # One cached ranking serves every limit up to TOP_VALUE_CACHE_SIZE
+        ranking_size = max(limit, cls.TOP_VALUE_CACHE_SIZE)
+        cache_key = cls._top_value_key(ranking_size)
+        
+        cached_result = get_cached_records(cache_key, TOP_VALUE_CACHE_SCHEMA)
+        if cached_result is not None:
+            return cached_result[:limit]
+        
         # Get current gold prices
         gold_prices = {}
         for karat in [14, 18, 21, 22, 24]:
@@ -894,25 +957,43 @@ class InventoryValuationService:
         
         # Sort by total value (descending)
         item_values.sort(key=lambda x: x['current_total_value'], reverse=True)
+        item_values = item_values[:ranking_size]
         
-        return item_values[:limit]
+        set_cached_records(cache_key, item_values, TOP_VALUE_CACHE_SCHEMA, cls.CACHE_TIMEOUT)
+        
+        return TOP_VALUE_CACHE_SCHEMA.rehydrate(item_values[:limit])
+    
+    @classmethod
+    def _top_value_key(cls, ranking_size: int) -> str:
+        """
+        Cache key of a top value ranking of the current tenant.
+        
+        The key carries the tenant's inventory data version, bumped by item
+        saves, deletes and bulk stock updates, and the gold price generation,
+        bumped by every price refresh. Either change moves rankings of every
+        size to new keys at once.
+        """
+        return (
+            f"{cls.CACHE_KEY_PREFIX}:{connection.schema_name}:top_value:"
+            f"{data_version('inventory')}:{GoldPriceService.get_price_generation()}:{ranking_size}"
+        )
     
     @classmethod
     def invalidate_cache(cls):
         """Invalidate all inventory valuation caches."""
-        # Clear all cached valuation data
-        cache_pattern = f"{cls.CACHE_KEY_PREFIX}_*"
-        
         # Since Django cache doesn't support pattern deletion,
         # we'll clear specific known keys
         cache_keys = [
             f"{cls.CACHE_KEY_PREFIX}_total",
-            f"{cls.CACHE_KEY_PREFIX}_total_with_sold"
+            f"{cls.CACHE_KEY_PREFIX}_total_with_sold",
         ]
         
         for key in cache_keys:
             cache.delete(key)
         
+        # Top value rankings of every size are keyed on the inventory version
+        invalidate_report_results('inventory')
+        
         logger.info("Invalidated inventory valuation caches")
 
 
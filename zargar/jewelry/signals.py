@@ -1,12 +1,14 @@
 """
 Signals for jewelry inventory management.
 """
-from django.db.models.signals import post_save
+from django.db import connection
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.conf import settings
 
 from .models import JewelryItem
 from .barcode_models import BarcodeSettings
+from .barcode_index import barcode_index
 from .barcode_services import BarcodeGenerationService
 
 
@@ -83,19 +85,44 @@ def update_barcode_on_sku_change(sender, instance, created, **kwargs):
             print(f"Error updating barcode for {instance.name}: {e}")
 
 
-# Store original SKU to detect changes
+# Store original SKU and barcode to detect changes
 def store_original_sku(sender, instance, **kwargs):
-    """Store original SKU to detect changes."""
+    """Store original SKU and barcode to detect changes."""
+    original = None
     if instance.pk:
-        try:
-            original = JewelryItem.objects.get(pk=instance.pk)
-            instance._original_sku = original.sku
-        except JewelryItem.DoesNotExist:
-            instance._original_sku = None
-    else:
-        instance._original_sku = None
+        original = JewelryItem.objects.filter(pk=instance.pk).values('sku', 'barcode').first()
+    
+    instance._original_sku = original['sku'] if original else None
+    instance._original_barcode = original['barcode'] if original else None
+
+
+@receiver(post_save, sender=JewelryItem)
+def update_barcode_index(sender, instance, created, raw=False, **kwargs):
+    """
+    Keep the barcode resolution index in step with item codes.
+    """
+    if raw:
+        return
+    
+    stale_codes = {
+        getattr(instance, '_original_sku', None),
+        getattr(instance, '_original_barcode', None),
+    } - {instance.sku, instance.barcode}
+    
+    schema_name = connection.schema_name
+    barcode_index.forget(schema_name, stale_codes)
+    if created or stale_codes:
+        barcode_index.add_item(schema_name, instance)
+
+
+@receiver(post_delete, sender=JewelryItem)
+def remove_from_barcode_index(sender, instance, **kwargs):
+    """
+    Drop a deleted item's codes from the barcode resolution index.
+    """
+    barcode_index.forget(connection.schema_name, [instance.sku, instance.barcode])
 
 
 # Connect the pre_save signal
 from django.db.models.signals import pre_save
-pre_save.connect(store_original_sku, sender=JewelryItem)
\ No newline at end of file
+pre_save.connect(store_original_sku, sender=JewelryItem)
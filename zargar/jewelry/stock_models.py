@@ -0,0 +1,125 @@
+"""
+Stock movement history for jewelry items.
+"""
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+from zargar.core.models import TenantAwareModel
+from .models import JewelryItem
+
+
+class StockMovementType(models.TextChoices):
+    """Stock movement type choices."""
+    SALE = 'sale', _('Sale')
+    PURCHASE_RECEIPT = 'purchase_receipt', _('Purchase Receipt')
+    ADJUSTMENT = 'adjustment', _('Adjustment')
+    STOCK_TAKE = 'stock_take', _('Stock Take')
+    RETURN = 'return', _('Return')
+
+
+class StockMovement(TenantAwareModel):
+    """
+    Append-only record of a change to a jewelry item's quantity.
+
+    Rows are written in bulk alongside the quantity change and never updated.
+    """
+    jewelry_item = models.ForeignKey(
+        JewelryItem,
+        on_delete=models.CASCADE,
+        related_name='stock_movements',
+        verbose_name=_('Jewelry Item')
+    )
+    movement_type = models.CharField(
+        max_length=20,
+        choices=StockMovementType.choices,
+        default=StockMovementType.ADJUSTMENT,
+        verbose_name=_('Movement Type')
+    )
+    quantity_change = models.IntegerField(
+        verbose_name=_('Quantity Change')
+    )
+    quantity_before = models.PositiveIntegerField(
+        verbose_name=_('Quantity Before')
+    )
+    quantity_after = models.PositiveIntegerField(
+        verbose_name=_('Quantity After')
+    )
+    reason = models.CharField(
+        max_length=200,
+        blank=True,
+        verbose_name=_('Reason')
+    )
+    reference = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name=_('Reference'),
+        help_text=_('Source document, e.g. transaction number or upload batch')
+    )
+
+    class Meta:
+        verbose_name = _('Stock Movement')
+        verbose_name_plural = _('Stock Movements')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['jewelry_item', 'created_at']),
+            models.Index(fields=['movement_type', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.jewelry_item_id}: {self.quantity_change:+d} ({self.movement_type})"
+
+
+class StockForecast(TenantAwareModel):
+    """
+    Nightly demand forecast for a jewelry item, computed from its sales movements.
+
+    Read by the low stock and reorder pages instead of estimating on request.
+    """
+    jewelry_item = models.OneToOneField(
+        JewelryItem,
+        on_delete=models.CASCADE,
+        related_name='stock_forecast',
+        verbose_name=_('Jewelry Item')
+    )
+    daily_demand = models.FloatField(
+        default=0,
+        verbose_name=_('Daily Demand'),
+        help_text=_('Deseasonalised average units sold per day')
+    )
+    seasonal_factor = models.FloatField(
+        default=1,
+        verbose_name=_('Seasonal Factor'),
+        help_text=_('Demand multiplier during the Nowruz and Yalda run-ups')
+    )
+    forecast_30d = models.FloatField(
+        default=0,
+        verbose_name=_('30-Day Forecast')
+    )
+    safety_stock = models.FloatField(
+        default=0,
+        verbose_name=_('Safety Stock')
+    )
+    days_of_cover = models.FloatField(
+        null=True,
+        blank=True,
+        verbose_name=_('Days of Cover'),
+        help_text=_('Days the current quantity lasts at the forecast rate; empty without demand')
+    )
+    low_stock_since = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name=_('Low Stock Since')
+    )
+    suggested_reorder_quantity = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_('Suggested Reorder Quantity')
+    )
+    computed_at = models.DateTimeField(
+        verbose_name=_('Computed At')
+    )
+
+    class Meta:
+        verbose_name = _('Stock Forecast')
+        verbose_name_plural = _('Stock Forecasts')
+
+    def __str__(self):
+        return f"{self.jewelry_item_id}: {self.forecast_30d:.1f} / 30d"
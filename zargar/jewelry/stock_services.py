@@ -0,0 +1,209 @@
+"""
+Set-based stock updates for jewelry items.
+
+Stock-take uploads can carry thousands of rows. Instead of loading and saving
+items one by one, each batch locks its items with a single query, applies the
+changes in memory, and writes quantities and movement history with one
+bulk_update and one bulk_create.
+"""
+import csv
+import json
+import logging
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from zargar.core.sync_changes import record_changes
+from zargar.reports.result_store import invalidate_report_results
+from .models import JewelryItem
+from .stock_models import StockMovement, StockMovementType
+
+logger = logging.getLogger(__name__)
+
+
+class BulkStockUpdateService:
+    """
+    Service for applying many stock adjustments in one transaction.
+
+    Rows are dicts with ``item_id`` or ``sku``, ``quantity``, ``adjustment_type``
+    (set/add/subtract) and optional ``expected_quantity`` and ``reason``.
+    When ``expected_quantity`` is given the row is rejected if the stored
+    quantity differs, so concurrent edits are not silently overwritten.
+    """
+
+    @classmethod
+    def apply_updates(cls, rows: List[Tuple[int, Dict]], user=None,
+                      movement_type: str = StockMovementType.ADJUSTMENT,
+                      reference: str = '') -> Dict:
+        """
+        Apply validated update rows.
+
+        Args:
+            rows: (row number, row data) pairs; row numbers are echoed in errors
+            user: User recorded on the items and movements
+            movement_type: StockMovementType of the recorded movements
+            reference: Upload batch or document the movements belong to
+
+        Returns:
+            Dictionary with updated/failed counts and per-row errors
+        """
+        results = {'updated': 0, 'failed': 0, 'errors': []}
+        user_id = user.pk if user is not None and user.is_authenticated else None
+
+        with transaction.atomic():
+            items_by_id, items_by_sku = cls._lock_items(rows)
+            changed = {}
+            movements = []
+
+            for row_number, row in rows:
+                item = cls._resolve(row, items_by_id, items_by_sku)
+                error = None
+
+                if item is None:
+                    error = _('Item not found')
+                elif row.get('expected_quantity') is not None and row['expected_quantity'] != item.quantity:
+                    error = _('Quantity changed since it was read')
+                else:
+                    new_quantity = cls._new_quantity(item.quantity, row)
+                    if new_quantity < 0:
+                        error = _('Quantity cannot be negative')
+
+                if error:
+                    results['failed'] += 1
+                    results['errors'].append({
+                        'row': row_number,
+                        'item_id': row.get('item_id'),
+                        'sku': row.get('sku'),
+                        'error': str(error),
+                        'current_quantity': item.quantity if item is not None else None,
+                    })
+                    continue
+
+                results['updated'] += 1
+                if new_quantity == item.quantity:
+                    continue
+
+                movements.append(StockMovement(
+                    jewelry_item_id=item.id,
+                    movement_type=movement_type,
+                    quantity_change=new_quantity - item.quantity,
+                    quantity_before=item.quantity,
+                    quantity_after=new_quantity,
+                    reason=(row.get('reason') or '')[:200],
+                    reference=reference,
+                    created_by_id=user_id,
+                    updated_by_id=user_id,
+                ))
+                item.quantity = new_quantity
+                changed[item.id] = item
+
+            if changed:
+                now = timezone.now()
+                for item in changed.values():
+                    item.updated_at = now
+                    item.updated_by_id = user_id
+
+                batch_size = settings.STOCK_UPDATE_BATCH_SIZE
+                JewelryItem.objects.bulk_update(
+                    changed.values(), ['quantity', 'updated_at', 'updated_by'], batch_size=batch_size
+                )
+                StockMovement.objects.bulk_create(movements, batch_size=batch_size)
+                # bulk_update bypasses model signals
+                record_changes('jewelry_items', changed.keys(), 'update')
+                invalidate_report_results('inventory')
+
+        return results
+
+    @classmethod
+    def _lock_items(cls, rows: List[Tuple[int, Dict]]) -> Tuple[Dict, Dict]:
+        """Load and lock every item referenced by the rows in one query."""
+        item_ids = {row['item_id'] for _row_number, row in rows if row.get('item_id')}
+        skus = {row['sku'] for _row_number, row in rows if row.get('sku')}
+
+        items = JewelryItem.objects.select_for_update().filter(
+            Q(id__in=item_ids) | Q(sku__in=skus)
+        ).only('id', 'sku', 'quantity').order_by('id')
+
+        items_by_id = {}
+        items_by_sku = {}
+        for item in items:
+            items_by_id[item.id] = item
+            items_by_sku[item.sku] = item
+        return items_by_id, items_by_sku
+
+    @staticmethod
+    def _resolve(row: Dict, items_by_id: Dict, items_by_sku: Dict) -> Optional[JewelryItem]:
+        if row.get('item_id'):
+            return items_by_id.get(row['item_id'])
+        return items_by_sku.get(row.get('sku'))
+
+    @staticmethod
+    def _new_quantity(current: int, row: Dict) -> int:
+        adjustment_type = row.get('adjustment_type', 'set')
+        if adjustment_type == 'add':
+            return current + row['quantity']
+        if adjustment_type == 'subtract':
+            return current - row['quantity']
+        return row['quantity']
+
+
+def stock_movement(jewelry_item, quantity_before: int, quantity_after: int, movement_type: str,
+                   reason: str = '', reference: str = '') -> StockMovement:
+    """Build an unsaved movement for a quantity change already applied to an item."""
+    return StockMovement(
+        jewelry_item_id=jewelry_item.pk,
+        movement_type=movement_type,
+        quantity_change=quantity_after - quantity_before,
+        quantity_before=quantity_before,
+        quantity_after=quantity_after,
+        reason=reason[:200],
+        reference=reference[:100],
+    )
+
+
+def record_stock_movements(movements: Iterable[StockMovement]) -> int:
+    """
+    Append movements to the stock ledger in one INSERT.
+
+    Movements that did not change the quantity are skipped. Returns the number
+    of rows written.
+    """
+    movements = [movement for movement in movements if movement.quantity_change]
+    if movements:
+        StockMovement.objects.bulk_create(movements, batch_size=settings.STOCK_UPDATE_BATCH_SIZE)
+    return len(movements)
+
+
+def iter_stock_update_rows(stream: Iterable[bytes], file_format: str) -> Iterator[Tuple[int, object]]:
+    """
+    Parse an uploaded CSV or JSON-lines stock file lazily.
+
+    Yields (row number, row) pairs without reading the whole file. Empty CSV
+    cells are dropped; malformed JSON lines are yielded as their raw text so
+    validation reports them against their row.
+    """
+    lines = (line.decode('utf-8-sig') if isinstance(line, bytes) else line for line in stream)
+
+    if file_format == 'jsonl':
+        row_number = 0
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            row_number += 1
+            try:
+                yield row_number, json.loads(line)
+            except ValueError:
+                yield row_number, line
+        return
+
+    for row_number, row in enumerate(csv.DictReader(lines), start=1):
+        yield row_number, {
+            key.strip(): value.strip()
+            for key, value in row.items()
+            if key and value not in (None, '')
+        }
@@ -0,0 +1,113 @@
+"""
+Celery tasks for jewelry inventory.
+"""
+from celery import shared_task
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django_tenants.utils import schema_context
+from zargar.core.tenant_tasks import map_over_tenants
+from .barcode_batch import BarcodeBatchGenerator
+from .forecasting import StockForecastService
+from .models import BarcodeBatchJob, JewelryItem
+from .scan_sink import scan_history_sink
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, acks_late=True)
+def generate_barcode_batch(self, schema_name, job_id):
+    """
+    Generate barcodes and a printable label sheet for a BarcodeBatchJob.
+
+    Progress is recorded on the job after every chunk.
+    """
+    with schema_context(schema_name):
+        job = BarcodeBatchJob.objects.get(pk=job_id)
+        job.mark_as_running(self.request.id)
+
+        try:
+            items = JewelryItem.objects.filter(
+                id__in=job.item_ids
+            ).select_related('category').order_by('id')
+
+            generator = BarcodeBatchGenerator(job.barcode_type, label_sheet=True)
+            results = generator.generate(
+                items.iterator(chunk_size=settings.BARCODE_BATCH_CHUNK_SIZE),
+                progress=job.update_progress
+            )
+
+            if results['label_sheet']:
+                job.label_sheet.save(
+                    f"labels_{job.pk}.pdf", ContentFile(results['label_sheet']), save=False
+                )
+                job.save(update_fields=['label_sheet', 'updated_at'])
+
+            job.mark_as_completed()
+
+            logger.info(
+                f"Barcode batch {job.pk} for tenant {schema_name}: "
+                f"generated {job.generated_count}, failed {job.failed_count}"
+            )
+
+            return {
+                'job_id': job.pk,
+                'generated': job.generated_count,
+                'failed': job.failed_count
+            }
+
+        except Exception as exc:
+            logger.error(f"Barcode batch {job.pk} for tenant {schema_name} failed: {exc}")
+            job.mark_as_failed(exc)
+            raise
+
+
+@shared_task(bind=True, max_retries=3)
+def flush_barcode_scans(self, schema_name):
+    """
+    Write one tenant's buffered barcode scans to scan history.
+    """
+    try:
+        with schema_context(schema_name):
+            written = scan_history_sink.flush(schema_name)
+        
+        if written:
+            logger.info(f"Wrote {written} buffered barcode scans for tenant {schema_name}")
+        return {'schema_name': schema_name, 'written': written}
+        
+    except Exception as exc:
+        logger.error(f"Flushing barcode scans for tenant {schema_name} failed: {exc}")
+        raise self.retry(exc=exc, countdown=30)
+
+
+@shared_task
+def flush_pending_barcode_scans():
+    """
+    Periodic task writing buffered barcode scans of every tenant that has any.
+    """
+    schemas = scan_history_sink.pending_schemas()
+    for schema_name in schemas:
+        flush_barcode_scans.delay(schema_name)
+    
+    return {'tenants': len(schemas)}
+
+
+@shared_task(bind=True, max_retries=3)
+def compute_stock_forecasts(self):
+    """
+    Nightly task forecasting demand and reorder quantities for every tenant.
+    """
+    try:
+        return map_over_tenants(
+            'zargar.jewelry.tasks.compute_tenant_stock_forecasts',
+            job_name='stock_forecasts'
+        )
+    
+    except Exception as exc:
+        logger.error(f"Stock forecasting failed: {exc}")
+        raise self.retry(exc=exc, countdown=60 * 5)
+
+
+def compute_tenant_stock_forecasts(tenant):
+    """Store demand forecasts for one tenant's jewelry items."""
+    return StockForecastService.compute_forecasts()
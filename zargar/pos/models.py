@@ -343,15 +343,26 @@ class POSTransaction(TenantAwareModel):
         self.status = 'completed'
         
         # Update inventory for jewelry items
-        for line_item in self.line_items.all():
+        from zargar.jewelry.stock_models import StockMovementType
+        from zargar.jewelry.stock_services import record_stock_movements, stock_movement
+        
+        movements = []
+        for line_item in self.line_items.select_related('jewelry_item'):
             if line_item.jewelry_item:
                 jewelry_item = line_item.jewelry_item
-                jewelry_item.quantity -= line_item.quantity
+                quantity_before = jewelry_item.quantity
+                jewelry_item.quantity = quantity_before - line_item.quantity
                 
                 if jewelry_item.quantity <= 0:
                     jewelry_item.status = 'sold'
                 
                 jewelry_item.save(update_fields=['quantity', 'status'])
+                movements.append(stock_movement(
+                    jewelry_item, quantity_before, jewelry_item.quantity,
+                    StockMovementType.SALE, reference=self.transaction_number
+                ))
+        
+        record_stock_movements(movements)
         
         # Update customer purchase stats if customer is set
         if self.customer:
@@ -3,6 +3,7 @@ Point of Sale (POS) services for ZARGAR jewelry SaaS platform.
 Provides transaction processing, gold price calculations, and offline synchronization.
 """
 import logging
+from io import BytesIO
 from typing import Dict, List, Optional, Tuple
 from decimal import Decimal, ROUND_HALF_UP
 from datetime import datetime, timedelta
@@ -17,8 +18,18 @@ from .models import POSTransaction, POSTransactionLineItem, POSInvoice, POSOffli
 from zargar.jewelry.models import JewelryItem
 from zargar.customers.models import Customer
 from zargar.gold_installments.services import GoldPriceService
+from zargar.core.pdf_rendering import get_reportlab_styles, render_pdf
 from django.db import models
 
+try:
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+    REPORTLAB_AVAILABLE = True
+except ImportError:
+    REPORTLAB_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
@@ -539,6 +550,8 @@ class POSInvoiceService:
         """
         Generate PDF invoice with Persian formatting and Iranian business law compliance.
         
+        Reprints of an unchanged invoice are served from the PDF cache.
+        
         Args:
             invoice: POSInvoice instance
             
@@ -546,123 +559,7 @@ class POSInvoiceService:
             PDF content as bytes
         """
         try:
-            from reportlab.lib.pagesizes import A4
-            from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-            from reportlab.lib.units import inch
-            from reportlab.lib import colors
-            from reportlab.pdfbase import pdfmetrics
-            from reportlab.pdfbase.ttfonts import TTFont
-            from io import BytesIO
-            import os
-            
-            # Register Persian font (you would need to add Persian font files)
-            # For now, using default fonts
-            
-            buffer = BytesIO()
-            doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=72, leftMargin=72,
-                                  topMargin=72, bottomMargin=18)
-            
-            # Get invoice data
-            invoice_data = invoice.generate_persian_invoice_data()
-            
-            # Build PDF content
-            story = []
-            styles = getSampleStyleSheet()
-            
-            # Create RTL style for Persian text
-            rtl_style = ParagraphStyle(
-                'RTL',
-                parent=styles['Normal'],
-                alignment=2,  # Right alignment for RTL
-                fontName='Helvetica',
-                fontSize=12,
-                leading=14
-            )
-            
-            # Header - Business Information
-            business_info = invoice_data['business_info']
-            story.append(Paragraph(f"<b>{business_info['name']}</b>", rtl_style))
-            story.append(Paragraph(business_info['address'], rtl_style))
-            story.append(Paragraph(f"تلفن: {business_info['phone']}", rtl_style))
-            if business_info['tax_id']:
-                story.append(Paragraph(f"شناسه مالیاتی: {business_info['tax_id']}", rtl_style))
-            story.append(Spacer(1, 12))
-            
-            # Invoice Header
-            invoice_details = invoice_data['invoice_details']
-            story.append(Paragraph(f"<b>فاکتور فروش - شماره: {invoice_details['invoice_number']}</b>", rtl_style))
-            story.append(Paragraph(f"تاریخ صدور: {invoice_details['issue_date_shamsi']}", rtl_style))
-            story.append(Spacer(1, 12))
-            
-            # Customer Information
-            customer_info = invoice_data['customer_info']
-            story.append(Paragraph("<b>مشخصات خریدار:</b>", rtl_style))
-            story.append(Paragraph(f"نام: {customer_info['name']}", rtl_style))
-            if customer_info['phone']:
-                story.append(Paragraph(f"تلفن: {customer_info['phone']}", rtl_style))
-            if customer_info['address']:
-                story.append(Paragraph(f"آدرس: {customer_info['address']}", rtl_style))
-            story.append(Spacer(1, 12))
-            
-            # Line Items Table
-            table_data = [
-                ['مجموع', 'قیمت واحد', 'تعداد', 'وزن (گرم)', 'کد کالا', 'شرح کالا']
-            ]
-            
-            for item in invoice_data['line_items']:
-                table_data.append([
-                    item['line_total'],
-                    item['unit_price'],
-                    item['quantity'],
-                    item['gold_weight'] or '-',
-                    item['sku'] or '-',
-                    item['name']
-                ])
-            
-            # Create table
-            table = Table(table_data, colWidths=[1*inch, 1*inch, 0.8*inch, 1*inch, 1*inch, 2*inch])
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            
-            story.append(table)
-            story.append(Spacer(1, 12))
-            
-            # Financial Totals
-            financial_totals = invoice_data['financial_totals']
-            story.append(Paragraph(f"جمع کل: {financial_totals['subtotal']}", rtl_style))
-            if financial_totals['tax_amount'] != '۰':
-                story.append(Paragraph(f"مالیات: {financial_totals['tax_amount']}", rtl_style))
-            if financial_totals['discount_amount'] != '۰':
-                story.append(Paragraph(f"تخفیف: {financial_totals['discount_amount']}", rtl_style))
-            story.append(Paragraph(f"<b>مبلغ نهایی: {financial_totals['total_amount']}</b>", rtl_style))
-            story.append(Paragraph(f"به حروف: {financial_totals['total_in_words']}", rtl_style))
-            story.append(Spacer(1, 12))
-            
-            # Terms and Conditions
-            if invoice_data['terms_and_conditions']:
-                story.append(Paragraph("<b>شرایط و ضوابط:</b>", rtl_style))
-                story.append(Paragraph(invoice_data['terms_and_conditions'], rtl_style))
-            
-            # Notes
-            if invoice_data['notes']:
-                story.append(Spacer(1, 12))
-                story.append(Paragraph("<b>توضیحات:</b>", rtl_style))
-                story.append(Paragraph(invoice_data['notes'], rtl_style))
-            
-            # Build PDF
-            doc.build(story)
-            
-            pdf_content = buffer.getvalue()
-            buffer.close()
+            pdf_content = render_pdf('invoice', invoice.generate_persian_invoice_data())
             
             logger.info(f"Generated PDF for invoice {invoice.invoice_number}")
             return pdf_content
@@ -1299,4 +1196,121 @@ class POSReportingService:
             'total_transactions': transactions.count(),
             'total_sales': sum(t.total_amount for t in transactions),
             'total_gold_weight': sum(t.total_gold_weight_grams for t in transactions)
-        }
\ No newline at end of file
+        }
+
+
+def load_invoice_pdf_data(invoice_id) -> Dict:
+    """Invoice data for the PDF workers."""
+    return POSInvoice.objects.select_related('transaction__customer').get(id=invoice_id).generate_persian_invoice_data()
+
+
+def render_invoice_pdf(invoice_data: Dict) -> bytes:
+    """
+    Lay out an invoice with ReportLab, using the fonts and styles preloaded by
+    the PDF rendering workers.
+    
+    Args:
+        invoice_data: Output of POSInvoice.generate_persian_invoice_data()
+        
+    Returns:
+        PDF content as bytes
+    """
+    if not REPORTLAB_AVAILABLE:
+        raise ImportError("ReportLab is required for invoice PDFs")
+    
+    styles = get_reportlab_styles()
+    rtl_style = styles['rtl']
+    header_font = 'Helvetica-Bold' if styles['font_name'] == 'Helvetica' else styles['font_name']
+    
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=72, leftMargin=72,
+                          topMargin=72, bottomMargin=18)
+    
+    # Build PDF content
+    story = []
+    
+    # Header - Business Information
+    business_info = invoice_data['business_info']
+    story.append(Paragraph(f"<b>{business_info['name']}</b>", rtl_style))
+    story.append(Paragraph(business_info['address'], rtl_style))
+    story.append(Paragraph(f"تلفن: {business_info['phone']}", rtl_style))
+    if business_info['tax_id']:
+        story.append(Paragraph(f"شناسه مالیاتی: {business_info['tax_id']}", rtl_style))
+    story.append(Spacer(1, 12))
+    
+    # Invoice Header
+    invoice_details = invoice_data['invoice_details']
+    story.append(Paragraph(f"<b>فاکتور فروش - شماره: {invoice_details['invoice_number']}</b>", rtl_style))
+    story.append(Paragraph(f"تاریخ صدور: {invoice_details['issue_date_shamsi']}", rtl_style))
+    story.append(Spacer(1, 12))
+    
+    # Customer Information
+    customer_info = invoice_data['customer_info']
+    story.append(Paragraph("<b>مشخصات خریدار:</b>", rtl_style))
+    story.append(Paragraph(f"نام: {customer_info['name']}", rtl_style))
+    if customer_info['phone']:
+        story.append(Paragraph(f"تلفن: {customer_info['phone']}", rtl_style))
+    if customer_info['address']:
+        story.append(Paragraph(f"آدرس: {customer_info['address']}", rtl_style))
+    story.append(Spacer(1, 12))
+    
+    # Line Items Table
+    table_data = [
+        ['مجموع', 'قیمت واحد', 'تعداد', 'وزن (گرم)', 'کد کالا', 'شرح کالا']
+    ]
+    
+    for item in invoice_data['line_items']:
+        table_data.append([
+            item['line_total'],
+            item['unit_price'],
+            item['quantity'],
+            item['gold_weight'] or '-',
+            item['sku'] or '-',
+            item['name']
+        ])
+    
+    # Create table
+    table = Table(table_data, colWidths=[1*inch, 1*inch, 0.8*inch, 1*inch, 1*inch, 2*inch])
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), header_font),
+        ('FONTNAME', (0, 1), (-1, -1), styles['font_name']),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+    
+    story.append(table)
+    story.append(Spacer(1, 12))
+    
+    # Financial Totals
+    financial_totals = invoice_data['financial_totals']
+    story.append(Paragraph(f"جمع کل: {financial_totals['subtotal']}", rtl_style))
+    if financial_totals['tax_amount'] != '۰':
+        story.append(Paragraph(f"مالیات: {financial_totals['tax_amount']}", rtl_style))
+    if financial_totals['discount_amount'] != '۰':
+        story.append(Paragraph(f"تخفیف: {financial_totals['discount_amount']}", rtl_style))
+    story.append(Paragraph(f"<b>مبلغ نهایی: {financial_totals['total_amount']}</b>", rtl_style))
+    story.append(Paragraph(f"به حروف: {financial_totals['total_in_words']}", rtl_style))
+    story.append(Spacer(1, 12))
+    
+    # Terms and Conditions
+    if invoice_data['terms_and_conditions']:
+        story.append(Paragraph("<b>شرایط و ضوابط:</b>", rtl_style))
+        story.append(Paragraph(invoice_data['terms_and_conditions'], rtl_style))
+    
+    # Notes
+    if invoice_data['notes']:
+        story.append(Spacer(1, 12))
+        story.append(Paragraph("<b>توضیحات:</b>", rtl_style))
+        story.append(Paragraph(invoice_data['notes'], rtl_style))
+    
+    # Build PDF
+    doc.build(story)
+    
+    pdf_content = buffer.getvalue()
+    buffer.close()
+    return pdf_content
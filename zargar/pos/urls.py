@@ -38,6 +38,7 @@ urlpatterns = [
     
     # API Endpoints for AJAX/Mobile
     path('api/gold-price/', views.CurrentGoldPriceAPIView.as_view(), name='api_gold_price'),
+    path('api/gold-price/stream/', views.gold_price_stream, name='api_gold_price_stream'),
     path('api/customer-lookup/', views.CustomerLookupAPIView.as_view(), name='api_customer_lookup'),
     path('api/jewelry-search/', views.JewelryItemSearchAPIView.as_view(), name='api_jewelry_search'),
     path('api/today-stats/', views.POSTodayStatsAPIView.as_view(), name='api_today_stats'),
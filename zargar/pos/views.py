@@ -4,7 +4,7 @@ Provides touch-optimized POS interface and transaction management.
 """
 from django.views.generic import TemplateView, ListView, DetailView, CreateView
 from django.views import View
-from django.http import JsonResponse, HttpResponse, Http404
+from django.http import JsonResponse, HttpResponse, Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
@@ -16,7 +16,9 @@ import json
 
 from django.db import models
 
+from asgiref.sync import sync_to_async
 from zargar.core.mixins import TenantContextMixin
+from zargar.core.gold_price_stream import gold_price_events
 from .models import POSTransaction, POSTransactionLineItem, POSInvoice, POSOfflineStorage
 from .services import POSTransactionService, POSOfflineService, POSInvoiceService, POSReportingService
 from zargar.jewelry.models import JewelryItem
@@ -420,6 +422,23 @@ class CurrentGoldPriceAPIView(LoginRequiredMixin, TenantContextMixin, View):
             return JsonResponse({'success': False, 'error': str(e)})
 
 
+async def gold_price_stream(request):
+    """
+    Stream gold price updates as Server-Sent Events.
+    
+    Replaces polling CurrentGoldPriceAPIView; serve it through ASGI so idle
+    connections do not hold a worker thread.
+    """
+    is_authenticated = await sync_to_async(lambda: request.user.is_authenticated)()
+    if not is_authenticated:
+        return JsonResponse({'success': False, 'error': str(_('Authentication required'))}, status=401)
+    
+    response = StreamingHttpResponse(gold_price_events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Keep nginx from buffering the stream
+    return response
+
+
 class CustomerLookupAPIView(LoginRequiredMixin, TenantContextMixin, View):
     """API endpoint for customer lookup."""
     
@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class ReportsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'zargar.reports'
-    verbose_name = 'Reports & Analytics'
\ No newline at end of file
+    verbose_name = 'Reports & Analytics'    
+    def ready(self):
+        """Import signals when app is ready."""
+        import zargar.reports.signals
@@ -8,33 +8,54 @@ with proper Persian formatting and RTL layout support.
 import os
 import json
 import csv
+import tempfile
 from io import BytesIO, StringIO
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, Optional, Tuple
 from decimal import Decimal
 from datetime import date, datetime
 
 from django.conf import settings
-from django.template.loader import render_to_string
-from django.http import HttpResponse
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
 from django.utils import timezone
 
+from .models import GeneratedReport
+from .result_store import ReportResultStore
+from .streaming import ROW_SECTION, ROW_TOTAL, ReportStream, report_stream_from_data
+
 # PDF generation
-try:
-    from weasyprint import HTML, CSS
-    from weasyprint.text.fonts import FontConfiguration
-    WEASYPRINT_AVAILABLE = True
-except ImportError:
-    WEASYPRINT_AVAILABLE = False
+from zargar.core.pdf_rendering import WEASYPRINT_AVAILABLE, render_html_pdf, render_pdf
 
 # Excel generation
 try:
     import openpyxl
-    from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, Alignment, Border, Side, PatternFill, NamedStyle
     from openpyxl.utils import get_column_letter
     OPENPYXL_AVAILABLE = True
 except ImportError:
     OPENPYXL_AVAILABLE = False
 
+# Formats written row by row from a ReportStream
+STREAMED_FORMATS = ('excel', 'csv', 'jsonl')
+
+CONTENT_TYPES = {
+    'pdf': 'application/pdf',
+    'excel': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'csv': 'text/csv; charset=utf-8',
+    'json': 'application/json; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+FILE_EXTENSIONS = {
+    'pdf': 'pdf',
+    'excel': 'xlsx',
+    'csv': 'csv',
+    'json': 'json',
+    'jsonl': 'jsonl',
+}
+
+EXCEL_DEFAULT_COLUMN_WIDTH = 20
+
 
 class ReportExporter:
     """
@@ -52,7 +73,7 @@ class ReportExporter:
         
         Args:
             report_data: Report data dictionary
-            output_format: Output format (pdf, excel, csv, json)
+            output_format: Output format (pdf, excel, csv, json, jsonl)
             filename: Output filename
             
         Returns:
@@ -66,6 +87,8 @@ class ReportExporter:
             return self.export_to_csv(report_data, filename)
         elif output_format == 'json':
             return self.export_to_json(report_data, filename)
+        elif output_format == 'jsonl':
+            return self.export_stream(report_stream_from_data(report_data), 'jsonl', filename)
         else:
             raise ValueError(f"Unsupported output format: {output_format}")
     
@@ -73,6 +96,9 @@ class ReportExporter:
         """
         Export report to PDF format with Persian RTL layout.
         
+        Rendering goes through the shared PDF renderer, which reuses the
+        preloaded fonts and stylesheet and caches the result by content.
+        
         Args:
             report_data: Report data dictionary
             filename: Output filename
@@ -83,93 +109,11 @@ class ReportExporter:
         if not WEASYPRINT_AVAILABLE:
             raise ImportError("WeasyPrint is required for PDF export")
         
-        # Determine template based on report type
-        report_type = report_data.get('report_type', 'generic')
-        template_name = f'reports/pdf/{report_type}.html'
-        
-        # Fallback to generic template if specific template doesn't exist
-        try:
-            html_content = render_to_string(template_name, {'report': report_data})
-        except:
-            html_content = render_to_string('reports/pdf/generic.html', {'report': report_data})
-        
-        # Generate PDF
-        font_config = FontConfiguration()
-        
-        # CSS for Persian RTL layout
-        css_content = """
-        @font-face {
-            font-family: 'Vazir';
-            src: url('static/fonts/Vazir-Regular.woff2') format('woff2');
-        }
-        
-        body {
-            font-family: 'Vazir', Arial, sans-serif;
-            direction: rtl;
-            text-align: right;
-            font-size: 12px;
-            line-height: 1.6;
-        }
-        
-        .report-header {
-            text-align: center;
-            margin-bottom: 30px;
-            border-bottom: 2px solid #333;
-            padding-bottom: 15px;
-        }
-        
-        .report-title {
-            font-size: 18px;
-            font-weight: bold;
-            margin-bottom: 10px;
-        }
-        
-        .report-date {
-            font-size: 12px;
-            color: #666;
-        }
-        
-        table {
-            width: 100%;
-            border-collapse: collapse;
-            margin: 20px 0;
-            direction: rtl;
-        }
-        
-        th, td {
-            border: 1px solid #ddd;
-            padding: 8px;
-            text-align: right;
-        }
-        
-        th {
-            background-color: #f5f5f5;
-            font-weight: bold;
-        }
-        
-        .number {
-            text-align: left;
-            font-family: 'Vazir', monospace;
-        }
-        
-        .total-row {
-            font-weight: bold;
-            background-color: #f9f9f9;
-        }
-        
-        .report-footer {
-            margin-top: 30px;
-            text-align: center;
-            font-size: 10px;
-            color: #666;
-        }
-        """
-        
-        css = CSS(string=css_content, font_config=font_config)
+        pdf_content = render_pdf('report', self._prepare_for_json(report_data))
         
-        # Generate PDF file
         file_path = os.path.join(self.reports_dir, filename)
-        HTML(string=html_content).write_pdf(file_path, stylesheets=[css], font_config=font_config)
+        with open(file_path, 'wb') as pdf_file:
+            pdf_file.write(pdf_content)
         
         return file_path
     
@@ -184,411 +128,159 @@ class ReportExporter:
         Returns:
             Path to generated Excel file
         """
-        if not OPENPYXL_AVAILABLE:
-            raise ImportError("openpyxl is required for Excel export")
-        
-        # Create workbook
-        wb = openpyxl.Workbook()
-        ws = wb.active
+        return self.export_stream(report_stream_from_data(report_data), 'excel', filename)
+    
+    def export_to_csv(self, report_data: Dict[str, Any], filename: str) -> str:
+        """
+        Export report to CSV format.
         
-        # Set worksheet title
-        report_title = report_data.get('report_title_persian', 'گزارش')
-        ws.title = report_title[:31]  # Excel sheet name limit
+        Args:
+            report_data: Report data dictionary
+            filename: Output filename
+            
+        Returns:
+            Path to generated CSV file
+        """
+        return self.export_stream(report_stream_from_data(report_data), 'csv', filename)
+    
+    def export_stream(self, stream: ReportStream, output_format: str, filename: str) -> str:
+        """
+        Write a report stream to a file in the reports directory, row by row.
         
-        # Configure RTL
-        ws.sheet_view.rightToLeft = True
+        Args:
+            stream: ReportStream to consume
+            output_format: excel, csv or jsonl
+            filename: Output filename
+            
+        Returns:
+            Path to generated file
+        """
+        file_path = os.path.join(self.reports_dir, filename)
         
-        # Define styles
-        header_font = Font(name='Tahoma', size=14, bold=True)
-        title_font = Font(name='Tahoma', size=16, bold=True)
-        data_font = Font(name='Tahoma', size=11)
-        number_font = Font(name='Tahoma', size=11)
-        
-        header_fill = PatternFill(start_color='E6E6FA', end_color='E6E6FA', fill_type='solid')
-        
-        border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
-        
-        # Add report header
-        current_row = 1
-        
-        # Report title
-        ws.merge_cells(f'A{current_row}:F{current_row}')
-        title_cell = ws[f'A{current_row}']
-        title_cell.value = report_title
-        title_cell.font = title_font
-        title_cell.alignment = Alignment(horizontal='center')
-        current_row += 2
-        
-        # Report date range
-        if report_data.get('date_from_shamsi') and report_data.get('date_to_shamsi'):
-            ws.merge_cells(f'A{current_row}:F{current_row}')
-            date_cell = ws[f'A{current_row}']
-            date_cell.value = f"از تاریخ {report_data['date_from_shamsi']} تا {report_data['date_to_shamsi']}"
-            date_cell.font = data_font
-            date_cell.alignment = Alignment(horizontal='center')
-            current_row += 2
-        
-        # Export based on report type
-        report_type = report_data.get('report_type')
-        
-        if report_type == 'trial_balance':
-            current_row = self._export_trial_balance_to_excel(ws, report_data, current_row)
-        elif report_type == 'profit_loss':
-            current_row = self._export_profit_loss_to_excel(ws, report_data, current_row)
-        elif report_type == 'balance_sheet':
-            current_row = self._export_balance_sheet_to_excel(ws, report_data, current_row)
-        elif report_type == 'inventory_valuation':
-            current_row = self._export_inventory_valuation_to_excel(ws, report_data, current_row)
-        elif report_type == 'customer_aging':
-            current_row = self._export_customer_aging_to_excel(ws, report_data, current_row)
+        if output_format == 'excel':
+            self.write_excel(stream, file_path)
+        elif output_format in ('csv', 'jsonl'):
+            chunks = self.iter_csv(stream) if output_format == 'csv' else self.iter_jsonl(stream)
+            with open(file_path, 'w', newline='', encoding='utf-8') as output:
+                output.writelines(chunks)
         else:
-            # Generic export
-            current_row = self._export_generic_to_excel(ws, report_data, current_row)
-        
-        # Add generation timestamp
-        current_row += 2
-        ws[f'A{current_row}'] = f"تاریخ تولید گزارش: {report_data.get('generated_at_shamsi', '')}"
-        ws[f'A{current_row}'].font = Font(name='Tahoma', size=9, italic=True)
-        
-        # Auto-adjust column widths
-        for column in ws.columns:
-            max_length = 0
-            column_letter = get_column_letter(column[0].column)
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            ws.column_dimensions[column_letter].width = adjusted_width
-        
-        # Save file
-        file_path = os.path.join(self.reports_dir, filename)
-        wb.save(file_path)
+            raise ValueError(f"Unsupported streaming format: {output_format}")
         
         return file_path
     
-    def _export_trial_balance_to_excel(self, ws, report_data: Dict[str, Any], start_row: int) -> int:
-        """Export trial balance data to Excel worksheet."""
-        current_row = start_row
-        
-        # Headers
-        headers = ['کد حساب', 'نام حساب', 'نوع حساب', 'بدهکار', 'بستانکار']
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=current_row, column=col, value=header)
-            cell.font = Font(name='Tahoma', size=12, bold=True)
-            cell.fill = PatternFill(start_color='E6E6FA', end_color='E6E6FA', fill_type='solid')
-            cell.alignment = Alignment(horizontal='center')
-        
-        current_row += 1
-        
-        # Data rows
-        for account in report_data.get('accounts', []):
-            ws.cell(row=current_row, column=1, value=account['account_code'])
-            ws.cell(row=current_row, column=2, value=account['account_name_persian'])
-            ws.cell(row=current_row, column=3, value=account['account_type'])
-            ws.cell(row=current_row, column=4, value=account['debit_amount_formatted'])
-            ws.cell(row=current_row, column=5, value=account['credit_amount_formatted'])
-            current_row += 1
-        
-        # Totals row
-        current_row += 1
-        ws.cell(row=current_row, column=1, value='جمع کل').font = Font(bold=True)
-        ws.cell(row=current_row, column=4, value=report_data.get('total_debits_formatted', '')).font = Font(bold=True)
-        ws.cell(row=current_row, column=5, value=report_data.get('total_credits_formatted', '')).font = Font(bold=True)
-        
-        return current_row + 2
-    
-    def _export_profit_loss_to_excel(self, ws, report_data: Dict[str, Any], start_row: int) -> int:
-        """Export profit & loss data to Excel worksheet."""
-        current_row = start_row
-        
-        # Revenue section
-        ws.cell(row=current_row, column=1, value='درآمدها').font = Font(name='Tahoma', size=14, bold=True)
-        current_row += 1
-        
-        for account in report_data.get('revenue_accounts', []):
-            ws.cell(row=current_row, column=1, value=account['account_name_persian'])
-            ws.cell(row=current_row, column=2, value=account['amount_formatted'])
-            current_row += 1
+    def export_template_report(self, engine, template, parameters: Dict[str, Any],
+                               output_format: str, filename: str,
+                               generated_report=None) -> Tuple[str, Dict[str, Any]]:
+        """
+        Generate and export a report, streaming it when the format allows.
         
-        ws.cell(row=current_row, column=1, value='جمع درآمدها').font = Font(bold=True)
-        ws.cell(row=current_row, column=2, value=report_data.get('total_revenue_formatted', '')).font = Font(bold=True)
-        current_row += 2
+        Excel, CSV and JSON lines exports of the large report types are written straight
+        from the engine's row stream; only the header and totals are kept as
+        report data. Other combinations go through the report result store, so
+        concurrent requests for the same report compute it once and a stored
+        result is reused until the underlying data changes.
         
-        # Expense section
-        ws.cell(row=current_row, column=1, value='هزینه‌ها').font = Font(name='Tahoma', size=14, bold=True)
-        current_row += 1
+        Args:
+            generated_report: Record of this request, completed by the result store
         
-        for account in report_data.get('expense_accounts', []):
-            ws.cell(row=current_row, column=1, value=account['account_name_persian'])
-            ws.cell(row=current_row, column=2, value=account['amount_formatted'])
-            current_row += 1
+        Returns:
+            Tuple of (file path, JSON-safe report data to store)
+        """
+        if output_format in STREAMED_FORMATS and template.report_type in engine.STREAMED_REPORT_TYPES:
+            stream = engine.stream_report(template, parameters)
+            file_path = self.export_stream(stream, output_format, filename)
+            return file_path, self._prepare_for_json(stream.summary())
+        
+        report_data = ReportResultStore(engine).get_or_generate(template, parameters, generated_report)
+        file_path = self.export_report(report_data, output_format, filename)
+        return file_path, report_data
+    
+    def write_excel(self, stream: ReportStream, target):
+        """
+        Write a report stream to an Excel workbook in write-only mode.
         
-        ws.cell(row=current_row, column=1, value='جمع هزینه‌ها').font = Font(bold=True)
-        ws.cell(row=current_row, column=2, value=report_data.get('total_expenses_formatted', '')).font = Font(bold=True)
-        current_row += 2
+        Rows are flushed to the file as they are appended, so memory use does
+        not grow with the number of rows. Column widths come from the stream
+        since write-only sheets cannot be measured after the fact.
         
-        # Net income
-        ws.cell(row=current_row, column=1, value='سود خالص').font = Font(name='Tahoma', size=14, bold=True)
-        ws.cell(row=current_row, column=2, value=report_data.get('net_income_formatted', '')).font = Font(name='Tahoma', size=14, bold=True)
+        Args:
+            stream: ReportStream to consume
+            target: File path or binary file object
+        """
+        if not OPENPYXL_AVAILABLE:
+            raise ImportError("openpyxl is required for Excel export")
         
-        return current_row + 2
-    
-    def _export_balance_sheet_to_excel(self, ws, report_data: Dict[str, Any], start_row: int) -> int:
-        """Export balance sheet data to Excel worksheet."""
-        current_row = start_row
+        wb = openpyxl.Workbook(write_only=True)
+        for style in _excel_named_styles():
+            wb.add_named_style(style)
         
-        # Assets section
-        ws.cell(row=current_row, column=1, value='دارایی‌ها').font = Font(name='Tahoma', size=14, bold=True)
-        current_row += 1
+        ws = wb.create_sheet(title=_excel_sheet_title(stream.title))
+        ws.sheet_view.rightToLeft = True
         
-        for category, accounts in report_data.get('assets', {}).items():
-            ws.cell(row=current_row, column=1, value=category).font = Font(bold=True)
-            current_row += 1
-            
-            for account in accounts:
-                ws.cell(row=current_row, column=2, value=account['account_name_persian'])
-                ws.cell(row=current_row, column=3, value=account['amount_formatted'])
-                current_row += 1
-        
-        ws.cell(row=current_row, column=1, value='جمع دارایی‌ها').font = Font(bold=True)
-        ws.cell(row=current_row, column=3, value=report_data.get('total_assets_formatted', '')).font = Font(bold=True)
-        current_row += 2
-        
-        # Liabilities section
-        ws.cell(row=current_row, column=1, value='بدهی‌ها').font = Font(name='Tahoma', size=14, bold=True)
-        current_row += 1
-        
-        for category, accounts in report_data.get('liabilities', {}).items():
-            ws.cell(row=current_row, column=1, value=category).font = Font(bold=True)
-            current_row += 1
-            
-            for account in accounts:
-                ws.cell(row=current_row, column=2, value=account['account_name_persian'])
-                ws.cell(row=current_row, column=3, value=account['amount_formatted'])
-                current_row += 1
-        
-        # Equity section
-        ws.cell(row=current_row, column=1, value='حقوق صاحبان سهام').font = Font(name='Tahoma', size=14, bold=True)
-        current_row += 1
-        
-        for category, accounts in report_data.get('equity', {}).items():
-            ws.cell(row=current_row, column=1, value=category).font = Font(bold=True)
-            current_row += 1
-            
-            for account in accounts:
-                ws.cell(row=current_row, column=2, value=account['account_name_persian'])
-                ws.cell(row=current_row, column=3, value=account['amount_formatted'])
-                current_row += 1
+        widths = stream.column_widths or [EXCEL_DEFAULT_COLUMN_WIDTH] * len(stream.columns)
+        for column, width in enumerate(widths, 1):
+            ws.column_dimensions[get_column_letter(column)].width = width
         
-        ws.cell(row=current_row, column=1, value='جمع بدهی‌ها و حقوق صاحبان سهام').font = Font(bold=True)
-        ws.cell(row=current_row, column=3, value=report_data.get('total_liabilities_equity_formatted', '')).font = Font(bold=True)
+        def styled(value, style):
+            cell = WriteOnlyCell(ws, value=value)
+            cell.style = style
+            return cell
         
-        return current_row + 2
-    
-    def _export_inventory_valuation_to_excel(self, ws, report_data: Dict[str, Any], start_row: int) -> int:
-        """Export inventory valuation data to Excel worksheet."""
-        current_row = start_row
-        
-        # Headers
-        headers = ['کد کالا', 'نام کالا', 'تعداد', 'وزن (گرم)', 'عیار', 'اجرت ساخت', 'ارزش کل']
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=current_row, column=col, value=header)
-            cell.font = Font(name='Tahoma', size=12, bold=True)
-            cell.fill = PatternFill(start_color='E6E6FA', end_color='E6E6FA', fill_type='solid')
-        
-        current_row += 1
-        
-        # Data by category
-        for category in report_data.get('categories', []):
-            # Category header
-            ws.cell(row=current_row, column=1, value=category['category_name']).font = Font(bold=True)
-            current_row += 1
-            
-            # Category items
-            for item in category['items']:
-                ws.cell(row=current_row, column=1, value=item['sku'])
-                ws.cell(row=current_row, column=2, value=item['name'])
-                ws.cell(row=current_row, column=3, value=item['quantity'])
-                ws.cell(row=current_row, column=4, value=item['weight_grams_formatted'])
-                ws.cell(row=current_row, column=5, value=item['karat'])
-                ws.cell(row=current_row, column=6, value=item['manufacturing_cost_formatted'])
-                ws.cell(row=current_row, column=7, value=item['total_item_value_formatted'])
-                current_row += 1
-            
-            # Category total
-            ws.cell(row=current_row, column=6, value='جمع دسته‌بندی:').font = Font(bold=True)
-            ws.cell(row=current_row, column=7, value=category['category_total_value_formatted']).font = Font(bold=True)
-            current_row += 2
+        ws.append([styled(stream.title, 'report_title')])
+        ws.append([])
+        if stream.date_line:
+            ws.append([styled(stream.date_line, 'report_data')])
+            ws.append([])
         
-        # Grand total
-        ws.cell(row=current_row, column=6, value='جمع کل موجودی:').font = Font(name='Tahoma', size=14, bold=True)
-        ws.cell(row=current_row, column=7, value=report_data.get('total_inventory_value_formatted', '')).font = Font(name='Tahoma', size=14, bold=True)
+        ws.append([styled(label, 'report_header') for _key, label in stream.columns])
         
-        return current_row + 2
-    
-    def _export_customer_aging_to_excel(self, ws, report_data: Dict[str, Any], start_row: int) -> int:
-        """Export customer aging data to Excel worksheet."""
-        current_row = start_row
-        
-        # Headers
-        headers = ['نام مشتری', 'شماره تماس', 'جمع مطالبات'] + report_data.get('aging_period_labels', [])
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=current_row, column=col, value=header)
-            cell.font = Font(name='Tahoma', size=12, bold=True)
-            cell.fill = PatternFill(start_color='E6E6FA', end_color='E6E6FA', fill_type='solid')
-        
-        current_row += 1
-        
-        # Customer data
-        for customer in report_data.get('customers', []):
-            ws.cell(row=current_row, column=1, value=customer['customer_name'])
-            ws.cell(row=current_row, column=2, value=customer['phone_number'])
-            ws.cell(row=current_row, column=3, value=customer['total_outstanding_formatted'])
-            
-            # Aging breakdown
-            col = 4
-            for period_key in customer['aging_breakdown_formatted']:
-                ws.cell(row=current_row, column=col, value=customer['aging_breakdown_formatted'][period_key])
-                col += 1
-            
-            current_row += 1
-        
-        # Totals row
-        current_row += 1
-        ws.cell(row=current_row, column=1, value='جمع کل').font = Font(bold=True)
-        ws.cell(row=current_row, column=3, value=report_data.get('total_outstanding_formatted', '')).font = Font(bold=True)
+        row_styles = {ROW_SECTION: 'report_section', ROW_TOTAL: 'report_total'}
+        for kind, values in stream:
+            style = row_styles.get(kind)
+            if style is None:
+                ws.append([None if value == '' else value for value in values])
+            else:
+                ws.append([None if value == '' else styled(value, style) for value in values])
         
-        col = 4
-        for period_key in report_data.get('aging_totals_formatted', {}):
-            ws.cell(row=current_row, column=col, value=report_data['aging_totals_formatted'][period_key]).font = Font(bold=True)
-            col += 1
+        ws.append([])
+        ws.append([styled(f"تاریخ تولید گزارش: {stream.header.get('generated_at_shamsi', '')}", 'report_footer')])
         
-        return current_row + 2
+        wb.save(target)
     
-    def _export_generic_to_excel(self, ws, report_data: Dict[str, Any], start_row: int) -> int:
-        """Export generic report data to Excel worksheet."""
-        current_row = start_row
-        
-        # Add key-value pairs from report data
-        for key, value in report_data.items():
-            if key not in ['report_type', 'generated_at', 'generated_at_shamsi']:
-                ws.cell(row=current_row, column=1, value=str(key))
-                ws.cell(row=current_row, column=2, value=str(value))
-                current_row += 1
-        
-        return current_row + 2
-    
-    def export_to_csv(self, report_data: Dict[str, Any], filename: str) -> str:
+    def iter_csv(self, stream: ReportStream) -> Iterator[str]:
         """
-        Export report to CSV format.
+        Yield a report stream as CSV text, one row at a time.
         
-        Args:
-            report_data: Report data dictionary
-            filename: Output filename
-            
-        Returns:
-            Path to generated CSV file
+        The first chunk is a UTF-8 byte order mark so Excel opens the Persian
+        text correctly.
         """
-        file_path = os.path.join(self.reports_dir, filename)
+        writer = csv.writer(_EchoBuffer())
         
-        with open(file_path, 'w', newline='', encoding='utf-8-sig') as csvfile:
-            writer = csv.writer(csvfile)
-            
-            # Write header
-            writer.writerow([
-                report_data.get('report_title_persian', 'گزارش'),
-                f"تاریخ: {report_data.get('generated_at_shamsi', '')}"
-            ])
-            writer.writerow([])  # Empty row
-            
-            # Export based on report type
-            report_type = report_data.get('report_type')
-            
-            if report_type == 'trial_balance':
-                self._export_trial_balance_to_csv(writer, report_data)
-            elif report_type == 'inventory_valuation':
-                self._export_inventory_valuation_to_csv(writer, report_data)
-            elif report_type == 'customer_aging':
-                self._export_customer_aging_to_csv(writer, report_data)
-            else:
-                # Generic CSV export
-                for key, value in report_data.items():
-                    if isinstance(value, (str, int, float, Decimal)):
-                        writer.writerow([key, value])
+        yield '\ufeff'
+        yield writer.writerow([stream.title, f"تاریخ: {stream.header.get('generated_at_shamsi', '')}"])
+        yield writer.writerow([])  # Empty row
+        yield writer.writerow([label for _key, label in stream.columns])
         
-        return file_path
-    
-    def _export_trial_balance_to_csv(self, writer, report_data: Dict[str, Any]):
-        """Export trial balance to CSV."""
-        writer.writerow(['کد حساب', 'نام حساب', 'نوع حساب', 'بدهکار', 'بستانکار'])
-        
-        for account in report_data.get('accounts', []):
-            writer.writerow([
-                account['account_code'],
-                account['account_name_persian'],
-                account['account_type'],
-                account['debit_amount_formatted'],
-                account['credit_amount_formatted']
-            ])
-        
-        writer.writerow([])
-        writer.writerow(['جمع کل', '', '', 
-                        report_data.get('total_debits_formatted', ''),
-                        report_data.get('total_credits_formatted', '')])
+        for _kind, values in stream:
+            yield writer.writerow(values)
     
-    def _export_inventory_valuation_to_csv(self, writer, report_data: Dict[str, Any]):
-        """Export inventory valuation to CSV."""
-        writer.writerow(['کد کالا', 'نام کالا', 'تعداد', 'وزن (گرم)', 'عیار', 'ارزش کل'])
+    def iter_jsonl(self, stream: ReportStream) -> Iterator[str]:
+        """
+        Yield a report stream as JSON lines.
         
-        for category in report_data.get('categories', []):
-            writer.writerow([f"دسته‌بندی: {category['category_name']}"])
-            
-            for item in category['items']:
-                writer.writerow([
-                    item['sku'],
-                    item['name'],
-                    item['quantity'],
-                    item['weight_grams_formatted'],
-                    item['karat'],
-                    item['total_item_value_formatted']
-                ])
-            
-            writer.writerow(['', '', '', '', 'جمع دسته‌بندی:', category['category_total_value_formatted']])
-            writer.writerow([])
+        The first line holds the report header and each following line one
+        row keyed by column; the last line carries the totals accumulated
+        while streaming.
+        """
+        keys = [key for key, _label in stream.columns]
         
-        writer.writerow(['', '', '', '', 'جمع کل:', report_data.get('total_inventory_value_formatted', '')])
+        yield self._json_line({'type': 'header', **stream.header, 'columns': dict(stream.columns)})
+        for kind, values in stream:
+            yield self._json_line({'type': kind, **dict(zip(keys, values))})
+        yield self._json_line({'type': 'summary', **stream.totals})
     
-    def _export_customer_aging_to_csv(self, writer, report_data: Dict[str, Any]):
-        """Export customer aging to CSV."""
-        headers = ['نام مشتری', 'شماره تماس', 'جمع مطالبات'] + report_data.get('aging_period_labels', [])
-        writer.writerow(headers)
-        
-        for customer in report_data.get('customers', []):
-            row = [
-                customer['customer_name'],
-                customer['phone_number'],
-                customer['total_outstanding_formatted']
-            ]
-            
-            for period_key in customer['aging_breakdown_formatted']:
-                row.append(customer['aging_breakdown_formatted'][period_key])
-            
-            writer.writerow(row)
-        
-        # Totals row
-        totals_row = ['جمع کل', '', report_data.get('total_outstanding_formatted', '')]
-        for period_key in report_data.get('aging_totals_formatted', {}):
-            totals_row.append(report_data['aging_totals_formatted'][period_key])
-        
-        writer.writerow(totals_row)
+    def _json_line(self, data: Dict[str, Any]) -> str:
+        return json.dumps(self._prepare_for_json(data), ensure_ascii=False, default=str) + '\n'
     
     def export_to_json(self, report_data: Dict[str, Any], filename: str) -> str:
         """
@@ -646,24 +338,101 @@ class ReportExporter:
             response['Content-Disposition'] = f'attachment; filename="{filename}"'
             return response
         
+        elif output_format in ('csv', 'jsonl'):
+            return self.create_streaming_response(report_stream_from_data(report_data), output_format, filename)
+        
         else:
-            # Generate file and return as download
+            # Generate file and stream it from disk
             file_path = self.export_report(report_data, output_format, filename)
             
-            with open(file_path, 'rb') as f:
-                file_content = f.read()
-            
-            # Determine content type
-            content_types = {
-                'pdf': 'application/pdf',
-                'excel': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                'csv': 'text/csv; charset=utf-8-sig',
-            }
-            
-            response = HttpResponse(
-                file_content,
-                content_type=content_types.get(output_format, 'application/octet-stream')
+            return FileResponse(
+                open(file_path, 'rb'),
+                as_attachment=True,
+                filename=filename,
+                content_type=CONTENT_TYPES.get(output_format, 'application/octet-stream')
+            )
+    
+    def create_streaming_response(self, stream: ReportStream, output_format: str, filename: str):
+        """
+        Create a download response that writes the report stream as it is sent.
+        
+        CSV and JSON lines are generated row by row inside the response.
+        Excel is written in write-only mode to a temporary file, which is
+        streamed and deleted once sent.
+        
+        Args:
+            stream: ReportStream to consume
+            output_format: csv, jsonl or excel
+            filename: Download filename
+        """
+        if output_format in ('csv', 'jsonl'):
+            chunks = self.iter_csv(stream) if output_format == 'csv' else self.iter_jsonl(stream)
+            response = StreamingHttpResponse(
+                (chunk.encode('utf-8') for chunk in chunks),
+                content_type=CONTENT_TYPES[output_format]
             )
             response['Content-Disposition'] = f'attachment; filename="{filename}"'
-            
-            return response
\ No newline at end of file
+            return response
+        
+        if output_format == 'excel':
+            output = tempfile.TemporaryFile()
+            self.write_excel(stream, output)
+            output.seek(0)
+            return FileResponse(
+                output, as_attachment=True, filename=filename, content_type=CONTENT_TYPES['excel']
+            )
+        
+        raise ValueError(f"Unsupported streaming format: {output_format}")
+
+
+def load_report_pdf_data(report_id) -> Dict[str, Any]:
+    """Stored report data for the PDF workers."""
+    return GeneratedReport.objects.only('report_data').get(report_id=report_id).report_data
+
+
+def render_report_pdf(report_data: Dict[str, Any]) -> bytes:
+    """Render report data with its type's PDF template, falling back to the generic one."""
+    report_type = report_data.get('report_type', 'generic')
+    stream = report_stream_from_data(report_data)
+    return render_html_pdf(
+        (f'reports/pdf/{report_type}.html', 'reports/pdf/generic.html'),
+        {'report': report_data, 'stream': stream, 'rows': list(stream)}
+    )
+
+
+class _EchoBuffer:
+    """File-like object whose write returns the value, for streaming csv.writer rows."""
+    
+    def write(self, value):
+        return value
+
+
+def _excel_named_styles():
+    """Named styles shared by every cell of a kind, instead of per-cell fonts and fills."""
+    border = Border(
+        left=Side(style='thin'),
+        right=Side(style='thin'),
+        top=Side(style='thin'),
+        bottom=Side(style='thin')
+    )
+    return [
+        NamedStyle(name='report_title', font=Font(name='Tahoma', size=16, bold=True)),
+        NamedStyle(
+            name='report_header',
+            font=Font(name='Tahoma', size=12, bold=True),
+            fill=PatternFill(start_color='E6E6FA', end_color='E6E6FA', fill_type='solid'),
+            alignment=Alignment(horizontal='center'),
+            border=border,
+        ),
+        NamedStyle(name='report_data', font=Font(name='Tahoma', size=11)),
+        NamedStyle(name='report_section', font=Font(name='Tahoma', size=12, bold=True)),
+        NamedStyle(name='report_total', font=Font(name='Tahoma', size=12, bold=True), border=border),
+        NamedStyle(name='report_footer', font=Font(name='Tahoma', size=9, italic=True)),
+    ]
+
+
+def _excel_sheet_title(title: str) -> str:
+    """Worksheet name without the characters Excel rejects, within its 31 character limit."""
+    for character in '[]:*?/\\':
+        title = title.replace(character, ' ')
+    return title[:31] or 'Report'
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.24 on 2026-10-18 21:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0003_notification_system'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generatedreport',
+            name='result_key',
+            field=models.CharField(blank=True, help_text='Hash of template, parameters and data version, for reusing results', max_length=64, verbose_name='Result Key'),
+        ),
+        migrations.AddIndex(
+            model_name='generatedreport',
+            index=models.Index(fields=['result_key', 'status'], name='reports_gen_result__d20039_idx'),
+        ),
+    ]
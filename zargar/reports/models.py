@@ -242,6 +242,12 @@ class GeneratedReport(TenantAwareModel):
         verbose_name=_('Report Data'),
         help_text=_('Cached report data for quick access')
     )
+    result_key = models.CharField(
+        max_length=64,
+        blank=True,
+        verbose_name=_('Result Key'),
+        help_text=_('Hash of template, parameters and data version, for reusing results')
+    )
     
     class Meta:
         verbose_name = _('Generated Report')
@@ -253,6 +259,7 @@ class GeneratedReport(TenantAwareModel):
             models.Index(fields=['status']),
             models.Index(fields=['generated_at']),
             models.Index(fields=['expires_at']),
+            models.Index(fields=['result_key', 'status']),
         ]
     
     def __str__(self):
@@ -496,9 +503,15 @@ class ReportSchedule(TenantAwareModel):
         now = timezone.now()
         return now >= self.next_execution
     
-    def mark_execution(self, success: bool = True):
-        """Mark schedule as executed."""
-        self.last_execution = timezone.now()
+    def mark_execution(self, success: bool = True, advance: bool = True):
+        """
+        Mark schedule as executed.
+        
+        Args:
+            success: Whether the execution succeeded
+            advance: Move next_execution forward; schedules claimed by the
+                scheduler were already advanced when claimed
+        """
         self.total_executions += 1
         
         if success:
@@ -506,17 +519,20 @@ class ReportSchedule(TenantAwareModel):
         else:
             self.failed_executions += 1
         
-        # Calculate next execution
-        self.calculate_next_execution()
-        
-        self.save(update_fields=[
-            'last_execution',
+        update_fields = [
             'total_executions',
             'successful_executions',
             'failed_executions',
-            'next_execution',
             'updated_at'
-        ])
+        ]
+        
+        if advance:
+            # Calculate next execution
+            self.last_execution = timezone.now()
+            self.calculate_next_execution()
+            update_fields += ['last_execution', 'next_execution']
+        
+        self.save(update_fields=update_fields)
 
 
 class ReportDelivery(TenantAwareModel):
@@ -0,0 +1,213 @@
+"""
+Single-flight report generation with results persisted in GeneratedReport.
+
+A report result is identified by a key hashed from the tenant, template,
+parameters and the data version of the ledgers the report reads. The first
+request for a key takes a Redis lock and computes the report; concurrent
+requests for the same key wait for the lock to be released and then read the
+stored result instead of computing it again. Completed results are kept on
+GeneratedReport, so they are reused across workers and restarts until they
+expire.
+
+Each report type reads one data domain (accounting, inventory or
+installments). Saving or deleting a model of a domain bumps its version, so
+later requests hash to a new key and recompute; code that writes with
+bulk_update or update() calls invalidate_report_results() itself. The bump
+happens when the writing transaction commits: bumped earlier, a request
+could read the new version but the old rows and store that result under
+the new key.
+"""
+import hashlib
+import json
+import logging
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import GeneratedReport, ReportTemplate
+
+logger = logging.getLogger(__name__)
+
+# Ledger domain each report type is computed from
+REPORT_DATA_DOMAINS = {
+    'trial_balance': 'accounting',
+    'profit_loss': 'accounting',
+    'balance_sheet': 'accounting',
+    'inventory_valuation': 'inventory',
+    'customer_aging': 'installments',
+    'sales_summary': 'installments',
+    'gold_price_analysis': 'installments',
+    'installment_summary': 'installments',
+}
+
+# Models whose changes invalidate a domain's report results
+DOMAIN_MODELS = {
+    'accounting': (
+        'accounting.ChartOfAccounts', 'accounting.JournalEntry', 'accounting.JournalEntryLine',
+        'accounting.GeneralLedger', 'accounting.SubsidiaryLedger',
+    ),
+    'inventory': ('jewelry.JewelryItem', 'jewelry.Category'),
+    'installments': (
+        'gold_installments.GoldInstallmentContract', 'gold_installments.GoldInstallmentPayment',
+        'customers.Customer',
+    ),
+}
+
+
+def to_json_data(data: Any) -> Any:
+    """Round-trip data through JSON as it is stored on GeneratedReport."""
+    return json.loads(json.dumps(data, cls=DjangoJSONEncoder))
+
+
+def _version_key(domain: str, schema_name: Optional[str] = None) -> str:
+    return f'report_data_version:{schema_name or connection.schema_name}:{domain}'
+
+
+def data_version(domain: str) -> int:
+    """Current data version of a domain for this tenant."""
+    key = _version_key(domain)
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock rather than 1 so a flushed Redis never
+        # reissues a version that stored results were keyed on
+        cache.add(key, int(time.time()), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_report_results(*domains: str):
+    """
+    Make stored report results of the given domains stale for this tenant,
+    once the current transaction commits.
+
+    Args:
+        domains: Data domains, all domains if none are given
+    """
+    schema_name = connection.schema_name
+    domains = domains or tuple(DOMAIN_MODELS)
+    transaction.on_commit(lambda: _bump_versions(schema_name, domains))
+
+
+def _bump_versions(schema_name: str, domains):
+    for domain in domains:
+        key = _version_key(domain, schema_name)
+        try:
+            if not cache.add(key, int(time.time()), timeout=None):
+                cache.incr(key)
+        except Exception as e:
+            logger.error(f"Could not invalidate {domain} report results: {e}")
+
+
+class ReportResultStore:
+    """
+    Single-flight front for ComprehensiveReportingEngine.generate_report.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def result_key(self, template: ReportTemplate, parameters: Dict[str, Any]) -> str:
+        """Hash of the tenant, template, parameters and data version."""
+        domain = REPORT_DATA_DOMAINS.get(template.report_type)
+        version = data_version(domain) if domain else None
+        payload = json.dumps(
+            [connection.schema_name, template.pk, template.report_type, parameters, version],
+            sort_keys=True, cls=DjangoJSONEncoder
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def find(self, result_key: str) -> Optional[GeneratedReport]:
+        """The newest unexpired completed result for a key."""
+        return GeneratedReport.objects.filter(
+            result_key=result_key,
+            status='completed',
+            report_data__isnull=False,
+            expires_at__gt=timezone.now(),
+        ).order_by('-generated_at').first()
+
+    def get_or_generate(self, template: ReportTemplate, parameters: Dict[str, Any],
+                        generated_report: Optional[GeneratedReport] = None) -> Dict[str, Any]:
+        """
+        Return the report data, computing it at most once across concurrent requests.
+
+        Args:
+            template: Report template
+            parameters: Report parameters
+            generated_report: Record of this request to complete with the result;
+                a new record is stored when omitted
+
+        Returns:
+            Report data as stored on GeneratedReport (JSON types)
+        """
+        result_key = self.result_key(template, parameters)
+        lock_key = f'report_lock:{result_key}'
+        deadline = time.monotonic() + settings.REPORT_SINGLE_FLIGHT_WAIT
+
+        while True:
+            stored = self.find(result_key)
+            if stored is not None:
+                return self._reuse(stored, generated_report)
+
+            token = uuid.uuid4().hex
+            if cache.add(lock_key, token, settings.REPORT_SINGLE_FLIGHT_LOCK_TIMEOUT):
+                try:
+                    # A leader that finished between find() and add() left its result
+                    stored = self.find(result_key)
+                    if stored is not None:
+                        return self._reuse(stored, generated_report)
+                    return self._generate(template, parameters, result_key, generated_report)
+                finally:
+                    if cache.get(lock_key) == token:
+                        cache.delete(lock_key)
+
+            if time.monotonic() >= deadline:
+                logger.warning(f"Timed out waiting for report {result_key}, generating it here")
+                return self._generate(template, parameters, result_key, generated_report)
+
+            self._wait_for_release(lock_key, deadline)
+
+    def _wait_for_release(self, lock_key: str, deadline: float):
+        while cache.get(lock_key) is not None and time.monotonic() < deadline:
+            time.sleep(settings.REPORT_SINGLE_FLIGHT_POLL_INTERVAL)
+
+    def _generate(self, template, parameters, result_key, generated_report) -> Dict[str, Any]:
+        started_at = timezone.now()
+        report_data = to_json_data(self.engine.generate_report(template, parameters))
+        completed_at = timezone.now()
+
+        record = generated_report or GeneratedReport(
+            template=template,
+            report_parameters=to_json_data(parameters),
+            date_from=parameters.get('date_from'),
+            date_to=parameters.get('date_to'),
+            output_format='json',
+        )
+        record.status = 'completed'
+        record.generation_started_at = record.generation_started_at or started_at
+        record.generation_completed_at = completed_at
+        record.generation_duration_seconds = int((completed_at - record.generation_started_at).total_seconds())
+        record.report_data = report_data
+        record.result_key = result_key
+        record.save()
+
+        logger.info(f"Generated report {record.report_id} for result {result_key}")
+        return report_data
+
+    def _reuse(self, stored: GeneratedReport, generated_report: Optional[GeneratedReport]) -> Dict[str, Any]:
+        if generated_report is not None and generated_report.pk != stored.pk:
+            now = timezone.now()
+            generated_report.status = 'completed'
+            generated_report.generation_started_at = generated_report.generation_started_at or now
+            generated_report.generation_completed_at = now
+            generated_report.generation_duration_seconds = 0
+            generated_report.report_data = stored.report_data
+            generated_report.result_key = stored.result_key
+            generated_report.save()
+
+        return stored.report_data
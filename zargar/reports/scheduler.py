@@ -8,8 +8,11 @@ according to configured schedules.
 from django.utils import timezone
 from django.core.mail import EmailMessage
 from django.conf import settings
+from django.db import connection, transaction
 from django.template.loader import render_to_string
+from django_tenants.utils import schema_context
 from celery import shared_task
+import json
 import logging
 from typing import List, Dict, Any, Optional
 from decimal import Decimal
@@ -19,6 +22,7 @@ from datetime import datetime, timedelta
 from .models import ReportSchedule, ReportTemplate, GeneratedReport, ReportDelivery
 from .services import ComprehensiveReportingEngine
 from .exporters import ReportExporter
+from zargar.core.tenant_tasks import map_over_tenants
 
 logger = logging.getLogger(__name__)
 
@@ -43,13 +47,10 @@ class ReportScheduler:
         executed_schedules = []
         failed_schedules = []
         
-        # Get all active schedules that should execute now
-        schedules_to_execute = ReportSchedule.objects.filter(
-            is_active=True,
-            next_execution__lte=timezone.now()
-        )
+        # Claim active schedules that should execute now
+        schedules_to_execute = self.claim_due_schedules()
         
-        logger.info(f"Found {schedules_to_execute.count()} schedules to execute")
+        logger.info(f"Found {len(schedules_to_execute)} schedules to execute")
         
         for schedule in schedules_to_execute:
             try:
@@ -77,6 +78,82 @@ class ReportScheduler:
             'execution_time': timezone.now()
         }
     
+    def claim_due_schedules(self, limit: Optional[int] = None) -> List[ReportSchedule]:
+        """
+        Claim due schedules of the current tenant and advance their next execution.
+        
+        Due rows are locked with SKIP LOCKED and their next_execution is moved
+        forward in the same transaction, so concurrent dispatchers (a second
+        beat instance, an overlapping run) claim disjoint schedules and a
+        claimed schedule is not picked up again.
+        
+        Args:
+            limit: Maximum number of schedules to claim
+            
+        Returns:
+            List of claimed ReportSchedule instances
+        """
+        limit = limit or settings.REPORT_SCHEDULE_CLAIM_BATCH_SIZE
+        now = timezone.now()
+        
+        with transaction.atomic():
+            schedules = list(
+                ReportSchedule.objects
+                .select_for_update(skip_locked=True, of=('self',))
+                .select_related('template')
+                .filter(is_active=True, next_execution__lte=now)
+                .order_by('next_execution')[:limit]
+            )
+            
+            for schedule in schedules:
+                schedule.last_execution = now
+                schedule.calculate_next_execution()
+                schedule.save(update_fields=['last_execution', 'next_execution', 'updated_at'])
+        
+        return schedules
+    
+    def dispatch_due_schedules(self) -> Dict[str, Any]:
+        """
+        Claim due schedules and hand them to the report generation workers.
+        
+        Schedules of the same template, frequency and parameters produce the
+        same report, so each such group is generated once and delivered to
+        every schedule in it.
+        
+        Returns:
+            Dictionary with claim and dispatch counts
+        """
+        schedules = self.claim_due_schedules()
+        
+        groups = {}
+        for schedule in schedules:
+            groups.setdefault(self._schedule_group_key(schedule), []).append(schedule.id)
+        
+        dispatched = 0
+        for schedule_ids in groups.values():
+            try:
+                generate_scheduled_report.apply_async(
+                    args=(schedule_ids, connection.schema_name),
+                    queue=settings.REPORT_GENERATION_QUEUE
+                )
+                dispatched += 1
+            except Exception as e:
+                logger.error(f"Failed to dispatch report schedules {schedule_ids}: {str(e)}")
+        
+        logger.info(f"Claimed {len(schedules)} report schedules, dispatched {dispatched} reports")
+        
+        return {
+            'claimed_count': len(schedules),
+            'dispatched_count': dispatched,
+        }
+    
+    def _schedule_group_key(self, schedule: ReportSchedule) -> str:
+        """Key shared by schedules that generate identical reports."""
+        return json.dumps(
+            [schedule.template_id, schedule.frequency, schedule.schedule_parameters],
+            sort_keys=True, default=str
+        )
+    
     def execute_schedule(self, schedule: ReportSchedule) -> Dict[str, Any]:
         """
         Execute a specific report schedule.
@@ -183,17 +260,14 @@ class ReportScheduler:
             # Set tenant context for reporting engine
             self.reporting_engine.tenant = schedule.tenant
             
-            # Generate report data
-            report_data = self.reporting_engine.generate_report(
-                schedule.template, 
-                parameters
-            )
-            
-            # Export report to file
-            file_path = self.exporter.export_report(
-                report_data,
+            # Generate and export report to file, streaming large reports row by row
+            file_path, report_data = self.exporter.export_template_report(
+                self.reporting_engine,
+                schedule.template,
+                parameters,
                 generated_report.output_format,
-                generated_report.download_filename
+                generated_report.download_filename,
+                generated_report
             )
             
             # Update generated report
@@ -476,17 +550,88 @@ class ReportScheduler:
 @shared_task
 def execute_scheduled_reports():
     """
-    Celery task to execute scheduled reports.
+    Celery task to dispatch scheduled reports of every tenant.
     
-    This task should be run periodically (e.g., every hour) to check
-    for and execute any scheduled reports.
+    This task runs every few minutes; it only claims due schedules and
+    queues their generation, so a slow report does not delay the others.
     """
-    scheduler = ReportScheduler()
-    result = scheduler.check_and_execute_schedules()
+    return map_over_tenants(
+        'zargar.reports.scheduler.dispatch_tenant_report_schedules',
+        job_name='report_schedules'
+    )
+
+
+def dispatch_tenant_report_schedules(tenant):
+    """Claim and dispatch due report schedules for one tenant."""
+    return ReportScheduler().dispatch_due_schedules()
+
+
+@shared_task
+def generate_scheduled_report(schedule_ids: List[int], schema_name: str):
+    """
+    Celery task to generate the report shared by a group of claimed schedules.
     
-    logger.info(f"Scheduled report execution completed: {result['executed_count']} executed, {result['failed_count']} failed")
+    Delivery to each schedule is queued separately on REPORT_DELIVERY_QUEUE.
     
-    return result
+    Args:
+        schedule_ids: IDs of schedules producing the same report
+        schema_name: Tenant schema the schedules belong to
+        
+    Returns:
+        Generated report ID
+    """
+    with schema_context(schema_name):
+        schedules = list(
+            ReportSchedule.objects.select_related('template').filter(id__in=schedule_ids).order_by('id')
+        )
+        if not schedules:
+            return None
+        
+        scheduler = ReportScheduler()
+        schedule = schedules[0]
+        parameters = scheduler._build_schedule_parameters(schedule)
+        
+        try:
+            generated_report = scheduler._generate_scheduled_report(schedule, parameters)
+        except Exception:
+            for failed_schedule in schedules:
+                failed_schedule.mark_execution(success=False, advance=False)
+            raise
+        
+        for delivered_schedule in schedules:
+            deliver_scheduled_report.apply_async(
+                args=(delivered_schedule.id, generated_report.id, schema_name),
+                queue=settings.REPORT_DELIVERY_QUEUE
+            )
+        
+        return generated_report.report_id
+
+
+@shared_task
+def deliver_scheduled_report(schedule_id: int, generated_report_id: int, schema_name: str):
+    """
+    Celery task to deliver a generated report to a schedule's recipients.
+    
+    Args:
+        schedule_id: ReportSchedule ID
+        generated_report_id: GeneratedReport ID
+        schema_name: Tenant schema the schedule belongs to
+        
+    Returns:
+        Dictionary with delivery results
+    """
+    with schema_context(schema_name):
+        schedule = ReportSchedule.objects.get(id=schedule_id)
+        generated_report = GeneratedReport.objects.select_related('template').get(id=generated_report_id)
+        
+        delivery_results = ReportScheduler()._deliver_report(schedule, generated_report)
+        schedule.mark_execution(success=True, advance=False)
+        
+        return {
+            'schedule_id': schedule_id,
+            'generated_report_id': generated_report.report_id,
+            'delivery_results': delivery_results,
+        }
 
 
 @shared_task
@@ -516,16 +661,16 @@ def generate_single_report(template_id: int, parameters: Dict[str, Any], output_
             generation_started_at=timezone.now()
         )
         
-        # Generate report
+        # Generate and export report, streaming large reports row by row
         reporting_engine = ComprehensiveReportingEngine(tenant=template.tenant)
-        report_data = reporting_engine.generate_report(template, parameters)
-        
-        # Export report
         exporter = ReportExporter()
-        file_path = exporter.export_report(
-            report_data,
+        file_path, report_data = exporter.export_template_report(
+            reporting_engine,
+            template,
+            parameters,
             output_format,
-            generated_report.download_filename
+            generated_report.download_filename,
+            generated_report
         )
         
         # Update generated report
@@ -5,8 +5,9 @@ This module implements the core reporting logic including Persian financial repo
 inventory valuation, customer aging reports, and automated report generation.
 """
 
+from django.conf import settings
 from django.db import models
-from django.db.models import Sum, Count, Avg, Q, F, Case, When, Value
+from django.db.models import Sum, Count, Avg, Q, F, Case, When, Value, Prefetch
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from decimal import Decimal, ROUND_HALF_UP
@@ -14,6 +15,8 @@ from typing import Dict, List, Optional, Any, Tuple
 import jdatetime
 from datetime import date, datetime, timedelta
 
+from zargar.core.analytics import as_array, price_series_arrays, summarize_series
+from zargar.core.gold_price_history import get_price_series
 from zargar.core.persian_number_formatter import PersianNumberFormatter
 from zargar.accounting.models import (
     ChartOfAccounts, JournalEntry, JournalEntryLine, 
@@ -23,6 +26,11 @@ from zargar.jewelry.models import JewelryItem, Category
 from zargar.customers.models import Customer
 from zargar.gold_installments.models import GoldInstallmentContract, GoldInstallmentPayment
 from .models import ReportTemplate, GeneratedReport
+from .streaming import (
+    INVENTORY_VALUATION_COLUMNS, ROW_DATA, ROW_SECTION, ReportStream, customer_aging_columns,
+    customer_aging_row, customer_aging_total_row, inventory_category_total_row,
+    inventory_grand_total_row, inventory_valuation_row, report_stream_from_data
+)
 
 
 class ComprehensiveReportingEngine:
@@ -68,6 +76,22 @@ class ComprehensiveReportingEngine:
         else:
             raise ValueError(f"Unsupported report type: {report_type}")
     
+    # Report types exported row by row straight from the database
+    STREAMED_REPORT_TYPES = ('inventory_valuation', 'customer_aging')
+    
+    def stream_report(self, template: ReportTemplate, parameters: Dict[str, Any]) -> ReportStream:
+        """
+        Generate a report as a row stream for Excel, CSV or JSON lines export.
+        
+        Inventory valuation and customer aging are streamed from the database;
+        other report types are generated in full and laid out as a stream.
+        """
+        if template.report_type == 'inventory_valuation':
+            return self.stream_inventory_valuation_report(parameters)
+        if template.report_type == 'customer_aging':
+            return self.stream_customer_aging_report(parameters)
+        return report_stream_from_data(self.generate_report(template, parameters))
+    
     def generate_trial_balance(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
         """
         Generate Trial Balance report (ترازنامه آزمایشی).
@@ -411,21 +435,13 @@ class ComprehensiveReportingEngine:
         as_of_date = parameters.get('as_of_date', timezone.now().date())
         gold_price_per_gram = parameters.get('gold_price_per_gram', Decimal('0.00'))
         
-        # Get all jewelry items in stock
-        jewelry_items = JewelryItem.objects.filter(
-            status='in_stock',
-            quantity__gt=0
-        ).select_related('category').order_by('category__name_persian', 'name')
-        
         # Group by category
         categories_data = {}
         total_inventory_value = Decimal('0.00')
         total_items_count = 0
         total_weight = Decimal('0.000')
         
-        for item in jewelry_items:
-            category_name = item.category.name_persian or item.category.name
-            
+        for category_name, item_data in self.iter_inventory_valuation_items(parameters):
             if category_name not in categories_data:
                 categories_data[category_name] = {
                     'category_name': category_name,
@@ -435,6 +451,49 @@ class ComprehensiveReportingEngine:
                     'category_items_count': 0,
                 }
             
+            item_weight = item_data['weight_grams'] * item_data['quantity']
+            categories_data[category_name]['items'].append(item_data)
+            categories_data[category_name]['category_total_value'] += item_data['total_item_value']
+            categories_data[category_name]['category_total_weight'] += item_weight
+            categories_data[category_name]['category_items_count'] += item_data['quantity']
+            
+            total_inventory_value += item_data['total_item_value']
+            total_items_count += item_data['quantity']
+            total_weight += item_weight
+        
+        # Format category totals
+        for category_data in categories_data.values():
+            category_data['category_total_value_formatted'] = self.formatter.format_currency(
+                category_data['category_total_value'], use_persian_digits=True
+            )
+            category_data['category_total_weight_formatted'] = self.formatter.format_weight(
+                category_data['category_total_weight'], 'gram', use_persian_digits=True
+            )
+        
+        return {
+            **self._inventory_valuation_header(as_of_date, gold_price_per_gram),
+            'categories': list(categories_data.values()),
+            **self._inventory_valuation_totals(total_inventory_value, total_items_count, total_weight),
+        }
+    
+    def iter_inventory_valuation_items(self, parameters: Dict[str, Any]):
+        """
+        Yield (category_name, item_data) for every in-stock item, grouped by category.
+        
+        Items are fetched with a server-side iterator in chunks of
+        REPORT_EXPORT_CHUNK_SIZE so large inventories are never loaded at once.
+        """
+        gold_price_per_gram = parameters.get('gold_price_per_gram', Decimal('0.00'))
+        
+        # Get all jewelry items in stock; ordering by both category names keeps each category contiguous
+        jewelry_items = JewelryItem.objects.filter(
+            status='in_stock',
+            quantity__gt=0
+        ).select_related('category').order_by('category__name_persian', 'category__name', 'name')
+        
+        for item in jewelry_items.iterator(chunk_size=settings.REPORT_EXPORT_CHUNK_SIZE):
+            category_name = item.category.name_persian or item.category.name
+            
             # Calculate current gold value if gold price provided
             current_gold_value = Decimal('0.00')
             if gold_price_per_gram > 0:
@@ -447,7 +506,7 @@ class ComprehensiveReportingEngine:
                 (item.manufacturing_cost or Decimal('0.00'))
             ) * item.quantity
             
-            item_data = {
+            yield category_name, {
                 'sku': item.sku,
                 'name': item.name,
                 'quantity': item.quantity,
@@ -474,40 +533,72 @@ class ComprehensiveReportingEngine:
                 ),
                 'is_low_stock': item.is_low_stock,
             }
+    
+    def stream_inventory_valuation_report(self, parameters: Dict[str, Any]) -> ReportStream:
+        """
+        Inventory valuation as a row stream for export.
+        
+        Category and grand totals are accumulated while the rows are written
+        and are available on the stream's totals once it has been consumed.
+        """
+        as_of_date = parameters.get('as_of_date', timezone.now().date())
+        gold_price_per_gram = parameters.get('gold_price_per_gram', Decimal('0.00'))
+        totals = {}
+        
+        def rows():
+            current_category = None
+            category_total = Decimal('0.00')
+            total_inventory_value = Decimal('0.00')
+            total_items_count = 0
+            total_weight = Decimal('0.000')
             
-            categories_data[category_name]['items'].append(item_data)
-            categories_data[category_name]['category_total_value'] += item_total_value
-            categories_data[category_name]['category_total_weight'] += (item.weight_grams * item.quantity)
-            categories_data[category_name]['category_items_count'] += item.quantity
+            for category_name, item_data in self.iter_inventory_valuation_items(parameters):
+                if category_name != current_category:
+                    if current_category is not None:
+                        yield inventory_category_total_row(
+                            self.formatter.format_currency(category_total, use_persian_digits=True)
+                        )
+                    current_category = category_name
+                    category_total = Decimal('0.00')
+                    yield ROW_SECTION, [category_name] + [''] * (len(INVENTORY_VALUATION_COLUMNS) - 1)
+                
+                yield ROW_DATA, inventory_valuation_row(item_data)
+                category_total += item_data['total_item_value']
+                total_inventory_value += item_data['total_item_value']
+                total_items_count += item_data['quantity']
+                total_weight += item_data['weight_grams'] * item_data['quantity']
             
-            total_inventory_value += item_total_value
-            total_items_count += item.quantity
-            total_weight += (item.weight_grams * item.quantity)
-        
-        # Format category totals
-        for category_data in categories_data.values():
-            category_data['category_total_value_formatted'] = self.formatter.format_currency(
-                category_data['category_total_value'], use_persian_digits=True
-            )
-            category_data['category_total_weight_formatted'] = self.formatter.format_weight(
-                category_data['category_total_weight'], 'gram', use_persian_digits=True
-            )
-        
-        # Convert date to Shamsi
-        shamsi_date = jdatetime.date.fromgregorian(date=as_of_date)
-        as_of_date_shamsi = shamsi_date.strftime('%Y/%m/%d')
+            if current_category is not None:
+                yield inventory_category_total_row(
+                    self.formatter.format_currency(category_total, use_persian_digits=True)
+                )
+            
+            totals.update(self._inventory_valuation_totals(total_inventory_value, total_items_count, total_weight))
+            yield inventory_grand_total_row(totals['total_inventory_value_formatted'])
         
+        return ReportStream(
+            self._inventory_valuation_header(as_of_date, gold_price_per_gram),
+            INVENTORY_VALUATION_COLUMNS, rows(), totals,
+            column_widths=[16, 32, 8, 14, 8, 20, 24],
+        )
+    
+    def _inventory_valuation_header(self, as_of_date, gold_price_per_gram) -> Dict[str, Any]:
         return {
             'report_type': 'inventory_valuation',
             'report_title_persian': 'گزارش ارزش‌گذاری موجودی',
             'report_title_english': 'Inventory Valuation Report',
             'as_of_date': as_of_date,
-            'as_of_date_shamsi': as_of_date_shamsi,
+            'as_of_date_shamsi': jdatetime.date.fromgregorian(date=as_of_date).strftime('%Y/%m/%d'),
             'gold_price_per_gram': gold_price_per_gram,
             'gold_price_per_gram_formatted': self.formatter.format_currency(
                 gold_price_per_gram, use_persian_digits=True
             ),
-            'categories': list(categories_data.values()),
+            'generated_at': timezone.now(),
+            'generated_at_shamsi': jdatetime.datetime.now().strftime('%Y/%m/%d %H:%M'),
+        }
+    
+    def _inventory_valuation_totals(self, total_inventory_value, total_items_count, total_weight) -> Dict[str, Any]:
+        return {
             'total_inventory_value': total_inventory_value,
             'total_items_count': total_items_count,
             'total_weight': total_weight,
@@ -520,8 +611,6 @@ class ComprehensiveReportingEngine:
             'total_weight_formatted': self.formatter.format_weight(
                 total_weight, 'gram', use_persian_digits=True
             ),
-            'generated_at': timezone.now(),
-            'generated_at_shamsi': jdatetime.datetime.now().strftime('%Y/%m/%d %H:%M'),
         }
     
     def generate_customer_aging_report(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
@@ -537,28 +626,50 @@ class ComprehensiveReportingEngine:
         as_of_date = parameters.get('as_of_date', timezone.now().date())
         aging_periods = parameters.get('aging_periods', [30, 60, 90, 120])  # Days
         
-        # Get all customers with active gold installment contracts
-        customers_with_contracts = Customer.objects.filter(
-            gold_installment_contracts__status='active'
-        ).distinct().order_by('persian_last_name', 'last_name')
-        
         aging_data = []
         total_outstanding = Decimal('0.00')
         aging_totals = {f'period_{i}': Decimal('0.00') for i in range(len(aging_periods) + 1)}
         
-        for customer in customers_with_contracts:
-            # Get active contracts for this customer
-            active_contracts = GoldInstallmentContract.objects.filter(
-                customer=customer,
-                status='active'
+        for customer_data in self.iter_customer_aging(parameters):
+            aging_data.append(customer_data)
+            total_outstanding += customer_data['total_outstanding']
+            for key, value in customer_data['aging_breakdown'].items():
+                aging_totals[key] += value
+        
+        return {
+            **self._customer_aging_header(as_of_date, aging_periods),
+            'customers': aging_data,
+            **self._customer_aging_totals(total_outstanding, aging_totals, len(aging_data)),
+        }
+    
+    def iter_customer_aging(self, parameters: Dict[str, Any]):
+        """
+        Yield the aging breakdown of every customer with outstanding active contracts.
+        
+        Customers are fetched in chunks of REPORT_EXPORT_CHUNK_SIZE with their
+        active contracts prefetched per chunk.
+        """
+        as_of_date = parameters.get('as_of_date', timezone.now().date())
+        aging_periods = parameters.get('aging_periods', [30, 60, 90, 120])  # Days
+        current_gold_price = parameters.get('current_gold_price_per_gram', Decimal('0.00'))
+        
+        # Get all customers with active gold installment contracts
+        customers_with_contracts = Customer.objects.filter(
+            gold_installment_contracts__status='active'
+        ).distinct().order_by('persian_last_name', 'last_name').prefetch_related(
+            Prefetch(
+                'gold_installment_contracts',
+                queryset=GoldInstallmentContract.objects.filter(status='active'),
+                to_attr='active_contracts'
             )
-            
+        )
+        
+        for customer in customers_with_contracts.iterator(chunk_size=settings.REPORT_EXPORT_CHUNK_SIZE):
             customer_total = Decimal('0.00')
             customer_aging = {f'period_{i}': Decimal('0.00') for i in range(len(aging_periods) + 1)}
             
-            for contract in active_contracts:
+            for contract in customer.active_contracts:
                 # Calculate current gold value
-                current_gold_price = parameters.get('current_gold_price_per_gram', Decimal('0.00'))
                 if current_gold_price > 0:
                     gold_value_data = contract.calculate_current_gold_value(current_gold_price)
                     outstanding_amount = gold_value_data['total_value_toman']
@@ -569,8 +680,7 @@ class ComprehensiveReportingEngine:
                 customer_total += outstanding_amount
                 
                 # Determine aging period based on last payment or contract date
-                last_payment = contract.payments.order_by('-payment_date').first()
-                reference_date = last_payment.payment_date if last_payment else contract.contract_date
+                reference_date = contract.last_payment_date or contract.contract_date
                 days_outstanding = (as_of_date - reference_date).days
                 
                 # Categorize into aging periods
@@ -581,10 +691,9 @@ class ComprehensiveReportingEngine:
                         break
                 
                 customer_aging[f'period_{period_index}'] += outstanding_amount
-                aging_totals[f'period_{period_index}'] += outstanding_amount
             
             if customer_total > 0:
-                customer_data = {
+                yield {
                     'customer_id': customer.id,
                     'customer_name': customer.full_persian_name,
                     'phone_number': customer.phone_number,
@@ -597,12 +706,42 @@ class ComprehensiveReportingEngine:
                         key: self.formatter.format_currency(value, use_persian_digits=True)
                         for key, value in customer_aging.items()
                     },
-                    'active_contracts_count': active_contracts.count(),
+                    'active_contracts_count': len(customer.active_contracts),
                 }
-                
-                aging_data.append(customer_data)
-                total_outstanding += customer_total
+    
+    def stream_customer_aging_report(self, parameters: Dict[str, Any]) -> ReportStream:
+        """
+        Customer aging as a row stream for export.
         
+        Totals are accumulated while the rows are written and are available on
+        the stream's totals once it has been consumed.
+        """
+        as_of_date = parameters.get('as_of_date', timezone.now().date())
+        aging_periods = parameters.get('aging_periods', [30, 60, 90, 120])  # Days
+        header = self._customer_aging_header(as_of_date, aging_periods)
+        totals = {}
+        
+        def rows():
+            total_outstanding = Decimal('0.00')
+            aging_totals = {f'period_{i}': Decimal('0.00') for i in range(len(aging_periods) + 1)}
+            total_customers = 0
+            
+            for customer_data in self.iter_customer_aging(parameters):
+                yield ROW_DATA, customer_aging_row(customer_data)
+                total_outstanding += customer_data['total_outstanding']
+                for key, value in customer_data['aging_breakdown'].items():
+                    aging_totals[key] += value
+                total_customers += 1
+            
+            totals.update(self._customer_aging_totals(total_outstanding, aging_totals, total_customers))
+            yield customer_aging_total_row(totals['total_outstanding_formatted'], totals['aging_totals_formatted'])
+        
+        return ReportStream(
+            header, customer_aging_columns(header['aging_period_labels']), rows(), totals,
+            column_widths=[28, 16, 22] + [18] * len(header['aging_period_labels']),
+        )
+    
+    def _customer_aging_header(self, as_of_date, aging_periods) -> Dict[str, Any]:
         # Create aging period labels
         aging_period_labels = []
         for i, period_days in enumerate(aging_periods):
@@ -612,19 +751,20 @@ class ComprehensiveReportingEngine:
                 aging_period_labels.append(f'{aging_periods[i-1]+1}-{period_days} روز')
         aging_period_labels.append(f'بیش از {aging_periods[-1]} روز')
         
-        # Convert date to Shamsi
-        shamsi_date = jdatetime.date.fromgregorian(date=as_of_date)
-        as_of_date_shamsi = shamsi_date.strftime('%Y/%m/%d')
-        
         return {
             'report_type': 'customer_aging',
             'report_title_persian': 'گزارش تحلیل سن مطالبات مشتریان',
             'report_title_english': 'Customer Aging Report',
             'as_of_date': as_of_date,
-            'as_of_date_shamsi': as_of_date_shamsi,
+            'as_of_date_shamsi': jdatetime.date.fromgregorian(date=as_of_date).strftime('%Y/%m/%d'),
             'aging_periods': aging_periods,
             'aging_period_labels': aging_period_labels,
-            'customers': aging_data,
+            'generated_at': timezone.now(),
+            'generated_at_shamsi': jdatetime.datetime.now().strftime('%Y/%m/%d %H:%M'),
+        }
+    
+    def _customer_aging_totals(self, total_outstanding, aging_totals, total_customers) -> Dict[str, Any]:
+        return {
             'total_outstanding': total_outstanding,
             'aging_totals': aging_totals,
             'total_outstanding_formatted': self.formatter.format_currency(
@@ -634,9 +774,7 @@ class ComprehensiveReportingEngine:
                 key: self.formatter.format_currency(value, use_persian_digits=True)
                 for key, value in aging_totals.items()
             },
-            'total_customers': len(aging_data),
-            'generated_at': timezone.now(),
-            'generated_at_shamsi': jdatetime.datetime.now().strftime('%Y/%m/%d %H:%M'),
+            'total_customers': total_customers,
         }
     
     def generate_sales_summary_report(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
@@ -748,48 +886,65 @@ class ComprehensiveReportingEngine:
         date_from = parameters.get('date_from')
         date_to = parameters.get('date_to', timezone.now().date())
         
-        # Note: This is a placeholder implementation since gold price tracking isn't fully implemented
-        # In a complete implementation, this would query actual gold price history
+        karat = parameters.get('karat', 18)
         
-        # For now, we'll create sample data structure
-        current_gold_price = parameters.get('current_gold_price_per_gram', Decimal('1500000'))  # Sample price
-        
-        # Generate sample price trend data
+        # Daily closes from the shared gold price history, analysed as arrays
         price_history = []
+        trend = summarize_series(as_array([]))
         if date_from and date_to:
-            current_date = date_from
-            base_price = current_gold_price
+            series = get_price_series(
+                karat,
+                timezone.make_aware(datetime.combine(date_from, datetime.min.time())),
+                timezone.make_aware(datetime.combine(date_to, datetime.max.time())),
+                resolution='day'
+            )
+            columns = price_series_arrays(series)
+            trend = summarize_series(columns['close'], highs=columns['high'], lows=columns['low'])
             
-            while current_date <= date_to:
-                # Simulate price fluctuation (±5%)
-                import random
-                fluctuation = Decimal(str(random.uniform(-0.05, 0.05)))
-                daily_price = base_price * (1 + fluctuation)
-                
+            for point, change, moving_average in zip(series, trend['changes'], trend['moving_average']):
                 price_history.append({
-                    'date': current_date,
-                    'date_shamsi': jdatetime.date.fromgregorian(date=current_date).strftime('%Y/%m/%d'),
-                    'price_per_gram': daily_price,
+                    'date': point['date'],
+                    'date_shamsi': jdatetime.date.fromgregorian(date=point['date']).strftime('%Y/%m/%d'),
+                    'price_per_gram': point['close'],
                     'price_per_gram_formatted': self.formatter.format_currency(
-                        daily_price, use_persian_digits=True
+                        point['close'], use_persian_digits=True
                     ),
-                    'change_from_previous': fluctuation * 100,  # Percentage change
+                    'high_price': point['high'],
+                    'low_price': point['low'],
+                    'average_price': point['average'],
+                    'moving_average': moving_average,
+                    'change_from_previous': change,  # Percentage change
                 })
-                
-                current_date += timedelta(days=1)
+        
+        current_gold_price = parameters.get(
+            'current_gold_price_per_gram',
+            price_history[-1]['price_per_gram'] if price_history else Decimal('1500000')
+        )
         
         # Calculate statistics
         if price_history:
-            prices = [item['price_per_gram'] for item in price_history]
-            min_price = min(prices)
-            max_price = max(prices)
-            avg_price = sum(prices) / len(prices)
-            
-            price_volatility = (max_price - min_price) / avg_price * 100
+            min_price = trend['minimum']
+            max_price = trend['maximum']
+            avg_price = trend['average']
+            price_volatility = trend['volatility']
         else:
             min_price = max_price = avg_price = current_gold_price
             price_volatility = Decimal('0.00')
         
+        price_forecast = []
+        if date_to:
+            price_forecast = [
+                {
+                    'date': date_to + timedelta(days=offset),
+                    'date_shamsi': jdatetime.date.fromgregorian(
+                        date=date_to + timedelta(days=offset)
+                    ).strftime('%Y/%m/%d'),
+                    'price_per_gram': price,
+                }
+                for offset, price in enumerate(trend['forecast'], start=1)
+                if price is not None
+            ]
+        
         # Convert dates to Shamsi
         date_from_shamsi = ""
         date_to_shamsi = ""
@@ -829,6 +984,10 @@ class ComprehensiveReportingEngine:
                 price_volatility, use_persian_digits=True
             ) + '%',
             'price_history': price_history,
+            'trend_direction': trend['direction'],
+            'change_percentage': trend['change_percentage'],
+            'daily_change_std': trend['change_std'],
+            'price_forecast': price_forecast,
             'generated_at': timezone.now(),
             'generated_at_shamsi': jdatetime.datetime.now().strftime('%Y/%m/%d %H:%M'),
         }
@@ -874,26 +1033,30 @@ class ComprehensiveReportingEngine:
         overdue_contracts = []
         current_gold_price = parameters.get('current_gold_price_per_gram', Decimal('1500000'))
         
-        for contract in contracts_query.filter(status='active'):
-            # Check if contract has overdue payments
-            last_payment = contract.payments.order_by('-payment_date').first()
-            if last_payment:
-                days_since_payment = (timezone.now().date() - last_payment.payment_date).days
-                if days_since_payment > 30:  # Consider overdue after 30 days
-                    overdue_contracts.append({
-                        'contract_id': contract.id,
-                        'customer_name': contract.customer.full_persian_name,
-                        'remaining_weight': contract.remaining_gold_weight_grams,
-                        'remaining_weight_formatted': self.formatter.format_weight(
-                            contract.remaining_gold_weight_grams, 'gram', use_persian_digits=True
-                        ),
-                        'days_overdue': days_since_payment,
-                        'estimated_value': contract.remaining_gold_weight_grams * current_gold_price,
-                        'estimated_value_formatted': self.formatter.format_currency(
-                            contract.remaining_gold_weight_grams * current_gold_price,
-                            use_persian_digits=True
-                        ),
-                    })
+        overdue_query = contracts_query.overdue().filter(status='active').select_related(
+            'customer'
+        ).order_by('next_due_date')
+        for contract in overdue_query:
+            overdue_amount = contract.calculate_overdue_amount(current_gold_price)
+            overdue_contracts.append({
+                'contract_id': contract.id,
+                'customer_name': contract.customer.full_persian_name,
+                'remaining_weight': contract.remaining_gold_weight_grams,
+                'remaining_weight_formatted': self.formatter.format_weight(
+                    contract.remaining_gold_weight_grams, 'gram', use_persian_digits=True
+                ),
+                'days_overdue': contract.days_overdue,
+                'next_due_date': contract.next_due_date,
+                'overdue_amount': overdue_amount,
+                'overdue_amount_formatted': self.formatter.format_currency(
+                    overdue_amount, use_persian_digits=True
+                ),
+                'estimated_value': contract.remaining_gold_weight_grams * current_gold_price,
+                'estimated_value_formatted': self.formatter.format_currency(
+                    contract.remaining_gold_weight_grams * current_gold_price,
+                    use_persian_digits=True
+                ),
+            })
         
         # Recent payments
         recent_payments = GoldInstallmentPayment.objects.filter(
@@ -0,0 +1,25 @@
+"""
+Signals for invalidating stored report results when ledger data changes.
+"""
+from django.apps import apps
+from django.db.models.signals import post_delete, post_save
+
+from .result_store import DOMAIN_MODELS, invalidate_report_results
+
+
+def _invalidator(domain):
+    def invalidate(sender, **kwargs):
+        invalidate_report_results(domain)
+    return invalidate
+
+
+# Receivers are connected weakly, keep them alive for the process
+_receivers = []
+
+for domain, model_labels in DOMAIN_MODELS.items():
+    receiver = _invalidator(domain)
+    _receivers.append(receiver)
+    for model_label in model_labels:
+        model = apps.get_model(model_label)
+        post_save.connect(receiver, sender=model, dispatch_uid=f'report_results_{model_label}_save')
+        post_delete.connect(receiver, sender=model, dispatch_uid=f'report_results_{model_label}_delete')
@@ -0,0 +1,246 @@
+"""
+Row streams for report export.
+
+A ReportStream describes a report as a header (title, dates) plus an iterator
+of table rows, so exporters can write Excel, CSV and JSON lines one row at a
+time instead of materialising the whole report. Rows are ``(kind, values)``
+pairs where kind is ROW_DATA, ROW_SECTION (a group heading such as a
+category) or ROW_TOTAL; exporters style them accordingly.
+
+Large reports (inventory valuation, customer aging) are streamed straight
+from the reporting engine. Reports that already exist as a dictionary, e.g.
+stored on a GeneratedReport, are laid out as a stream by
+report_stream_from_data().
+"""
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+ROW_DATA = 'data'
+ROW_SECTION = 'section'
+ROW_TOTAL = 'total'
+
+# Report dictionary keys copied into a stream's header
+HEADER_KEYS = (
+    'report_type', 'report_title_persian', 'report_title_english',
+    'date_from_shamsi', 'date_to_shamsi', 'as_of_date_shamsi', 'generated_at_shamsi',
+)
+
+
+class ReportStream:
+    """
+    A report as a header, column definitions and a lazy iterator of rows.
+
+    Args:
+        header: Report metadata; HEADER_KEYS are used by the exporters
+        columns: (key, label) pairs of the table columns
+        rows: Iterable of (kind, values) pairs, consumed once
+        totals: Dictionary filled in by the row iterator as it runs, e.g. the
+            grand totals of a streamed report; complete once rows are consumed
+        column_widths: Optional Excel column widths, one per column
+    """
+
+    def __init__(self, header: Dict[str, Any], columns: List[Tuple[str, str]],
+                 rows: Iterable[Tuple[str, List[Any]]], totals: Optional[Dict[str, Any]] = None,
+                 column_widths: Optional[List[int]] = None):
+        self.header = header
+        self.columns = columns
+        self.totals = totals if totals is not None else {}
+        self.column_widths = column_widths
+        self._rows = rows
+
+    @property
+    def report_type(self) -> str:
+        return self.header.get('report_type', 'generic')
+
+    @property
+    def title(self) -> str:
+        return self.header.get('report_title_persian') or 'گزارش'
+
+    @property
+    def date_line(self) -> str:
+        """Persian date range or as-of line shown under the title."""
+        if self.header.get('date_from_shamsi') and self.header.get('date_to_shamsi'):
+            return f"از تاریخ {self.header['date_from_shamsi']} تا {self.header['date_to_shamsi']}"
+        if self.header.get('as_of_date_shamsi'):
+            return f"تا تاریخ {self.header['as_of_date_shamsi']}"
+        return ''
+
+    def __iter__(self) -> Iterator[Tuple[str, List[Any]]]:
+        return iter(self._rows)
+
+    def summary(self) -> Dict[str, Any]:
+        """Header and totals without the rows, for storing on a GeneratedReport."""
+        return {**self.header, **self.totals, 'streamed': True}
+
+
+def report_header(report_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy the header keys of a report dictionary."""
+    return {key: report_data[key] for key in HEADER_KEYS if key in report_data}
+
+
+def report_stream_from_data(report_data: Dict[str, Any]) -> ReportStream:
+    """Lay out an already generated report dictionary as a ReportStream."""
+    layouts = {
+        'trial_balance': _trial_balance_rows,
+        'profit_loss': _profit_loss_rows,
+        'balance_sheet': _balance_sheet_rows,
+        'inventory_valuation': _inventory_valuation_rows,
+        'customer_aging': _customer_aging_rows,
+    }
+    layout = layouts.get(report_data.get('report_type'), _generic_rows)
+    columns, rows = layout(report_data)
+    return ReportStream(report_header(report_data), columns, rows)
+
+
+INVENTORY_VALUATION_COLUMNS = [
+    ('sku', 'کد کالا'),
+    ('name', 'نام کالا'),
+    ('quantity', 'تعداد'),
+    ('weight_grams', 'وزن (گرم)'),
+    ('karat', 'عیار'),
+    ('manufacturing_cost', 'اجرت ساخت'),
+    ('total_value', 'ارزش کل'),
+]
+
+
+def inventory_valuation_row(item: Dict[str, Any]) -> List[Any]:
+    return [
+        item['sku'],
+        item['name'],
+        item['quantity'],
+        item['weight_grams_formatted'],
+        item['karat'],
+        item['manufacturing_cost_formatted'],
+        item['total_item_value_formatted'],
+    ]
+
+
+def inventory_category_total_row(formatted_total: str) -> Tuple[str, List[Any]]:
+    return ROW_TOTAL, ['', '', '', '', '', 'جمع دسته‌بندی:', formatted_total]
+
+
+def inventory_grand_total_row(formatted_total: str) -> Tuple[str, List[Any]]:
+    return ROW_TOTAL, ['', '', '', '', '', 'جمع کل موجودی:', formatted_total]
+
+
+def customer_aging_columns(period_labels: List[str]) -> List[Tuple[str, str]]:
+    return [
+        ('customer_name', 'نام مشتری'),
+        ('phone_number', 'شماره تماس'),
+        ('total_outstanding', 'جمع مطالبات'),
+    ] + [(f'period_{index}', label) for index, label in enumerate(period_labels)]
+
+
+def customer_aging_row(customer: Dict[str, Any]) -> List[Any]:
+    return [
+        customer['customer_name'],
+        customer['phone_number'],
+        customer['total_outstanding_formatted'],
+    ] + list(customer['aging_breakdown_formatted'].values())
+
+
+def customer_aging_total_row(total_formatted: str, aging_totals_formatted: Dict[str, str]) -> Tuple[str, List[Any]]:
+    return ROW_TOTAL, ['جمع کل', '', total_formatted] + list(aging_totals_formatted.values())
+
+
+def _trial_balance_rows(report_data):
+    columns = [
+        ('account_code', 'کد حساب'),
+        ('account_name', 'نام حساب'),
+        ('account_type', 'نوع حساب'),
+        ('debit', 'بدهکار'),
+        ('credit', 'بستانکار'),
+    ]
+
+    def rows():
+        for account in report_data.get('accounts', []):
+            yield ROW_DATA, [
+                account['account_code'],
+                account['account_name_persian'],
+                account['account_type'],
+                account['debit_amount_formatted'],
+                account['credit_amount_formatted'],
+            ]
+        yield ROW_TOTAL, [
+            'جمع کل', '', '',
+            report_data.get('total_debits_formatted', ''),
+            report_data.get('total_credits_formatted', ''),
+        ]
+
+    return columns, rows()
+
+
+def _profit_loss_rows(report_data):
+    columns = [('account_name', 'شرح'), ('amount', 'مبلغ')]
+
+    def rows():
+        sections = (
+            ('درآمدها', 'revenue_accounts', 'جمع درآمدها', 'total_revenue_formatted'),
+            ('هزینه‌ها', 'expense_accounts', 'جمع هزینه‌ها', 'total_expenses_formatted'),
+        )
+        for title, accounts_key, total_label, total_key in sections:
+            yield ROW_SECTION, [title, '']
+            for account in report_data.get(accounts_key, []):
+                yield ROW_DATA, [account['account_name_persian'], account['amount_formatted']]
+            yield ROW_TOTAL, [total_label, report_data.get(total_key, '')]
+        yield ROW_TOTAL, ['سود خالص', report_data.get('net_income_formatted', '')]
+
+    return columns, rows()
+
+
+def _balance_sheet_rows(report_data):
+    columns = [('category', 'گروه'), ('account_name', 'نام حساب'), ('amount', 'مبلغ')]
+
+    def rows():
+        sections = (
+            ('دارایی‌ها', 'assets', ('جمع دارایی‌ها', 'total_assets_formatted')),
+            ('بدهی‌ها', 'liabilities', None),
+            ('حقوق صاحبان سهام', 'equity',
+             ('جمع بدهی‌ها و حقوق صاحبان سهام', 'total_liabilities_equity_formatted')),
+        )
+        for title, groups_key, total in sections:
+            yield ROW_SECTION, [title, '', '']
+            for category, accounts in report_data.get(groups_key, {}).items():
+                yield ROW_SECTION, [category, '', '']
+                for account in accounts:
+                    yield ROW_DATA, ['', account['account_name_persian'], account['amount_formatted']]
+            if total:
+                yield ROW_TOTAL, [total[0], '', report_data.get(total[1], '')]
+
+    return columns, rows()
+
+
+def _inventory_valuation_rows(report_data):
+    def rows():
+        for category in report_data.get('categories', []):
+            yield ROW_SECTION, [category['category_name']] + [''] * 6
+            for item in category['items']:
+                yield ROW_DATA, inventory_valuation_row(item)
+            yield inventory_category_total_row(category['category_total_value_formatted'])
+        yield inventory_grand_total_row(report_data.get('total_inventory_value_formatted', ''))
+
+    return INVENTORY_VALUATION_COLUMNS, rows()
+
+
+def _customer_aging_rows(report_data):
+    def rows():
+        for customer in report_data.get('customers', []):
+            yield ROW_DATA, customer_aging_row(customer)
+        yield customer_aging_total_row(
+            report_data.get('total_outstanding_formatted', ''),
+            report_data.get('aging_totals_formatted', {})
+        )
+
+    return customer_aging_columns(report_data.get('aging_period_labels', [])), rows()
+
+
+def _generic_rows(report_data):
+    columns = [('key', 'عنوان'), ('value', 'مقدار')]
+    skipped = ('report_type', 'generated_at', 'generated_at_shamsi')
+
+    def rows():
+        for key, value in report_data.items():
+            if key not in skipped and isinstance(value, (str, int, float, Decimal)):
+                yield ROW_DATA, [key, value]
+
+    return columns, rows()
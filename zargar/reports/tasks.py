@@ -0,0 +1,73 @@
+"""
+Celery tasks for on-demand report generation.
+"""
+from celery import shared_task
+from django.utils import timezone
+from django_tenants.utils import schema_context
+import logging
+
+from .models import GeneratedReport
+from .services import ComprehensiveReportingEngine
+from .exporters import ReportExporter
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def generate_report_task(generated_report_id, schema_name):
+    """
+    Generate a report requested from the UI.
+    
+    Identical concurrent requests are computed once by the report result
+    store; the others are completed with the stored result.
+    
+    Args:
+        generated_report_id: Pending GeneratedReport ID
+        schema_name: Tenant schema the report belongs to
+        
+    Returns:
+        Generated report ID
+    """
+    with schema_context(schema_name):
+        generated_report = GeneratedReport.objects.select_related('template').get(id=generated_report_id)
+        template = generated_report.template
+        
+        # Dates are stored as strings in report_parameters
+        parameters = dict(generated_report.report_parameters or {})
+        parameters['date_from'] = generated_report.date_from
+        parameters['date_to'] = generated_report.date_to
+        
+        generated_report.status = 'generating'
+        generated_report.generation_started_at = timezone.now()
+        generated_report.save(update_fields=['status', 'generation_started_at'])
+        
+        try:
+            file_path, report_data = ReportExporter().export_template_report(
+                ComprehensiveReportingEngine(tenant=template.tenant),
+                template,
+                parameters,
+                generated_report.output_format,
+                generated_report.download_filename,
+                generated_report
+            )
+            
+            generated_report.status = 'completed'
+            generated_report.generation_completed_at = timezone.now()
+            generated_report.generation_duration_seconds = (
+                generated_report.generation_completed_at -
+                generated_report.generation_started_at
+            ).total_seconds()
+            generated_report.file_path = file_path
+            generated_report.report_data = report_data
+            generated_report.save()
+            
+            logger.info(f"Successfully generated report: {generated_report.report_id}")
+            
+        except Exception as e:
+            generated_report.status = 'failed'
+            generated_report.error_message = str(e)
+            generated_report.save()
+            logger.error(f"Failed to generate report {generated_report.report_id}: {str(e)}")
+            raise
+        
+        return generated_report.report_id
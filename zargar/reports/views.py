@@ -8,23 +8,27 @@ report generation, scheduling, and export functionality.
 from django.shortcuts import render, get_object_or_404, redirect
 from django.views.generic import TemplateView, ListView, CreateView, UpdateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import JsonResponse, HttpResponse, Http404
+from django.http import JsonResponse, Http404, FileResponse
 from django.contrib import messages
 from django.urls import reverse_lazy, reverse
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.core.paginator import Paginator
+from django.db import connection
 from django.db.models import Q
 from decimal import Decimal
+import io
 import json
+import os
 from datetime import datetime, date, timedelta
 import jdatetime
 
 from zargar.core.mixins import TenantContextMixin
+from zargar.core.pdf_rendering import enqueue_pdf, get_cached_pdf, pdf_content_hash
 from zargar.core.persian_number_formatter import PersianNumberFormatter
 from .models import ReportTemplate, GeneratedReport, ReportSchedule, ReportDelivery
 from .services import ComprehensiveReportingEngine
-from .exporters import ReportExporter
+from .exporters import CONTENT_TYPES, FILE_EXTENSIONS, ReportExporter
 from .scheduler import ReportScheduler
 
 
@@ -125,7 +129,7 @@ class ReportGenerationView(LoginRequiredMixin, TenantContextMixin, TemplateView)
             
             # Generate report asynchronously
             from .tasks import generate_report_task
-            generate_report_task.delay(generated_report.id)
+            generate_report_task.delay(generated_report.id, connection.schema_name)
             
             messages.success(request, _('گزارش در حال تولید است. پس از تکمیل، از طریق لیست گزارش‌ها قابل دسترسی خواهد بود.'))
             
@@ -293,23 +297,56 @@ class ReportDownloadView(LoginRequiredMixin, TenantContextMixin, TemplateView):
         if report.is_expired:
             raise Http404(_('گزارش منقضی شده است'))
         
+        if format_type not in FILE_EXTENSIONS:
+            raise Http404(_('فرمت گزارش پشتیبانی نمی‌شود'))
+        
+        filename = f"{os.path.splitext(report.download_filename)[0]}.{FILE_EXTENSIONS[format_type]}"
+        
         try:
-            # Generate file in requested format
-            exporter = ReportExporter()
-            file_content, content_type, filename = exporter.export_report(
-                report, format_type
-            )
+            # Serve the stored file without loading it into memory
+            if format_type == report.output_format and report.file_path and os.path.exists(report.file_path):
+                return FileResponse(
+                    open(report.file_path, 'rb'),
+                    as_attachment=True,
+                    filename=filename,
+                    content_type=CONTENT_TYPES[format_type]
+                )
             
-            response = HttpResponse(file_content, content_type=content_type)
-            response['Content-Disposition'] = f'attachment; filename="{filename}"'
+            # Streamed reports only keep their header and totals
+            if not report.report_data or report.report_data.get('streamed'):
+                raise ValueError(_('این گزارش باید با فرمت درخواستی دوباره تولید شود'))
             
-            return response
+            if format_type == 'pdf':
+                return self._pdf_response(request, report, filename)
+            
+            exporter = ReportExporter()
+            return exporter.create_http_response(report.report_data, format_type, filename)
             
         except Exception as e:
             messages.error(request, f'خطا در دانلود گزارش: {str(e)}')
             return redirect('reports:report_detail', report_id=report_id)
 
 
+    def _pdf_response(self, request, report, filename):
+        """
+        Serve the report's PDF from the PDF cache, queueing it for the PDF
+        workers on a miss instead of rendering it in the request.
+        """
+        pdf_content = get_cached_pdf(pdf_content_hash('report', report.report_data))
+        
+        if pdf_content is None:
+            enqueue_pdf('report', str(report.report_id))
+            messages.info(request, _('فایل PDF گزارش در حال آماده‌سازی است. چند لحظه دیگر دوباره دانلود کنید.'))
+            return redirect('reports:report_detail', report_id=report.report_id)
+        
+        return FileResponse(
+            io.BytesIO(pdf_content),
+            as_attachment=True,
+            filename=filename,
+            content_type=CONTENT_TYPES['pdf']
+        )
+
+
 class ReportScheduleListView(LoginRequiredMixin, TenantContextMixin, ListView):
     """
     List view for report schedules with management options.
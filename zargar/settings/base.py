@@ -72,7 +72,7 @@ INSTALLED_APPS = list(SHARED_APPS) + [app for app in TENANT_APPS if app not in S
 
 MIDDLEWARE = [
     'zargar.core.middleware.HealthCheckMiddleware',  # Must be first for health checks
-    'django_tenants.middleware.main.TenantMainMiddleware',
+    'zargar.tenants.middleware.CachedTenantMainMiddleware',  # django-tenants resolution behind a cache
     'django.middleware.security.SecurityMiddleware',
     'zargar.admin_panel.unified_auth_middleware.UnifiedAdminSecurityMiddleware',  # Admin security
     'zargar.core.security_middleware.SecurityAuditMiddleware',  # Security audit logging
@@ -291,6 +291,10 @@ SIMPLE_JWT = {
     'BLACKLIST_AFTER_ROTATION': True,
 }
 
+# Cache authenticated JWT principals instead of loading the user on every request
+JWT_PRINCIPAL_CACHE_ENABLED = config('JWT_PRINCIPAL_CACHE_ENABLED', default=True, cast=bool)
+JWT_PRINCIPAL_CACHE_TIMEOUT = config('JWT_PRINCIPAL_CACHE_TIMEOUT', default=120, cast=int)  # 2 minutes
+
 # CORS Configuration
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
@@ -331,6 +335,12 @@ CORS_EXPOSE_HEADERS = [
 CELERY_BROKER_URL = config('CELERY_BROKER_URL', default='redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = config('CELERY_RESULT_BACKEND', default='redis://localhost:6379/0')
 
+# Cross-tenant fan-out jobs (zargar.core.tenant_tasks.map_over_tenants)
+TENANT_TASK_CONCURRENCY = config('TENANT_TASK_CONCURRENCY', default=8, cast=int)
+TENANT_TASK_SOFT_TIME_LIMIT = config('TENANT_TASK_SOFT_TIME_LIMIT', default=5 * 60, cast=int)  # 5 minutes per tenant
+TENANT_TASK_TIME_LIMIT = config('TENANT_TASK_TIME_LIMIT', default=10 * 60, cast=int)  # Backstop only, well above the soft limit
+TENANT_TASK_RETRY_DELAY = config('TENANT_TASK_RETRY_DELAY', default=60, cast=int)
+
 # Storage Configuration
 # Cloudflare R2
 CLOUDFLARE_R2_ACCESS_KEY = config('CLOUDFLARE_R2_ACCESS_KEY', default='3f3dfdd35d139a687d4d00d75da96c76')
@@ -376,6 +386,92 @@ TENANT_BASE_DOMAIN = config('TENANT_BASE_DOMAIN', default='zargar.com')
 TENANT_SUBDOMAIN_SEPARATOR = config('TENANT_SUBDOMAIN_SEPARATOR', default='.')
 TENANT_DOMAIN_PROTOCOL = config('TENANT_DOMAIN_PROTOCOL', default='https')
 
+# Template schema provisioning - new tenants are cloned from a pre-migrated
+# "golden" schema instead of replaying every migration on signup
+TENANT_TEMPLATE_PROVISIONING = config('TENANT_TEMPLATE_PROVISIONING', default=False, cast=bool)
+TENANT_TEMPLATE_SCHEMA = config('TENANT_TEMPLATE_SCHEMA', default='tenant_template')
+TENANT_CREATION_FAKES_MIGRATIONS = TENANT_TEMPLATE_PROVISIONING
+if TENANT_TEMPLATE_PROVISIONING:
+    TENANT_BASE_SCHEMA = TENANT_TEMPLATE_SCHEMA
+
+# Hostname -> tenant resolution cache (per-process LRU in front of Redis)
+TENANT_RESOLUTION_CACHE_ENABLED = config('TENANT_RESOLUTION_CACHE_ENABLED', default=True, cast=bool)
+TENANT_RESOLUTION_CACHE_TIMEOUT = config('TENANT_RESOLUTION_CACHE_TIMEOUT', default=600, cast=int)  # 10 minutes in Redis
+TENANT_RESOLUTION_NEGATIVE_TIMEOUT = 30  # Unknown hosts
+TENANT_RESOLUTION_LOCAL_TIMEOUT = 60  # Per-process LRU entries
+TENANT_RESOLUTION_LOCAL_CACHE_SIZE = 1024
+TENANT_RESOLUTION_GENERATION_CHECK_INTERVAL = 2  # Seconds between Redis generation checks
+
+# Compiled super admin RBAC permission sets (per-process LRU in front of Redis)
+RBAC_PERMISSION_CACHE_TIMEOUT = config('RBAC_PERMISSION_CACHE_TIMEOUT', default=300, cast=int)  # 5 minutes in Redis
+RBAC_PERMISSION_LOCAL_TIMEOUT = 60  # Per-process LRU entries
+RBAC_PERMISSION_LOCAL_CACHE_SIZE = 512
+RBAC_VERSION_CHECK_INTERVAL = 1  # Seconds between Redis version checks
+
+# Delta sync for mobile/offline POS clients
+SYNC_CHANGES_PAGE_SIZE = config('SYNC_CHANGES_PAGE_SIZE', default=500, cast=int)
+SYNC_CHANGES_MAX_PAGE_SIZE = 2000
+SYNC_CHANGE_LOG_SETTLE_SECONDS = 2  # Hide entries younger than this from readers
+SYNC_MANIFEST_BUCKET_SIZE = 1000  # Ids per range checksum bucket
+SYNC_MANIFEST_MIN_BUCKET_SIZE = 100
+SYNC_PAYLOAD_CACHE_TIMEOUT = config('SYNC_PAYLOAD_CACHE_TIMEOUT', default=300, cast=int)  # Shared sync pages
+SYNC_COMPRESSION_MIN_BYTES = 512  # Smaller bodies are sent uncompressed
+
+# Bulk stock updates and stock-take uploads
+STOCK_UPDATE_BATCH_SIZE = config('STOCK_UPDATE_BATCH_SIZE', default=500, cast=int)  # Rows per transaction
+STOCK_UPDATE_MAX_ROWS = 5000  # Larger stock-takes go through the file upload endpoint
+
+# Nightly demand forecasts from the stock movement ledger
+STOCK_FORECAST_HISTORY_DAYS = config('STOCK_FORECAST_HISTORY_DAYS', default=730, cast=int)  # Two years covers two of each peak
+STOCK_FORECAST_HORIZON_DAYS = 30
+STOCK_FORECAST_HALFLIFE_DAYS = 30  # Age at which a sale weighs half
+STOCK_FORECAST_PEAK_RUN_UP_DAYS = 21  # Days before Nowruz and Yalda treated as peak demand
+STOCK_FORECAST_SERVICE_Z = 1.65  # ~95% service level for safety stock
+
+# Batched barcode/QR generation
+BARCODE_BATCH_CHUNK_SIZE = 500  # Items per transaction
+BARCODE_RENDER_WORKERS = config('BARCODE_RENDER_WORKERS', default=4, cast=int)  # QR rendering processes
+BARCODE_UPLOAD_WORKERS = 8  # Concurrent image uploads
+BARCODE_SYNC_LIMIT = 50  # Larger requests run as background jobs
+
+# Barcode/SKU resolution index for scanning (per-process LRU in front of Redis)
+BARCODE_INDEX_TIMEOUT = config('BARCODE_INDEX_TIMEOUT', default=86400, cast=int)  # 1 day in Redis
+BARCODE_INDEX_NEGATIVE_TIMEOUT = 10  # Codes matching no item
+BARCODE_INDEX_LOCAL_TIMEOUT = 30  # Per-process LRU entries
+BARCODE_INDEX_LOCAL_CACHE_SIZE = 4096
+BARCODE_SCAN_HISTORY_ASYNC = config('BARCODE_SCAN_HISTORY_ASYNC', default=True, cast=bool)  # Buffer scan history in Redis
+BARCODE_SCAN_FLUSH_SIZE = 200  # Buffered scans per bulk insert
+BARCODE_SCAN_QUEUE_MAX_LENGTH = config('BARCODE_SCAN_QUEUE_MAX_LENGTH', default=100000, cast=int)  # Oldest buffered scans dropped beyond this
+BARCODE_SCAN_DEAD_LETTER_MAX_LENGTH = 1000  # Rejected scans kept for inspection per tenant
+
+# Compact service cache payloads and their size histogram
+CACHE_PAYLOAD_STATS_ENABLED = config('CACHE_PAYLOAD_STATS_ENABLED', default=True, cast=bool)
+CACHE_PAYLOAD_WARN_BYTES = config('CACHE_PAYLOAD_WARN_BYTES', default=65536, cast=int)  # Flagged on the health dashboard
+CACHE_PAYLOAD_LARGEST_KEYS = 50  # Largest entries kept for the health dashboard
+
+# Streaming report exports (write-only Excel, CSV and JSON lines)
+REPORT_EXPORT_CHUNK_SIZE = config('REPORT_EXPORT_CHUNK_SIZE', default=2000, cast=int)  # Rows fetched per query round trip
+
+# Single-flight report generation (zargar.reports.result_store)
+REPORT_SINGLE_FLIGHT_LOCK_TIMEOUT = config('REPORT_SINGLE_FLIGHT_LOCK_TIMEOUT', default=900, cast=int)  # Longer than the slowest report
+REPORT_SINGLE_FLIGHT_WAIT = config('REPORT_SINGLE_FLIGHT_WAIT', default=600, cast=int)  # Seconds a request waits for another to finish
+REPORT_SINGLE_FLIGHT_POLL_INTERVAL = 0.5
+
+# Scheduled report workers (zargar.reports.scheduler)
+REPORT_SCHEDULE_CLAIM_BATCH_SIZE = config('REPORT_SCHEDULE_CLAIM_BATCH_SIZE', default=100, cast=int)  # Schedules claimed per tenant and run
+REPORT_GENERATION_QUEUE = config('REPORT_GENERATION_QUEUE', default='celery')  # Set to "reports" when running a dedicated pool
+REPORT_DELIVERY_QUEUE = config('REPORT_DELIVERY_QUEUE', default='celery')  # Set to "report_delivery" to keep sending off the generation pool
+
+# PDF rendering workers (zargar.core.pdf_rendering)
+PDF_FONT_PATH = config('PDF_FONT_PATH', default=str(BASE_DIR / 'static' / 'fonts' / 'Vazirmatn-Regular.ttf'))
+PDF_TASK_QUEUE = config('PDF_TASK_QUEUE', default='celery')  # Set to "pdf" when running a dedicated pool
+PDF_PRELOAD_ON_WORKER_START = config('PDF_PRELOAD_ON_WORKER_START', default=True, cast=bool)
+PDF_CACHE_TIMEOUT = config('PDF_CACHE_TIMEOUT', default=604800, cast=int)  # 7 days
+PDF_CACHE_MAX_BYTES = 5 * 1024 * 1024  # Larger PDFs are stored under MEDIA_ROOT/pdf_cache
+
+# Set-based loyalty jobs (tier recalculation and points expiry)
+LOYALTY_BATCH_SIZE = config('LOYALTY_BATCH_SIZE', default=1000, cast=int)  # Customers written per transaction
+
 # Custom User Model
 AUTH_USER_MODEL = 'core.User'
 
@@ -482,6 +578,39 @@ GOLD_PRICE_UPDATE_INTERVAL = config('GOLD_PRICE_UPDATE_INTERVAL', default=300, c
 IRANIAN_GOLD_PRICE_CACHE_TIMEOUT = config('IRANIAN_GOLD_PRICE_CACHE_TIMEOUT', default=300, cast=int)  # 5 minutes
 IRANIAN_GOLD_PRICE_API_TIMEOUT = config('IRANIAN_GOLD_PRICE_API_TIMEOUT', default=10, cast=int)  # 10 seconds
 
+# Gold price push over Server-Sent Events (zargar.core.gold_price_stream)
+GOLD_PRICE_CHANNEL = config('GOLD_PRICE_CHANNEL', default='gold_prices')  # Redis pub/sub channel
+GOLD_PRICE_STREAM_HEARTBEAT = 15  # Seconds between keepalive comments on idle connections
+GOLD_PRICE_STREAM_MAX_AGE = config('GOLD_PRICE_STREAM_MAX_AGE', default=30 * 60, cast=int)  # Clients reconnect after this
+GOLD_PRICE_STREAM_RETRY_MS = 5000  # EventSource reconnect delay
+GOLD_PRICE_STREAM_RECONNECT_DELAY = 5  # Seconds before resubscribing after a Redis error
+GOLD_PRICE_STREAM_QUEUE_SIZE = 4  # Pending messages per connection
+
+# Gold price time series (zargar.core.gold_price_history)
+GOLD_PRICE_MINUTE_RETENTION_DAYS = config('GOLD_PRICE_MINUTE_RETENTION_DAYS', default=7, cast=int)
+GOLD_PRICE_HOUR_RETENTION_DAYS = config('GOLD_PRICE_HOUR_RETENTION_DAYS', default=365, cast=int)  # Daily buckets are kept forever
+GOLD_PRICE_MINUTE_MAX_SPAN_DAYS = 2  # Longer ranges are served hourly
+GOLD_PRICE_HOUR_MAX_SPAN_DAYS = 90  # Longer ranges are served daily
+GOLD_PRICE_WINDOW_MINUTES = 6 * 60  # Recent minute buckets held in memory per process
+GOLD_PRICE_WINDOW_REFRESH_SECONDS = 60
+
+# Monthly partitioned log tables (zargar.core.partitioning)
+LOG_PARTITION_MONTHS_AHEAD = config('LOG_PARTITION_MONTHS_AHEAD', default=3, cast=int)  # Future monthly partitions kept created
+LOG_PARTITION_DETACH_EXPIRED = config('LOG_PARTITION_DETACH_EXPIRED', default=False, cast=bool)  # Detach for archiving instead of dropping
+AUDIT_LOG_RETENTION_DAYS = config('AUDIT_LOG_RETENTION_DAYS', default=730, cast=int)
+PUBLIC_AUDIT_LOG_RETENTION_DAYS = config('PUBLIC_AUDIT_LOG_RETENTION_DAYS', default=730, cast=int)
+SECURITY_EVENT_RETENTION_DAYS = config('SECURITY_EVENT_RETENTION_DAYS', default=365, cast=int)
+SUSPICIOUS_ACTIVITY_RETENTION_DAYS = config('SUSPICIOUS_ACTIVITY_RETENTION_DAYS', default=365, cast=int)
+TENANT_ACCESS_LOG_RETENTION_DAYS = config('TENANT_ACCESS_LOG_RETENTION_DAYS', default=365, cast=int)
+NOTIFICATION_RETENTION_DAYS = config('NOTIFICATION_RETENTION_DAYS', default=90, cast=int)
+HEALTH_METRIC_RETENTION_DAYS = config('HEALTH_METRIC_RETENTION_DAYS', default=30, cast=int)
+
+# Health metric rollups (zargar.admin_panel.health_rollups)
+HEALTH_METRIC_MINUTE_ROLLUP_RETENTION_DAYS = config('HEALTH_METRIC_MINUTE_ROLLUP_RETENTION_DAYS', default=7, cast=int)
+HEALTH_METRIC_HOUR_ROLLUP_RETENTION_DAYS = config('HEALTH_METRIC_HOUR_ROLLUP_RETENTION_DAYS', default=365, cast=int)  # Daily buckets are kept forever
+HEALTH_METRIC_MINUTE_MAX_HOURS = 24  # Longer windows are served hourly
+HEALTH_METRIC_HOUR_MAX_HOURS = 31 * 24  # Longer windows are served daily
+
 # Logging
 LOGGING = {
     'version': 1,
@@ -46,6 +46,12 @@ PASSWORD_HASHERS = [
 CELERY_TASK_ALWAYS_EAGER = True
 CELERY_TASK_EAGER_PROPAGATES = True
 
+# Write scan history synchronously so tests can assert on it
+BARCODE_SCAN_HISTORY_ASYNC = False
+
+# Cache payload size histogram lives in Redis
+CACHE_PAYLOAD_STATS_ENABLED = False
+
 # Media files for tests
 MEDIA_ROOT = BASE_DIR / 'test_media'
 
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.24 on 2026-10-18 22:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('system', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GoldPricePoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('karat', models.PositiveSmallIntegerField(verbose_name='Karat')),
+                ('source', models.CharField(help_text='Price API the samples were fetched from', max_length=50, verbose_name='Source')),
+                ('resolution', models.CharField(choices=[('minute', 'Minute'), ('hour', 'Hour'), ('day', 'Day')], max_length=10, verbose_name='Resolution')),
+                ('bucket_start', models.DateTimeField(verbose_name='Bucket Start')),
+                ('open_price', models.DecimalField(decimal_places=2, max_digits=15, verbose_name='Open Price')),
+                ('high_price', models.DecimalField(decimal_places=2, max_digits=15, verbose_name='High Price')),
+                ('low_price', models.DecimalField(decimal_places=2, max_digits=15, verbose_name='Low Price')),
+                ('close_price', models.DecimalField(decimal_places=2, max_digits=15, verbose_name='Close Price')),
+                ('average_price', models.DecimalField(decimal_places=2, max_digits=15, verbose_name='Average Price')),
+                ('sample_count', models.PositiveIntegerField(default=1, verbose_name='Sample Count')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Gold Price Point',
+                'verbose_name_plural': 'Gold Price Points',
+                'db_table': 'system_gold_price_point',
+                'ordering': ['resolution', 'karat', 'bucket_start'],
+                'indexes': [models.Index(fields=['resolution', 'karat', 'bucket_start'], name='system_gold_resolut_207b10_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='goldpricepoint',
+            constraint=models.UniqueConstraint(fields=('resolution', 'karat', 'source', 'bucket_start'), name='system_gold_price_point_bucket_unique'),
+        ),
+    ]
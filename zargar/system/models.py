@@ -656,4 +656,86 @@ class BackupIntegrityCheck(models.Model):
         self.status = 'error'
         self.error_message = error_message
         self.completed_at = timezone.now()
-        self.save(update_fields=['status', 'error_message', 'completed_at'])
\ No newline at end of file
+        self.save(update_fields=['status', 'error_message', 'completed_at'])
+
+class GoldPricePoint(models.Model):
+    """
+    One bucket of the shared gold price time series.
+    
+    Fetched prices are appended as minute buckets and rolled up into hourly
+    and daily buckets, each holding open/high/low/close and the average of
+    the samples in it. Lives in the public schema so every tenant reads the
+    same history.
+    """
+    RESOLUTION_CHOICES = [
+        ('minute', _('Minute')),
+        ('hour', _('Hour')),
+        ('day', _('Day')),
+    ]
+    
+    karat = models.PositiveSmallIntegerField(
+        verbose_name=_('Karat')
+    )
+    source = models.CharField(
+        max_length=50,
+        verbose_name=_('Source'),
+        help_text=_('Price API the samples were fetched from')
+    )
+    resolution = models.CharField(
+        max_length=10,
+        choices=RESOLUTION_CHOICES,
+        verbose_name=_('Resolution')
+    )
+    bucket_start = models.DateTimeField(
+        verbose_name=_('Bucket Start')
+    )
+    
+    open_price = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        verbose_name=_('Open Price')
+    )
+    high_price = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        verbose_name=_('High Price')
+    )
+    low_price = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        verbose_name=_('Low Price')
+    )
+    close_price = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        verbose_name=_('Close Price')
+    )
+    average_price = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        verbose_name=_('Average Price')
+    )
+    sample_count = models.PositiveIntegerField(
+        default=1,
+        verbose_name=_('Sample Count')
+    )
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = _('Gold Price Point')
+        verbose_name_plural = _('Gold Price Points')
+        db_table = 'system_gold_price_point'
+        ordering = ['resolution', 'karat', 'bucket_start']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['resolution', 'karat', 'source', 'bucket_start'],
+                name='system_gold_price_point_bucket_unique'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['resolution', 'karat', 'bucket_start']),
+        ]
+    
+    def __str__(self):
+        return f"{self.karat}k {self.resolution} {self.bucket_start:%Y-%m-%d %H:%M} ({self.source})"
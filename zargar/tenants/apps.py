@@ -4,4 +4,8 @@ from django.apps import AppConfig
 class TenantsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'zargar.tenants'
-    verbose_name = 'Tenants'
\ No newline at end of file
+    verbose_name = 'Tenants'
+    
+    def ready(self):
+        """Import signals when app is ready."""
+        import zargar.tenants.signals
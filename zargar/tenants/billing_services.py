@@ -12,6 +12,8 @@ import jdatetime
 from decimal import Decimal
 import logging
 
+from zargar.core.tenant_tasks import map_over_tenants
+
 from .admin_models import SubscriptionPlan, TenantInvoice, BillingCycle, TenantAccessLog
 from .models import Tenant
 
@@ -507,42 +509,56 @@ class BillingWorkflow:
         return len(overdue_invoices)
     
     @staticmethod
-    def generate_monthly_invoices_batch(admin_user=None):
-        """Generate monthly invoices for all active tenants."""
-        current_date = jdatetime.date.today()
+    def generate_monthly_invoices_batch(admin_user_id=None):
+        """
+        Generate monthly invoices for every tenant whose billing cycle is due.
+        
+        Each tenant is invoiced in its own Celery subtask, so one failing
+        tenant does not hold back the others.
         
+        Returns:
+            Dict describing the dispatched job (see map_over_tenants)
+        """
         # Get tenants with billing due today (compare with Gregorian date)
-        billing_cycles = BillingCycle.objects.filter(
+        due_schemas = BillingWorkflow.get_due_monthly_billing_cycles().values_list(
+            'tenant__schema_name', flat=True
+        )
+        
+        return map_over_tenants(
+            'zargar.tenants.tasks.generate_tenant_monthly_invoice',
+            job_name='monthly_invoices',
+            kwargs={'admin_user_id': admin_user_id},
+            schemas=due_schemas
+        )
+    
+    @staticmethod
+    def get_due_monthly_billing_cycles():
+        """Get active monthly billing cycles that are due for invoicing."""
+        current_date = jdatetime.date.today()
+        
+        return BillingCycle.objects.filter(
             is_active=True,
             cycle_type='monthly',
             next_billing_date__lte=current_date.togregorian(),
             tenant__is_active=True
         )
+    
+    @staticmethod
+    def generate_monthly_invoice_for_cycle(billing_cycle, admin_user=None):
+        """Generate, send and advance a single monthly billing cycle."""
+        # Generate invoice
+        invoice = InvoiceGenerator.generate_monthly_invoice(
+            tenant=billing_cycle.tenant,
+            admin_user=admin_user
+        )
         
-        generated_invoices = []
-        
-        for billing_cycle in billing_cycles:
-            try:
-                # Generate invoice
-                invoice = InvoiceGenerator.generate_monthly_invoice(
-                    tenant=billing_cycle.tenant,
-                    admin_user=admin_user
-                )
-                
-                # Send notification
-                InvoiceGenerator.send_invoice_notification(invoice)
-                
-                # Update next billing date
-                billing_cycle.calculate_next_billing_date()
-                
-                generated_invoices.append(invoice)
-                
-            except Exception as e:
-                logger.error(f"Failed to generate invoice for tenant {billing_cycle.tenant.name}: {str(e)}")
+        # Send notification
+        InvoiceGenerator.send_invoice_notification(invoice)
         
-        logger.info(f"Generated {len(generated_invoices)} monthly invoices")
+        # Update next billing date
+        billing_cycle.calculate_next_billing_date()
         
-        return generated_invoices
+        return invoice
     
     @staticmethod
     def manual_payment_processing(invoice, payment_method, payment_reference='', admin_user=None):
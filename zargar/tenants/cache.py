@@ -0,0 +1,113 @@
+"""
+Two-level cache for hostname -> tenant resolution.
+
+A per-process LRU sits in front of Redis so the common case resolves a tenant
+without touching Postgres or the network. Every entry is tagged with a global
+generation number kept in Redis; bumping the generation (on Domain/Tenant
+changes or suspension) invalidates both levels at once. Each process re-reads
+the generation at most every TENANT_RESOLUTION_GENERATION_CHECK_INTERVAL
+seconds, and invalidations made in the same process take effect immediately.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django_tenants.utils import get_tenant_database_alias, get_tenant_model
+
+from zargar.core.local_cache import GenerationCounter, LocalLRU
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = 'tenant_resolution:generation'
+
+# Marker stored for hostnames without a tenant
+MISSING = 'missing'
+
+
+class TenantResolutionCache:
+    """
+    Cache of hostname -> tenant field values.
+
+    Tenants are stored as raw field values rather than pickled instances and
+    a fresh instance is built on every hit, so per-request attributes such as
+    ``domain_url`` never leak between requests.
+    """
+
+    def __init__(self):
+        self._local = LocalLRU('TENANT_RESOLUTION_LOCAL_CACHE_SIZE')
+        self._generation = GenerationCounter(
+            GENERATION_KEY, 'TENANT_RESOLUTION_GENERATION_CHECK_INTERVAL', 'tenant resolution'
+        )
+
+    def get(self, hostname):
+        """
+        Look up a hostname.
+
+        Returns:
+            A Tenant instance, MISSING for a known-unknown host, or None on a miss
+        """
+        generation = self._generation.get()
+
+        payload = self._local.get(hostname, tag=generation)
+        if payload is not None:
+            return self._build(payload)
+
+        try:
+            payload = cache.get(self._redis_key(hostname, generation))
+        except Exception as e:
+            logger.warning(f"Tenant resolution cache unavailable: {e}")
+            return None
+
+        if payload is None:
+            return None
+
+        self._local.set(hostname, payload, settings.TENANT_RESOLUTION_LOCAL_TIMEOUT, tag=generation)
+        return self._build(payload)
+
+    def set(self, hostname, tenant):
+        """Cache the tenant resolved for a hostname."""
+        payload = {
+            'fields': [field.attname for field in tenant._meta.concrete_fields],
+            'values': [getattr(tenant, field.attname) for field in tenant._meta.concrete_fields],
+        }
+        self._store(hostname, payload, settings.TENANT_RESOLUTION_CACHE_TIMEOUT)
+
+    def set_missing(self, hostname):
+        """Cache that a hostname has no tenant."""
+        self._store(hostname, MISSING, settings.TENANT_RESOLUTION_NEGATIVE_TIMEOUT)
+
+    def invalidate(self):
+        """Invalidate every cached resolution in all processes."""
+        self._local.clear()
+        self._generation.bump()
+
+    def clear_local(self):
+        """Drop this process's LRU entries."""
+        self._local.clear()
+        self._generation.reset()
+
+    def _store(self, hostname, payload, timeout):
+        generation = self._generation.get()
+
+        try:
+            cache.set(self._redis_key(hostname, generation), payload, timeout)
+        except Exception as e:
+            logger.warning(f"Tenant resolution cache unavailable: {e}")
+
+        self._local.set(hostname, payload, settings.TENANT_RESOLUTION_LOCAL_TIMEOUT, tag=generation)
+
+    @staticmethod
+    def _redis_key(hostname, generation):
+        return f'tenant_resolution:{generation}:{hostname}'
+
+    @staticmethod
+    def _build(payload):
+        if payload == MISSING:
+            return MISSING
+
+        return get_tenant_model().from_db(
+            get_tenant_database_alias(), payload['fields'], payload['values']
+        )
+
+
+tenant_resolution_cache = TenantResolutionCache()
@@ -0,0 +1,91 @@
+"""
+Django management command to benchmark signup-to-ready time for new tenants.
+
+Compares provisioning by replaying migrations against cloning the template
+schema. Benchmark tenants are deleted (and their schemas dropped) afterwards.
+"""
+import statistics
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from zargar.tenants.models import Tenant
+from zargar.tenants.services import TenantProvisioningService, TenantTemplateSchemaService
+
+
+class Command(BaseCommand):
+    help = 'Benchmark tenant signup-to-ready time with and without the template schema'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--runs',
+            type=int,
+            default=3,
+            help='Number of tenants to provision per mode (default: 3)',
+        )
+        parser.add_argument(
+            '--mode',
+            choices=['both', 'migrate', 'template'],
+            default='both',
+            help='Provisioning mode(s) to benchmark',
+        )
+    
+    def handle(self, *args, **options):
+        runs = options['runs']
+        modes = ['migrate', 'template'] if options['mode'] == 'both' else [options['mode']]
+        results = {}
+        
+        for mode in modes:
+            template_enabled = mode == 'template'
+            template_settings = {
+                'TENANT_TEMPLATE_PROVISIONING': template_enabled,
+                'TENANT_CREATION_FAKES_MIGRATIONS': template_enabled,
+                'TENANT_BASE_SCHEMA': TenantTemplateSchemaService().schema_name if template_enabled else False,
+            }
+            
+            with override_settings(**template_settings):
+                if template_enabled:
+                    # Keep the one-off template build out of the per-signup numbers
+                    result = TenantTemplateSchemaService().ensure_template()
+                    if result['rebuilt']:
+                        self.stdout.write(
+                            f'Template schema rebuilt in {result["duration_seconds"]:.2f}s'
+                        )
+                
+                results[mode] = [self._time_signup(mode, run) for run in range(runs)]
+        
+        self.stdout.write('')
+        self.stdout.write('Signup-to-ready time (seconds):')
+        for mode, timings in results.items():
+            self.stdout.write(
+                f'  {mode:<9} min={min(timings):.2f} '
+                f'median={statistics.median(timings):.2f} max={max(timings):.2f}'
+            )
+        
+        if len(results) == 2:
+            speedup = statistics.median(results['migrate']) / statistics.median(results['template'])
+            self.stdout.write(self.style.SUCCESS(f'Template provisioning is {speedup:.1f}x faster'))
+    
+    def _time_signup(self, mode, run):
+        """Create and provision one throwaway tenant, returning elapsed seconds."""
+        schema_name = f'bench_{mode}_{uuid.uuid4().hex[:8]}'
+        
+        started_at = time.perf_counter()
+        tenant = Tenant.objects.create(
+            name=f'Benchmark {schema_name}',
+            schema_name=schema_name,
+            owner_name='Benchmark Owner',
+            owner_email=f'{schema_name}@benchmark.local',
+        )
+        result = TenantProvisioningService().provision_tenant(tenant)
+        elapsed = time.perf_counter() - started_at
+        
+        tenant.delete(force_drop=True)
+        
+        if not result['success']:
+            raise RuntimeError(f'Provisioning failed for {schema_name}: {result.get("error")}')
+        
+        self.stdout.write(f'  {mode} run {run + 1}: {elapsed:.2f}s')
+        return elapsed
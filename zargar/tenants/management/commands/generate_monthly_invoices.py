@@ -1,8 +1,10 @@
 """
 Django management command to generate monthly invoices for all tenants.
+
+Invoices are generated by per-tenant Celery subtasks; the command dispatches
+them and returns.
 """
 from django.core.management.base import BaseCommand
-from django.db import transaction
 import jdatetime
 
 from zargar.tenants.billing_services import BillingWorkflow
@@ -47,26 +49,21 @@ class Command(BaseCommand):
         
         try:
             if not dry_run:
-                with transaction.atomic():
-                    generated_invoices = BillingWorkflow.generate_monthly_invoices_batch(
-                        admin_user=admin_user
-                    )
-                    
-                    if generated_invoices:
-                        self.stdout.write(
-                            self.style.SUCCESS(
-                                f'Successfully generated {len(generated_invoices)} invoices:'
-                            )
-                        )
-                        for invoice in generated_invoices:
-                            self.stdout.write(
-                                f'  - {invoice.invoice_number}: {invoice.tenant.name} '
-                                f'({invoice.total_amount_toman:,.0f} Toman)'
-                            )
-                    else:
-                        self.stdout.write(
-                            self.style.WARNING('No invoices were generated (no tenants due for billing)')
+                result = BillingWorkflow.generate_monthly_invoices_batch(
+                    admin_user_id=admin_user.id if admin_user else None
+                )
+                
+                if result['tenant_count']:
+                    self.stdout.write(
+                        self.style.SUCCESS(
+                            f'Dispatched invoice generation for {result["tenant_count"]} tenants '
+                            f'(summary task {result["aggregate_task_id"]})'
                         )
+                    )
+                else:
+                    self.stdout.write(
+                        self.style.WARNING('No invoices were generated (no tenants due for billing)')
+                    )
             else:
                 # Dry run - show what would be generated
                 from zargar.tenants.admin_models import BillingCycle
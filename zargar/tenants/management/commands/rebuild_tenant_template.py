@@ -0,0 +1,52 @@
+"""
+Django management command to rebuild the tenant template schema.
+
+Run after deploying new migrations so the first signup does not pay for the
+rebuild; provisioning also rebuilds a stale template on demand.
+"""
+from django.core.management.base import BaseCommand
+
+from zargar.tenants.services import TenantTemplateSchemaService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the pre-migrated template schema that new tenants are cloned from'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Rebuild even if the template matches the current migrations',
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report whether the template is up to date',
+        )
+    
+    def handle(self, *args, **options):
+        service = TenantTemplateSchemaService()
+        fingerprint = service.get_migration_fingerprint()
+        stored_fingerprint = service.get_stored_fingerprint()
+        
+        self.stdout.write(f'Template schema: {service.schema_name}')
+        self.stdout.write(f'Migration fingerprint: {fingerprint}')
+        self.stdout.write(f'Stored fingerprint: {stored_fingerprint or "-"}')
+        
+        if options['check']:
+            if stored_fingerprint == fingerprint:
+                self.stdout.write(self.style.SUCCESS('Template schema is up to date'))
+            else:
+                self.stdout.write(self.style.WARNING('Template schema is missing or stale'))
+            return
+        
+        result = service.ensure_template(force=options['force'])
+        
+        if result['rebuilt']:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'Template schema rebuilt in {result["duration_seconds"]:.2f}s'
+                )
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS('Template schema already up to date'))
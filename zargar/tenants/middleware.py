@@ -0,0 +1,35 @@
+"""
+Tenant resolution middleware.
+"""
+from django.conf import settings
+from django_tenants.middleware.main import TenantMainMiddleware
+
+from .cache import tenant_resolution_cache, MISSING
+
+
+class CachedTenantMainMiddleware(TenantMainMiddleware):
+    """
+    TenantMainMiddleware that resolves hostnames through the two-level
+    tenant resolution cache instead of querying Domain and Tenant on every
+    request. Unknown hosts and public-schema routing behave exactly as in
+    django-tenants.
+    """
+    
+    def get_tenant(self, domain_model, hostname):
+        if not settings.TENANT_RESOLUTION_CACHE_ENABLED:
+            return super().get_tenant(domain_model, hostname)
+        
+        tenant = tenant_resolution_cache.get(hostname)
+        if tenant is MISSING:
+            raise domain_model.DoesNotExist(f'No domain for hostname "{hostname}"')
+        if tenant is not None:
+            return tenant
+        
+        try:
+            tenant = super().get_tenant(domain_model, hostname)
+        except domain_model.DoesNotExist:
+            tenant_resolution_cache.set_missing(hostname)
+            raise
+        
+        tenant_resolution_cache.set(hostname, tenant)
+        return tenant
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.24 on 2026-10-18 22:18
+
+from django.db import migrations
+
+from zargar.core.partitioning import convert_to_partitioned
+
+
+def partition_access_and_audit_logs(apps, schema_editor):
+    convert_to_partitioned(schema_editor, apps.get_model('tenants', 'TenantAccessLog'), 'timestamp')
+    convert_to_partitioned(schema_editor, apps.get_model('tenants', 'PublicAuditLog'), 'created_at')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0010_publicauditlog_checksum_publicauditlog_new_values_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_access_and_audit_logs, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.db import models
 from django_tenants.models import TenantMixin, DomainMixin
 
@@ -49,6 +50,28 @@ class Tenant(TenantMixin):
     def __str__(self):
         return self.name
 
+    def create_schema(self, check_if_exists=False, sync_schema=True, verbosity=1):
+        """
+        Create the tenant schema, refreshing the template schema first when
+        tenants are provisioned by cloning it and partitioning the cloned
+        log tables again afterwards.
+        """
+        cloned = sync_schema and getattr(settings, 'TENANT_TEMPLATE_PROVISIONING', False)
+        if cloned:
+            from .services import TenantTemplateSchemaService
+            TenantTemplateSchemaService().ensure_template()
+
+        created = super().create_schema(
+            check_if_exists=check_if_exists,
+            sync_schema=sync_schema,
+            verbosity=verbosity
+        )
+
+        if cloned and created is not False:
+            TenantTemplateSchemaService().repartition_clone(self.schema_name)
+
+        return created
+
 
 class Domain(DomainMixin):
     """
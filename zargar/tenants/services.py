@@ -5,10 +5,14 @@ Services for tenant management, provisioning, and statistics collection.
 from django.db import connection, transaction
 from django.core.management import call_command
 from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.utils import timezone
 from django.db.models import Count, Sum, Avg, Q
-from django_tenants.utils import schema_context
+from django.db.models.functions import TruncDate
+from django_tenants.utils import schema_context, schema_exists, app_labels
+import hashlib
 import logging
+import re
 import subprocess
 import os
 from datetime import datetime, timedelta
@@ -26,6 +30,8 @@ class TenantProvisioningService:
     migrations, and initial data setup.
     """
     
+    DEFAULT_GROUP_NAMES = ('مالک فروشگاه', 'حسابدار', 'فروشنده')
+    
     def provision_tenant(self, tenant: Tenant) -> Dict[str, Any]:
         """
         Provision a new tenant with complete setup.
@@ -113,6 +119,14 @@ class TenantProvisioningService:
     
     def _run_tenant_migrations(self, tenant: Tenant) -> Dict[str, Any]:
         """Run database migrations for the tenant schema."""
+        if TenantTemplateSchemaService.is_enabled():
+            # Schema was cloned from the template and its migrations faked on save
+            return {
+                'success': True,
+                'details': f'Schema {tenant.schema_name} cloned from template '
+                           f'{TenantTemplateSchemaService().schema_name}'
+            }
+        
         try:
             with schema_context(tenant.schema_name):
                 # Run migrations for the tenant schema
@@ -133,50 +147,30 @@ class TenantProvisioningService:
     def _setup_initial_data(self, tenant: Tenant) -> Dict[str, Any]:
         """Setup initial data for the tenant."""
         try:
-            with schema_context(tenant.schema_name):
-                # Import here to avoid circular imports
-                from django.contrib.auth import get_user_model
-                from django.contrib.auth.models import Group, Permission
-                
-                User = get_user_model()
-                
-                # Create user groups with Persian names
-                groups_created = []
-                
-                # Owner group
-                owner_group, created = Group.objects.get_or_create(
-                    name='مالک فروشگاه',
-                    defaults={'name': 'مالک فروشگاه'}
-                )
-                if created:
-                    groups_created.append('مالک فروشگاه')
-                
-                # Accountant group
-                accountant_group, created = Group.objects.get_or_create(
-                    name='حسابدار',
-                    defaults={'name': 'حسابدار'}
-                )
-                if created:
-                    groups_created.append('حسابدار')
-                
-                # Salesperson group
-                salesperson_group, created = Group.objects.get_or_create(
-                    name='فروشنده',
-                    defaults={'name': 'فروشنده'}
-                )
-                if created:
-                    groups_created.append('فروشنده')
-                
-                # Setup permissions for groups
-                self._setup_group_permissions(owner_group, accountant_group, salesperson_group)
-                
-                return {
-                    'success': True,
-                    'details': {
-                        'groups_created': groups_created,
-                        'permissions_setup': True
-                    }
+            if TenantTemplateSchemaService.is_enabled():
+                with schema_context(tenant.schema_name):
+                    from django.contrib.auth.models import Group
+                    
+                    # Groups and permissions come with the cloned template data
+                    if Group.objects.filter(name__in=self.DEFAULT_GROUP_NAMES).count() == len(self.DEFAULT_GROUP_NAMES):
+                        return {
+                            'success': True,
+                            'details': {
+                                'groups_created': [],
+                                'permissions_setup': True,
+                                'cloned_from_template': True
+                            }
+                        }
+            
+            groups_created = self.setup_default_groups(tenant.schema_name)
+            
+            return {
+                'success': True,
+                'details': {
+                    'groups_created': groups_created,
+                    'permissions_setup': True
                 }
+            }
                 
         except Exception as e:
             logger.error(f"Error setting up initial data for {tenant.schema_name}: {e}")
@@ -185,6 +179,40 @@ class TenantProvisioningService:
                 'error': str(e)
             }
     
+    def setup_default_groups(self, schema_name: str) -> List[str]:
+        """
+        Create the default Persian user groups with their permissions in a schema.
+        
+        Returns:
+            Names of the groups that did not exist yet
+        """
+        with schema_context(schema_name):
+            # Import here to avoid circular imports
+            from django.contrib.auth.models import Group
+            
+            owner_name, accountant_name, salesperson_name = self.DEFAULT_GROUP_NAMES
+            groups_created = []
+            
+            # Owner group
+            owner_group, created = Group.objects.get_or_create(name=owner_name)
+            if created:
+                groups_created.append(owner_name)
+            
+            # Accountant group
+            accountant_group, created = Group.objects.get_or_create(name=accountant_name)
+            if created:
+                groups_created.append(accountant_name)
+            
+            # Salesperson group
+            salesperson_group, created = Group.objects.get_or_create(name=salesperson_name)
+            if created:
+                groups_created.append(salesperson_name)
+            
+            # Setup permissions for groups
+            self._setup_group_permissions(owner_group, accountant_group, salesperson_group)
+            
+            return groups_created
+    
     def _setup_group_permissions(self, owner_group, accountant_group, salesperson_group):
         """Setup permissions for user groups."""
         from django.contrib.auth.models import Permission
@@ -316,6 +344,194 @@ class TenantProvisioningService:
             }
 
 
+class TenantTemplateSchemaService:
+    """
+    Service maintaining the pre-migrated "golden" schema that new tenants are
+    cloned from when TENANT_TEMPLATE_PROVISIONING is enabled.
+    
+    django-tenants clones the template (DDL and seed data, including the
+    django_migrations rows) with a single clone_schema() call and then fakes
+    the tenant migrations. The template is stamped with a fingerprint of the
+    tenant app migrations and rebuilt whenever that fingerprint changes.
+    """
+    
+    FINGERPRINT_PREFIX = 'zargar-template:'
+    LOCK_NAME = 'zargar_tenant_template'
+    
+    # Bump when the seed data written by rebuild_template() changes
+    SEED_VERSION = 1
+    
+    _fingerprint_cache: Optional[str] = None
+    
+    def __init__(self, schema_name: Optional[str] = None):
+        self.schema_name = schema_name or settings.TENANT_TEMPLATE_SCHEMA
+        
+        # The name is interpolated into DDL, so only plain identifiers are allowed
+        if not re.match(r'^[a-z_][a-z0-9_]{0,62}$', self.schema_name):
+            raise ValidationError(f"Invalid template schema name: {self.schema_name}")
+    
+    @staticmethod
+    def is_enabled() -> bool:
+        """Check whether tenants are provisioned from the template schema."""
+        return getattr(settings, 'TENANT_TEMPLATE_PROVISIONING', False)
+    
+    @classmethod
+    def get_migration_fingerprint(cls) -> str:
+        """
+        Hash of every migration file on disk for the tenant apps plus the seed version.
+        
+        File contents are hashed, not just migration names, so editing a
+        migration in place also makes the template stale. Migrations cannot
+        change while a process is running, so the value is computed once per
+        process.
+        """
+        if cls._fingerprint_cache is None:
+            import sys
+            from django.db.migrations.loader import MigrationLoader
+            
+            tenant_labels = set(app_labels(settings.TENANT_APPS))
+            loader = MigrationLoader(None, ignore_no_migrations=True)
+            
+            digest = hashlib.sha256(f'{cls.SEED_VERSION}'.encode('utf-8'))
+            for key in sorted(key for key in loader.disk_migrations if key[0] in tenant_labels):
+                module_file = sys.modules[loader.disk_migrations[key].__module__].__file__
+                digest.update(f':{key[0]}.{key[1]}:'.encode('utf-8'))
+                with open(module_file, 'rb') as migration_file:
+                    digest.update(migration_file.read())
+            
+            cls._fingerprint_cache = digest.hexdigest()[:32]
+        
+        return cls._fingerprint_cache
+    
+    def get_stored_fingerprint(self) -> Optional[str]:
+        """Read the fingerprint stamped on the template schema, if any."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT obj_description(oid, 'pg_namespace') FROM pg_namespace WHERE nspname = %s",
+                [self.schema_name]
+            )
+            row = cursor.fetchone()
+        
+        if not row or not row[0] or not row[0].startswith(self.FINGERPRINT_PREFIX):
+            return None
+        
+        return row[0][len(self.FINGERPRINT_PREFIX):]
+    
+    def is_current(self) -> bool:
+        """Check whether the template schema exists and matches the migrations on disk."""
+        return self.get_stored_fingerprint() == self.get_migration_fingerprint()
+    
+    def ensure_template(self, force: bool = False) -> Dict[str, Any]:
+        """
+        Rebuild the template schema if it is missing or its migrations are stale.
+        
+        A Postgres advisory lock serialises concurrent signups so the template
+        is only rebuilt once; a forced rebuild takes the same lock so it never
+        runs alongside a signup's rebuild.
+        
+        Args:
+            force: Rebuild even if the template matches the current migrations
+        """
+        connection.set_schema_to_public()
+        
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_lock(hashtext(%s))", [self.LOCK_NAME])
+        
+        try:
+            fingerprint = self.get_migration_fingerprint()
+            if not force and self.get_stored_fingerprint() == fingerprint:
+                return {
+                    'success': True,
+                    'rebuilt': False,
+                    'fingerprint': fingerprint
+                }
+            
+            return self.rebuild_template()
+            
+        finally:
+            connection.set_schema_to_public()
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(hashtext(%s))", [self.LOCK_NAME])
+    
+    def rebuild_template(self) -> Dict[str, Any]:
+        """Drop and recreate the template schema, migrate it to head and seed it."""
+        from django_tenants.clone import CloneSchema
+        
+        fingerprint = self.get_migration_fingerprint()
+        started_at = timezone.now()
+        
+        logger.info(f"Rebuilding tenant template schema {self.schema_name} ({fingerprint})")
+        
+        connection.set_schema_to_public()
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP SCHEMA IF EXISTS "{self.schema_name}" CASCADE')
+            cursor.execute(f'CREATE SCHEMA "{self.schema_name}"')
+            
+            # Install clone_schema() up front; django-tenants would otherwise
+            # commit mid-transaction when it creates the function lazily
+            cursor.execute(
+                "SELECT 1 FROM pg_proc WHERE proname = 'clone_schema' "
+                "AND pronamespace = 'public'::regnamespace"
+            )
+            if not cursor.fetchone():
+                CloneSchema()._create_clone_schema_function()
+        
+        call_command(
+            'migrate_schemas',
+            tenant=True,
+            schema_name=self.schema_name,
+            interactive=False,
+            verbosity=0
+        )
+        
+        TenantProvisioningService().setup_default_groups(self.schema_name)
+        
+        connection.set_schema_to_public()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'COMMENT ON SCHEMA "{self.schema_name}" IS %s',
+                [f'{self.FINGERPRINT_PREFIX}{fingerprint}']
+            )
+        
+        duration = (timezone.now() - started_at).total_seconds()
+        logger.info(f"Tenant template schema {self.schema_name} rebuilt in {duration:.2f}s")
+        
+        return {
+            'success': True,
+            'rebuilt': True,
+            'fingerprint': fingerprint,
+            'duration_seconds': duration
+        }
+    
+    @staticmethod
+    def repartition_clone(schema_name: str) -> List[str]:
+        """
+        Partition the log tables of a schema cloned from the template again.
+        
+        clone_schema() copies partitioned tables as plain tables, which would
+        leave retention deleting rows instead of dropping partitions.
+        """
+        from zargar.core.partitioning import TENANT_PARTITIONED_TABLES, repartition_clone
+        
+        with schema_context(schema_name):
+            converted = repartition_clone(TENANT_PARTITIONED_TABLES)
+        
+        if converted:
+            logger.info(f"Repartitioned {len(converted)} cloned log tables in {schema_name}")
+        return converted
+    
+    def drop_template(self) -> bool:
+        """Drop the template schema. Returns True if it existed."""
+        if not schema_exists(self.schema_name):
+            return False
+        
+        connection.set_schema_to_public()
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP SCHEMA "{self.schema_name}" CASCADE')
+        
+        return True
+
+
 class TenantStatisticsService:
     """
     Service for collecting and calculating tenant usage metrics and statistics.
@@ -421,13 +637,16 @@ class TenantStatisticsService:
                 timestamp__gte=thirty_days_ago
             )
             
-            # Activity by day
+            # Activity by day, in one grouped query over the recent partitions
+            counts_by_day = dict(
+                recent_logs.annotate(day=TruncDate('timestamp')).values('day').annotate(
+                    count=Count('id')
+                ).order_by().values_list('day', 'count')
+            )
             daily_activity = {}
             for i in range(30):
                 date = (timezone.now() - timedelta(days=i)).date()
-                daily_activity[date.isoformat()] = recent_logs.filter(
-                    timestamp__date=date
-                ).count()
+                daily_activity[date.isoformat()] = counts_by_day.get(date, 0)
             
             # Activity by action
             action_stats = recent_logs.values('action').annotate(
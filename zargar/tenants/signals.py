@@ -0,0 +1,24 @@
+"""
+Signals for tenant management.
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Tenant, Domain
+from .cache import tenant_resolution_cache
+
+
+@receiver(post_save, sender=Tenant)
+@receiver(post_delete, sender=Tenant)
+@receiver(post_save, sender=Domain)
+@receiver(post_delete, sender=Domain)
+def invalidate_tenant_resolution(sender, instance, **kwargs):
+    """
+    Invalidate cached hostname -> tenant resolutions when a tenant or one of
+    its domains changes (including suspension via is_active).
+    
+    The generation is bumped once the change commits; bumped earlier, a
+    concurrent request could cache the old row under the new generation.
+    """
+    transaction.on_commit(tenant_resolution_cache.invalidate)
@@ -0,0 +1,48 @@
+"""
+Celery tasks for tenant billing.
+"""
+from celery import shared_task
+import logging
+
+from .billing_services import BillingWorkflow
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, max_retries=3)
+def generate_monthly_invoices(self, admin_user_id=None):
+    """
+    Generate monthly invoices for every tenant whose billing cycle is due.
+    Each tenant is invoiced in its own subtask.
+    """
+    try:
+        return BillingWorkflow.generate_monthly_invoices_batch(admin_user_id=admin_user_id)
+        
+    except Exception as exc:
+        logger.error(f"Monthly invoice generation failed: {exc}")
+        raise self.retry(exc=exc, countdown=60 * 10)  # Retry in 10 minutes
+
+
+def generate_tenant_monthly_invoice(tenant, admin_user_id=None):
+    """Generate the due monthly invoice for one tenant."""
+    from .admin_models import SuperAdmin
+    
+    admin_user = None
+    if admin_user_id:
+        admin_user = SuperAdmin.objects.filter(id=admin_user_id).first()
+    
+    # Re-check inside the subtask so a retried or duplicated run does not bill twice
+    billing_cycle = BillingWorkflow.get_due_monthly_billing_cycles().filter(tenant=tenant).first()
+    if not billing_cycle:
+        return {
+            'invoices_generated': 0
+        }
+    
+    invoice = BillingWorkflow.generate_monthly_invoice_for_cycle(billing_cycle, admin_user)
+    
+    logger.info(f"Generated monthly invoice {invoice.invoice_number} for tenant {tenant.name}")
+    
+    return {
+        'invoices_generated': 1,
+        'invoiced_amount_toman': float(invoice.total_amount_toman)
+    }
@@ -24,6 +24,7 @@ from datetime import datetime, timedelta
 from .models import Tenant, Domain
 from .admin_models import SuperAdmin, TenantAccessLog
 from .services import TenantProvisioningService, TenantStatisticsService
+from .cache import tenant_resolution_cache
 from .forms import TenantCreateForm, TenantUpdateForm, TenantSearchForm
 from zargar.core.mixins import SuperAdminRequiredMixin, PaginationMixin, SearchMixin, FilterMixin
 
@@ -576,10 +577,13 @@ class TenantBulkActionView(SuperAdminRequiredMixin, View):
             
             if action == 'activate':
                 updated_count = tenants.update(is_active=True)
+                # queryset.update() bypasses the post_save invalidation
+                tenant_resolution_cache.invalidate()
                 message = f'{updated_count} تنانت فعال شد.'
                 
             elif action == 'deactivate':
                 updated_count = tenants.update(is_active=False)
+                tenant_resolution_cache.invalidate()
                 message = f'{updated_count} تنانت غیرفعال شد.'
                 
             elif action == 'delete':